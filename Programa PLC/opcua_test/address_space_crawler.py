@@ -0,0 +1,247 @@
+"""
+================================================================================
+    CRAWLER DEL ADDRESS SPACE OPC UA - BÚSQUEDA EN ANCHURA CONCURRENTE
+
+    Reemplaza los recorridos recursivos (get_children() + read_browse_name()
+    por cada hijo) de list_all_tags.py, search_everything.py y find_heartbeat.py.
+
+    - Recorrido en anchura (BFS) nivel por nivel
+    - Una petición Browse para muchos nodos a la vez, con BrowseNext para
+      los continuation points
+    - BrowseName, NodeClass y NodeId llegan en el mismo ReferenceDescription;
+      DataType y AccessLevel de las variables se leen en lote (un Read por nivel)
+    - Concurrencia limitada con asyncio.Semaphore
+    - Resultado: tabla de nodos (lista de dicts) que otros scripts filtran
+    - Hook expand(path, n_referencias): permite no descender a subárboles
+      ya conocidos (refresco incremental de address_space_index.py)
+
+    Uso:
+        crawler = AddressSpaceCrawler(client, concurrency=8, max_depth=15)
+        table = await crawler.crawl(client.get_node("ns=9;s=CPS001"), "CPS001")
+        egcom = find_nodes(table, "egcom")
+================================================================================
+"""
+
+import asyncio
+import fnmatch
+import logging
+
+from asyncua import ua
+
+from batch_io import BatchIO, chunks, release_continuation_points, to_nodeid
+
+logger = logging.getLogger("AddressSpaceCrawler")
+
+# ============================================================================
+# CONFIGURACIÓN POR DEFECTO
+# ============================================================================
+
+BROWSE_CONCURRENCY = 8          # Peticiones Browse/Read simultáneas
+BROWSE_BATCH_SIZE = 50          # Nodos por petición Browse
+MAX_REFERENCES_PER_NODE = 1000  # Referencias por nodo antes de usar BrowseNext
+MAX_DEPTH = 15
+
+
+def data_type_name(data_type: ua.NodeId) -> str:
+    """Nombre legible del DataType (tipos estándar de ns=0 por nombre)."""
+
+    if data_type.NamespaceIndex == 0 and isinstance(data_type.Identifier, int):
+        return ua.ObjectIdNames.get(data_type.Identifier, data_type.to_string())
+    return data_type.to_string()
+
+
+def find_nodes(table: list, text: str, field: str = "name") -> list:
+    """Filtra la tabla por texto (sin distinguir mayúsculas) en path o name."""
+
+    text = text.lower()
+    return [row for row in table if text in row[field].lower()]
+
+
+def match_nodes(table: list, pattern: str, field: str = "path") -> list:
+    """Filtra la tabla por glob, p. ej. "*/GlobalVars/EgCom*"."""
+
+    return [row for row in table if fnmatch.fnmatchcase(row[field], pattern)]
+
+
+class AddressSpaceCrawler:
+    """Recorre el address space en anchura con concurrencia limitada."""
+
+    def __init__(self, client, concurrency=BROWSE_CONCURRENCY, max_depth=MAX_DEPTH,
+                 batch_size=BROWSE_BATCH_SIZE, read_data_types=True,
+                 max_references_per_node=MAX_REFERENCES_PER_NODE):
+        self.client = client
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        self.batch_size = batch_size
+        self.read_data_types = read_data_types
+        self.max_references_per_node = max_references_per_node
+
+        self._semaphore = None
+        self._batch = None
+        self._expand = None
+
+        # Estadísticas del último recorrido
+        self.stats = {}
+
+        # Path -> número de referencias jerárquicas de cada nodo recorrido,
+        # y paths cuyos hijos se agregaron a la tabla (expand() verdadero)
+        self.child_counts = {}
+        self.expanded = set()
+
+    async def crawl(self, start=None, start_path: str = "", expand=None) -> list:
+        """
+        Recorre desde start (Node, NodeId o string; Objects por defecto).
+
+        expand(path, n_referencias) se llama tras hacer Browse de cada nodo;
+        si retorna False sus hijos no se agregan ni se recorren.
+
+        Retorna una lista de dicts con: path, name, nodeid, ns, node_class,
+        data_type, access_level, depth, parent. El nodo inicial no se incluye.
+        """
+
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._expand = expand
+        self.stats = {"browse": 0, "browse_next": 0, "read": 0, "errors": 0}
+        self.child_counts = {}
+        self.expanded = set()
+
+        self._batch = BatchIO(self.client)
+        limits = await self._batch.load_limits()
+        if limits["MaxNodesPerBrowse"]:
+            self.batch_size = min(self.batch_size, limits["MaxNodesPerBrowse"])
+
+        start_id = to_nodeid(start) if start is not None else ua.NodeId(ua.ObjectIds.ObjectsFolder)
+        visited = {start_id}
+        frontier = [(start_id, start_path)]
+        table = []
+        depth = 0
+
+        while frontier and depth < self.max_depth:
+            depth += 1
+            level = await self._browse_level(frontier, depth, visited)
+            table.extend(level)
+
+            if self.read_data_types:
+                await self._read_variable_attributes(level)
+
+            frontier = [(row["_nodeid"], row["path"]) for row in level]
+
+        for row in table:
+            del row["_nodeid"]
+
+        self.stats["nodes"] = len(table)
+        return table
+
+    async def _browse_level(self, frontier: list, depth: int, visited: set) -> list:
+        """Browse de todos los nodos de un nivel, en lotes concurrentes."""
+
+        batches = list(chunks(frontier, self.batch_size))
+        results = await asyncio.gather(*(self._browse_batch(batch) for batch in batches))
+
+        level = []
+        for batch, browse_results in zip(batches, results):
+            for (parent_id, parent_path), references in zip(batch, browse_results):
+                self.child_counts[parent_path] = len(references)
+                if self._expand is not None and not self._expand(parent_path, len(references)):
+                    continue
+                self.expanded.add(parent_path)
+
+                for ref in references:
+                    node_id = ref.NodeId
+                    if node_id in visited:
+                        continue
+                    visited.add(node_id)
+
+                    name = ref.BrowseName.Name
+                    level.append({
+                        "path": f"{parent_path}/{name}" if parent_path else name,
+                        "name": name,
+                        "nodeid": node_id.to_string(),
+                        "ns": node_id.NamespaceIndex,
+                        "node_class": ref.NodeClass.name,
+                        "data_type": None,
+                        "access_level": None,
+                        "depth": depth,
+                        "parent": parent_id.to_string(),
+                        "_nodeid": node_id,
+                    })
+        return level
+
+    async def _browse_batch(self, batch: list) -> list:
+        """Una petición Browse para el lote + BrowseNext hasta agotar referencias."""
+
+        params = ua.BrowseParameters()
+        params.RequestedMaxReferencesPerNode = self.max_references_per_node
+        for node_id, _ in batch:
+            desc = ua.BrowseDescription()
+            desc.NodeId = node_id
+            desc.BrowseDirection = ua.BrowseDirection.Forward
+            desc.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+            desc.IncludeSubtypes = True
+            desc.NodeClassMask = 0
+            desc.ResultMask = ua.BrowseResultMask.All
+            params.NodesToBrowse.append(desc)
+
+        async with self._semaphore:
+            self.stats["browse"] += 1
+            results = await self.client.uaclient.browse(params)
+
+        # Punto de continuación pendiente de cada resultado: los que queden
+        # al salir (error o excepción) se liberan para no agotar los del servidor
+        pending = [result.ContinuationPoint if result.StatusCode.is_good() else None
+                   for result in results]
+        references = []
+        try:
+            for i, result in enumerate(results):
+                if not result.StatusCode.is_good():
+                    self.stats["errors"] += 1
+                    references.append([])
+                    continue
+                refs = list(result.References)
+                while pending[i]:
+                    next_params = ua.BrowseNextParameters()
+                    next_params.ReleaseContinuationPoints = False
+                    next_params.ContinuationPoints = [pending[i]]
+                    async with self._semaphore:
+                        self.stats["browse_next"] += 1
+                        next_result = (await self.client.uaclient.browse_next(next_params))[0]
+                    if not next_result.StatusCode.is_good():
+                        self.stats["errors"] += 1
+                        break
+                    refs.extend(next_result.References)
+                    pending[i] = next_result.ContinuationPoint
+                references.append(refs)
+        finally:
+            if any(pending):
+                async with self._semaphore:
+                    self.stats["browse_next"] += 1
+                    await release_continuation_points(self.client, pending)
+        return references
+
+    async def _read_variable_attributes(self, level: list):
+        """Lee DataType y AccessLevel de las variables del nivel en lote."""
+
+        variables = [row for row in level if row["node_class"] == "Variable"]
+        if not variables:
+            return
+
+        # Dos ReadValueId por variable, en la misma petición Read
+        batches = list(chunks(variables, max(1, self._batch.max_nodes_per_read // 2)))
+
+        async def read_batch(rows):
+            items = []
+            for row in rows:
+                items.append((row["_nodeid"], ua.AttributeIds.DataType))
+                items.append((row["_nodeid"], ua.AttributeIds.AccessLevel))
+            async with self._semaphore:
+                self.stats["read"] += 1
+                return await self._batch.read_attributes(items)
+
+        results = await asyncio.gather(*(read_batch(rows) for rows in batches))
+        for rows, data_values in zip(batches, results):
+            for i, row in enumerate(rows):
+                data_type, access_level = data_values[2 * i], data_values[2 * i + 1]
+                if data_type.StatusCode.is_good() and data_type.Value.Value is not None:
+                    row["data_type"] = data_type_name(data_type.Value.Value)
+                if access_level.StatusCode.is_good() and access_level.Value.Value is not None:
+                    row["access_level"] = int(access_level.Value.Value)
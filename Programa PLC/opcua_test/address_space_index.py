@@ -0,0 +1,462 @@
+"""
+================================================================================
+    ÍNDICE PERSISTENTE DEL ADDRESS SPACE (SQLite)
+
+    Guarda en disco la tabla que produce address_space_crawler.py para que los
+    scripts de búsqueda (find_tags.py, find_variables.py, find_egcom_tags.py,
+    find_model_vars.py, search_tags.py) respondan en milisegundos sin
+    recorrer el servidor en cada ejecución.
+
+    - Clave: endpoint + namespace URI (no el índice ns, que puede cambiar
+      entre arranques del servidor); el NodeId se reconstruye con la
+      tabla de namespaces actual
+    - Por nodo: path, BrowseName, NodeClass, DataType, AccessLevel
+    - Búsqueda por subcadena, glob o expresión regular sobre name o path
+    - Refresco incremental: sólo se desciende a los nodos cuyo número de
+      referencias jerárquicas cambió desde el último recorrido
+    - ModelChangeEvents (GeneralModelChangeEventType): refresh() se suscribe
+      la primera vez; los nodos afectados se marcan como sucios (en la base,
+      sobreviven a la ejecución) y se vuelven a recorrer en el siguiente
+      refresco
+    - La red sólo se usa si la búsqueda no encuentra nada (find()): primero
+      refresco incremental y, si sigue sin aparecer, recorrido completo
+
+    Uso:
+        index = AddressSpaceIndex("opc.tcp://192.168.101.100:59100")
+        rows = await index.find(client, ["EgComIn_Heartbeat"])
+        rows = index.search(glob="*GlobalVars/EgCom*", field="path")
+================================================================================
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+
+from asyncua import ua
+
+from address_space_crawler import AddressSpaceCrawler, MAX_DEPTH
+from batch_io import BatchIO, to_nodeid
+from nodeid_resolver import split_nodeid
+from tag_subscription import PUBLISHING_INTERVAL_MS
+
+logger = logging.getLogger("AddressSpaceIndex")
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "cache", "address_space_index.db")
+ROOT_PATH = "Objects"
+
+# Path sucio especial: el próximo refresco recorre todo el árbol
+FULL_REFRESH = "*"
+
+SEARCH_FIELDS = ("name", "path")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS servers (
+    id              INTEGER PRIMARY KEY,
+    endpoint        TEXT UNIQUE NOT NULL,
+    namespace_uris  TEXT NOT NULL DEFAULT '[]',
+    refreshed_at    REAL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    server_id       INTEGER NOT NULL,
+    path            TEXT NOT NULL,
+    name            TEXT NOT NULL,
+    parent_path     TEXT NOT NULL,
+    ns_uri          TEXT NOT NULL,
+    identifier      TEXT NOT NULL,
+    node_class      TEXT,
+    data_type       TEXT,
+    access_level    INTEGER,
+    depth           INTEGER,
+    PRIMARY KEY (server_id, path)
+);
+CREATE INDEX IF NOT EXISTS nodes_name ON nodes (server_id, name);
+CREATE INDEX IF NOT EXISTS nodes_parent ON nodes (server_id, parent_path);
+CREATE INDEX IF NOT EXISTS nodes_nodeid ON nodes (server_id, ns_uri, identifier);
+CREATE TABLE IF NOT EXISTS children (
+    server_id       INTEGER NOT NULL,
+    path            TEXT NOT NULL,
+    child_count     INTEGER NOT NULL,
+    PRIMARY KEY (server_id, path)
+);
+CREATE TABLE IF NOT EXISTS dirty (
+    server_id       INTEGER NOT NULL,
+    path            TEXT NOT NULL,
+    PRIMARY KEY (server_id, path)
+);
+"""
+
+
+def _regexp(pattern, value, _cache={}):
+    """Función REGEXP para SQLite (sin distinguir mayúsculas)."""
+
+    if value is None:
+        return False
+    compiled = _cache.get(pattern)
+    if compiled is None:
+        compiled = _cache[pattern] = re.compile(pattern, re.IGNORECASE)
+    return compiled.search(value) is not None
+
+
+class AddressSpaceIndex:
+    """Índice SQLite del address space de un endpoint."""
+
+    def __init__(self, endpoint: str, path: str = INDEX_PATH):
+        self.endpoint = endpoint
+        self.path = path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.create_function("REGEXP", 2, _regexp, deterministic=True)
+        self.db.executescript(SCHEMA)
+
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO servers (endpoint) VALUES (?)", (endpoint,))
+        row = self.db.execute(
+            "SELECT id, namespace_uris, refreshed_at FROM servers WHERE endpoint = ?", (endpoint,)
+        ).fetchone()
+        self.server_id = row["id"]
+        self.namespace_uris = json.loads(row["namespace_uris"])
+        self.refreshed_at = row["refreshed_at"]
+
+        # Estadísticas del último refresco
+        self.stats = {}
+        self._subscription = None
+        self._watch_attempted = False
+
+    def close(self):
+        self.db.close()
+
+    # ------------------------------------------------------------------------
+    # CONSULTAS (sin red)
+    # ------------------------------------------------------------------------
+
+    @property
+    def node_count(self) -> int:
+        return self.db.execute(
+            "SELECT COUNT(*) FROM nodes WHERE server_id = ?", (self.server_id,)
+        ).fetchone()[0]
+
+    def nodeid_for(self, ns_uri: str, identifier: str):
+        """NodeId como string con el índice ns actual (None si el URI no existe)."""
+
+        if ns_uri not in self.namespace_uris:
+            return None
+        ns = self.namespace_uris.index(ns_uri)
+        return f"ns={ns};{identifier}" if ns else identifier
+
+    def _to_dict(self, row) -> dict:
+        nodeid = self.nodeid_for(row["ns_uri"], row["identifier"])
+        return {
+            "path": row["path"],
+            "name": row["name"],
+            "nodeid": nodeid,
+            "ns": self.namespace_uris.index(row["ns_uri"]) if nodeid else None,
+            "ns_uri": row["ns_uri"],
+            "node_class": row["node_class"],
+            "data_type": row["data_type"],
+            "access_level": row["access_level"],
+            "depth": row["depth"],
+            "parent_path": row["parent_path"],
+        }
+
+    def search(self, text: str = None, glob: str = None, regex: str = None,
+               field: str = "name", node_class: str = None, limit: int = None) -> list:
+        """
+        Busca en el índice local.
+
+        - text:  subcadena sin distinguir mayúsculas
+        - glob:  patrón estilo shell, distingue mayúsculas ("*/GlobalVars/EgCom*")
+        - regex: expresión regular, sin distinguir mayúsculas
+        field es "name" o "path"; node_class filtra por "Variable", "Object", ...
+        """
+
+        if field not in SEARCH_FIELDS:
+            raise ValueError(f"Campo de búsqueda no válido: {field}")
+
+        sql = "SELECT * FROM nodes WHERE server_id = ?"
+        params = [self.server_id]
+        if text is not None:
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            sql += f" AND {field} LIKE ? ESCAPE '\\'"
+            params.append(f"%{escaped}%")
+        if glob is not None:
+            sql += f" AND {field} GLOB ?"
+            params.append(glob)
+        if regex is not None:
+            sql += f" AND {field} REGEXP ?"
+            params.append(regex)
+        if node_class is not None:
+            sql += " AND node_class = ?"
+            params.append(node_class)
+        sql += " ORDER BY path"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [self._to_dict(row) for row in self.db.execute(sql, params)]
+
+    def children(self, path: str) -> list:
+        """Hijos directos de un path del índice."""
+
+        rows = self.db.execute(
+            "SELECT * FROM nodes WHERE server_id = ? AND parent_path = ? ORDER BY path",
+            (self.server_id, path),
+        )
+        return [self._to_dict(row) for row in rows]
+
+    def path_for_nodeid(self, nodeid) -> str:
+        """Path indexado de un NodeId (None si no está en el índice)."""
+
+        ns, identifier = split_nodeid(to_nodeid(nodeid).to_string())
+        if ns >= len(self.namespace_uris):
+            return None
+        row = self.db.execute(
+            "SELECT path FROM nodes WHERE server_id = ? AND ns_uri = ? AND identifier = ? LIMIT 1",
+            (self.server_id, self.namespace_uris[ns], identifier),
+        ).fetchone()
+        return row["path"] if row else None
+
+    # ------------------------------------------------------------------------
+    # INVALIDACIÓN
+    # ------------------------------------------------------------------------
+
+    def mark_dirty(self, path: str):
+        """El nodo se vuelve a recorrer en el próximo refresco (FULL_REFRESH = todo)."""
+
+        with self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO dirty (server_id, path) VALUES (?, ?)",
+                (self.server_id, path),
+            )
+
+    def dirty_paths(self) -> set:
+        rows = self.db.execute("SELECT path FROM dirty WHERE server_id = ?", (self.server_id,))
+        return {row["path"] for row in rows}
+
+    def event_notification(self, event):
+        """Handler de ModelChangeEvents: marca como sucios los nodos afectados."""
+
+        changes = getattr(event, "Changes", None)
+        if not changes:
+            # BaseModelChangeEventType no dice qué cambió
+            self.mark_dirty(FULL_REFRESH)
+            return
+
+        for change in changes:
+            path = self.path_for_nodeid(change.Affected)
+            if path is None:
+                # Nodo nuevo (aún no indexado): no se sabe bajo qué padre
+                self.mark_dirty(FULL_REFRESH)
+                return
+            self.mark_dirty(path)
+            logger.info(f"ModelChange {change.Verb}: {path}")
+
+    def status_change_notification(self, status):
+        logger.warning(f"Suscripción ModelChange: {status}")
+
+    async def watch_model_changes(self, client) -> bool:
+        """
+        Se suscribe a GeneralModelChangeEventType en el nodo Server.
+
+        Retorna False si el servidor no lo soporta (el índice sigue
+        funcionando, sólo con el refresco por número de referencias).
+        """
+
+        try:
+            self._subscription = await client.create_subscription(PUBLISHING_INTERVAL_MS, self)
+            event_type = client.get_node(ua.NodeId(ua.ObjectIds.GeneralModelChangeEventType))
+            await self._subscription.subscribe_events(client.nodes.server, event_type)
+            return True
+        except Exception as e:
+            logger.warning(f"ModelChangeEvents no disponibles: {e}")
+            if self._subscription is not None:
+                try:
+                    await self._subscription.delete()
+                except Exception:
+                    pass
+                self._subscription = None
+            return False
+
+    @property
+    def watching(self) -> bool:
+        return self._subscription is not None
+
+    async def stop_watching(self):
+        if self._subscription is not None:
+            await self._subscription.delete()
+            self._subscription = None
+
+    # ------------------------------------------------------------------------
+    # REFRESCO (red)
+    # ------------------------------------------------------------------------
+
+    async def refresh(self, client, start=None, start_path: str = ROOT_PATH,
+                      force: bool = False, max_depth: int = MAX_DEPTH, watch: bool = True) -> dict:
+        """
+        Recorre el servidor y actualiza el índice.
+
+        Sin force sólo se expanden los nodos nuevos, los que cambiaron de
+        número de referencias, los marcados como sucios y sus ancestros.
+        Con watch, el primer refresco se suscribe a ModelChangeEvents antes
+        de recorrer (un cambio durante el recorrido queda marcado para el
+        siguiente). Retorna estadísticas del recorrido.
+        """
+
+        if watch and not self._watch_attempted:
+            self._watch_attempted = True
+            await self.watch_model_changes(client)
+
+        namespace_uris = await client.get_namespace_array()
+        if namespace_uris != self.namespace_uris and self.namespace_uris:
+            logger.info("Tabla de namespaces cambió: refresco completo")
+            force = True
+
+        dirty = self.dirty_paths()
+        if FULL_REFRESH in dirty:
+            force = True
+
+        known = dict(self.db.execute(
+            "SELECT path, child_count FROM children WHERE server_id = ?", (self.server_id,)
+        ).fetchall())
+
+        def expand(path, count):
+            if force or known.get(path) != count:
+                return True
+            prefix = path + "/"
+            return any(d == path or d.startswith(prefix) for d in dirty)
+
+        crawler = AddressSpaceCrawler(client, max_depth=max_depth)
+        start_time = time.perf_counter()
+        table = await crawler.crawl(start, start_path, expand=expand)
+
+        with self.db:
+            self._apply(table, crawler, namespace_uris, start_path, dirty)
+
+        self.namespace_uris = namespace_uris
+        self.stats = dict(crawler.stats)
+        self.stats["expanded"] = len(crawler.expanded)
+        self.stats["skipped"] = len(crawler.child_counts) - len(crawler.expanded)
+        self.stats["ms"] = (time.perf_counter() - start_time) * 1000
+        logger.info(f"Índice {self.endpoint}: {self.stats}")
+        return self.stats
+
+    def _apply(self, table: list, crawler, namespace_uris: list, start_path: str, dirty: set):
+        """
+        Escribe el resultado del recorrido (dentro de una transacción).
+        dirty: marcas leídas antes de recorrer; las que llegaron durante el
+        recorrido quedan para el próximo refresco.
+        """
+
+        sid = self.server_id
+        new_children = {}
+        for row in table:
+            new_children.setdefault(row["path"].rsplit("/", 1)[0], set()).add(row["path"])
+
+        # Hijos que desaparecieron de un padre re-expandido: borrar su subárbol
+        for parent in crawler.expanded:
+            existing = {r[0] for r in self.db.execute(
+                "SELECT path FROM nodes WHERE server_id = ? AND parent_path = ?", (sid, parent)
+            )}
+            for removed in existing - new_children.get(parent, set()):
+                self._delete_subtree(removed)
+
+        self.db.executemany(
+            "INSERT OR REPLACE INTO nodes (server_id, path, name, parent_path, ns_uri, identifier,"
+            " node_class, data_type, access_level, depth) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (sid, row["path"], row["name"], row["path"].rsplit("/", 1)[0],
+                 namespace_uris[row["ns"]], split_nodeid(row["nodeid"])[1],
+                 row["node_class"], row["data_type"], row["access_level"], row["depth"])
+                for row in table
+            ],
+        )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO children (server_id, path, child_count) VALUES (?, ?, ?)",
+            [(sid, path, count) for path, count in crawler.child_counts.items()],
+        )
+
+        # Marcas sucias atendidas por este recorrido
+        prefix = start_path + "/"
+        self.db.executemany(
+            "DELETE FROM dirty WHERE server_id = ? AND path = ?",
+            [(sid, path) for path in dirty
+             if path in (FULL_REFRESH, start_path) or path.startswith(prefix)],
+        )
+        self.db.execute(
+            "UPDATE servers SET namespace_uris = ?, refreshed_at = ? WHERE id = ?",
+            (json.dumps(namespace_uris), time.time(), sid),
+        )
+
+    def _delete_subtree(self, path: str):
+        prefix = path + "/"
+        for table in ("nodes", "children"):
+            self.db.execute(
+                f"DELETE FROM {table} WHERE server_id = ? AND (path = ? OR substr(path, 1, ?) = ?)",
+                (self.server_id, path, len(prefix), prefix),
+            )
+
+    # ------------------------------------------------------------------------
+    # BÚSQUEDA CON RESPALDO EN RED
+    # ------------------------------------------------------------------------
+
+    async def find(self, client, terms: list, field: str = "name", node_class: str = None) -> list:
+        """
+        Busca cada término (subcadena) en el índice; si alguno no aparece,
+        refresca el índice (incremental) y repite la búsqueda. Si aún falta,
+        un cambio profundo sin ModelChangeEvent pudo escapar al refresco
+        incremental: se hace un recorrido completo.
+
+        Retorna las filas encontradas, sin duplicados, ordenadas por path.
+        """
+
+        def lookup():
+            found = {}
+            missing = []
+            for term in terms:
+                rows = self.search(text=term, field=field, node_class=node_class)
+                if not rows:
+                    missing.append(term)
+                for row in rows:
+                    found[row["path"]] = row
+            return found, missing
+
+        found, missing = lookup()
+        for force in (False, True):
+            if not missing:
+                break
+            logger.info(f"Sin coincidencias en el índice para {missing}: refrescando")
+            await self.refresh(client, force=force)
+            found, missing = lookup()
+
+        return [found[path] for path in sorted(found)]
+
+    async def read_values(self, client, rows: list) -> list:
+        """
+        Lee en lote el Value de las variables de rows y agrega "value",
+        "readable" y "error" a cada fila. Los NodeId que ya no existen
+        marcan a su padre como sucio.
+        """
+
+        variables = [row for row in rows if row["node_class"] == "Variable" and row["nodeid"]]
+        if not variables:
+            return rows
+
+        batch = BatchIO(client)
+        await batch.load_limits()
+        data_values = await batch.read([row["nodeid"] for row in variables])
+
+        for row, dv in zip(variables, data_values):
+            if dv.StatusCode.is_good():
+                row["value"] = dv.Value.Value if dv.Value is not None else None
+                row["readable"] = True
+            else:
+                row["error"] = dv.StatusCode.name
+                row["readable"] = False
+                if dv.StatusCode.value == ua.StatusCodes.BadNodeIdUnknown:
+                    self.mark_dirty(row["parent_path"])
+        return rows
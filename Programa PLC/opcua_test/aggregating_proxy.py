@@ -0,0 +1,552 @@
+"""
+================================================================================
+    PROXY OPC UA AGREGADOR - UNA SOLA SESIÓN HACIA EL EQUIPO
+
+    Servidor asyncua local que espeja el address space de un servidor real
+    (Optix Edge, 5069-L310ER, gateway_simulator.py) y atiende a cualquier
+    cantidad de scripts y dashboards con una sola sesión aguas arriba:
+
+    - Arranque: mismo NamespaceArray que el equipo (los NodeIds son los
+      mismos) y crawl en anchura de las raíces; carpetas y variables se
+      crean con AddNodes en lotes
+    - Una sola suscripción aguas arriba; cada variable se agrega la primera
+      vez que un cliente local la lee o la monitorea (o todas con --all).
+      Las notificaciones se escriben en el address space local: las
+      suscripciones locales se sirven sin tocar el equipo
+    - Read con maxAge: mientras la suscripción está sana el valor tiene a lo
+      sumo un publishing interval de antigüedad; si el cliente pide algo más
+      fresco (o el nodo aún no está suscrito) se hace un Read aguas arriba,
+      agrupado y compartido entre los clientes que lo piden a la vez.
+      maxAge por debajo de MAX_AGE_FLOOR_MS (incluido el 0 por defecto de
+      asyncua) se trata como ese piso
+    - Write: se reenvía al equipo en un solo Write y se aplica localmente
+      solo lo que el equipo aceptó
+    - Caída del equipo: los valores quedan UncertainLastUsableValue y el
+      proxy reconecta y vuelve a suscribir lo que tenía
+    - Read/Write con IndexRange sobre arrays (index_range.py)
+
+    Limitaciones: no espeja métodos ni tipos propios del equipo (los
+    DataType de estructuras se copian como NodeId).
+
+    Ejecutar con: python aggregating_proxy.py [opc.tcp://equipo:puerto]
+        [--url opc.tcp://0.0.0.0:4850] [--root ns=9;s=CPS001 ...] [--all]
+================================================================================
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import time
+from collections import Counter
+
+from asyncua import Client, Server, ua
+from asyncua.common.callback import CallbackType
+
+from address_space_crawler import AddressSpaceCrawler
+from batch_io import BatchIO, chunks, to_nodeid
+from index_range import apply_read_range
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("AggregatingProxy")
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+UPSTREAM_URL = "opc.tcp://192.168.101.100:59100"   # Optix Edge
+PROXY_URL = "opc.tcp://0.0.0.0:4850"
+PROXY_NAME = "OPC UA Aggregating Proxy"
+
+PUBLISHING_INTERVAL_MS = 100    # Suscripción aguas arriba
+SAMPLING_INTERVAL_MS = 0
+UPSTREAM_QUEUE_SIZE = 10        # Pulsos más cortos que el publishing no se pierden
+MAX_AGE_FLOOR_MS = PUBLISHING_INTERVAL_MS
+SUBSCRIBE_BATCH_WINDOW_S = 0.01  # Junta los MonitoredItems pedidos por varios clientes
+
+PROBE_INTERVAL_S = 1.0          # Read de ServerStatus.State para detectar caídas
+PROBE_TIMEOUT_S = 3.0
+RECONNECT_INTERVAL_S = 2.0
+ADD_NODES_BATCH = 1000
+
+
+class AggregatingProxy:
+    """Servidor local que comparte una sesión y una suscripción con el equipo."""
+
+    def __init__(self, upstream_url=UPSTREAM_URL, url=PROXY_URL, roots=None,
+                 subscribe_all=False, publishing_interval=PUBLISHING_INTERVAL_MS,
+                 max_age_floor_ms=MAX_AGE_FLOOR_MS):
+        self.upstream_url = upstream_url
+        self.url = url
+        self.roots = roots or [ua.NodeId(ua.ObjectIds.ObjectsFolder)]
+        self.subscribe_all = subscribe_all
+        self.publishing_interval = publishing_interval
+        self.max_age_floor_ms = max_age_floor_ms
+
+        self.client = None
+        self.batch = None
+        self.subscription = None
+        self.server = None
+        self.healthy = False
+
+        self.variables = {}       # NodeId -> string del NodeId (variables espejadas)
+        self.objects = 0
+        self.stats = Counter()
+
+        self._updated = {}        # NodeId -> time.monotonic() del último valor
+        self._live = set()        # Variables con al menos una notificación desde la suscripción
+        self._subscribed = set()  # Variables pedidas a la suscripción aguas arriba
+        self._pending = set()     # Variables por agregar a la suscripción
+        self._refreshing = {}     # NodeId -> Future del Read aguas arriba en curso
+        self._updates = None      # Cola (NodeId, DataValue) hacia el address space local
+        self._lost_at = None
+        self._tasks = []
+        self._subscribe_task = None
+
+    # ========================================================================
+    # CICLO DE VIDA
+    # ========================================================================
+
+    async def start(self):
+        """Conecta al equipo, espeja el address space y levanta el servidor."""
+
+        await self._connect_upstream()
+
+        self.server = Server()
+        await self.server.init()
+        self.server.set_endpoint(self.url)
+        self.server.set_server_name(PROXY_NAME)
+
+        await self._mirror_namespaces()
+        start = time.perf_counter()
+        await self._mirror_address_space()
+        logger.info(f"Espejados {self.objects} objetos y {len(self.variables)} variables "
+                    f"en {time.perf_counter() - start:.2f} s")
+
+        self._install_hooks()
+        await self.server.start()
+
+        self._updates = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._apply_updates()),
+            asyncio.create_task(self._supervise()),
+        ]
+        await self._create_subscription()
+        if self.subscribe_all:
+            self._want(self.variables)
+        logger.info(f"Proxy en {self.url} -> {self.upstream_url}")
+
+    async def stop(self):
+        for task in self._tasks + ([self._subscribe_task] if self._subscribe_task else []):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._disconnect_upstream()
+        if self.server is not None:
+            await self.server.stop()
+
+    async def _connect_upstream(self):
+        self.client = Client(self.upstream_url)
+        await self.client.connect()
+        self.batch = BatchIO(self.client)
+        await self.batch.load_limits()
+        self.healthy = True
+        self._lost_at = None
+
+    async def _disconnect_upstream(self):
+        self.healthy = False
+        if self.subscription is not None:
+            try:
+                await asyncio.wait_for(self.subscription.delete(), PROBE_TIMEOUT_S)
+            except Exception:
+                pass
+            self.subscription = None
+        if self.client is not None:
+            try:
+                await asyncio.wait_for(self.client.disconnect(), PROBE_TIMEOUT_S)
+            except Exception:
+                pass
+
+    # ========================================================================
+    # ESPEJO DEL ADDRESS SPACE
+    # ========================================================================
+
+    async def _mirror_namespaces(self):
+        """Copia el NamespaceArray del equipo: mismos índices, mismos NodeIds."""
+
+        uris = await self.client.get_namespace_array()
+        await self.server.write_attribute_value(
+            ua.NodeId(ua.ObjectIds.Server_NamespaceArray),
+            ua.DataValue(ua.Variant(uris, ua.VariantType.String)),
+        )
+
+    async def _mirror_address_space(self):
+        objects_folder = ua.NodeId(ua.ObjectIds.ObjectsFolder)
+        items = []
+        variables = []
+
+        for root in self.roots:
+            root = to_nodeid(root)
+            parent = root
+            if root != objects_folder:
+                # La raíz cuelga directamente de Objects en el proxy
+                name, = await self.batch.read_attributes([(root, ua.AttributeIds.BrowseName)])
+                items.append(_object_item(root, objects_folder, name.Value.Value))
+                self.objects += 1
+
+            crawler = AddressSpaceCrawler(self.client, read_data_types=False)
+            table = await crawler.crawl(parent, "", expand=lambda path, n: path != "Server")
+            for row in table:
+                node_id = ua.NodeId.from_string(row["nodeid"])
+                if node_id.NamespaceIndex == 0:
+                    continue
+                parent_id = ua.NodeId.from_string(row["parent"])
+                if row["node_class"] == "Object":
+                    items.append(_object_item(node_id, parent_id, ua.QualifiedName(row["name"], node_id.NamespaceIndex)))
+                    self.objects += 1
+                elif row["node_class"] == "Variable":
+                    variables.append((node_id, parent_id, row["name"]))
+
+        attributes = (ua.AttributeIds.DataType, ua.AttributeIds.ValueRank, ua.AttributeIds.ArrayDimensions,
+                      ua.AttributeIds.AccessLevel, ua.AttributeIds.Value)
+        values = await self.batch.read_attributes(
+            [(node_id, attribute) for node_id, _, _ in variables for attribute in attributes]
+        )
+        now = time.monotonic()
+        for i, (node_id, parent_id, name) in enumerate(variables):
+            read = values[i * len(attributes):(i + 1) * len(attributes)]
+            items.append(_variable_item(node_id, parent_id, name, *read))
+            self.variables[node_id] = node_id.to_string()
+            self._updated[node_id] = now
+
+        session = self.server.iserver.isession
+        for batch in chunks(items, ADD_NODES_BATCH):
+            for item, result in zip(batch, await session.add_nodes(batch)):
+                if not result.StatusCode.is_good():
+                    self.variables.pop(item.RequestedNewNodeId, None)
+                    logger.warning(f"No se espejó {item.RequestedNewNodeId.to_string()}: {result.StatusCode.name}")
+            await asyncio.sleep(0)
+
+    # ========================================================================
+    # HOOKS DEL SERVIDOR LOCAL
+    # ========================================================================
+
+    def _install_hooks(self):
+        self.server.subscribe_server_callback(CallbackType.PreRead, self._on_pre_read)
+        self.server.subscribe_server_callback(CallbackType.ItemSubscriptionCreated, self._on_items_created)
+
+        service = self.server.iserver.attribute_service
+        read, write = service.read, service.write
+
+        def read_with_range(params):
+            results = read(params)
+            for i, rv in enumerate(params.NodesToRead):
+                if rv.IndexRange and rv.AttributeId == ua.AttributeIds.Value and results[i].StatusCode.is_good():
+                    results[i] = apply_read_range(results[i], rv.IndexRange)
+            return results
+
+        async def write_upstream(params, *args, **kwargs):
+            forwarded = [i for i, wv in enumerate(params.NodesToWrite)
+                         if wv.AttributeId == ua.AttributeIds.Value and wv.NodeId in self.variables]
+            if not forwarded:
+                return await write(params, *args, **kwargs)
+
+            upstream = ua.WriteParameters()
+            upstream.NodesToWrite = [params.NodesToWrite[i] for i in forwarded]
+            try:
+                self.stats["upstream_writes"] += 1
+                statuses = await self.client.uaclient.write(upstream)
+            except Exception as e:
+                logger.warning(f"Write aguas arriba falló: {e}")
+                statuses = [ua.StatusCode(ua.StatusCodes.BadNotConnected)] * len(forwarded)
+            results = dict(zip(forwarded, statuses))
+
+            # Local: lo no espejado, y lo que el equipo aceptó (sin IndexRange,
+            # ese valor parcial llega completo por la suscripción)
+            local = ua.WriteParameters()
+            indexes = []
+            for i, wv in enumerate(params.NodesToWrite):
+                if i in results:
+                    if not results[i].is_good():
+                        continue
+                    if wv.IndexRange:
+                        self._updated.pop(wv.NodeId, None)
+                        continue
+                indexes.append(i)
+                local.NodesToWrite.append(wv)
+            if local.NodesToWrite:
+                for i, status in zip(indexes, await write(local, *args, **kwargs)):
+                    results.setdefault(i, status)
+                    if status.is_good() and params.NodesToWrite[i].NodeId in self.variables:
+                        self._updated[params.NodesToWrite[i].NodeId] = time.monotonic()
+            return [results[i] for i in range(len(params.NodesToWrite))]
+
+        service.read = read_with_range
+        service.write = write_upstream
+
+    async def _on_pre_read(self, event, dispatcher):
+        """Antes de cada Read local: refresca lo que no cumple el maxAge pedido."""
+
+        if not getattr(event, "is_external", True):
+            return
+        params = event.request_params
+        max_age = max(params.MaxAge or 0, self.max_age_floor_ms)
+        requested = [rv.NodeId for rv in params.NodesToRead
+                     if rv.AttributeId == ua.AttributeIds.Value and rv.NodeId in self.variables]
+        if not requested:
+            return
+        self.stats["local_reads"] += 1
+        stale = [node_id for node_id in requested if self.age_ms(node_id) > max_age]
+        self.stats["cache_hits"] += len(requested) - len(stale)
+        self._want(requested)
+        if stale and self.healthy:
+            await self.refresh(stale)
+
+    async def _on_items_created(self, event, dispatcher):
+        """MonitoredItems locales: agregar sus variables a la suscripción aguas arriba."""
+
+        self._want(item.ItemToMonitor.NodeId for item in event.request_params.ItemsToCreate
+                   if item.ItemToMonitor.AttributeId == ua.AttributeIds.Value)
+
+    def age_ms(self, node_id) -> float:
+        """Antigüedad del valor en caché (ms)."""
+
+        if self.healthy and node_id in self._live:
+            return self.publishing_interval
+        updated = self._updated.get(node_id)
+        if updated is None:
+            return math.inf
+        return (time.monotonic() - updated) * 1000
+
+    # ========================================================================
+    # LECTURAS AGUAS ARRIBA
+    # ========================================================================
+
+    async def refresh(self, node_ids: list):
+        """Read aguas arriba de los nodos; comparte los Reads ya en curso."""
+
+        loop = asyncio.get_running_loop()
+        waiting = []
+        missing = []
+        for node_id in dict.fromkeys(node_ids):
+            if node_id in self._refreshing:
+                waiting.append(self._refreshing[node_id])
+            else:
+                future = self._refreshing[node_id] = loop.create_future()
+                missing.append((node_id, future))
+
+        if missing:
+            self.stats["upstream_reads"] += 1
+            self.stats["refreshed_nodes"] += len(missing)
+            try:
+                data_values = await self.batch.read([node_id for node_id, _ in missing])
+                for (node_id, _), dv in zip(missing, data_values):
+                    await self._apply(node_id, dv)
+            except Exception as e:
+                logger.warning(f"Read aguas arriba falló: {e}")
+            finally:
+                for node_id, future in missing:
+                    del self._refreshing[node_id]
+                    future.set_result(None)
+
+        if waiting:
+            self.stats["shared_reads"] += len(waiting)
+            await asyncio.gather(*waiting)
+
+    async def _apply(self, node_id, dv):
+        await self.server.write_attribute_value(node_id, dv)
+        self._updated[node_id] = time.monotonic()
+
+    # ========================================================================
+    # SUSCRIPCIÓN AGUAS ARRIBA
+    # ========================================================================
+
+    async def _create_subscription(self):
+        self.subscription = await self.client.create_subscription(self.publishing_interval, self)
+        self._live.clear()
+
+    def _want(self, node_ids):
+        """Agenda nodos para la suscripción; un solo CreateMonitoredItems por ventana."""
+
+        new = {node_id for node_id in node_ids if node_id in self.variables} - self._subscribed
+        if not new:
+            return
+        self._pending |= new
+        self._flush_pending()
+
+    def _flush_pending(self):
+        if self._pending and (self._subscribe_task is None or self._subscribe_task.done()):
+            self._subscribe_task = asyncio.create_task(self._subscribe_pending())
+
+    async def _subscribe_pending(self):
+        await asyncio.sleep(SUBSCRIBE_BATCH_WINDOW_S)
+        while self._pending and self.healthy:
+            pending, self._pending = list(self._pending), set()
+            try:
+                await self._monitor(pending)
+            except Exception as e:
+                logger.warning(f"No se pudieron suscribir {len(pending)} variables: {e}")
+                self._pending |= set(pending)
+                return
+
+    async def _monitor(self, node_ids: list):
+        self._subscribed |= set(node_ids)
+        nodes = [self.client.get_node(node_id) for node_id in node_ids]
+        size = self.batch.max_nodes_per_read
+        for batch in chunks(nodes, size):
+            self.stats["upstream_monitor_requests"] += 1
+            handles = await self.subscription.subscribe_data_change(
+                batch, queuesize=UPSTREAM_QUEUE_SIZE, sampling_interval=SAMPLING_INTERVAL_MS)
+            for node, handle in zip(batch, handles):
+                if isinstance(handle, ua.StatusCode):
+                    self._subscribed.discard(node.nodeid)
+                    logger.warning(f"No se pudo monitorear {node.nodeid.to_string()}: {handle}")
+
+    def datachange_notification(self, node, val, data):
+        """Handler de asyncua: encola el DataValue para el address space local."""
+
+        self.stats["upstream_notifications"] += 1
+        self._live.add(node.nodeid)
+        self._updates.put_nowait((node.nodeid, data.monitored_item.Value))
+
+    def status_change_notification(self, status):
+        logger.warning(f"Estado de suscripción aguas arriba: {status}")
+
+    async def _apply_updates(self):
+        while True:
+            node_id, dv = await self._updates.get()
+            try:
+                await self._apply(node_id, dv)
+            except Exception as e:
+                logger.error(f"Error aplicando {node_id.to_string()}: {e}")
+
+    # ========================================================================
+    # SUPERVISIÓN Y RECONEXIÓN
+    # ========================================================================
+
+    async def _supervise(self):
+        state = ua.NodeId(ua.ObjectIds.Server_ServerStatus_State)
+        while True:
+            if self.healthy:
+                await asyncio.sleep(PROBE_INTERVAL_S)
+                try:
+                    await asyncio.wait_for(self.client.get_node(state).read_value(), PROBE_TIMEOUT_S)
+                except Exception as e:
+                    logger.warning(f"Equipo sin respuesta: {e!r}")
+                    await self._upstream_lost()
+            else:
+                await asyncio.sleep(RECONNECT_INTERVAL_S)
+                await self._reconnect()
+
+    async def _upstream_lost(self):
+        """Marca la caché como UncertainLastUsableValue y suelta la sesión."""
+
+        self._lost_at = time.monotonic()
+        await self._disconnect_upstream()
+        self._live.clear()
+        aspace = self.server.iserver.aspace
+        uncertain = ua.StatusCode(ua.StatusCodes.UncertainLastUsableValue)
+        for node_id in self.variables:
+            dv = aspace.read_attribute_value(node_id, ua.AttributeIds.Value)
+            if dv.StatusCode is not None and dv.StatusCode.is_good():
+                await self.server.write_attribute_value(node_id, ua.DataValue(
+                    dv.Value, uncertain, SourceTimestamp=dv.SourceTimestamp, ServerTimestamp=dv.ServerTimestamp))
+
+    async def _reconnect(self):
+        lost_at = self._lost_at
+        try:
+            await self._connect_upstream()
+            await self._create_subscription()
+            subscribed, self._subscribed = list(self._subscribed), set()
+            await self._monitor(subscribed)
+        except Exception as e:
+            logger.info(f"Reconexión fallida: {e!r}")
+            await self._disconnect_upstream()
+            self._lost_at = lost_at
+            return
+        self.stats["reconnects"] += 1
+        logger.info(f"Reconectado a {self.upstream_url} tras {time.monotonic() - lost_at:.1f} s, "
+                    f"{len(self._subscribed)} variables suscritas de nuevo")
+        self._flush_pending()
+
+    def print_stats(self):
+        print(f"  Variables espejadas: {len(self.variables)}, suscritas aguas arriba: {len(self._subscribed)}")
+        for key, value in sorted(self.stats.items()):
+            print(f"    {key:<28} {value}")
+
+
+def _object_item(node_id, parent_id, browse_name) -> ua.AddNodesItem:
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = node_id
+    item.BrowseName = browse_name
+    item.NodeClass = ua.NodeClass.Object
+    item.ParentNodeId = parent_id
+    item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.Organizes)
+    item.TypeDefinition = ua.NodeId(ua.ObjectIds.FolderType)
+    attrs = ua.ObjectAttributes()
+    attrs.DisplayName = ua.LocalizedText(browse_name.Name)
+    attrs.EventNotifier = 0
+    item.NodeAttributes = attrs
+    return item
+
+
+def _variable_item(node_id, parent_id, name, data_type, value_rank, dimensions, access, value) -> ua.AddNodesItem:
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = node_id
+    item.BrowseName = ua.QualifiedName(name, node_id.NamespaceIndex)
+    item.NodeClass = ua.NodeClass.Variable
+    item.ParentNodeId = parent_id
+    item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasComponent)
+    item.TypeDefinition = ua.NodeId(ua.ObjectIds.BaseDataVariableType)
+    attrs = ua.VariableAttributes()
+    attrs.DisplayName = ua.LocalizedText(name)
+    if data_type.StatusCode.is_good():
+        attrs.DataType = data_type.Value.Value
+    if value_rank.StatusCode.is_good():
+        attrs.ValueRank = value_rank.Value.Value
+    if dimensions.StatusCode.is_good() and dimensions.Value.Value:
+        attrs.ArrayDimensions = dimensions.Value.Value
+    if access.StatusCode.is_good():
+        attrs.AccessLevel = access.Value.Value
+        attrs.UserAccessLevel = access.Value.Value
+    if value.StatusCode.is_good():
+        attrs.Value = value.Value
+    item.NodeAttributes = attrs
+    return item
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Proxy OPC UA agregador")
+    parser.add_argument("upstream", nargs="?", default=UPSTREAM_URL, help="Endpoint del equipo")
+    parser.add_argument("--url", default=PROXY_URL, help="Endpoint del proxy")
+    parser.add_argument("--root", action="append", help="NodeId raíz a espejar (Objects por defecto)")
+    parser.add_argument("--all", action="store_true", help="Suscribir todas las variables al arrancar")
+    parser.add_argument("--max-age-floor", type=float, default=MAX_AGE_FLOOR_MS,
+                        help="maxAge mínimo en ms (0 = respetar maxAge=0 con un Read al equipo)")
+    args = parser.parse_args()
+
+    proxy = AggregatingProxy(args.upstream, args.url, roots=args.root, subscribe_all=args.all,
+                             max_age_floor_ms=args.max_age_floor)
+    await proxy.start()
+
+    print("\n" + "=" * 70)
+    print("🔀 PROXY OPC UA AGREGADOR")
+    print("=" * 70)
+    print(f"\n📡 Clientes locales: {proxy.url}")
+    print(f"🏭 Equipo:           {proxy.upstream_url} (una sesión, una suscripción)")
+    print(f"📋 {proxy.objects} objetos y {len(proxy.variables)} variables espejadas")
+    print("\n⏳ Presiona Ctrl+C para detener el proxy\n")
+
+    try:
+        while True:
+            await asyncio.sleep(60)
+            proxy.print_stats()
+    finally:
+        await proxy.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Proxy detenido por el usuario")
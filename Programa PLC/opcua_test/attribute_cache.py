@@ -0,0 +1,322 @@
+"""
+================================================================================
+    CACHÉ PERSISTENTE DE ATRIBUTOS DE NODOS
+
+    Los scripts de diagnóstico leían DataType, BrowseName y NodeClass junto a
+    cada valor (read_data_type_as_variant_type(), read_browse_name(),
+    read_node_class()): tres o más viajes por tag para atributos que no
+    cambian. Esta caché los guarda por endpoint en cache/attribute_cache.json:
+
+    - Atributos: NodeClass, BrowseName, DataType, ValueRank,
+      ArrayDimensions, AccessLevel y el VariantType que corresponde al
+      DataType (como read_data_type_as_variant_type)
+    - Los nodos que faltan se leen con una petición Read para todos
+      (atributos mezclados, dividida sólo por MaxNodesPerRead)
+    - El VariantType de un DataType que no es built-in se resuelve una sola
+      vez por DataType (sube por los supertipos) y también queda guardado
+    - Si NamespaceArray cambia (recarga de Optix, descarga al PLC) la caché
+      del endpoint se descarta
+    - Los valores se leen aparte: read_values() = un Read sólo del Value
+
+    Con python-opcua (síncrono, opcua_basic_test.py) se usan load_sync(),
+    fill_sync() y read_values_sync().
+
+    Uso:
+        cache = AttributeCache(client, url)
+        await cache.load()
+        attributes = await cache.fill(node_ids)       # {node_id: dict}
+        data_values = await cache.read_values(node_ids)
+        attributes[node_ids[0]]["VariantType"]
+================================================================================
+"""
+
+import json
+import logging
+import os
+
+from asyncua import ua
+from asyncua.common.ua_utils import data_type_to_variant_type
+
+from batch_io import FALLBACK_MAX_NODES, OPERATION_LIMITS, chunks, read_attributes_raw, read_raw, to_nodeid
+
+logger = logging.getLogger("AttributeCache")
+
+ATTRIBUTE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    "cache", "attribute_cache.json")
+
+NAMESPACE_ARRAY = ua.NodeId(ua.ObjectIds.Server_NamespaceArray)
+
+# Atributos cacheados (los de Variable dan BadAttributeIdInvalid en Objects: None)
+ATTRIBUTES = ("NodeClass", "BrowseName", "DataType", "ValueRank", "ArrayDimensions", "AccessLevel")
+
+# DataTypes built-in de ns=0: el VariantType es el mismo número
+BUILTIN_TYPES = range(1, 26)
+
+
+def _node_key(node) -> str:
+    """ "ns=2;s=Tag", ua.NodeId o Node -> clave en forma string."""
+
+    if isinstance(node, str):
+        return node
+    return to_nodeid(node).to_string()
+
+
+def _jsonable(name: str, variant):
+    """Valor de un atributo en forma JSON (NodeId y QualifiedName como string)."""
+
+    if variant is None:
+        return None
+    value = variant.Value
+    if name in ("DataType", "BrowseName"):
+        return value.to_string()
+    if name == "ArrayDimensions":
+        return list(value) if value is not None else None
+    return int(value) if value is not None else None
+
+
+class AttributeCache:
+    """Atributos que no cambian (DataType, BrowseName, ...) leídos una sola vez."""
+
+    def __init__(self, client, endpoint: str = None, cache_path: str = ATTRIBUTE_CACHE_PATH):
+        self.client = client
+        self.endpoint = endpoint or client.server_url.geturl()
+        self.cache_path = cache_path
+
+        self.namespaces = None
+        self.max_nodes_per_read = FALLBACK_MAX_NODES
+        self._nodes = {}           # "ns=N;..." -> {atributo: valor JSON}
+        self._variant_types = {}   # DataType "ns=N;..." -> nombre del VariantType
+        self._dirty = False
+
+        # Estadísticas: peticiones Read y aciertos por nodo
+        self.stats = {"attribute_reads": 0, "value_reads": 0, "hits": 0, "misses": 0}
+
+    # ------------------------------------------------------------------------
+    # CARGA (asyncua)
+    # ------------------------------------------------------------------------
+
+    async def load(self) -> dict:
+        """
+        Lee NamespaceArray y MaxNodesPerRead en una petición y carga la
+        caché del endpoint si la tabla de namespaces no cambió.
+        """
+
+        limit_id = ua.NodeId(OPERATION_LIMITS["MaxNodesPerRead"])
+        results = await read_raw(self.client, [NAMESPACE_ARRAY, limit_id],
+                                 timestamps=ua.TimestampsToReturn.Neither)
+        self.stats["attribute_reads"] += 1
+        self._apply_load(list(results[0].Value.Value), results[1])
+        return self._nodes
+
+    async def fill(self, nodes: list) -> dict:
+        """
+        Asegura los atributos de todos los nodos: los que faltan en una
+        petición Read. Retorna {nodo tal como se pasó: atributos}.
+        """
+
+        if self.namespaces is None:
+            await self.load()
+
+        missing = self._missing(nodes)
+        if missing:
+            items = [(ua.NodeId.from_string(key), getattr(ua.AttributeIds, name))
+                     for key in missing for name in ATTRIBUTES]
+            data_values = []
+            for batch in chunks(items, self.max_nodes_per_read):
+                data_values.extend(await read_attributes_raw(self.client, batch, ua.TimestampsToReturn.Neither))
+                self.stats["attribute_reads"] += 1
+            for data_type in self._store(missing, data_values):
+                try:
+                    variant_type = await data_type_to_variant_type(self.client.get_node(data_type))
+                except Exception as e:
+                    logger.warning(f"VariantType de {data_type} no resuelto: {e}")
+                    continue
+                self._variant_types[data_type] = variant_type.name
+            self._save_cache()
+        return {node: self.get(node) for node in nodes}
+
+    async def read_values(self, nodes: list) -> list:
+        """Un Read sólo del atributo Value de todos los nodos (DataValues en orden)."""
+
+        results = []
+        for batch in chunks([ua.NodeId.from_string(_node_key(node)) for node in nodes], self.max_nodes_per_read):
+            results.extend(await read_raw(self.client, batch))
+            self.stats["value_reads"] += 1
+        return results
+
+    # ------------------------------------------------------------------------
+    # CARGA (python-opcua, síncrono)
+    # ------------------------------------------------------------------------
+
+    def load_sync(self) -> dict:
+        self._apply_load(list(self.client.get_namespace_array()), None)
+        self.stats["attribute_reads"] += 1
+        return self._nodes
+
+    def fill_sync(self, nodes: list) -> dict:
+        from opcua import ua as sync_ua
+        from opcua.common.ua_utils import data_type_to_variant_type as sync_variant_type
+
+        if self.namespaces is None:
+            self.load_sync()
+
+        missing = self._missing(nodes)
+        if missing:
+            items = [(key, getattr(sync_ua.AttributeIds, name)) for key in missing for name in ATTRIBUTES]
+            data_values = []
+            for batch in chunks(items, self.max_nodes_per_read):
+                data_values.extend(self.client.uaclient.read(_sync_read_params(sync_ua, batch)))
+                self.stats["attribute_reads"] += 1
+            for data_type in self._store(missing, data_values):
+                try:
+                    variant_type = sync_variant_type(self.client.get_node(data_type))
+                except Exception as e:
+                    logger.warning(f"VariantType de {data_type} no resuelto: {e}")
+                    continue
+                self._variant_types[data_type] = variant_type.name
+            self._save_cache()
+        return {node: self.get(node) for node in nodes}
+
+    def read_values_sync(self, nodes: list) -> list:
+        from opcua import ua as sync_ua
+
+        results = []
+        for batch in chunks([_node_key(node) for node in nodes], self.max_nodes_per_read):
+            items = [(key, sync_ua.AttributeIds.Value) for key in batch]
+            results.extend(self.client.uaclient.read(_sync_read_params(sync_ua, items)))
+            self.stats["value_reads"] += 1
+        return results
+
+    # ------------------------------------------------------------------------
+    # CONSULTA
+    # ------------------------------------------------------------------------
+
+    def get(self, node):
+        """
+        Atributos de un nodo ya cargado (None si no está): NodeClass
+        (ua.NodeClass), BrowseName (ua.QualifiedName), DataType (ua.NodeId),
+        VariantType (ua.VariantType), ValueRank, ArrayDimensions, AccessLevel.
+        """
+
+        entry = self._nodes.get(_node_key(node))
+        if entry is None:
+            return None
+        data_type = entry["DataType"]
+        variant_type = self._variant_type(data_type)
+        return {
+            "NodeClass": ua.NodeClass(entry["NodeClass"]) if entry["NodeClass"] is not None else None,
+            "BrowseName": ua.QualifiedName.from_string(entry["BrowseName"]) if entry["BrowseName"] else None,
+            "DataType": ua.NodeId.from_string(data_type) if data_type else None,
+            "VariantType": getattr(ua.VariantType, variant_type) if variant_type else None,
+            "ValueRank": entry["ValueRank"],
+            "ArrayDimensions": entry["ArrayDimensions"],
+            "AccessLevel": entry["AccessLevel"],
+        }
+
+    def invalidate(self, nodes: list = None):
+        """Descarta los nodos indicados (todos si nodes es None)."""
+
+        if nodes is None:
+            self._nodes = {}
+            self._variant_types = {}
+        else:
+            for node in nodes:
+                self._nodes.pop(_node_key(node), None)
+        self._dirty = True
+        self._save_cache()
+
+    def _missing(self, nodes: list) -> list:
+        missing = []
+        for node in nodes:
+            key = _node_key(node)
+            if key in self._nodes:
+                self.stats["hits"] += 1
+            elif key not in missing:
+                self.stats["misses"] += 1
+                missing.append(key)
+        return missing
+
+    def _store(self, keys: list, data_values: list) -> set:
+        """Guarda los atributos leídos; retorna los DataTypes sin VariantType."""
+
+        unresolved = set()
+        values = iter(data_values)
+        for key in keys:
+            entry = {}
+            for name in ATTRIBUTES:
+                dv = next(values)
+                entry[name] = _jsonable(name, dv.Value) if dv.StatusCode.is_good() else None
+            if entry["NodeClass"] is None:
+                # El nodo no existe: no se cachea, el próximo fill() lo reintenta
+                continue
+            self._nodes[key] = entry
+            data_type = entry["DataType"]
+            if data_type and self._variant_type(data_type) is None:
+                unresolved.add(data_type)
+        self._dirty = True
+        return unresolved
+
+    def _variant_type(self, data_type: str):
+        if data_type is None:
+            return None
+        node_id = ua.NodeId.from_string(data_type)
+        if node_id.NamespaceIndex == 0 and node_id.Identifier in BUILTIN_TYPES:
+            return ua.VariantType(node_id.Identifier).name
+        return self._variant_types.get(data_type)
+
+    # ------------------------------------------------------------------------
+    # PERSISTENCIA
+    # ------------------------------------------------------------------------
+
+    def _apply_load(self, namespaces: list, limit):
+        if limit is not None and limit.StatusCode.is_good() and limit.Value and limit.Value.Value:
+            self.max_nodes_per_read = int(limit.Value.Value)
+
+        stored = self._load_cache()
+        if stored.get("namespaces") == namespaces:
+            self._nodes = stored.get("nodes", {})
+            self._variant_types = stored.get("variant_types", {})
+        else:
+            if stored:
+                logger.info(f"NamespaceArray de {self.endpoint} cambió: atributos descartados")
+            self._nodes = {}
+            self._variant_types = {}
+        self.namespaces = namespaces
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f).get(self.endpoint, {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        if not self._dirty or self.namespaces is None:
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data[self.endpoint] = {"namespaces": self.namespaces, "nodes": self._nodes,
+                               "variant_types": self._variant_types}
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+
+def _sync_read_params(sync_ua, items: list):
+    """ReadParameters de python-opcua para [("ns=N;...", atributo), ...]."""
+
+    params = sync_ua.ReadParameters()
+    params.TimestampsToReturn = sync_ua.TimestampsToReturn.Both
+    for key, attribute in items:
+        rv = sync_ua.ReadValueId()
+        rv.NodeId = sync_ua.NodeId.from_string(key)
+        rv.AttributeId = attribute
+        params.NodesToRead.append(rv)
+    return params
@@ -0,0 +1,183 @@
+"""
+================================================================================
+    LECTURA / ESCRITURA OPC UA EN LOTE
+
+    Una sola petición Read (o Write) con muchos ReadValueId / WriteValue en
+    lugar de un read_value() / write_value() por tag.
+
+    - Respeta los límites del servidor (OperationLimits.MaxNodesPerRead /
+      MaxNodesPerWrite): los lotes se dividen automáticamente
+    - Retorna el DataValue completo: valor, StatusCode y timestamps
+      de fuente y servidor por cada nodo
+
+    Uso:
+        batch = BatchIO(client)
+        await batch.load_limits()
+        data_values = await batch.read(["ns=2;s=EgComIn_Heartbeat", ...])
+        status_codes = await batch.write([("ns=2;s=EgComOut_UUIDReq", True)])
+================================================================================
+"""
+
+import logging
+
+from asyncua import Node, ua
+
+logger = logging.getLogger("BatchIO")
+
+# Tamaño de lote si el servidor no declara límite (0 = sin límite)
+FALLBACK_MAX_NODES = 1000
+
+# Límites de operación publicados en Server.ServerCapabilities.OperationLimits
+OPERATION_LIMITS = {
+    "MaxNodesPerRead": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerRead,
+    "MaxNodesPerWrite": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerWrite,
+    "MaxNodesPerBrowse": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerBrowse,
+    "MaxNodesPerRegisterNodes": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerRegisterNodes,
+    "MaxNodesPerTranslateBrowsePathsToNodeIds": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerTranslateBrowsePathsToNodeIds,
+}
+
+
+def to_nodeid(node) -> ua.NodeId:
+    """Acepta "ns=2;s=Tag", ua.NodeId o Node y retorna ua.NodeId."""
+
+    if isinstance(node, ua.NodeId):
+        return node
+    if isinstance(node, Node):
+        return node.nodeid
+    return ua.NodeId.from_string(node)
+
+
+def chunks(items: list, size: int):
+    """Divide la lista en lotes de tamaño size (0 = un solo lote)."""
+
+    if size <= 0:
+        size = len(items) or 1
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def read_raw(client, node_ids: list, attribute=ua.AttributeIds.Value,
+                   timestamps=ua.TimestampsToReturn.Both) -> list:
+    """Una petición Read para todos los nodos (sin dividir). Retorna DataValues."""
+
+    return await read_attributes_raw(
+        client, [(node_id, attribute) for node_id in node_ids], timestamps
+    )
+
+
+async def read_attributes_raw(client, items: list,
+                              timestamps=ua.TimestampsToReturn.Both) -> list:
+    """Una petición Read para [(node_id, atributo), ...] (sin dividir)."""
+
+    params = ua.ReadParameters()
+    params.TimestampsToReturn = timestamps
+    for node_id, attribute in items:
+        rv = ua.ReadValueId()
+        rv.NodeId = to_nodeid(node_id)
+        rv.AttributeId = attribute
+        params.NodesToRead.append(rv)
+    return await client.uaclient.read(params)
+
+
+async def release_continuation_points(client, points: list):
+    """
+    BrowseNext con ReleaseContinuationPoints=True para los puntos de
+    continuación que quedaron sin agotar. El servidor tiene pocos por sesión
+    (MaxBrowseContinuationPoints): si no se liberan, los Browse siguientes
+    fallan con BadNoContinuationPoints.
+    """
+
+    points = [point for point in points if point]
+    if not points:
+        return
+    params = ua.BrowseNextParameters()
+    params.ReleaseContinuationPoints = True
+    params.ContinuationPoints = points
+    try:
+        await client.uaclient.browse_next(params)
+    except Exception as e:
+        logger.warning(f"No se pudieron liberar {len(points)} puntos de continuación: {e}")
+
+
+async def read_operation_limits(client) -> dict:
+    """
+    Lee los OperationLimits del servidor en una sola petición.
+
+    Retorna {nombre: valor}; 0 significa que el servidor no declara límite.
+    """
+
+    limits = dict.fromkeys(OPERATION_LIMITS, 0)
+    try:
+        node_ids = [ua.NodeId(object_id) for object_id in OPERATION_LIMITS.values()]
+        results = await read_raw(client, node_ids, timestamps=ua.TimestampsToReturn.Neither)
+        for name, dv in zip(OPERATION_LIMITS, results):
+            if dv.StatusCode.is_good() and dv.Value is not None and dv.Value.Value:
+                limits[name] = int(dv.Value.Value)
+    except Exception as e:
+        logger.warning(f"No se pudieron leer OperationLimits: {e}")
+    return limits
+
+
+class BatchIO:
+    """Lecturas y escrituras en lote respetando los límites del servidor."""
+
+    def __init__(self, client, max_nodes_per_read=None, max_nodes_per_write=None):
+        self.client = client
+        self.limits = {}
+        self.max_nodes_per_read = max_nodes_per_read
+        self.max_nodes_per_write = max_nodes_per_write
+
+    async def load_limits(self):
+        """Consulta los límites del servidor (los valores explícitos tienen prioridad)."""
+
+        self.limits = await read_operation_limits(self.client)
+        if self.max_nodes_per_read is None:
+            self.max_nodes_per_read = self.limits["MaxNodesPerRead"] or FALLBACK_MAX_NODES
+        if self.max_nodes_per_write is None:
+            self.max_nodes_per_write = self.limits["MaxNodesPerWrite"] or FALLBACK_MAX_NODES
+        return self.limits
+
+    async def read(self, node_ids: list, attribute=ua.AttributeIds.Value) -> list:
+        """
+        Lee un atributo (Value por defecto) de todos los nodos.
+
+        Retorna un DataValue por nodo, en el mismo orden; los errores por nodo
+        vienen en DataValue.StatusCode, no como excepción.
+        """
+
+        return await self.read_attributes([(node_id, attribute) for node_id in node_ids])
+
+    async def read_attributes(self, items: list) -> list:
+        """
+        Lee [(node_id, atributo), ...] mezclando atributos en la misma petición
+        (p. ej. DataType y AccessLevel de cada variable). Un DataValue por item.
+        """
+
+        size = self.max_nodes_per_read or FALLBACK_MAX_NODES
+        results = []
+        for batch in chunks(list(items), size):
+            results.extend(await read_attributes_raw(self.client, batch))
+        return results
+
+    async def write(self, items: list) -> list:
+        """
+        Escribe [(node_id, valor), ...] con peticiones Write en lote.
+
+        El valor puede ser un valor Python, ua.Variant o ua.DataValue.
+        Retorna un StatusCode por nodo, en el mismo orden.
+        """
+
+        size = self.max_nodes_per_write or FALLBACK_MAX_NODES
+        results = []
+        for batch in chunks(list(items), size):
+            params = ua.WriteParameters()
+            for node_id, value in batch:
+                if not isinstance(value, ua.DataValue):
+                    value = ua.DataValue(value if isinstance(value, ua.Variant) else ua.Variant(value))
+                wv = ua.WriteValue()
+                wv.NodeId = to_nodeid(node_id)
+                wv.AttributeId = ua.AttributeIds.Value
+                wv.Value = value
+                params.NodesToWrite.append(wv)
+            results.extend(await self.client.uaclient.write(params))
+        return results
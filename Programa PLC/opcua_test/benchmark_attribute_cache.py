@@ -0,0 +1,153 @@
+"""
+================================================================================
+    BENCHMARK: CACHÉ DE ATRIBUTOS (attribute_cache.py)
+
+    Servidor asyncua local con un GlobalVars al estilo Omron: variables
+    Boolean, Int16, Float, String, arrays y un enum (DataType que no es
+    built-in). Se leen nombre, clase, tipo y valor de todas:
+
+    - Antes:    read_browse_name() + read_node_class() + read_value() +
+                read_data_type_as_variant_type() por variable
+    - Fría:     AttributeCache sin caché: un Read de atributos + un Read
+                de valores (y la resolución del enum, una vez)
+    - Caliente: AttributeCache desde disco (como la siguiente ejecución
+                del script): sólo el Read de valores
+
+    Reporta peticiones, ms por pasada y verifica que los VariantType son
+    los mismos que con read_data_type_as_variant_type(). Al final agrega
+    un namespace al servidor y comprueba que la caché se descarta. Con
+    --latency se agrega un retardo por petición para emular el enlace.
+
+    Ejecutar con: python benchmark_attribute_cache.py [--tags N] [--latency MS]
+================================================================================
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+
+from asyncua import Client, Server, ua
+
+from attribute_cache import AttributeCache
+from benchmark_utils import RequestCounter, Stopwatch
+
+SERVER_URL = "opc.tcp://127.0.0.1:48425"
+NAMESPACE_URI = "urn:benchmark:attributes"
+TAGS = 60
+
+logging.getLogger("asyncua").setLevel(logging.CRITICAL)
+
+# (sufijo, valor inicial, DataType explícito o None)
+VARIABLE_KINDS = [
+    ("Bool", True, None),
+    ("Int", ua.Variant(7, ua.VariantType.Int16), None),
+    ("Real", ua.Variant(1.5, ua.VariantType.Float), None),
+    ("Str", "BC-000001", None),
+    ("Arr", ua.Variant([1, 2, 3], ua.VariantType.Int32), None),
+    ("State", ua.Variant(0, ua.VariantType.Int32), ua.NodeId(ua.ObjectIds.ServerState)),
+]
+
+
+async def start_server(tags: int):
+    server = Server()
+    await server.init()
+    server.set_endpoint(SERVER_URL)
+    idx = await server.register_namespace(NAMESPACE_URI)
+    folder = await server.nodes.objects.add_folder(ua.NodeId("GlobalVars", idx), "GlobalVars")
+    for i in range(tags):
+        suffix, value, datatype = VARIABLE_KINDS[i % len(VARIABLE_KINDS)]
+        name = f"Var{i:03d}_{suffix}"
+        await folder.add_variable(ua.NodeId(f"GlobalVars.{name}", idx), name, value, datatype=datatype)
+    await server.start()
+    return server, idx
+
+
+async def read_before(client, nodes):
+    """Un viaje por atributo y por variable, como los scripts de diagnóstico."""
+
+    rows = {}
+    for node in nodes:
+        browse_name = await node.read_browse_name()
+        node_class = await node.read_node_class()
+        value = await node.read_value()
+        data_type = await node.read_data_type_as_variant_type()
+        rows[node.nodeid.to_string()] = (browse_name.Name, node_class, data_type, value)
+    return rows
+
+
+async def read_cached(client, nodes, cache_path):
+    cache = AttributeCache(client, SERVER_URL, cache_path)
+    attributes = await cache.fill(nodes)
+    data_values = await cache.read_values(nodes)
+    rows = {}
+    for node, dv in zip(nodes, data_values):
+        entry = attributes[node]
+        rows[node.nodeid.to_string()] = (entry["BrowseName"].Name, entry["NodeClass"],
+                                          entry["VariantType"], dv.Value.Value)
+    return rows, cache
+
+
+async def measure(label, client, latency_ms, coroutine):
+    counter = RequestCounter(client, latency_ms).install()
+    try:
+        with Stopwatch() as sw:
+            result = await coroutine
+    finally:
+        counter.uninstall()
+    detail = ", ".join(f"{name.replace('Request', '')} {n}" for name, n in sorted(counter.counts.items()))
+    print(f"  {label:<12} {sw.ms:8.1f} ms   {counter.total:4d} peticiones ({detail})")
+    return result, counter.total
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la caché de atributos")
+    parser.add_argument("--tags", type=int, default=TAGS)
+    parser.add_argument("--latency", type=float, default=0.0, help="ms por petición")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("📊 BENCHMARK: CACHÉ DE ATRIBUTOS (DataType, BrowseName, NodeClass, ...)")
+    print("=" * 70)
+
+    server, idx = await start_server(args.tags)
+    directory = tempfile.mkdtemp(prefix="attribute_cache_bench_")
+    cache_path = os.path.join(directory, "attribute_cache.json")
+    try:
+        async with Client(SERVER_URL, watchdog_intervall=10.0) as client:
+            folder = client.get_node(ua.NodeId("GlobalVars", idx))
+            nodes = await folder.get_children()
+            print(f"  {len(nodes)} variables en {SERVER_URL}, latencia emulada {args.latency} ms/petición")
+
+            print("\n▶ Nombre, clase, tipo y valor de todas las variables")
+            print("-" * 70)
+            before, before_requests = await measure("Antes", client, args.latency, read_before(client, nodes))
+            (cold, _), _ = await measure("Fría", client, args.latency, read_cached(client, nodes, cache_path))
+            (warm, cache), warm_requests = await measure("Caliente", client, args.latency,
+                                                         read_cached(client, nodes, cache_path))
+
+            assert cold == before and warm == before, "los atributos cacheados no coinciden"
+            assert cache.stats["misses"] == 0 and cache.stats["attribute_reads"] == 1
+            print(f"  ✅ Mismos nombres, clases y VariantType (enum -> "
+                  f"{before[nodes[5].nodeid.to_string()][2].name}); "
+                  f"caliente: {before_requests} -> {warm_requests} peticiones, "
+                  f"caché {os.path.getsize(cache_path):,} bytes")
+
+        print("\n▶ Cambio de NamespaceArray")
+        print("-" * 70)
+        await server.register_namespace("urn:benchmark:reloaded")
+        async with Client(SERVER_URL, watchdog_intervall=10.0) as client:
+            nodes = await client.get_node(ua.NodeId("GlobalVars", idx)).get_children()
+            _, cache = await read_cached(client, nodes, cache_path)
+            assert cache.stats["misses"] == len(nodes), "la caché no se descartó"
+            print(f"  ✅ Caché descartada: {cache.stats['misses']} nodos leídos de nuevo")
+    finally:
+        await server.stop()
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+================================================================================
+    BENCHMARK: RECORRIDO RECURSIVO vs CRAWLER CONCURRENTE
+
+    Levanta un servidor asyncua local con un address space sintético grande
+    (estaciones x carpetas x variables) y lo recorre con:
+
+    - Recursivo:  get_children() + read_browse_name() por cada hijo
+                  (como list_all_tags.browse_all / search_everything)
+    - Crawler:    address_space_crawler.AddressSpaceCrawler (BFS, Browse en
+                  lote, BrowseNext, DataType en lote, semáforo)
+
+    Nota: el servidor de asyncua no pagina el Browse (ignora
+    RequestedMaxReferencesPerNode), así que aquí no se ejercita BrowseNext.
+
+    Ejecutar con: python benchmark_crawler.py [estaciones] [latencia_ms]
+================================================================================
+"""
+
+import asyncio
+import logging
+import sys
+
+from asyncua import Client, Server, ua
+
+from address_space_crawler import AddressSpaceCrawler
+from benchmark_utils import RequestCounter, Stopwatch
+
+BENCH_URL = "opc.tcp://127.0.0.1:48403"
+NAMESPACE_URI = "urn:Syngenta:APL:CrawlerBenchmark"
+
+STATIONS = 20
+FOLDERS_PER_STATION = 5
+VARIABLES_PER_FOLDER = 20
+LATENCY_MS = 2.0   # Retardo emulado por petición (enlace Jetson -> Optix)
+
+logging.getLogger("asyncua").setLevel(logging.ERROR)
+
+
+async def build_server(stations: int):
+    """Servidor con Objects/Plant/StationNN/FolderN/TagNN."""
+
+    server = Server()
+    await server.init()
+    server.set_endpoint(BENCH_URL)
+    idx = await server.register_namespace(NAMESPACE_URI)
+
+    plant = await server.nodes.objects.add_folder(ua.NodeId("Plant", idx), "Plant")
+    for s in range(stations):
+        station = await plant.add_folder(ua.NodeId(f"Station{s:02d}", idx), f"Station{s:02d}")
+        for f in range(FOLDERS_PER_STATION):
+            folder = await station.add_folder(
+                ua.NodeId(f"Station{s:02d}.Folder{f}", idx), f"Folder{f}"
+            )
+            for v in range(VARIABLES_PER_FOLDER):
+                await folder.add_variable(
+                    ua.NodeId(f"Station{s:02d}.Folder{f}.Tag{v:02d}", idx),
+                    f"Tag{v:02d}", v, ua.VariantType.Int32,
+                )
+    return server, idx
+
+
+async def legacy_browse(node, path="", results=None):
+    """Recorrido recursivo original (un get_children + read_browse_name por hijo)."""
+
+    if results is None:
+        results = []
+    for child in await node.get_children():
+        name = await child.read_browse_name()
+        current_path = f"{path}/{name.Name}" if path else name.Name
+        results.append({"path": current_path, "name": name.Name, "nodeid": str(child.nodeid)})
+        await legacy_browse(child, current_path, results)
+    return results
+
+
+async def run(label, latency_ms, crawl):
+    async with Client(BENCH_URL) as client:
+        counter = RequestCounter(client, latency_ms=latency_ms).install()
+        with Stopwatch() as sw:
+            table = await crawl(client)
+        counter.uninstall()
+
+    print(f"\n▶ {label}")
+    print("-" * 70)
+    print(f"  Nodos: {len(table)}   Tiempo: {sw.ms:9.1f} ms   Peticiones: {counter.total}")
+    for request_type, count in sorted(counter.counts.items()):
+        print(f"    {request_type:<28} {count}")
+    return table, sw.ms
+
+
+async def main():
+    stations = int(sys.argv[1]) if len(sys.argv) > 1 else STATIONS
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else LATENCY_MS
+
+    print("=" * 70)
+    print("📊 BENCHMARK: CRAWLER DEL ADDRESS SPACE")
+    print("=" * 70)
+
+    server, idx = await build_server(stations)
+    total = stations * FOLDERS_PER_STATION * (VARIABLES_PER_FOLDER + 1) + stations + 1
+    print(f"  Address space sintético: {total} nodos bajo Objects/Plant")
+    print(f"  Latencia emulada por petición: {latency_ms} ms")
+
+    plant_id = f"ns={idx};s=Plant"
+
+    async with server:
+        legacy, legacy_ms = await run(
+            "RECURSIVO (get_children + read_browse_name)", latency_ms,
+            lambda client: legacy_browse(client.get_node(plant_id), "Plant"),
+        )
+
+        async def crawl(client):
+            crawler = AddressSpaceCrawler(client)
+            return await crawler.crawl(plant_id, "Plant")
+
+        table, crawler_ms = await run(
+            "CRAWLER (BFS, concurrencia 8)", latency_ms, crawl,
+        )
+
+    same = {row["path"] for row in legacy} == {row["path"] for row in table}
+    typed = sum(1 for row in table if row["data_type"])
+
+    print("\n" + "=" * 70)
+    print("📈 RESUMEN")
+    print("=" * 70)
+    print(f"  Mismos paths en ambos recorridos: {'✓' if same else '✗'}")
+    print(f"  Variables con DataType resuelto: {typed}")
+    print(f"  Aceleración: {legacy_ms / crawler_ms:.1f}x ({legacy_ms:.0f} ms -> {crawler_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
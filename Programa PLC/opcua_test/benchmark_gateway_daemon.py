@@ -0,0 +1,258 @@
+"""
+================================================================================
+    BENCHMARK: EDGE GATEWAY DAEMON CON DECENAS DE ESTACIONES CPS
+
+    Levanta en localhost un servidor con N estaciones (carpeta CPS_NNN con
+    los tags EgComIn_* / EgComOut_* de cada una, MaterialRecord_push como
+    array de Syn_FileWriteOut_Struct) y un EdgeGatewayDaemon con una sola
+    sesión para todas. Una segunda sesión hace de PLC y corre en paralelo,
+    en cada estación, ciclos de:
+
+    - BarcodeReq con un código existente  -> espera EgComIn_UUID_pull
+    - BarcodeReq con un código inexistente -> espera EgComIn_RecordNotFound
+    - UUIDReq                             -> espera EgComIn_UUID_pull
+    - WriteToDb con 3 registros           -> espera WriteToDb_Confirmation
+
+    Reporta handshakes/s, latencia por handshake vista desde el PLC
+    (HandshakeRunner, histogramas HDR exportados a cache/benchmark_handshakes*)
+    y peticiones del daemon (las respuestas de varias estaciones salen en
+    una misma petición Write).
+
+    Ejecutar con: python benchmark_gateway_daemon.py [estaciones] [ciclos]
+================================================================================
+"""
+
+import asyncio
+import logging
+import os
+import sys
+
+from asyncua import Client, Server, ua
+
+from batch_io import BatchIO
+from benchmark_utils import RequestCounter, Stopwatch, print_stats
+from edge_gateway_daemon import NAMESPACE_URI, STATION_TAGS, EdgeGatewayDaemon, station_node_ids
+from gateway_simulator import MATERIAL_RECORD_SLOTS, MATERIAL_RECORD_TYPE
+from handshake import Handshake, HandshakeRunner
+from l5k_datatypes import create_datatypes, parse_l5k_datatypes
+from nodeid_resolver import NodeIdResolver
+from record_store import MemoryRecordStore
+from tag_subscription import TagSubscription
+
+BENCH_URL = "opc.tcp://127.0.0.1:48414"
+STATIONS = 48
+CYCLES = 10
+STORE_LATENCY_MS = 2.0     # Ida y vuelta emulada a la base de datos
+TIMEOUT_S = 10.0
+HISTOGRAM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "benchmark_handshakes")
+
+logging.getLogger("asyncua").setLevel(logging.ERROR)
+logging.getLogger("EdgeGatewayDaemon").setLevel(logging.WARNING)
+
+
+def station_prefix(index: int) -> str:
+    return f"CPS_{index:03d}."
+
+
+def station_name(index: int) -> str:
+    return f"CPS_{index:03d}"
+
+
+async def start_server(stations: int) -> Server:
+    """Servidor con los tags de N estaciones (sin lógica: responde el daemon)."""
+
+    server = Server()
+    await server.init()
+    server.set_endpoint(BENCH_URL)
+    server.set_server_name("Edge Gateway Benchmark")
+    idx = await server.register_namespace(NAMESPACE_URI)
+
+    datatypes = await create_datatypes(server, idx, parse_l5k_datatypes(), [MATERIAL_RECORD_TYPE])
+    await server.load_data_type_definitions()
+    record_type = getattr(ua, MATERIAL_RECORD_TYPE)
+
+    initial = {
+        "BarcodeReq": (False, ua.VariantType.Boolean),
+        "BarcodeValue": ("", ua.VariantType.String),
+        "UUIDReq": (False, ua.VariantType.Boolean),
+        "WriteToDb": (False, ua.VariantType.Boolean),
+        "Heartbeat": (False, ua.VariantType.Boolean),
+        "RecordNotFound": (False, ua.VariantType.Boolean),
+        "UUID_pull": ('{"uuid": "", "timestamp": "", "data": {}}', ua.VariantType.String),
+        "WriteToDb_Confirmation": (False, ua.VariantType.Boolean),
+    }
+
+    objects = server.get_objects_node()
+    for i in range(1, stations + 1):
+        folder = await objects.add_folder(idx, station_name(i))
+        for name, identifier in STATION_TAGS.items():
+            node_id = ua.NodeId(station_prefix(i) + identifier, idx)
+            if name == "MaterialRecord_push":
+                variable = await folder.add_variable(
+                    node_id, identifier,
+                    ua.Variant([record_type() for _ in range(MATERIAL_RECORD_SLOTS)],
+                               ua.VariantType.ExtensionObject),
+                    datatype=datatypes[MATERIAL_RECORD_TYPE],
+                )
+            else:
+                value, variant_type = initial[name]
+                variable = await folder.add_variable(node_id, identifier, value, variant_type)
+            await variable.set_writable()
+
+    await server.start()
+    return server
+
+
+def make_records(station: int, cycle: int) -> list:
+    records = []
+    for slot in range(MATERIAL_RECORD_SLOTS):
+        record = getattr(ua, MATERIAL_RECORD_TYPE)()
+        record.BARCD = f"BC-{station:03d}-{cycle:04d}-{slot}"
+        record.SampleNumber = (station * 10000 + cycle) * 10 + slot
+        record.NetWeight = float(slot + 1)
+        records.append(record)
+    return records
+
+
+def not_(value) -> bool:
+    return not value
+
+
+# Handshakes del PLC (tags sin prefijo; run() antepone "<estación>/")
+BARCODE_FOUND = Handshake("BarcodeReq", ["UUID_pull"], lambda changes: changes.get("UUID_pull"),
+                          timeout=TIMEOUT_S, name="BarcodeReq")
+BARCODE_NOT_FOUND = Handshake("BarcodeReq", ["RecordNotFound"], lambda changes: changes.get("RecordNotFound") or None,
+                              timeout=TIMEOUT_S, name="RecordNotFound", release={"RecordNotFound": not_})
+UUID_REQUEST = Handshake("UUIDReq", ["UUID_pull"], lambda changes: changes.get("UUID_pull"), timeout=TIMEOUT_S)
+WRITE_TO_DB = Handshake("WriteToDb", ["WriteToDb_Confirmation"],
+                        lambda changes: changes.get("WriteToDb_Confirmation") or None,
+                        timeout=TIMEOUT_S, release={"WriteToDb_Confirmation": not_})
+
+
+class PlcDriver:
+    """Sesión que emula los PLC de todas las estaciones."""
+
+    def __init__(self, stations: int):
+        self.stations = stations
+        self.client = Client(url=BENCH_URL)
+        self.batch = None
+        self.subscription = None
+        self.handshakes = None
+        self.node_ids = {}
+
+    async def connect(self):
+        await self.client.connect()
+        await self.client.load_data_type_definitions()
+        specs = {
+            (i, name): node_id
+            for i in range(1, self.stations + 1)
+            for name, node_id in station_node_ids(station_prefix(i)).items()
+        }
+        for (i, name), node_id in (await NodeIdResolver(self.client, BENCH_URL).resolve(specs)).items():
+            self.node_ids.setdefault(i, {})[name] = node_id
+        self.batch = BatchIO(self.client)
+        await self.batch.load_limits()
+        self.subscription = TagSubscription(self.client, publishing_interval=10)
+        await self.subscription.start({
+            f"{i}/{name}": node_ids[name]
+            for i, node_ids in self.node_ids.items()
+            for name in ("RecordNotFound", "UUID_pull", "WriteToDb_Confirmation")
+        })
+        self.handshakes = HandshakeRunner(self.write_tags, self.subscription)
+
+    async def disconnect(self):
+        await self.subscription.stop()
+        await self.client.disconnect()
+
+    async def write_tags(self, values: dict) -> dict:
+        """Escribe {"<estación>/<tag>": valor} en una sola petición."""
+
+        targets = []
+        for tag in values:
+            station, name = tag.split("/")
+            targets.append(self.node_ids[int(station)][name])
+        return dict(zip(values, await self.batch.write(list(zip(targets, values.values())))))
+
+    async def run_station(self, station: int, cycles: int):
+        prefix = f"{station}/"
+        for cycle in range(cycles):
+            # Código existente -> UUID_pull
+            barcode = f"BC-{station:03d}-{cycle:04d}"
+            value = await self.handshakes.run(BARCODE_FOUND, {"BarcodeValue": barcode}, prefix)
+            assert barcode in value, value
+
+            # Código inexistente -> RecordNotFound (y se limpia al bajar el request)
+            await self.handshakes.run(BARCODE_NOT_FOUND, {"BarcodeValue": f"XX-{station:03d}-{cycle:04d}"}, prefix)
+
+            # UUID nuevo
+            await self.handshakes.run(UUID_REQUEST, prefix=prefix)
+
+            # WriteToDb con MaterialRecord_push completo
+            await self.write_tags({prefix + "MaterialRecord_push": ua.Variant(make_records(station, cycle))})
+            await self.handshakes.run(WRITE_TO_DB, prefix=prefix)
+
+
+async def main():
+    stations = int(sys.argv[1]) if len(sys.argv) > 1 else STATIONS
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else CYCLES
+
+    print("=" * 70)
+    print("📊 BENCHMARK: EDGE GATEWAY DAEMON (una sesión, N estaciones)")
+    print("=" * 70)
+    print(f"  Servidor: {BENCH_URL}   Estaciones: {stations}   Ciclos: {cycles}   "
+          f"Latencia del store: {STORE_LATENCY_MS} ms")
+
+    records = {
+        f"BC-{i:03d}-{c:04d}": {"BARCD": f"BC-{i:03d}-{c:04d}", "ContainerUUID": f"uuid-{i:03d}-{c:04d}"}
+        for i in range(1, stations + 1) for c in range(cycles)
+    }
+    store = MemoryRecordStore(records, latency_ms=STORE_LATENCY_MS)
+
+    with Stopwatch() as sw:
+        server = await start_server(stations)
+    print(f"  Servidor listo en {sw.ms:.0f} ms ({stations * len(STATION_TAGS)} variables)")
+
+    daemon = EdgeGatewayDaemon(
+        BENCH_URL, {station_name(i): station_prefix(i) for i in range(1, stations + 1)}, store,
+        publishing_interval=10,
+    )
+    plc = PlcDriver(stations)
+    try:
+        with Stopwatch() as sw:
+            await daemon.start()
+        print(f"  Daemon listo en {sw.ms:.0f} ms")
+        counter = RequestCounter(daemon.client).install()
+        await plc.connect()
+
+        with Stopwatch() as sw:
+            await asyncio.gather(*(plc.run_station(i, cycles) for i in range(1, stations + 1)))
+
+        handshakes = sum(plc.handshakes.completed.values())
+        stats = daemon.stats()
+        assert stats["errors"] == 0, stats
+        assert len(store.saved) == stations * cycles * MATERIAL_RECORD_SLOTS
+        assert stats["not_found"] == stations * cycles
+
+        print(f"\n▶ {handshakes} handshakes en {sw.ms / 1000:.2f} s: "
+              f"{handshakes / (sw.ms / 1000):,.0f} handshakes/s")
+        print("-" * 70)
+        plc.handshakes.print_stats()
+        print_stats("Daemon (cambio -> respuesta)", stats["latencies_ms"])
+
+        writes = counter.counts.get("WriteRequest", 0)
+        print(f"\n  Peticiones del daemon: {dict(counter.counts)}")
+        print(f"  Respuestas escritas: {stats['written_items']} valores en {stats['write_requests']} "
+              f"peticiones Write ({stats['written_items'] / max(1, stats['write_requests']):.1f} por petición)")
+        print(f"  Write / handshake: {writes / handshakes:.2f}")
+        counter.uninstall()
+
+        files = plc.handshakes.export(HISTOGRAM_PATH)
+        print(f"\n  Histogramas exportados: {', '.join(os.path.basename(f) for f in files)}")
+    finally:
+        await plc.disconnect()
+        await daemon.stop()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+"""
+================================================================================
+    BENCHMARK: HISTORIAN (historian.py)
+
+    Sin servidor: genera cambios sintéticos de una planta y los pasa por
+    Historian.record() tal como llegarían de la suscripción.
+
+    - REAL: random walk (banda muerta + swinging door)
+    - DINT: contadores
+    - BOOL: toggles
+    - Texto: UUIDs de un conjunto pequeño (diccionario por bloque)
+
+    Reporta cambios/s en un núcleo (filtros + volcados incluidos), bytes por
+    punto frente al formato crudo (t 8 + valor 8 + calidad 4 = 20 bytes),
+    error máximo de la interpolación swinging door y el tiempo de consulta de
+    un tag frente a decodificar todos los segmentos.
+
+    Ejecutar con: python benchmark_historian.py [cambios]
+================================================================================
+"""
+
+import random
+import shutil
+import sys
+import tempfile
+import uuid
+from bisect import bisect_right
+
+from benchmark_utils import Stopwatch
+from historian import FLUSH_POINTS, Historian, SegmentStore, decode_block
+
+CHANGES = 1_000_000
+SEED = 1
+
+REAL_TAGS, INT_TAGS, BOOL_TAGS, TEXT_TAGS = 120, 40, 30, 10
+RATE_HZ = 5000               # Cambios/s simulados de toda la planta
+DEADBAND = 0.01
+DEVIATION = 0.05
+RAW_POINT_BYTES = 20
+
+
+def generate(changes: int) -> list:
+    """[(nombre, valor, t_µs)] intercalados en el tiempo."""
+
+    rng = random.Random(SEED)
+    names = ([f"Real_{i:03d}" for i in range(REAL_TAGS)] + [f"Counter_{i:03d}" for i in range(INT_TAGS)] +
+             [f"Bool_{i:03d}" for i in range(BOOL_TAGS)] + [f"Text_{i:03d}" for i in range(TEXT_TAGS)])
+    state = {name: 0.0 if name.startswith("Real") else 0 for name in names}
+    for name in names:
+        if name.startswith("Bool"):
+            state[name] = False
+    words = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(16)]
+
+    step = 1_000_000 // RATE_HZ
+    t = 1_760_000_000_000_000
+    events = []
+    for _ in range(changes):
+        t += step
+        name = names[rng.randrange(len(names))]
+        kind = name[0]
+        if kind == "R":
+            state[name] += rng.gauss(0.0, 0.02)
+        elif kind == "C":
+            state[name] += 1
+        elif kind == "B":
+            state[name] = not state[name]
+        else:
+            state[name] = words[rng.randrange(len(words))]
+        events.append((name, state[name], t))
+    return events
+
+
+def max_interpolation_error(events: list, series) -> float:
+    """Error máximo al reconstruir un tag REAL interpolando lo archivado."""
+
+    times, values = series.times, series.values
+    worst = 0.0
+    for t, value in events:
+        i = bisect_right(times, t)
+        if i == 0 or i == len(times):
+            continue
+        t0, t1 = times[i - 1], times[i]
+        v0, v1 = values[i - 1], values[i]
+        estimate = v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+        worst = max(worst, abs(estimate - value))
+    return worst
+
+
+def main():
+    changes = int(sys.argv[1]) if len(sys.argv) > 1 else CHANGES
+
+    print("=" * 70)
+    print("📊 BENCHMARK: HISTORIAN")
+    print("=" * 70)
+    print(f"  {changes:,} cambios, {REAL_TAGS + INT_TAGS + BOOL_TAGS + TEXT_TAGS} tags, "
+          f"volcado cada {FLUSH_POINTS:,} puntos archivados")
+
+    events = generate(changes)
+    directory = tempfile.mkdtemp(prefix="historian_bench_")
+    try:
+        tags = {f"Real_{i:03d}": {"deadband": DEADBAND, "deviation": DEVIATION} for i in range(REAL_TAGS)}
+        historian = Historian(SegmentStore(directory), tags)
+        record = historian.record
+
+        with Stopwatch() as ingest:
+            for name, value, t in events:
+                record(name, value, t)
+            historian.flush_sync(final=True)
+
+        stats = historian.store.stats()
+        rate = changes / (ingest.ms / 1000)
+        print("\n▶ Ingesta (record + filtros + volcado)")
+        print("-" * 70)
+        print(f"  {ingest.ms / 1000:.2f} s   {rate:,.0f} cambios/s   "
+              f"({changes / RATE_HZ:,.0f} s de planta a {RATE_HZ} cambios/s)")
+        print(f"  Archivados: {historian.archived:,} de {historian.received:,} "
+              f"({historian.archived / historian.received:.1%})   Segmentos: {stats['segments']}")
+        print(f"  Disco: {stats['bytes']:,} bytes = {stats['bytes'] / historian.archived:.2f} bytes/punto "
+              f"(crudo {RAW_POINT_BYTES}: {RAW_POINT_BYTES * historian.received / stats['bytes']:.1f}x "
+              f"sobre los cambios recibidos)")
+
+        tag = "Real_000"
+        reopened = SegmentStore(directory)
+        with Stopwatch() as one:
+            series = reopened.query(tag)
+        first, last = series.times[0], series.times[-1]
+        with Stopwatch() as window:
+            part = reopened.query(tag, first + (last - first) // 2, first + (last - first) // 2 + 60_000_000)
+        with Stopwatch() as scan:
+            decoded = 0
+            for blocks in reopened.blocks.values():
+                for _, _, path, offset, size, _ in blocks:
+                    with open(path, "rb") as f:
+                        f.seek(offset)
+                        decoded += len(decode_block(f.read(size))[2])
+
+        print("\n▶ Consultas (almacén reabierto desde disco)")
+        print("-" * 70)
+        print(f"  {tag} completo:        {one.ms:8.2f} ms   {len(series):,} puntos")
+        print(f"  {tag} ventana de 60 s: {window.ms:8.2f} ms   {len(part):,} puntos")
+        print(f"  Decodificar todo:      {scan.ms:8.2f} ms   {decoded:,} puntos")
+
+        original = [(t, value) for name, value, t in events if name == tag]
+        print("\n▶ Swinging door")
+        print("-" * 70)
+        print(f"  {tag}: {len(original):,} cambios -> {len(series):,} puntos, error máximo "
+              f"{max_interpolation_error(original, series):.4f} (desviación {DEVIATION}, banda muerta {DEADBAND})")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
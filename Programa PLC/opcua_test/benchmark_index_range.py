@@ -0,0 +1,127 @@
+"""
+================================================================================
+    BENCHMARK: ARRAY COMPLETO vs IndexRange EN MaterialRecord_push
+
+    Levanta gateway_simulator.py en localhost con MaterialRecord_push de
+    3 slots (como el PLC) y de 32. Un GatewayClient "PLC" escribe un
+    registro nuevo por slot (write_tag con index_range) cada pocos ciclos;
+    el lector, en cada ciclo:
+
+    - Antes:   read_tag("MaterialRecord_push") del array completo y
+               comparación con el anterior
+    - Después: array_cursor().poll(): un slot por ciclo sin novedades,
+               sólo los slots nuevos cuando los hay
+
+    Reporta bytes recibidos por ciclo, peticiones y ms por ciclo, y
+    verifica que ambos lectores ven los mismos registros en orden.
+
+    Ejecutar con: python benchmark_index_range.py [ciclos]
+================================================================================
+"""
+
+import asyncio
+import logging
+import sys
+
+from asyncua import ua
+
+from benchmark_utils import RequestCounter, Stopwatch
+from gateway_client import GatewayClient
+from gateway_simulator import MATERIAL_RECORD_TYPE, GatewaySimulator
+
+BENCH_URL = "opc.tcp://127.0.0.1:48413"
+CYCLES = 300
+APPEND_EVERY = 5          # Un registro nuevo cada 5 ciclos del lector
+SLOT_COUNTS = (3, 32)
+
+logging.getLogger("asyncua").setLevel(logging.ERROR)
+logging.getLogger("GatewayClient").setLevel(logging.WARNING)
+logging.getLogger("GatewaySimulator").setLevel(logging.WARNING)
+
+
+def make_record(sample: int):
+    record = getattr(ua, MATERIAL_RECORD_TYPE)()
+    record.BARCD = f"BC-{sample:06d}"
+    record.ContainerUUID = f"00000000-0000-0000-0000-{sample:012d}"
+    record.SampleNumber = sample
+    record.NetWeight = float(sample % 1000)
+    return record
+
+
+async def run(slots: int, cycles: int):
+    simulator = GatewaySimulator(BENCH_URL, material_record_slots=slots)
+    await simulator.start_background()
+    plc = GatewayClient(BENCH_URL, use_subscriptions=False)
+    full = GatewayClient(BENCH_URL, use_subscriptions=False)
+    partial = GatewayClient(BENCH_URL, use_subscriptions=False)
+    try:
+        for client in (plc, full, partial):
+            if not await client.connect():
+                raise RuntimeError(f"No se pudo conectar a {BENCH_URL}")
+
+        single = await partial.read_tag("MaterialRecord_push", index_range="1")
+        assert type(single).__name__ == MATERIAL_RECORD_TYPE
+
+        cursor = partial.array_cursor("MaterialRecord_push", key=lambda record: record.SampleNumber)
+        await cursor.sync()
+        previous = await full.read_tag("MaterialRecord_push")
+
+        counters = {
+            "full": RequestCounter(full.client).install(),
+            "cursor": RequestCounter(partial.client).install(),
+        }
+        seen = {"full": [], "cursor": []}
+        elapsed = {"full": 0.0, "cursor": 0.0}
+        sample, slot = 0, 0
+
+        for cycle in range(cycles):
+            if cycle % APPEND_EVERY == 0:
+                sample += 1
+                assert await plc.write_tag("MaterialRecord_push", make_record(sample), index_range=str(slot))
+                slot = (slot + 1) % slots
+
+            with Stopwatch() as sw:
+                current = await full.read_tag("MaterialRecord_push")
+                for i, record in enumerate(current):
+                    if record != previous[i]:
+                        seen["full"].append(record.SampleNumber)
+                previous = current
+            elapsed["full"] += sw.ms
+
+            with Stopwatch() as sw:
+                for _, record in sorted((r.SampleNumber, r) for r in (await cursor.poll()).values()):
+                    seen["cursor"].append(record.SampleNumber)
+            elapsed["cursor"] += sw.ms
+
+        assert seen["full"] == seen["cursor"] == list(range(1, sample + 1)), seen
+
+        print(f"\n▶ MaterialRecord_push[{slots}]: {cycles} ciclos, {sample} registros nuevos "
+              f"(uno cada {APPEND_EVERY} ciclos)")
+        print("-" * 70)
+        for label, key in (("Antes:   array completo", "full"), ("Después: cursor IndexRange", "cursor")):
+            counter = counters[key]
+            print(f"  {label:<28} {counter.bytes_received / cycles:9,.0f} bytes/ciclo   "
+                  f"{counter.total / cycles:5.2f} peticiones/ciclo   {elapsed[key] / cycles:6.2f} ms/ciclo")
+        ratio = counters["full"].bytes_received / counters["cursor"].bytes_received
+        print(f"  Bytes: {ratio:.1f}x menos con el cursor")
+        for counter in counters.values():
+            counter.uninstall()
+    finally:
+        for client in (plc, full, partial):
+            await client.disconnect()
+        await simulator.stop()
+
+
+async def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else CYCLES
+
+    print("=" * 70)
+    print("📊 BENCHMARK: ARRAY COMPLETO vs IndexRange (MaterialRecord_push)")
+    print("=" * 70)
+    print(f"  Simulador: {BENCH_URL}")
+    for slots in SLOT_COUNTS:
+        await run(slots, cycles)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
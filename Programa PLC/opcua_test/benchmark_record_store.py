@@ -0,0 +1,192 @@
+"""
+================================================================================
+    BENCHMARK: LOOKUP DE BARCODES EN EL ALMACÉN DE REGISTROS
+
+    Genera (una vez) cache/benchmark_records.db con N registros sintéticos
+    de MaterialRecord (generate_records, 1.000.000 por defecto) y simula el
+    flujo de escaneos de la planta: ESTACIONES lectores escaneando cada
+    SCAN_INTERVAL_S, cada contenedor pasa por PASSES estaciones (el mismo
+    código se vuelve a leer) y un MISREAD_RATE de lecturas son etiquetas
+    ilegibles que el operador reintenta.
+
+    - Antes:   SELECT sin índice (NOT INDEXED, recorrido completo)
+    - Después: SQLiteRecordStore (índice único sobre BARCD, WAL)
+    - Después: CachedRecordStore (LRU/TTL + caché negativa) delante
+
+    Reporta p50/p99 de lookup al ritmo de la planta y lookups/s máximos.
+
+    Ejecutar con: python benchmark_record_store.py [registros] [segundos]
+================================================================================
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+from benchmark_utils import Stopwatch, print_stats
+from record_store import (CachedRecordStore, RecordNotFound, SQLiteRecordStore,
+                          barcode_for, generate_records)
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "benchmark_records.db")
+RECORDS = 1000000
+DURATION_S = 10.0
+STATIONS = 48
+SCAN_INTERVAL_S = 0.5      # Por estación: ~96 escaneos/s en total
+PASSES = 4                 # Estaciones por las que pasa cada contenedor
+MISREAD_RATE = 0.05
+MISREAD_RETRIES = 3
+SCAN_SAMPLES = 20          # Lookups sin índice (cada uno recorre la tabla)
+SEED = 7
+
+
+def scan_stream(records: int, seed: int = SEED):
+    """Códigos escaneados en el orden en que llegan a los lectores."""
+
+    rng = random.Random(seed)
+    recent = []
+    while True:
+        if rng.random() < MISREAD_RATE:
+            bad = f"??{rng.randrange(10**8):08d}"
+            for _ in range(MISREAD_RETRIES):
+                yield bad
+            continue
+        # Un contenedor que ya pasó por otra estación o uno nuevo
+        if recent and rng.random() < (PASSES - 1) / PASSES:
+            yield recent[rng.randrange(len(recent))]
+        else:
+            barcode = barcode_for(rng.randrange(records))
+            recent.append(barcode)
+            del recent[:-STATIONS * 2]
+            yield barcode
+
+
+async def prepare(records: int) -> float:
+    """Crea la base si no existe con ese número de registros; retorna segundos."""
+
+    store = SQLiteRecordStore(DB_PATH)
+    try:
+        if await store.count() == records:
+            return 0.0
+    finally:
+        await store.close()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    store = SQLiteRecordStore(DB_PATH)
+    try:
+        with Stopwatch() as sw:
+            await store.insert(generate_records(records))
+    finally:
+        await store.close()
+    return sw.ms / 1000
+
+
+async def timed_lookup(store, barcode: str, latencies: list):
+    start = time.perf_counter()
+    try:
+        await store.lookup(barcode)
+        found = True
+    except RecordNotFound:
+        found = False
+    latencies.append((time.perf_counter() - start) * 1000)
+    return found
+
+
+async def paced(store, records: int, duration: float) -> list:
+    """ESTACIONES lectores al ritmo de la planta durante `duration` segundos."""
+
+    stream = scan_stream(records)
+    latencies = []
+    end = time.monotonic() + duration
+
+    async def station(index: int):
+        # Desfasadas para que no escaneen todas en el mismo instante
+        await asyncio.sleep(SCAN_INTERVAL_S * index / STATIONS)
+        next_scan = time.monotonic()
+        while next_scan < end:
+            await timed_lookup(store, next(stream), latencies)
+            next_scan += SCAN_INTERVAL_S
+            await asyncio.sleep(max(0.0, next_scan - time.monotonic()))
+
+    await asyncio.gather(*(station(i) for i in range(STATIONS)))
+    return latencies
+
+
+async def flat_out(store, records: int, duration: float) -> float:
+    """Lookups/s con ESTACIONES consultas siempre en vuelo."""
+
+    stream = scan_stream(records, seed=SEED + 1)
+    latencies = []
+    end = time.monotonic() + duration
+
+    async def worker():
+        while time.monotonic() < end:
+            await timed_lookup(store, next(stream), latencies)
+
+    with Stopwatch() as sw:
+        await asyncio.gather(*(worker() for _ in range(STATIONS)))
+    return len(latencies) / (sw.ms / 1000)
+
+
+async def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else DURATION_S
+
+    print("=" * 70)
+    print("📊 BENCHMARK: LOOKUP DE BARCODES (SQLite + caché LRU/TTL)")
+    print("=" * 70)
+
+    seconds = await prepare(records)
+    size = sum(os.path.getsize(DB_PATH + s) for s in ("", "-wal") if os.path.exists(DB_PATH + s))
+    print(f"  Base: {DB_PATH}")
+    print(f"  {records:,} registros, {size / 2**20:.0f} MB"
+          + (f", generados en {seconds:.1f} s ({records / seconds:,.0f}/s)" if seconds else " (reutilizada)"))
+    print(f"  Planta: {STATIONS} estaciones cada {SCAN_INTERVAL_S} s "
+          f"(~{STATIONS / SCAN_INTERVAL_S:.0f} escaneos/s), {PASSES} pasadas por contenedor, "
+          f"{MISREAD_RATE:.0%} ilegibles x{MISREAD_RETRIES}")
+
+    print(f"\n▶ Antes: sin índice ({SCAN_SAMPLES} lookups, recorrido completo)")
+    print("-" * 70)
+    store = SQLiteRecordStore(DB_PATH, use_index=False)
+    latencies = []
+    try:
+        stream = scan_stream(records)
+        for _ in range(SCAN_SAMPLES):
+            await timed_lookup(store, next(stream), latencies)
+    finally:
+        await store.close()
+    print_stats("NOT INDEXED", latencies)
+
+    results = {}
+    for label, make in (
+        ("SQLite indexado", lambda: SQLiteRecordStore(DB_PATH)),
+        ("SQLite + LRU/TTL", lambda: CachedRecordStore(SQLiteRecordStore(DB_PATH))),
+    ):
+        print(f"\n▶ Después: {label} ({duration:.0f} s al ritmo de la planta)")
+        print("-" * 70)
+        store = make()
+        try:
+            await store.lookup(barcode_for(0))          # Abre la conexión
+            latencies = await paced(store, records, duration)
+            print_stats(label, latencies)
+            if isinstance(store, CachedRecordStore):
+                stats = store.stats
+                total = stats["hits"] + stats["negative_hits"] + stats["misses"]
+                print(f"  Caché: {stats['hits'] / total:.0%} aciertos, "
+                      f"{stats['negative_hits'] / total:.0%} RecordNotFound desde caché, "
+                      f"{stats['misses'] / total:.0%} al backend")
+            results[label] = await flat_out(store, records, min(duration, 3.0))
+        finally:
+            await store.close()
+
+    print("\n▶ Máximo (48 consultas siempre en vuelo)")
+    print("-" * 70)
+    for label, rate in results.items():
+        print(f"  {label:<28} {rate:10,.0f} lookups/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
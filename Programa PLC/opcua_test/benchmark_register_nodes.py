@@ -0,0 +1,269 @@
+"""
+================================================================================
+    BENCHMARK: TAGS DEL HANDSHAKE CON Y SIN RegisterNodes
+
+    Tráfico por ciclo del handshake: un Read de los 4 EgComIn (Heartbeat,
+    RecordNotFound, WriteToDb_Confirmation, UUID_pull) y un Write de los 4
+    EgComOut (BarcodeReq, BarcodeValue, UUIDReq, WriteToDb).
+
+    1. GatewayClient contra gateway_simulator.py local, con hot_tags=()
+       (NodeIds completos) y con HOT_TAGS registrados: bytes de petición,
+       ms por ciclo y tiempo del lado del servidor (attribute_service).
+       El servidor de asyncua no implementa RegisterNodes (devuelve los
+       mismos NodeIds), así que acá sólo se verifica el camino: un
+       RegisterNodes por sesión y de nuevo tras una caída (modo resilient).
+    2. Servidor local con los 8 tags en las tres formas de NodeId de los
+       equipos: string largo de Rockwell (ns=6;s=Program:EdgeGateway...),
+       GUID de Optix y numérico, que es lo que devuelve RegisterNodes en un
+       servidor que lo implementa. Mismo ciclo con cada forma.
+
+    Ejecutar con: python benchmark_register_nodes.py [ciclos]
+================================================================================
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import sys
+import time
+import uuid
+
+from asyncua import Client, Server, ua
+
+from batch_io import to_nodeid
+from benchmark_utils import RequestCounter, Stopwatch, print_stats
+from gateway_client import HOT_TAGS, GatewayClient
+from gateway_simulator import GatewaySimulator
+
+SIMULATOR_URL = "opc.tcp://127.0.0.1:48423"
+FORMS_URL = "opc.tcp://127.0.0.1:48424"
+CYCLES = 500
+RECONNECT_TIMEOUT_S = 10.0
+
+IN_TAGS = ["Heartbeat", "RecordNotFound", "WriteToDb_Confirmation", "UUID_pull"]
+OUT_VALUES = {"BarcodeReq": False, "BarcodeValue": "BC-000000", "UUIDReq": False, "WriteToDb": False}
+
+# Misma variable con el NodeId de cada equipo
+ROCKWELL_PREFIX = "Program:EdgeGateway.EdComm"
+NUMERIC_BASE = 50000
+
+logging.getLogger("asyncua").setLevel(logging.CRITICAL)
+logging.getLogger("GatewayClient").setLevel(logging.WARNING)
+logging.getLogger("GatewaySimulator").setLevel(logging.WARNING)
+logging.getLogger("SessionManager").setLevel(logging.ERROR)
+logging.getLogger("TypeDefinitionCache").setLevel(logging.WARNING)
+
+
+class ServerTimer:
+    """Mide el tiempo de Read/Write dentro del attribute_service del servidor."""
+
+    def __init__(self, server):
+        self.service = server.iserver.attribute_service
+        self.read, self.write = self.service.read, self.service.write
+        self.ms = {"Read": [], "Write": []}
+        timer = self
+
+        def read(params):
+            start = time.perf_counter()
+            try:
+                return timer.read(params)
+            finally:
+                timer.ms["Read"].append((time.perf_counter() - start) * 1000)
+
+        async def write(params, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await timer.write(params, *args, **kwargs)
+            finally:
+                timer.ms["Write"].append((time.perf_counter() - start) * 1000)
+
+        self.service.read, self.service.write = read, write
+
+    def reset(self):
+        for values in self.ms.values():
+            values.clear()
+
+    def uninstall(self):
+        self.service.read, self.service.write = self.read, self.write
+
+
+def report(label, counter, cycles, elapsed_ms, timer):
+    sent = counter.bytes_sent
+    print(f"  {label}")
+    print(f"    Petición Read  {sent['ReadRequest'] / cycles:6.0f} bytes   "
+          f"Write {sent['WriteRequest'] / cycles:6.0f} bytes   "
+          f"{counter.total / cycles:.2f} peticiones/ciclo   {elapsed_ms / cycles:6.3f} ms/ciclo")
+    print_stats("    Servidor: Read", timer.ms["Read"])
+    print_stats("    Servidor: Write", timer.ms["Write"])
+    return (sent["ReadRequest"] + sent["WriteRequest"]) / cycles
+
+
+# ============================================================================
+# 1. GatewayClient CONTRA EL SIMULADOR
+# ============================================================================
+
+def count_registrations(gateway):
+    """Envuelve register_hot_tags() de la instancia y cuenta las llamadas."""
+
+    calls = []
+    original = gateway.register_hot_tags
+
+    async def register_hot_tags():
+        calls.append(time.monotonic())
+        return await original()
+
+    gateway.register_hot_tags = register_hot_tags
+    return calls
+
+
+async def gateway_cycles(gateway, timer, cycles):
+    counter = RequestCounter(gateway.client, measure_sent=True).install()
+    timer.reset()
+    try:
+        with Stopwatch() as sw:
+            for cycle in range(cycles):
+                values = await gateway.read_tags(IN_TAGS)
+                assert set(values) == set(IN_TAGS)
+                assert await gateway.write_tags({**OUT_VALUES, "BarcodeValue": f"BC-{cycle:06d}"})
+    finally:
+        counter.uninstall()
+    return counter, sw.ms
+
+
+async def run_gateway(cycles):
+    print("\n▶ GatewayClient contra gateway_simulator.py")
+    print("-" * 70)
+    simulator = GatewaySimulator(SIMULATOR_URL)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await simulator.start_background()
+    timer = ServerTimer(simulator.server)
+    try:
+        for label, hot_tags in (("Antes:   NodeIds completos", ()), ("Después: HOT_TAGS registrados", HOT_TAGS)):
+            gateway = GatewayClient(SIMULATOR_URL, use_subscriptions=False, hot_tags=hot_tags)
+            registrations = count_registrations(gateway)
+            assert await gateway.connect(), f"No se pudo conectar a {SIMULATOR_URL}"
+            try:
+                assert len(registrations) == 1
+                assert len(gateway.registered) == len(hot_tags)
+                counter, elapsed = await gateway_cycles(gateway, timer, cycles)
+                report(label, counter, cycles, elapsed, timer)
+                if hot_tags:
+                    same = sum(gateway.registered[name] == to_nodeid(gateway.node_ids[name]) for name in hot_tags)
+                    print(f"    RegisterNodes devolvió {same}/{len(hot_tags)} NodeIds sin cambios "
+                          f"(el servidor de asyncua no lo implementa)")
+            finally:
+                await gateway.disconnect()
+
+        # Re-registro tras una caída: los NodeIds registrados mueren con la sesión
+        gateway = GatewayClient(SIMULATOR_URL, use_subscriptions=False, resilient=True)
+        registrations = count_registrations(gateway)
+        assert await gateway.connect()
+        try:
+            gateway.client.disconnect_socket()
+            deadline = time.monotonic() + RECONNECT_TIMEOUT_S
+            while len(registrations) < 2:
+                assert time.monotonic() < deadline, "no se volvieron a registrar los tags"
+                await asyncio.sleep(0.05)
+            await gateway.session.wait_connected(RECONNECT_TIMEOUT_S)
+            assert set(gateway.registered) == set(HOT_TAGS)
+            assert await gateway.write_tags(OUT_VALUES)
+            values = await gateway.read_tags(IN_TAGS)
+            assert set(values) == set(IN_TAGS)
+            print(f"  ✅ Caída forzada: {gateway.session.stats['reconnects']} reconexión, "
+                  f"{len(registrations)} RegisterNodes (uno por sesión), handshake OK")
+        finally:
+            await gateway.disconnect()
+    finally:
+        timer.uninstall()
+        await simulator.stop()
+
+
+# ============================================================================
+# 2. FORMAS DE NodeId DE LOS EQUIPOS
+# ============================================================================
+
+def node_id_forms(ns):
+    """{forma: {tag: NodeId}} para los 8 tags del handshake."""
+
+    rockwell, optix, numeric = {}, {}, {}
+    for i, name in enumerate(HOT_TAGS):
+        direction = "In" if name in IN_TAGS else "Out"
+        rockwell[name] = ua.NodeId(f"{ROCKWELL_PREFIX}{direction}.{name}", ns)
+        optix[name] = ua.NodeId(uuid.uuid5(uuid.NAMESPACE_URL, name), ns, ua.NodeIdType.Guid)
+        numeric[name] = ua.NodeId(NUMERIC_BASE + i, ns)
+    return {
+        "Rockwell: string largo": rockwell,
+        "Optix: GUID": optix,
+        "Registrado: numérico": numeric,
+    }
+
+
+async def run_forms(cycles):
+    print("\n▶ Formas de NodeId (mismo ciclo en un servidor local)")
+    print("-" * 70)
+    server = Server()
+    await server.init()
+    server.set_endpoint(FORMS_URL)
+    ns = await server.register_namespace("urn:benchmark:register_nodes")
+    forms = node_id_forms(ns)
+    for node_ids in forms.values():
+        for name, node_id in node_ids.items():
+            value = OUT_VALUES.get(name, False)
+            variable = await server.nodes.objects.add_variable(node_id, f"{ns}:{node_id.to_string()}", value)
+            await variable.set_writable()
+
+    results = {}
+    async with server:
+        timer = ServerTimer(server)
+        async with Client(FORMS_URL, watchdog_intervall=10.0) as client:
+            for label, node_ids in forms.items():
+                example = node_ids["Heartbeat"].to_string()
+                reads = ua.ReadParameters()
+                for name in IN_TAGS:
+                    rv = ua.ReadValueId()
+                    rv.NodeId = node_ids[name]
+                    rv.AttributeId = ua.AttributeIds.Value
+                    reads.NodesToRead.append(rv)
+
+                counter = RequestCounter(client, measure_sent=True).install()
+                timer.reset()
+                with Stopwatch() as sw:
+                    for cycle in range(cycles):
+                        data_values = await client.uaclient.read(reads)
+                        assert all(dv.StatusCode.is_good() for dv in data_values)
+                        writes = ua.WriteParameters()
+                        for name, value in OUT_VALUES.items():
+                            if name == "BarcodeValue":
+                                value = f"BC-{cycle:06d}"
+                            wv = ua.WriteValue()
+                            wv.NodeId = node_ids[name]
+                            wv.AttributeId = ua.AttributeIds.Value
+                            wv.Value = ua.DataValue(ua.Variant(value))
+                            writes.NodesToWrite.append(wv)
+                        status_codes = await client.uaclient.write(writes)
+                        assert all(status.is_good() for status in status_codes)
+                counter.uninstall()
+                results[label] = report(f"{label} ({example})", counter, cycles, sw.ms, timer)
+        timer.uninstall()
+
+    numeric = results["Registrado: numérico"]
+    for label, size in results.items():
+        if size != numeric:
+            print(f"  {label}: {size:.0f} -> {numeric:.0f} bytes/ciclo registrado "
+                  f"({(1 - numeric / size) * 100:.0f}% menos)")
+
+
+async def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else CYCLES
+
+    print("=" * 70)
+    print("📊 BENCHMARK: RegisterNodes EN LOS TAGS DEL HANDSHAKE")
+    print("=" * 70)
+    print(f"  {cycles} ciclos: Read de {len(IN_TAGS)} tags + Write de {len(OUT_VALUES)} tags")
+    await run_gateway(cycles)
+    await run_forms(cycles)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,178 @@
+"""
+================================================================================
+    BENCHMARK: LATENCIA DE RESPUESTA DEL GATEWAY SIMULATOR
+
+    Levanta gateway_simulator.py en localhost y mide, desde un cliente:
+
+    1. Request -> respuesta: escribe el request (BarcodeReq con BarcodeValue,
+       UUIDReq, WriteToDb) y lee la respuesta sin pausas hasta verla
+       (RecordNotFound, UUID_pull, WriteToDb_Confirmation). Incluye un
+       Write y al menos un Read de ida y vuelta. Después baja el request y
+       mide también el reset de la respuesta.
+    2. Pulsos: baja y vuelve a subir UUIDReq sin esperar; cada flanco debe
+       generar un UUID nuevo (con muestreo cada 100 ms se perdían).
+    3. Heartbeat: periodo y deriva acumulada de EgComIn_Heartbeat
+       (suscripción con publishing de 10 ms).
+
+    Ejecutar con: python benchmark_simulator_latency.py [iteraciones] [segundos_heartbeat]
+================================================================================
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import sys
+import time
+
+from asyncua import Client
+
+from benchmark_utils import Stopwatch, print_stats
+from gateway_simulator import HEARTBEAT_PERIOD_S, GatewaySimulator
+from tag_subscription import TagSubscription
+
+BENCH_URL = "opc.tcp://127.0.0.1:48417"
+ITERATIONS = 50
+HEARTBEAT_S = 10.0
+RESPONSE_TIMEOUT_S = 2.0
+
+logging.getLogger("asyncua").setLevel(logging.ERROR)
+logging.getLogger("GatewaySimulator").setLevel(logging.WARNING)
+
+
+async def write(client, ns, values):
+    """Escribe {tag: valor} en un único Write."""
+
+    nodes = [client.get_node(f"ns={ns};s={tag}") for tag in values]
+    await client.write_values(nodes, list(values.values()))
+
+
+async def wait_read(client, ns, tag, predicate):
+    """Lee el tag sin pausas hasta que cumple predicate."""
+
+    node = client.get_node(f"ns={ns};s={tag}")
+    deadline = time.perf_counter() + RESPONSE_TIMEOUT_S
+    while True:
+        value = await node.read_value()
+        if predicate(value):
+            return
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"{tag} sin respuesta")
+
+
+async def measure_requests(client, ns, iterations):
+    print(f"\n▶ Request -> respuesta ({iterations} por request)")
+    print("-" * 70)
+
+    latencies = {}
+    uuid_pull = client.get_node(f"ns={ns};s=EgComIn_UUID_pull")
+    for _ in range(iterations):
+        with Stopwatch() as sw:
+            await write(client, ns, {"EgComOut_BarcodeValue": "NO-EXISTE", "EgComOut_BarcodeReq": True})
+            await wait_read(client, ns, "EgComIn_RecordNotFound", bool)
+        latencies.setdefault("BarcodeReq -> RecordNotFound", []).append(sw.ms)
+        with Stopwatch() as sw:
+            await write(client, ns, {"EgComOut_BarcodeReq": False})
+            await wait_read(client, ns, "EgComIn_RecordNotFound", lambda v: not v)
+        latencies.setdefault("BarcodeReq reset", []).append(sw.ms)
+
+        previous = await uuid_pull.read_value()
+        with Stopwatch() as sw:
+            await write(client, ns, {"EgComOut_UUIDReq": True})
+            await wait_read(client, ns, "EgComIn_UUID_pull", lambda v: v != previous)
+        latencies.setdefault("UUIDReq -> UUID_pull", []).append(sw.ms)
+        await write(client, ns, {"EgComOut_UUIDReq": False})
+
+        with Stopwatch() as sw:
+            await write(client, ns, {"EgComOut_WriteToDb": True})
+            await wait_read(client, ns, "EgComIn_WriteToDb_Confirmation", bool)
+        latencies.setdefault("WriteToDb -> Confirmation", []).append(sw.ms)
+        with Stopwatch() as sw:
+            await write(client, ns, {"EgComOut_WriteToDb": False})
+            await wait_read(client, ns, "EgComIn_WriteToDb_Confirmation", lambda v: not v)
+        latencies.setdefault("WriteToDb reset", []).append(sw.ms)
+
+    for label, values in latencies.items():
+        print_stats(label, values)
+
+    # Referencia: lo mínimo posible es un Write + un Read de ida y vuelta
+    node = client.get_node(f"ns={ns};s=EgComOut_BarcodeValue")
+    round_trips = []
+    for _ in range(iterations):
+        with Stopwatch() as sw:
+            await node.write_value("")
+            await node.read_value()
+        round_trips.append(sw.ms)
+    print_stats("Write + Read (piso)", round_trips)
+
+
+async def measure_pulses(client, ns, pulses):
+    print(f"\n▶ Pulsos de UUIDReq sin pausa ({pulses})")
+    print("-" * 70)
+
+    seen = set()
+    subscription = TagSubscription(client, publishing_interval=10, queue_size=pulses * 2)
+    subscription.on_data(lambda name, dv: seen.add(dv.Value.Value))
+    await subscription.start({"UUID_pull": f"ns={ns};s=EgComIn_UUID_pull"})
+    await asyncio.sleep(0.2)
+    initial = len(seen)
+
+    for _ in range(pulses):
+        await write(client, ns, {"EgComOut_UUIDReq": True})
+        await write(client, ns, {"EgComOut_UUIDReq": False})
+    await asyncio.sleep(0.5)
+    await subscription.stop()
+
+    generated = len(seen) - initial
+    print(f"  {generated} UUIDs generados para {pulses} flancos de subida "
+          f"{'✅' if generated == pulses else '❌'}")
+
+
+async def measure_heartbeat(client, ns, seconds):
+    print(f"\n▶ Heartbeat durante {seconds:.0f} s (periodo {HEARTBEAT_PERIOD_S:.1f} s)")
+    print("-" * 70)
+
+    arrivals = []
+    subscription = TagSubscription(client, publishing_interval=10)
+    subscription.on_data(lambda name, dv: arrivals.append(time.monotonic()))
+    await subscription.start({"Heartbeat": f"ns={ns};s=EgComIn_Heartbeat"})
+    await asyncio.sleep(seconds)
+    await subscription.stop()
+
+    # Descartar el valor inicial de la suscripción
+    ticks = arrivals[1:]
+    if len(ticks) < 2:
+        print("  ❌ Sin suficientes ticks")
+        return
+    periods = [(b - a) * 1000 for a, b in zip(ticks, ticks[1:])]
+    print_stats("Periodo", periods)
+    drift = (ticks[-1] - ticks[0] - (len(ticks) - 1) * HEARTBEAT_PERIOD_S) * 1000
+    print(f"  Deriva acumulada tras {len(ticks) - 1} periodos: {drift:+.2f} ms")
+
+
+async def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else ITERATIONS
+    heartbeat_s = float(sys.argv[2]) if len(sys.argv) > 2 else HEARTBEAT_S
+
+    print("=" * 70)
+    print("📊 BENCHMARK: LATENCIA DEL GATEWAY SIMULATOR")
+    print("=" * 70)
+    print(f"  Simulador: {BENCH_URL}")
+
+    simulator = GatewaySimulator(url=BENCH_URL)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await simulator.start_background()
+
+    try:
+        async with Client(BENCH_URL) as client:
+            ns = simulator.namespace_idx
+            await measure_requests(client, ns, iterations)
+            await measure_pulses(client, ns, iterations)
+            await measure_heartbeat(client, ns, heartbeat_s)
+        print(f"  Ticks salteados por el simulador: {simulator.heartbeat_missed}")
+    finally:
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
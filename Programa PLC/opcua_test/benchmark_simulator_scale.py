@@ -0,0 +1,143 @@
+"""
+================================================================================
+    BENCHMARK: GATEWAY SIMULATOR A ESCALA
+
+    1. Arranque: crea el address space sintético (N estaciones x M tags,
+       layout Optix ns=9) con add_folder/add_variable/set_writable nodo
+       por nodo (como _create_tag_structure) y con build_address_space
+       (AddNodes en lotes).
+    2. Carga: GatewaySimulator con el sintético + L5X + CSV y dinámica
+       (toggle/ramp/walk); un cliente recorre el address space con
+       AddressSpaceCrawler y se suscribe a todos los tags sintéticos para
+       medir notificaciones/s contra los cambios/s generados.
+
+    Ejecutar con: python benchmark_simulator_scale.py [estaciones] [tags] [segundos]
+================================================================================
+"""
+
+import asyncio
+import logging
+import sys
+import time
+
+from asyncua import Client, Server, ua
+
+from address_space_crawler import AddressSpaceCrawler
+from benchmark_utils import Stopwatch
+from gateway_simulator import GatewaySimulator
+from simulated_address_space import (OPTIX_APPLICATION, build_address_space, csv_source,
+                                     l5x_source, reserve_namespace, synthetic_source)
+from tag_subscription import TagSubscription
+
+BENCH_URL = "opc.tcp://127.0.0.1:48416"
+STATIONS = 50
+TAGS_PER_STATION = 200
+DURATION_S = 5.0
+DYNAMICS = "toggle=0.2@2,ramp=0.05@5,walk=0.1@1"
+PUBLISHING_INTERVAL_MS = 100
+INITIAL_VALUES_TIMEOUT_S = 30.0
+# Servidor y cliente comparten el loop: codificar los 10k valores iniciales lo
+# frena más de 1 s y el watchdog por defecto daría la conexión por perdida
+WATCHDOG_S = 10.0
+
+logging.getLogger("asyncua").setLevel(logging.ERROR)
+# Al cerrar queda un Publish pendiente sin suscripción (BadNoSubscription), es esperable
+logging.getLogger("asyncua.server.uaprocessor").setLevel(logging.CRITICAL)
+logging.getLogger("GatewaySimulator").setLevel(logging.WARNING)
+logging.getLogger("SimulatedAddressSpace").setLevel(logging.WARNING)
+
+
+async def build_per_node(server: Server, source) -> int:
+    """Antes: un add_folder / add_variable + set_writable por nodo."""
+
+    idx = await reserve_namespace(server, source.namespace_uri, source.namespace_index)
+    folders = {(): server.nodes.objects}
+    for tag in source.tags:
+        for depth in range(1, len(tag.folders) + 1):
+            path = tag.folders[:depth]
+            if path not in folders:
+                folders[path] = await folders[path[:-1]].add_folder(
+                    ua.NodeId(source.node_identifier(path), idx), ua.QualifiedName(path[-1], idx))
+        variable = await folders[tag.folders].add_variable(
+            ua.NodeId(source.node_identifier(tag.path, tag.identifier), idx),
+            ua.QualifiedName(tag.name, idx), ua.Variant(tag.value, tag.variant_type))
+        await variable.set_writable()
+    return len(source.tags) + len(folders) - 1
+
+
+async def measure_startup(stations: int, tags: int):
+    print(f"\n▶ Arranque: {stations} x {tags} = {stations * tags:,} tags sintéticos")
+    print("-" * 70)
+    source = synthetic_source(stations, tags)
+    results = {}
+    for label, build in (("nodo por nodo", build_per_node), ("AddNodes en lotes", build_address_space)):
+        server = Server()
+        await server.init()
+        with Stopwatch() as sw:
+            await build(server, source)
+        results[label] = sw.ms
+        print(f"  {label:<22} {sw.ms / 1000:8.2f} s   {len(source.tags) / (sw.ms / 1000):10,.0f} tags/s")
+    print(f"  Aceleración: {results['nodo por nodo'] / results['AddNodes en lotes']:.1f}x")
+
+
+async def measure_load(stations: int, tags: int, duration: float):
+    sources = [synthetic_source(stations, tags), l5x_source(copies=4), csv_source()]
+    simulator = GatewaySimulator(BENCH_URL, sources=sources, dynamics=DYNAMICS)
+    with Stopwatch() as sw:
+        await simulator.start_background()
+    total = sum(len(source.tags) for source in sources)
+    print(f"\n▶ Simulador: {total:,} tags ({', '.join(s.name for s in simulator.sources)}) "
+          f"listo en {sw.ms / 1000:.2f} s")
+    print("-" * 70)
+
+    try:
+        synthetic = simulator.sources[-1]
+        node_ids = simulator.source_node_ids[synthetic.name]
+        engine = simulator.engines[-1]
+        print(f"  Dinámica {DYNAMICS}: {engine.tags:,} tags, ~{engine.changes_per_second:,.0f} cambios/s")
+
+        async with Client(BENCH_URL, watchdog_intervall=WATCHDOG_S) as client:
+            with Stopwatch() as sw:
+                table = await AddressSpaceCrawler(client).crawl(
+                    f"ns={synthetic.namespace_index};s={OPTIX_APPLICATION}", OPTIX_APPLICATION)
+            print(f"  Crawl de {OPTIX_APPLICATION}: {len(table):,} nodos en {sw.ms / 1000:.2f} s "
+                  f"({len(table) / (sw.ms / 1000):,.0f} nodos/s)")
+
+            subscription = TagSubscription(client, publishing_interval=PUBLISHING_INTERVAL_MS, queue_size=10)
+            with Stopwatch() as sw:
+                await subscription.start({".".join(path): node_id for path, node_id in node_ids.items()})
+            print(f"  Suscripción a {len(node_ids):,} tags en {sw.ms / 1000:.2f} s")
+
+            # Los valores iniciales llegan primero; medir después
+            deadline = time.monotonic() + INITIAL_VALUES_TIMEOUT_S
+            while subscription.notifications < len(node_ids) and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            await asyncio.sleep(1.0)
+            notifications, changes = subscription.notifications, engine.changes
+            await asyncio.sleep(duration)
+            received = subscription.notifications - notifications
+            generated = engine.changes - changes
+            await subscription.stop()
+
+        print(f"  {duration:.0f} s: {generated:,} cambios generados ({generated / duration:,.0f}/s), "
+              f"{received:,} notificaciones recibidas ({received / duration:,.0f}/s, "
+              f"{received / max(1, generated):.0%})")
+    finally:
+        await simulator.stop()
+
+
+async def main():
+    stations = int(sys.argv[1]) if len(sys.argv) > 1 else STATIONS
+    tags = int(sys.argv[2]) if len(sys.argv) > 2 else TAGS_PER_STATION
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else DURATION_S
+
+    print("=" * 70)
+    print("📊 BENCHMARK: GATEWAY SIMULATOR A ESCALA")
+    print("=" * 70)
+
+    await measure_startup(stations, tags)
+    await measure_load(stations, tags, duration)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""
+================================================================================
+    BENCHMARK: CODEC PRECOMPILADO vs DECODIFICADOR GENÉRICO DE ASYNCUA
+
+    Sin red: los tipos del L5K se crean en un Server asyncua local (sin
+    arrancar) y load_data_type_definitions() genera las clases que usaría
+    un cliente; con ellas se codifican arrays de Syn_FileWriteOut_Struct
+    (MaterialRecord_push) y Syn_UUID_Struct (UUID_pull) con datos
+    aleatorios.
+
+    - Antes:   variant_from_binary / variant_to_binary de asyncua
+               (un objeto Python por registro y por campo anidado)
+    - Después: StructCodec.decode_variant -> array estructurado de NumPy,
+               o lista de tuplas; encode_variant desde el array NumPy
+
+    Verifica que el codec produce exactamente los mismos bytes que asyncua
+    y reporta µs por registro para MaterialRecord_push[3] y arrays grandes.
+
+    Ejecutar con: python benchmark_struct_codec.py [registros]
+================================================================================
+"""
+
+import asyncio
+import dataclasses
+import random
+import string
+import sys
+
+from asyncua import Server, ua
+from asyncua.common.utils import Buffer
+from asyncua.ua.ua_binary import variant_from_binary, variant_to_binary
+
+from benchmark_utils import Stopwatch
+from l5k_datatypes import create_datatypes, parse_l5k_datatypes
+from struct_codec import STRING_SIZE, codecs_from_l5k
+
+RECORDS = 1000
+SEED = 1
+TYPES = {
+    "MaterialRecord_push": "Syn_FileWriteOut_Struct",
+    "UUID_pull": "Syn_UUID_Struct",
+}
+
+# Repeticiones hasta juntar ~al menos este número de registros por medición
+MIN_RECORDS_TIMED = 30000
+
+
+async def load_classes(datatypes: dict) -> dict:
+    """Clases generadas por asyncua para los UDTs (como en un cliente)."""
+
+    server = Server()
+    await server.init()
+    idx = await server.register_namespace("urn:benchmark:codec")
+    await create_datatypes(server, idx, datatypes, list(TYPES.values()))
+    await server.load_data_type_definitions()
+    return {name: getattr(ua, name) for name in TYPES.values()}
+
+
+def random_value(rng, value):
+    if isinstance(value, str):
+        return "".join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(rng.randint(4, 24)))
+    if isinstance(value, bool):
+        return rng.random() < 0.5
+    if isinstance(value, int):
+        return rng.randrange(0, 100000)
+    if isinstance(value, float):
+        return float(int(rng.uniform(0, 1000) * 64) / 64)     # exacto en float32
+    return random_record(rng, type(value))
+
+
+def random_record(rng, cls):
+    record = cls()
+    for field in dataclasses.fields(cls):
+        setattr(record, field.name, random_value(rng, getattr(record, field.name)))
+    return record
+
+
+def timed(function, records: int) -> float:
+    """µs por registro (mejor de 3)."""
+
+    repeat = max(1, MIN_RECORDS_TIMED // records)
+    function()
+    best = float("inf")
+    for _ in range(3):
+        with Stopwatch() as sw:
+            for _ in range(repeat):
+                function()
+        best = min(best, sw.ms)
+    return best * 1000 / (repeat * records)
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS
+
+    print("=" * 70)
+    print("📊 BENCHMARK: CODEC PRECOMPILADO vs ASYNCUA GENÉRICO")
+    print("=" * 70)
+
+    datatypes = parse_l5k_datatypes()
+    classes = asyncio.run(load_classes(datatypes))
+    codecs = codecs_from_l5k(datatypes, list(TYPES.values()))
+    rng = random.Random(SEED)
+
+    for tag, type_name in TYPES.items():
+        cls, codec = classes[type_name], codecs[type_name]
+        codec.encoding_id = ua.typeid_by_extension_objects[cls]
+
+        for count in (3 if tag == "MaterialRecord_push" else 5, records):
+            objects = [random_record(rng, cls) for _ in range(count)]
+            data = variant_to_binary(ua.Variant(objects))
+            array = codec.decode_variant(data)
+            rows = codec.decode_variant(data, numpy=False)
+            raw = [ua.ExtensionObject(TypeId=codec.encoding_id, Body=body)
+                   for body in (codec.encode(row) for row in rows)]
+
+            assert codec.encode_variant(array) == data and codec.encode_variant(rows) == data
+            assert [codec.encode(obj) for obj in objects] == [eo.Body for eo in raw]
+
+            print(f"\n▶ {tag}: {count} x {type_name} ({len(codec.fields)} campos, "
+                  f"{len(data) / count:.0f} bytes/registro en el Variant)")
+            print("-" * 70)
+            results = [
+                ("Antes:   asyncua variant_from_binary", timed(lambda: variant_from_binary(Buffer(data)), count)),
+                ("Después: decode_variant -> NumPy", timed(lambda: codec.decode_variant(data), count)),
+                ("Después: decode_variant -> tuplas", timed(lambda: codec.decode_variant(data, numpy=False), count)),
+                ("Después: decode_records(ExtensionObjects)", timed(lambda: codec.decode_records(raw), count)),
+                ("Antes:   asyncua variant_to_binary", timed(lambda: variant_to_binary(ua.Variant(objects)), count)),
+                ("Después: encode_variant(NumPy)", timed(lambda: codec.encode_variant(array), count)),
+                ("Después: encode_variant(tuplas)", timed(lambda: codec.encode_variant(rows), count)),
+            ]
+            for label, us in results:
+                print(f"  {label:<44} {us:8.2f} µs/registro")
+            print(f"  Decodificación: {results[0][1] / results[1][1]:.1f}x (NumPy)  "
+                  f"{results[0][1] / results[2][1]:.1f}x (tuplas)   "
+                  f"Codificación: {results[4][1] / results[5][1]:.1f}x (NumPy)  "
+                  f"{results[4][1] / results[6][1]:.1f}x (tuplas)")
+            print(f"  Array NumPy: {array.nbytes:,} bytes en un bloque (STRING -> U{STRING_SIZE})")
+
+
+if __name__ == "__main__":
+    main()
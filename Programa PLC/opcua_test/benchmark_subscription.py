@@ -0,0 +1,104 @@
+"""
+================================================================================
+    BENCHMARK: POLLING vs SUSCRIPCIÓN EN GatewayClient
+
+    Levanta gateway_simulator.py en localhost y ejecuta los mismos handshakes
+    (UUIDReq -> UUID_pull, WriteToDb -> WriteToDb_Confirmation) con:
+
+    - Polling:      read_value() de cada tag cada 100 ms (comportamiento anterior)
+    - Suscripción:  MonitoredItems, el handshake despierta al llegar el cambio
+
+    Reporta peticiones OPC UA enviadas (por tipo) y latencia de cada handshake.
+
+    Ejecutar con: python benchmark_subscription.py [iteraciones]
+================================================================================
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import sys
+
+from gateway_client import GatewayClient, workflow_request_uuid, workflow_write_to_db
+from gateway_simulator import GatewaySimulator
+from benchmark_utils import RequestCounter, Stopwatch, print_stats
+
+BENCH_URL = "opc.tcp://127.0.0.1:48401"
+ITERATIONS = 20
+
+logging.getLogger("asyncua").setLevel(logging.ERROR)
+logging.getLogger("GatewayClient").setLevel(logging.WARNING)
+logging.getLogger("GatewaySimulator").setLevel(logging.WARNING)
+
+
+async def run_mode(label: str, use_subscriptions: bool, iterations: int):
+    """Ejecuta los handshakes en un modo y retorna (latencias, contador)."""
+
+    client = GatewayClient(BENCH_URL, use_subscriptions=use_subscriptions)
+    if not await client.connect():
+        raise RuntimeError(f"No se pudo conectar a {BENCH_URL}")
+
+    counter = RequestCounter(client.client).install()
+    latencies = {"UUID": [], "WriteToDb": []}
+
+    with Stopwatch() as total:
+        for _ in range(iterations):
+            with contextlib.redirect_stdout(io.StringIO()):
+                with Stopwatch() as sw:
+                    await workflow_request_uuid(client)
+                latencies["UUID"].append(sw.ms)
+
+                with Stopwatch() as sw:
+                    await workflow_write_to_db(client)
+                latencies["WriteToDb"].append(sw.ms)
+
+                # El simulador mantiene la confirmación 500 ms; esperar el reset
+                await client.wait_for_tag("WriteToDb_Confirmation", lambda v: not v)
+
+    counter.uninstall()
+    await client.disconnect()
+
+    print(f"\n▶ {label}")
+    print("-" * 70)
+    for name, values in latencies.items():
+        print_stats(f"Handshake {name}", values)
+    rate = counter.total / (total.ms / 1000)
+    print(f"  Peticiones totales: {counter.total} ({rate:.1f}/s durante {total.ms / 1000:.1f} s)")
+    for request_type, count in sorted(counter.counts.items()):
+        print(f"    {request_type:<28} {count}")
+
+    return latencies, counter
+
+
+async def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else ITERATIONS
+
+    print("=" * 70)
+    print("📊 BENCHMARK: POLLING vs SUSCRIPCIÓN")
+    print("=" * 70)
+    print(f"  Simulador: {BENCH_URL}")
+    print(f"  Iteraciones: {iterations} (UUID + WriteToDb por iteración)")
+
+    simulator = GatewaySimulator(url=BENCH_URL)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await simulator.start_background()
+
+    try:
+        polling, polling_counter = await run_mode("POLLING (100 ms)", False, iterations)
+        subscribed, sub_counter = await run_mode("SUSCRIPCIÓN", True, iterations)
+    finally:
+        await simulator.stop()
+
+    print("\n" + "=" * 70)
+    print("📈 RESUMEN")
+    print("=" * 70)
+    for name in ("UUID", "WriteToDb"):
+        before = sum(polling[name]) / len(polling[name])
+        after = sum(subscribed[name]) / len(subscribed[name])
+        print(f"  {name:<12} latencia media: {before:8.2f} ms -> {after:8.2f} ms")
+    print(f"  Peticiones:  {polling_counter.total} -> {sub_counter.total}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
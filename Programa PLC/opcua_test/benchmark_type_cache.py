@@ -0,0 +1,174 @@
+"""
+================================================================================
+    BENCHMARK: CACHÉ DE DEFINICIONES DE TIPOS (type_definition_cache.py)
+
+    Servidor asyncua local con todos los UDTs del L5K (l5k_datatypes.py) y
+    una variable MaterialRecord_push[3]. Cada conexión se mide en un proceso
+    nuevo (las clases generadas quedan registradas en ua para todo el
+    proceso, como en un arranque real del cliente):
+
+    - Antes:   connect() + load_data_type_definitions()
+    - Fría:    connect() + TypeDefinitionCache.load() sin caché (carga
+               completa + guardado)
+    - Caliente: connect() + TypeDefinitionCache.load() con caché válida
+
+    Reporta ms hasta poder leer MaterialRecord_push decodificado y
+    peticiones OPC UA por tipo. Con --latency se agrega un retardo por
+    petición para emular el enlace al 5069-L310ER / Optix.
+
+    Ejecutar con: python benchmark_type_cache.py [--latency MS]
+================================================================================
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from asyncua import Client, Server, ua
+
+from benchmark_utils import RequestCounter
+from l5k_datatypes import create_datatypes, parse_l5k_datatypes
+
+SERVER_URL = "opc.tcp://127.0.0.1:48412/types/"
+NAMESPACE_URI = "urn:benchmark:types"
+ARRAY_NAME = "MaterialRecord_push"
+ARRAY_TYPE = "Syn_FileWriteOut_Struct"
+ARRAY_SIZE = 3
+RUNS = 3
+
+
+# ============================================================================
+# SERVIDOR
+# ============================================================================
+
+async def serve():
+    server = Server()
+    await server.init()
+    server.set_endpoint(SERVER_URL)
+    idx = await server.register_namespace(NAMESPACE_URI)
+    created = await create_datatypes(server, idx, parse_l5k_datatypes())
+    await server.load_data_type_definitions()
+
+    record = getattr(ua, ARRAY_TYPE)()
+    record.BARCD = "BC-0001"
+    await server.nodes.objects.add_variable(
+        ua.NodeId(ARRAY_NAME, idx), ARRAY_NAME,
+        ua.Variant([record] * ARRAY_SIZE, ua.VariantType.ExtensionObject),
+        datatype=created[ARRAY_TYPE],
+    )
+
+    async with server:
+        print(f"READY {len(created)}", flush=True)
+        while True:
+            await asyncio.sleep(3600)
+
+
+# ============================================================================
+# UNA CONEXIÓN (proceso hijo)
+# ============================================================================
+
+async def connect_once(mode: str, cache_path: str, latency_ms: float) -> dict:
+    from type_definition_cache import TypeDefinitionCache
+
+    client = Client(url=SERVER_URL)
+    start = time.perf_counter()
+    await client.connect()
+    counter = RequestCounter(client, latency_ms).install()
+    try:
+        if mode == "before":
+            await client.load_data_type_definitions()
+            source = "server"
+        else:
+            cache = TypeDefinitionCache(client, SERVER_URL, cache_path)
+            await cache.load()
+            source = cache.source
+        idx = await client.get_namespace_index(NAMESPACE_URI)
+        records = await client.get_node(ua.NodeId(ARRAY_NAME, idx)).read_value()
+        ms = (time.perf_counter() - start) * 1000
+        assert type(records[0]).__name__ == ARRAY_TYPE and records[0].BARCD == "BC-0001"
+    finally:
+        counter.uninstall()
+        await client.disconnect()
+    return {"ms": ms, "source": source, "requests": dict(counter.counts)}
+
+
+def run_child(mode: str, cache_path: str, latency_ms: float) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--connect", mode,
+         "--cache", cache_path, "--latency", str(latency_ms)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la caché de tipos")
+    parser.add_argument("--latency", type=float, default=0.0, help="ms por petición")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--connect", help=argparse.SUPPRESS)
+    parser.add_argument("--cache", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve())
+        return
+    if args.connect:
+        print(json.dumps(asyncio.run(connect_once(args.connect, args.cache, args.latency))))
+        return
+
+    print("=" * 70)
+    print("📊 BENCHMARK: CACHÉ DE DEFINICIONES DE TIPOS")
+    print("=" * 70)
+
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve"],
+                              stdout=subprocess.PIPE, text=True)
+    directory = tempfile.mkdtemp(prefix="type_cache_bench_")
+    cache_path = os.path.join(directory, "type_definitions.json")
+    try:
+        ready = server.stdout.readline().split()
+        print(f"  {ready[1]} UDTs del L5K en {SERVER_URL}, latencia emulada {args.latency} ms/petición, "
+              f"{RUNS} conexiones por caso")
+
+        rows = []
+        for label, mode in (("Antes:    load_data_type_definitions()", "before"),
+                            ("Fría:     caché vacía", "cold"),
+                            ("Caliente: caché válida", "warm")):
+            results = []
+            for _ in range(RUNS):
+                if mode == "cold" and os.path.exists(cache_path):
+                    os.remove(cache_path)
+                results.append(run_child(mode, cache_path, args.latency))
+            rows.append((label, results))
+
+        print("\n▶ Conexión hasta leer MaterialRecord_push decodificado")
+        print("-" * 70)
+        for label, results in rows:
+            best = min(r["ms"] for r in results)
+            requests = results[-1]["requests"]
+            detail = ", ".join(f"{name.replace('Request', '')} {n}" for name, n in sorted(requests.items()))
+            print(f"  {label:<40} {best:8.1f} ms   {sum(requests.values()):4d} peticiones "
+                  f"({results[-1]['source']})")
+            print(f"      {detail}")
+
+        before, warm = min(r["ms"] for r in rows[0][1]), min(r["ms"] for r in rows[2][1])
+        print(f"\n  Caliente vs antes: {before / warm:.1f}x   "
+              f"caché {os.path.getsize(cache_path):,} bytes")
+    finally:
+        server.terminate()
+        server.wait()
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+================================================================================
+    UTILIDADES PARA BENCHMARKS OPC UA
+
+    - RequestCounter: cuenta las peticiones de servicio que envía un Client
+      (Read, Write, Publish, Browse, ...) y los bytes recibidos, interceptando
+      el socket de asyncua; opcionalmente agrega un retardo por petición para
+      emular el enlace real y mide los bytes de cada petición enviada
+    - percentile / print_stats: resumen de latencias en milisegundos
+================================================================================
+"""
+
+import asyncio
+import time
+from collections import Counter
+
+from asyncua.ua.ua_binary import struct_to_binary
+
+
+class RequestCounter:
+    """Cuenta las peticiones OPC UA enviadas por un Client conectado."""
+
+    def __init__(self, client, latency_ms: float = 0.0, measure_sent: bool = False):
+        self.client = client
+        self.latency_ms = latency_ms
+        self.measure_sent = measure_sent
+        self.counts = Counter()
+        self.bytes_received = 0
+        self.bytes_sent = Counter()     # Tipo de petición -> bytes serializados (measure_sent)
+        self._protocol = None
+        self._original = None
+        self._original_received = None
+
+    def install(self):
+        """Envuelve protocol.send_request del cliente (llamar tras connect())."""
+
+        self._protocol = self.client.uaclient.protocol
+        self._original = self._protocol.send_request
+        counter = self
+
+        async def send_request(request, *args, **kwargs):
+            counter.counts[type(request).__name__] += 1
+            if counter.measure_sent:
+                counter.bytes_sent[type(request).__name__] += len(struct_to_binary(request))
+            if counter.latency_ms:
+                await asyncio.sleep(counter.latency_ms / 1000)
+            return await counter._original(request, *args, **kwargs)
+
+        self._original_received = self._protocol.data_received
+
+        def data_received(data):
+            counter.bytes_received += len(data)
+            return counter._original_received(data)
+
+        self._protocol.send_request = send_request
+        self._protocol.data_received = data_received
+        return self
+
+    def uninstall(self):
+        if self._protocol is not None:
+            self._protocol.send_request = self._original
+            self._protocol.data_received = self._original_received
+            self._protocol = None
+
+    def reset(self):
+        self.counts.clear()
+        self.bytes_received = 0
+        self.bytes_sent.clear()
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+
+def percentile(values, pct):
+    """Percentil (0-100) por rango más cercano."""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def print_stats(label, latencies_ms):
+    """Imprime n / media / p50 / p99 / máx de una lista de latencias en ms."""
+
+    if not latencies_ms:
+        print(f"  {label:<28} sin muestras")
+        return
+    mean = sum(latencies_ms) / len(latencies_ms)
+    print(f"  {label:<28} n={len(latencies_ms):<6} "
+          f"media={mean:8.2f} ms  p50={percentile(latencies_ms, 50):8.2f} ms  "
+          f"p99={percentile(latencies_ms, 99):8.2f} ms  "
+          f"máx={max(latencies_ms):8.2f} ms")
+
+
+class Stopwatch:
+    """Cronómetro con perf_counter: with Stopwatch() as sw: ...; sw.ms"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.start) * 1000
+        return False
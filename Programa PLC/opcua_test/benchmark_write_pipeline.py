@@ -0,0 +1,136 @@
+"""
+================================================================================
+    BENCHMARK: WriteToDb CON COMMIT POR PULSO vs GROUP COMMIT
+
+    ESTACIONES escriben en paralelo, cada una en lazo cerrado (el próximo
+    WriteToDb sale cuando llega la confirmación), 3 registros de
+    MaterialRecord_push por pedido, sobre SQLite en modo WAL con fsync en
+    cada commit (cache/benchmark_writes.db):
+
+    - Antes:   un commit (un fsync) por pulso (max_batch_rows=1)
+    - Después: WritePipeline con distintos flush_interval_ms
+
+    Reporta pedidos/s, filas/s, pedidos por commit, latencia de commit y
+    latencia hasta la confirmación (p50/p99). Al final repite pulsos (en
+    vuelo y ya guardados) y verifica que no se duplican filas.
+
+    Ejecutar con: python benchmark_write_pipeline.py [estaciones] [segundos]
+================================================================================
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+
+from record_store import SQLiteRecordStore
+from write_pipeline import WritePipeline
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "benchmark_writes.db")
+STATIONS = 48
+DURATION_S = 5.0
+RECORDS_PER_REQUEST = 3
+FLUSH_INTERVALS_MS = (0.0, 2.0, 5.0, 20.0)
+
+
+def make_records(station: int, sequence: int) -> list:
+    return [
+        {"BARCD": f"BC-{station:03d}-{sequence:06d}-{slot}", "SampleNumber": sequence * 10 + slot,
+         "NetWeight": float(slot + 1), "Timestamp": time.time()}
+        for slot in range(RECORDS_PER_REQUEST)
+    ]
+
+
+def saved_rows() -> int:
+    connection = sqlite3.connect(DB_PATH)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM saved_records").fetchone()[0]
+    finally:
+        connection.close()
+
+
+async def run(label: str, stations: int, duration: float, **options) -> dict:
+    store = SQLiteRecordStore(DB_PATH)
+    pipeline = WritePipeline(store, **options)
+    pipeline.start()
+    end = time.monotonic() + duration
+    sequence = [0]
+
+    async def station(index: int):
+        while time.monotonic() < end:
+            sequence[0] += 1
+            await pipeline.submit(f"CPS_{index:03d}", make_records(index, sequence[0]))
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(station(i) for i in range(1, stations + 1)))
+        elapsed = time.perf_counter() - start
+        await pipeline.stop()
+    finally:
+        await store.close()
+
+    stats = pipeline.stats()
+    print(f"  {label:<26} {stats['requests'] / elapsed:8,.0f} pedidos/s {stats['rows'] / elapsed:8,.0f} filas/s "
+          f"{stats['mean_batch']:6.1f} pedidos/commit")
+    print(f"  {'':<26} commit p50={stats['commit_p50_ms']:6.2f} p99={stats['commit_p99_ms']:6.2f} ms   "
+          f"confirmación p50={stats['request_p50_ms']:6.2f} p99={stats['request_p99_ms']:6.2f} ms")
+    return stats
+
+
+async def check_idempotency(stations: int):
+    """Pulsos repetidos: en vuelo (mismo lote) y después de guardados."""
+
+    store = SQLiteRecordStore(DB_PATH)
+    pipeline = WritePipeline(store, flush_interval_ms=5.0)
+    pipeline.start()
+    try:
+        requests = [(f"CPS_{i:03d}", make_records(i, -1)) for i in range(1, stations + 1)]
+        before = saved_rows()
+        first = await asyncio.gather(*(pipeline.submit(s, r) for s, r in requests for _ in range(3)))
+        again = await asyncio.gather(*(pipeline.submit(s, r) for s, r in requests))
+        after = saved_rows()
+    finally:
+        await pipeline.stop()
+        await store.close()
+
+    expected = stations * RECORDS_PER_REQUEST
+    assert sum(first) == expected and sum(again) == 0 and after - before == expected, (sum(first), sum(again), after - before)
+    print(f"  {stations} pedidos x3 en vuelo + x1 ya guardados: {after - before} filas nuevas "
+          f"(esperadas {expected}), {pipeline.duplicates} pulsos repetidos confirmados sin escribir")
+
+
+async def main():
+    stations = int(sys.argv[1]) if len(sys.argv) > 1 else STATIONS
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else DURATION_S
+
+    print("=" * 70)
+    print("📊 BENCHMARK: WriteToDb COMMIT POR PULSO vs GROUP COMMIT")
+    print("=" * 70)
+    print(f"  Base: {DB_PATH} (WAL, synchronous=FULL)")
+    print(f"  {stations} estaciones en lazo cerrado, {RECORDS_PER_REQUEST} registros por pedido, {duration:.0f} s por caso")
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+
+    print("\n▶ Antes: un commit por pulso")
+    print("-" * 70)
+    before = await run("commit por pulso", stations, duration, max_batch_rows=1)
+
+    print("\n▶ Después: group commit")
+    print("-" * 70)
+    best = None
+    for interval in FLUSH_INTERVALS_MS:
+        stats = await run(f"flush_interval={interval:g} ms", stations, duration, flush_interval_ms=interval)
+        if best is None or stats["rows"] > best["rows"]:
+            best = stats
+    print(f"\n  Mejor caso: {best['rows'] / max(1, before['rows']):.1f}x filas respecto de un commit por pulso")
+
+    print("\n▶ Idempotencia")
+    print("-" * 70)
+    await check_idempotency(stations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -14,6 +14,8 @@ import logging
 from datetime import datetime
 from asyncua import Client, ua
 
+from type_definition_cache import TypeDefinitionCache
+
 # Silenciar logs de asyncua
 logging.getLogger('asyncua').setLevel(logging.WARNING)
 
@@ -33,7 +35,9 @@ async def explore_and_find_tags():
         await client.connect()
         print("✅ Conectado!\n")
         
-        await client.load_data_type_definitions()
+        type_cache = TypeDefinitionCache(client, OPTIX_URL)
+        await type_cache.load()
+        print(f"Tipos cargados desde {type_cache.source}\n")
         
         # Ver namespaces
         print("=== NAMESPACES DISPONIBLES ===")
@@ -0,0 +1,431 @@
+"""
+================================================================================
+    EDGE GATEWAY DAEMON - HANDSHAKES BARCODE / UUID / WRITETODB POR ESTACIÓN
+
+    Servicio del lado gateway: una sola sesión OPC UA y una sola
+    suscripción para todas las estaciones CPS, y una máquina de estados
+    por estación (tarea asyncio) que reacciona a los cambios de:
+
+    - EgComOut_BarcodeReq  -> store.lookup(BarcodeValue) ->
+                              EgComIn_UUID_pull o EgComIn_RecordNotFound
+    - EgComOut_UUIDReq     -> UUID nuevo -> EgComIn_UUID_pull
+    - EgComOut_WriteToDb   -> MaterialRecord_push al WritePipeline (group
+                              commit) -> EgComIn_WriteToDb_Confirmation
+                              cuando el lote es durable (o, con --journal,
+                              cuando quedó en el journal si la base no
+                              responde: ring_journal.py la reenvía después)
+    - Al bajar cada request se limpian las respuestas (RecordNotFound,
+      WriteToDb_Confirmation)
+
+    Las respuestas de todas las estaciones que coinciden en el tiempo se
+    agrupan en una sola petición Write (ResponseWriter); el heartbeat
+    EgComIn_Heartbeat de todas las estaciones también.
+
+    Ejecutar con: python edge_gateway_daemon.py [--url URL] [--stations N]
+                  [--prefix "CPS_{:03d}."] [--duration S] [--db cache/records.db]
+                  [--journal cache/journal.bin]
+================================================================================
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+from asyncua import Client
+
+from batch_io import BatchIO
+from nodeid_resolver import NodeIdResolver
+from record_store import CachedRecordStore, MemoryRecordStore, RecordNotFound, SQLiteRecordStore
+from ring_journal import RingJournal, StoreAndForward
+from tag_subscription import TagSubscription
+from type_definition_cache import TypeDefinitionCache
+from write_pipeline import FLUSH_INTERVAL_MS, METRICS_WINDOW, WritePipeline, idempotency_key
+
+logging.getLogger('asyncua').setLevel(logging.WARNING)
+logger = logging.getLogger("EdgeGatewayDaemon")
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+SERVER_URL = "opc.tcp://192.168.101.100:59100"
+NAMESPACE_URI = "urn:RockwellAutomation:EdgeGateway:Simulator"
+
+PUBLISHING_INTERVAL_MS = 20     # Reacción a los requests del PLC
+# Cola por MonitoredItem: si el PLC baja y vuelve a subir un request dentro
+# de un mismo intervalo de publicación, con cola 1 sólo llegaría el True
+QUEUE_SIZE = 10
+HEARTBEAT_INTERVAL_S = 1.0
+
+# Tags de una estación: nombre lógico -> identificador (después del prefijo)
+STATION_TAGS = {
+    "BarcodeReq": "EgComOut_BarcodeReq",
+    "BarcodeValue": "EgComOut_BarcodeValue",
+    "UUIDReq": "EgComOut_UUIDReq",
+    "WriteToDb": "EgComOut_WriteToDb",
+    "MaterialRecord_push": "EgComOut_MaterialRecord_push",
+    "Heartbeat": "EgComIn_Heartbeat",
+    "RecordNotFound": "EgComIn_RecordNotFound",
+    "UUID_pull": "EgComIn_UUID_pull",
+    "WriteToDb_Confirmation": "EgComIn_WriteToDb_Confirmation",
+}
+
+# Tags suscritos (el resto se lee o escribe bajo demanda)
+MONITORED_TAGS = ("BarcodeReq", "BarcodeValue", "UUIDReq", "WriteToDb")
+REQUEST_TAGS = ("BarcodeReq", "UUIDReq", "WriteToDb")
+
+
+def station_node_ids(prefix: str, namespace_uri: str = NAMESPACE_URI) -> dict:
+    """{tag: "nsu=...;s=<prefix><identificador>"} de una estación."""
+    return {name: f"nsu={namespace_uri};s={prefix}{identifier}" for name, identifier in STATION_TAGS.items()}
+
+
+def uuid_payload(value: str, data: dict = None) -> str:
+    """Contenido de EgComIn_UUID_pull (formato de gateway_simulator.py)."""
+    return json.dumps({"uuid": value, "timestamp": datetime.now().isoformat(), "data": data or {}})
+
+
+def record_to_dict(record) -> dict:
+    """Registro de MaterialRecord_push (clase de asyncua o dict) -> dict."""
+    if dataclasses.is_dataclass(record):
+        return dataclasses.asdict(record)
+    if isinstance(record, dict):
+        return record
+    return {"value": record}
+
+
+class ResponseWriter:
+    """
+    Agrupa las escrituras de todas las estaciones: lo que se pide mientras
+    hay una petición Write en vuelo sale en la siguiente, en un solo lote.
+    """
+
+    def __init__(self, batch: BatchIO):
+        self.batch = batch
+        self._pending = []        # [(items, future)]
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+        # Peticiones Write enviadas y valores escritos
+        self.requests = 0
+        self.items = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for _, future in self._pending:
+            if not future.done():
+                future.cancel()
+        self._pending = []
+
+    async def write(self, items: list) -> list:
+        """Escribe [(node_id, valor)] en el próximo lote; retorna los StatusCode."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((items, future))
+        self._wakeup.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            pending, self._pending = self._pending, []
+            if not pending:
+                continue
+
+            items = [item for entry_items, _ in pending for item in entry_items]
+            try:
+                results = await self.batch.write(items)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.requests += 1
+            self.items += len(items)
+            start = 0
+            for entry_items, future in pending:
+                if not future.done():
+                    future.set_result(results[start:start + len(entry_items)])
+                start += len(entry_items)
+
+
+class StationMachine:
+    """Máquina de estados de los handshakes de una estación."""
+
+    def __init__(self, name: str, node_ids: dict, daemon):
+        self.name = name
+        self.node_ids = node_ids
+        self.daemon = daemon
+        self.queue = asyncio.Queue()
+
+        # Último valor de cada tag monitoreado y estado del handshake
+        self.values = {}
+        self.state = "IDLE"
+
+        self.handled = {name: 0 for name in REQUEST_TAGS}
+        self.not_found = 0
+        self.errors = 0
+        self.latencies_ms = deque(maxlen=METRICS_WINDOW)
+
+    async def run(self):
+        while True:
+            events = [await self.queue.get()]
+            while not self.queue.empty():
+                events.append(self.queue.get_nowait())
+
+            # BarcodeValue puede llegar después de BarcodeReq en la misma
+            # publicación: los datos se aplican antes que los requests, y los
+            # requests en orden (un pulso True/False no se pierde)
+            for tag, value, _ in events:
+                if tag not in REQUEST_TAGS:
+                    self.values[tag] = value
+            for tag, value, received in events:
+                if tag in REQUEST_TAGS:
+                    await self._on_edge(tag, value, received)
+
+    async def _on_edge(self, tag: str, value, received: float):
+        first = tag not in self.values
+        before = self.values.get(tag)
+        self.values[tag] = value
+        if bool(value) == bool(before) and not first:
+            return
+        try:
+            if value:
+                await self._on_request(tag)
+                self.latencies_ms.append((time.perf_counter() - received) * 1000)
+            elif not first:
+                await self._on_reset(tag)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"{self.name}: error en {tag}: {e}")
+        finally:
+            self.state = "IDLE"
+
+    async def _on_request(self, tag: str):
+        self.handled[tag] += 1
+        store = self.daemon.store
+
+        if tag == "BarcodeReq":
+            self.state = "LOOKUP"
+            barcode = self.values.get("BarcodeValue") or ""
+            try:
+                record = await store.lookup(barcode)
+            except RecordNotFound:
+                self.not_found += 1
+                await self._write({"RecordNotFound": True})
+                return
+            await self._write({
+                "RecordNotFound": False,
+                "UUID_pull": uuid_payload(record.get("ContainerUUID") or str(uuid.uuid4()), {"BARCD": barcode}),
+            })
+
+        elif tag == "UUIDReq":
+            self.state = "UUID"
+            await self._write({"UUID_pull": uuid_payload(str(uuid.uuid4()))})
+
+        elif tag == "WriteToDb":
+            self.state = "WRITING"
+            data_values = await self.daemon.batch.read([self.node_ids["MaterialRecord_push"]])
+            data_values[0].StatusCode.check()
+            records = [record_to_dict(r) for r in data_values[0].Value.Value or []]
+            records = [r for r in records if r.get("BARCD", True)]
+            if self.daemon.forwarder is not None:
+                await self.daemon.forwarder.submit(
+                    {"station": self.name, "records": records, "key": idempotency_key(self.name, records)}
+                )
+            else:
+                await self.daemon.pipeline.submit(self.name, records)
+            await self._write({"WriteToDb_Confirmation": True})
+
+    async def _on_reset(self, tag: str):
+        if tag == "BarcodeReq":
+            await self._write({"RecordNotFound": False})
+        elif tag == "WriteToDb":
+            await self._write({"WriteToDb_Confirmation": False})
+
+    async def _write(self, values: dict):
+        results = await self.daemon.writer.write(
+            [(self.node_ids[name], value) for name, value in values.items()]
+        )
+        for name, status in zip(values, results):
+            if not status.is_good():
+                raise RuntimeError(f"{name}: {status}")
+
+
+class EdgeGatewayDaemon:
+    """Una sesión y una suscripción para todas las estaciones."""
+
+    def __init__(self, url: str = SERVER_URL, stations: dict = None, store=None,
+                 namespace_uri: str = NAMESPACE_URI,
+                 publishing_interval: float = PUBLISHING_INTERVAL_MS,
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL_S,
+                 flush_interval_ms: float = FLUSH_INTERVAL_MS, journal_path: str = None):
+        self.url = url
+        # {nombre de estación: prefijo de NodeId}; "" = tags del simulador
+        self.stations = stations or {"CPS_001": ""}
+        self.store = store or MemoryRecordStore()
+        self.namespace_uri = namespace_uri
+        self.publishing_interval = publishing_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.flush_interval_ms = flush_interval_ms
+        self.journal_path = journal_path
+
+        self.client = None
+        self.batch = None
+        self.writer = None
+        self.pipeline = None
+        self.forwarder = None
+        self.subscription = None
+        self.machines = {}
+        self._tasks = []
+
+    async def start(self):
+        self.client = Client(url=self.url)
+        await self.client.connect()
+        await TypeDefinitionCache(self.client, self.url).load()
+
+        specs = {}
+        for station, prefix in self.stations.items():
+            for name, node_id in station_node_ids(prefix, self.namespace_uri).items():
+                specs[f"{station}/{name}"] = node_id
+        resolved = await NodeIdResolver(self.client, self.url).resolve(specs)
+
+        self.batch = BatchIO(self.client)
+        await self.batch.load_limits()
+        self.writer = ResponseWriter(self.batch)
+        self.writer.start()
+        self.pipeline = WritePipeline(self.store, flush_interval_ms=self.flush_interval_ms)
+        self.pipeline.start()
+        if self.journal_path:
+            # Lo pendiente de una ejecución anterior se reenvía al arrancar
+            self.forwarder = StoreAndForward(RingJournal(self.journal_path), self._forward)
+            self.forwarder.start()
+
+        for station in self.stations:
+            node_ids = {name: resolved[f"{station}/{name}"] for name in STATION_TAGS}
+            self.machines[station] = StationMachine(station, node_ids, self)
+        self._tasks = [asyncio.create_task(machine.run()) for machine in self.machines.values()]
+
+        self.subscription = TagSubscription(self.client, publishing_interval=self.publishing_interval,
+                                            queue_size=QUEUE_SIZE)
+        self.subscription.on_data(self._dispatch)
+        await self.subscription.start({
+            f"{station}/{name}": machine.node_ids[name]
+            for station, machine in self.machines.items() for name in MONITORED_TAGS
+        })
+
+        if self.heartbeat_interval:
+            self._tasks.append(asyncio.create_task(self._heartbeat()))
+        logger.info(f"✅ {len(self.machines)} estaciones en {self.url}")
+
+    def _dispatch(self, name: str, data_value):
+        station, tag = name.split("/", 1)
+        value = data_value.Value.Value if data_value.Value is not None else None
+        self.machines[station].queue.put_nowait((tag, value, time.perf_counter()))
+
+    async def _forward(self, entries: list):
+        """Destino del journal: WriteToDb por el pipeline, con su clave."""
+        await asyncio.gather(*(self.pipeline.submit(e["station"], e["records"], e["key"]) for e in entries))
+
+    async def _heartbeat(self):
+        state = False
+        while True:
+            state = not state
+            try:
+                await self.writer.write([(m.node_ids["Heartbeat"], state) for m in self.machines.values()])
+            except Exception as e:
+                logger.error(f"Error en heartbeat: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.subscription is not None:
+            await self.subscription.stop()
+            self.subscription = None
+        if self.writer is not None:
+            await self.writer.stop()
+        if self.forwarder is not None:
+            await self.forwarder.stop()
+            self.forwarder.journal.close()
+            self.forwarder = None
+        if self.pipeline is not None:
+            await self.pipeline.stop()
+        if self.client is not None:
+            await self.client.disconnect()
+        await self.store.close()
+
+    async def run(self, duration: float = None):
+        """Inicia y atiende hasta duration segundos (None = hasta Ctrl+C)."""
+        await self.start()
+        try:
+            if duration is None:
+                await asyncio.Event().wait()
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            await self.stop()
+
+    def stats(self) -> dict:
+        latencies = [ms for machine in self.machines.values() for ms in machine.latencies_ms]
+        return {
+            "stations": len(self.machines),
+            "handled": sum(sum(machine.handled.values()) for machine in self.machines.values()),
+            "not_found": sum(machine.not_found for machine in self.machines.values()),
+            "errors": sum(machine.errors for machine in self.machines.values()),
+            "write_requests": self.writer.requests if self.writer else 0,
+            "written_items": self.writer.items if self.writer else 0,
+            "latencies_ms": latencies,
+            "pipeline": self.pipeline.stats() if self.pipeline else {},
+            "forwarder": self.forwarder.stats() if self.forwarder else {},
+        }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Edge Gateway: handshakes por estación")
+    parser.add_argument("--url", default=SERVER_URL)
+    parser.add_argument("--stations", type=int, default=0,
+                        help="Número de estaciones (0 = una, con los tags del simulador)")
+    parser.add_argument("--prefix", default="CPS_{:03d}.", help="Prefijo de NodeId por estación")
+    parser.add_argument("--duration", type=float, default=None)
+    parser.add_argument("--db", help="Base SQLite de registros (python record_store.py --generate N)")
+    parser.add_argument("--journal", help="Journal de store-and-forward para WriteToDb (p. ej. cache/journal.bin)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    stations = None
+    if args.stations:
+        stations = {args.prefix.format(i).rstrip("."): args.prefix.format(i) for i in range(1, args.stations + 1)}
+
+    store = CachedRecordStore(SQLiteRecordStore(args.db)) if args.db else None
+    daemon = EdgeGatewayDaemon(args.url, stations, store, journal_path=args.journal)
+    try:
+        await daemon.run(args.duration)
+    finally:
+        stats = daemon.stats()
+        print(f"\nHandshakes atendidos: {stats['handled']} (no encontrados {stats['not_found']}, "
+              f"errores {stats['errors']}), {stats['write_requests']} peticiones Write")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Gateway detenido por el usuario")
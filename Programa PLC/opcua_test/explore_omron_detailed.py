@@ -3,6 +3,7 @@
     EXPLORACIÓN DETALLADA - PLC OMRON VIEJO
     
     Enfocado en GlobalVars y tags del namespace 4
+    (resuelto por URI: el índice puede cambiar)
 ================================================================================
 """
 
@@ -10,8 +11,20 @@ import asyncio
 from asyncua import Client, ua
 from datetime import datetime
 
+from attribute_cache import AttributeCache
+from nodeid_resolver import NodeIdResolver
+
 SERVER_URL = "opc.tcp://192.168.101.100:55533"
 
+# Namespace de los tags del PLC (ns=4 en OMRON_PLC_VIEJO_OPC_UA_INFO.txt)
+OMRON_NAMESPACE_URI = "urn:OMRON:NxOpcUaServer:FactoryAutomation"
+
+NODES = {
+    "GlobalVars": f"nsu={OMRON_NAMESPACE_URI};s=NxController.GlobalVars",
+    "NxController": f"nsu={OMRON_NAMESPACE_URI};s=NxController",
+    "DeviceStatus": f"nsu={OMRON_NAMESPACE_URI};s=PLC.DeviceStatus",
+}
+
 async def explore_global_vars():
     """Explorar GlobalVars del PLC OMRON."""
     
@@ -29,15 +42,23 @@ async def explore_global_vars():
         await client.connect()
         print("✓ Conectado\n")
         
+        resolver = NodeIdResolver(client, SERVER_URL)
+        node_ids = await resolver.resolve(NODES)
+        ns = resolver.index(OMRON_NAMESPACE_URI)
+        
+        # BrowseName / NodeClass / DataType desde cache/attribute_cache.json
+        cache = AttributeCache(client, SERVER_URL)
+        await cache.load()
+        
         # =====================================================================
         # EXPLORAR GLOBALVARS
         # =====================================================================
         print("=" * 80)
-        print("EXPLORANDO GlobalVars (ns=4)")
+        print(f"EXPLORANDO GlobalVars (ns={ns})")
         print("=" * 80)
         
         # El nodo GlobalVars que vimos
-        global_vars_node = client.get_node("ns=4;s=NxController.GlobalVars")
+        global_vars_node = client.get_node(node_ids["GlobalVars"])
         
         print("\nListando todas las variables globales:")
         print("-" * 80)
@@ -52,17 +73,27 @@ async def explore_global_vars():
             try:
                 children = await node.get_children()
                 
+                # Atributos de todos los hijos (un Read sólo para los que no
+                # están en la caché) y valores de las variables en un Read
+                attributes = await cache.fill(children)
+                variables = [child for child in children
+                             if attributes[child] and attributes[child]["NodeClass"] == ua.NodeClass.Variable]
+                data_values = dict(zip(variables, await cache.read_values(variables)))
+                
                 for child in children:
                     try:
-                        browse_name = await child.read_browse_name()
-                        node_class = await child.read_node_class()
+                        if attributes[child] is None:
+                            continue
+                        browse_name = attributes[child]["BrowseName"]
+                        node_class = attributes[child]["NodeClass"]
                         
                         current_path = f"{path}.{browse_name.Name}" if path else browse_name.Name
                         
                         if node_class == ua.NodeClass.Variable:
                             try:
-                                value = await child.read_value()
-                                data_type = await child.read_data_type_as_variant_type()
+                                data_values[child].StatusCode.check()
+                                value = data_values[child].Value.Value
+                                data_type = attributes[child]["VariantType"]
                                 
                                 tag_info = {
                                     'name': current_path,
@@ -106,16 +137,17 @@ async def explore_global_vars():
         print("EXPLORANDO Master_CPU (NxController)")
         print("=" * 80)
         
-        master_cpu_node = client.get_node("ns=4;s=NxController")
+        master_cpu_node = client.get_node(node_ids["NxController"])
         
         print("\nEstructura de Master_CPU:")
         print("-" * 80)
         
         children = await master_cpu_node.get_children()
+        attributes = await cache.fill(children)
         for child in children:
             try:
-                browse_name = await child.read_browse_name()
-                node_class = await child.read_node_class()
+                browse_name = attributes[child]["BrowseName"]
+                node_class = attributes[child]["NodeClass"]
                 class_str = str(node_class).split('.')[-1]
                 print(f"  {browse_name.Name} [{class_str}] - {child.nodeid}")
                 
@@ -133,7 +165,7 @@ async def explore_global_vars():
         print("EXPLORANDO DeviceStatus")
         print("=" * 80)
         
-        device_status_node = client.get_node("ns=4;s=PLC.DeviceStatus")
+        device_status_node = client.get_node(node_ids["DeviceStatus"])
         
         print("\nEstado del dispositivo:")
         print("-" * 80)
@@ -6,38 +6,32 @@ Servidor: 192.168.101.100:55533
 import asyncio
 from asyncua import Client, ua
 
+from address_space_crawler import AddressSpaceCrawler
+from batch_io import BatchIO
+
 SERVER_URL = "opc.tcp://192.168.101.100:55533"
 
-async def browse_deep(client, node, path="", target="EgComIn", max_level=8, level=0):
+async def browse_deep(client, start, path="", target="EgComIn", max_level=8):
     """Buscar nodos que contengan el target"""
-    if level > max_level:
-        return
+    crawler = AddressSpaceCrawler(client, max_depth=max_level + 1)
+    table = await crawler.crawl(start, path)
     
-    try:
-        children = await node.get_children()
-        for child in children:
-            try:
-                name = await child.read_browse_name()
-                node_id = child.nodeid
-                current_path = f"{path}/{name.Name}" if path else name.Name
-                
-                # Si el nombre contiene lo que buscamos, mostrarlo
-                if target.lower() in name.Name.lower() or "heartbeat" in name.Name.lower():
-                    print(f"✓ ENCONTRADO: {current_path}")
-                    print(f"  NodeId: {node_id}")
-                    try:
-                        value = await child.read_value()
-                        print(f"  Valor: {value}")
-                    except:
-                        pass
-                    print()
-                
-                # Continuar explorando
-                await browse_deep(client, child, current_path, target, max_level, level + 1)
-            except Exception as e:
-                pass
-    except Exception as e:
-        pass
+    found = [
+        row for row in table
+        if target.lower() in row['name'].lower() or "heartbeat" in row['name'].lower()
+    ]
+    
+    # Leer los valores de todos los encontrados en una sola petición
+    batch = BatchIO(client)
+    await batch.load_limits()
+    data_values = await batch.read([row['nodeid'] for row in found])
+    
+    for row, dv in zip(found, data_values):
+        print(f"✓ ENCONTRADO: {row['path']}")
+        print(f"  NodeId: {row['nodeid']}")
+        if dv.StatusCode.is_good():
+            print(f"  Valor: {dv.Value.Value}")
+        print()
 
 async def explore_tags_node(client):
     """Explorar el nodo Tags directamente"""
@@ -89,8 +83,7 @@ async def main():
         print("Buscando 'EgComIn' en todo el árbol...")
         print("-" * 70)
         
-        cps_node = client.get_node("ns=9;s=CPS001")
-        await browse_deep(client, cps_node, "CPS001", "EgCom", 10)
+        await browse_deep(client, "ns=9;s=CPS001", "CPS001", "EgCom", 10)
         
     except Exception as e:
         print(f"✗ Error: {e}")
@@ -5,45 +5,11 @@ que podamos usar para probar comunicacion
 import asyncio
 from asyncua import Client
 
-async def explore_model(node, path="", results=None, depth=0):
-    """Explorar buscando variables del Model"""
-    if results is None:
-        results = []
-    if depth > 4:
-        return results
-    
-    try:
-        name = await node.read_browse_name()
-        node_class = await node.read_node_class()
-        current_path = f"{path}/{name.Name}" if path else name.Name
-        
-        # Si es variable, intentar leer
-        if node_class.value == 2:  # Variable
-            try:
-                val = await node.read_value()
-                results.append({
-                    "path": current_path,
-                    "node_id": str(node),
-                    "value": val,
-                    "readable": True
-                })
-            except:
-                pass
-        
-        # Explorar hijos si es carpeta relevante
-        if any(x in name.Name for x in ["Model", "Global", "Var", "UI", "Alias"]):
-            children = await node.get_children()
-            for child in children[:20]:
-                await explore_model(child, current_path, results, depth + 1)
-        elif depth < 2:
-            children = await node.get_children()
-            for child in children[:15]:
-                await explore_model(child, current_path, results, depth + 1)
-                
-    except:
-        pass
-    
-    return results
+from address_space_index import AddressSpaceIndex
+
+# Variables bajo carpetas Model, GlobalVars, UI, Alias... en cualquier nivel
+MODEL_PATH_REGEX = r"/(?-i:[^/]*(Model|Global|Var|UI|Alias)[^/]*)/"
+MAX_DEPTH = 4
 
 async def main():
     url = "opc.tcp://192.168.101.100:59100"
@@ -58,15 +24,23 @@ async def main():
         print("Buscando variables legibles (Model, GlobalVars, UI)...")
         print("="*60)
         
-        objects = client.nodes.objects
-        results = await explore_model(objects)
+        # Índice local primero; recorre el servidor sólo si no hay coincidencias
+        index = AddressSpaceIndex(url)
+        results = index.search(regex=MODEL_PATH_REGEX, field="path", node_class="Variable")
+        if not results:
+            await index.refresh(client)
+            results = index.search(regex=MODEL_PATH_REGEX, field="path", node_class="Variable")
+        results = [r for r in results if r['depth'] <= MAX_DEPTH]
+        
+        await index.read_values(client, results)
+        results = [r for r in results if r['readable']]
         
         print(f"\nEncontradas {len(results)} variables legibles:\n")
         
         for r in results[:20]:  # Mostrar primeras 20
             val_str = str(r['value'])[:40]
             print(f"📊 {r['path']}")
-            print(f"   NodeId: {r['node_id']}")
+            print(f"   NodeId: {r['nodeid']}")
             print(f"   Valor: {val_str}")
             print()
         
@@ -78,7 +52,7 @@ async def main():
             for r in results:
                 if "Server" not in r['path']:
                     try:
-                        node = client.get_node(r['node_id'])
+                        node = client.get_node(r['nodeid'])
                         original = r['value']
                         
                         # Intentar escribir
@@ -2,8 +2,11 @@
 Explorar namespaces y tags en Optix Edge
 """
 import asyncio
+import time
 from asyncua import Client
 
+from address_space_index import AddressSpaceIndex, ROOT_PATH
+
 async def main():
     url = "opc.tcp://192.168.101.100:59100"
     
@@ -23,43 +26,31 @@ async def main():
         print("\n" + "="*50)
         print("BUSCANDO TAGS...")
         
-        # Probar diferentes formatos de NodeId
-        formatos = [
-            "ns=6;s=GlobalVars.EgComIn_Heartbeat",
-            "ns=9;s=GlobalVars.EgComIn_Heartbeat",
-            "ns=6;s=EgComIn_Heartbeat",
-            "ns=9;s=EgComIn_Heartbeat",
-            "ns=6;s=Controller Tags.EgComIn_Heartbeat",
-            "ns=9;s=Controller Tags.EgComIn_Heartbeat",
-        ]
+        # Buscar en el índice local (la red sólo si no aparece)
+        index = AddressSpaceIndex(url)
+        start = time.perf_counter()
+        found = await index.find(client, ["EgComIn_Heartbeat"], node_class="Variable")
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"({index.node_count} nodos indexados, búsqueda en {elapsed:.1f} ms)")
         
-        for fmt in formatos:
-            try:
-                node = client.get_node(fmt)
-                val = await node.read_value()
-                print(f"✅ ENCONTRADO: {fmt} = {val}")
-            except:
-                print(f"❌ No existe: {fmt}")
+        await index.read_values(client, found)
+        for r in found:
+            if r.get('readable'):
+                print(f"✅ ENCONTRADO: {r['nodeid']} = {r['value']}")
+            else:
+                print(f"❌ No legible: {r['nodeid']} ({r.get('error')})")
+        if not found:
+            print("❌ No existe EgComIn_Heartbeat en el servidor")
         
         print("\n" + "="*50)
         print("EXPLORANDO NODOS RAÍZ...")
         
-        # Explorar Objects folder
-        objects = client.nodes.objects
-        children = await objects.get_children()
+        # Objects y un nivel más, desde el índice
         print("\nHijos de Objects:")
-        for child in children:
-            name = await child.read_browse_name()
-            print(f"  - {name.Name} ({child})")
-            
-            # Explorar un nivel más
-            try:
-                subchildren = await child.get_children()
-                for sub in subchildren[:5]:  # Solo primeros 5
-                    subname = await sub.read_browse_name()
-                    print(f"      └─ {subname.Name} ({sub})")
-            except:
-                pass
+        for child in index.children(ROOT_PATH):
+            print(f"  - {child['name']} ({child['nodeid']})")
+            for sub in index.children(child['path'])[:5]:  # Solo primeros 5
+                print(f"      └─ {sub['name']} ({sub['nodeid']})")
         
     except Exception as e:
         print(f"❌ Error: {e}")
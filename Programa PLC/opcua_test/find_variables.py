@@ -4,41 +4,7 @@ Buscar variable1 y variable2 en todo el servidor
 import asyncio
 from asyncua import Client
 
-async def search_deep(node, search_terms, results, depth=0, max_depth=6):
-    """Buscar variables por nombre"""
-    if depth > max_depth:
-        return
-    
-    try:
-        name = await node.read_browse_name()
-        
-        # Verificar si coincide
-        for term in search_terms:
-            if term.lower() in name.Name.lower():
-                node_class = await node.read_node_class()
-                try:
-                    val = await node.read_value()
-                    results.append({
-                        "name": name.Name,
-                        "node_id": str(node),
-                        "value": val,
-                        "readable": True
-                    })
-                except Exception as e:
-                    results.append({
-                        "name": name.Name,
-                        "node_id": str(node),
-                        "error": str(e)[:50],
-                        "readable": False
-                    })
-        
-        # Explorar hijos
-        children = await node.get_children()
-        for child in children:
-            await search_deep(child, search_terms, results, depth + 1, max_depth)
-                
-    except:
-        pass
+from address_space_index import AddressSpaceIndex
 
 async def main():
     url = "opc.tcp://192.168.101.100:59100"
@@ -53,21 +19,22 @@ async def main():
         print("Buscando 'variable1' y 'variable2'...")
         print("="*60)
         
-        objects = client.nodes.objects
-        results = []
-        await search_deep(objects, ["variable1", "variable2", "Variable1", "Variable2"], results)
+        # Índice local primero; recorre el servidor sólo si falta alguno
+        index = AddressSpaceIndex(url)
+        results = await index.find(client, ["variable1", "variable2"])
+        await index.read_values(client, results)
         
         if results:
             print(f"\n✅ Encontradas {len(results)} coincidencias:\n")
             for r in results:
                 print(f"📊 {r['name']}")
-                print(f"   NodeId: {r['node_id']}")
-                if r['readable']:
+                print(f"   NodeId: {r['nodeid']}")
+                if r.get('readable'):
                     print(f"   Valor: {r['value']}")
                     
                     # Probar escribir
                     try:
-                        node = client.get_node(r['node_id'])
+                        node = client.get_node(r['nodeid'])
                         original = r['value']
                         if isinstance(original, bool):
                             await node.write_value(not original)
@@ -81,8 +48,10 @@ async def main():
                             await node.write_value(original)
                     except Exception as e:
                         print(f"   ⚠️ Escritura: {str(e)[:40]}")
-                else:
+                elif 'error' in r:
                     print(f"   ❌ Error: {r['error']}")
+                else:
+                    print(f"   📁 {r['node_class']}")
                 print()
         else:
             print("\n❌ No se encontraron las variables.")
@@ -10,8 +10,19 @@ import asyncio
 from asyncua import Client, ua
 from datetime import datetime
 
+from attribute_cache import AttributeCache
+from l5k_datatypes import parse_l5k_datatypes
+from nodeid_resolver import NodeIdResolver
+from struct_codec import codecs_from_l5k
+
 SERVER_URL = "opc.tcp://192.168.101.96:4840"
 
+# Namespace de los tags del PLC (ns=6 en REPORTE_DIAGNOSTICO.md); se resuelve
+# por URI porque el índice depende del orden de la tabla del servidor
+TAGS_NAMESPACE_URI = "urn:RockwellAutomation:5069-L310ER%2FA"
+
+MATERIAL_RECORD_PULL = f"nsu={TAGS_NAMESPACE_URI};s=Program:EdgeGateway.EdCommIn.MaterialRecord_pull"
+
 async def full_diagnostic():
     """Diagnóstico completo del servidor OPC UA."""
     
@@ -34,7 +45,8 @@ async def full_diagnostic():
         print("1. ANÁLISIS DE NAMESPACES")
         print("=" * 80)
         
-        ns_array = await client.get_namespace_array()
+        resolver = NodeIdResolver(client, SERVER_URL)
+        ns_array = await resolver.load()
         print(f"\nTotal de namespaces: {len(ns_array)}\n")
         
         for i, ns_uri in enumerate(ns_array):
@@ -62,20 +74,21 @@ async def full_diagnostic():
         print(f"\nProbando tag: {test_tag}")
         print("-" * 60)
         
-        for ns in range(7):
-            node_id = f"ns={ns};s={test_tag}"
-            try:
-                node = client.get_node(node_id)
-                value = await node.read_value()
-                print(f"  ns={ns}: ✓ ENCONTRADO - Valor: {value}")
-            except Exception as e:
-                error_name = type(e).__name__
-                if "BadNodeIdUnknown" in str(e):
-                    print(f"  ns={ns}: ✗ No existe")
-                else:
-                    print(f"  ns={ns}: ✗ Error: {error_name}")
+        # Todos los namespaces en una sola petición Read
+        candidates = [f"ns={ns};s={test_tag}" for ns in range(len(ns_array))]
+        for ns, status in enumerate(await resolver.probe(candidates)):
+            if status.is_good():
+                print(f"  ns={ns}: ✓ ENCONTRADO")
+            elif status.name == "BadNodeIdUnknown":
+                print(f"  ns={ns}: ✗ No existe")
+            else:
+                print(f"  ns={ns}: ✗ Error: {status.name}")
         
-        print("\n>>> CONCLUSIÓN: Los tags solo existen en ns=6")
+        try:
+            tags_ns = resolver.index(TAGS_NAMESPACE_URI)
+            print(f"\n>>> CONCLUSIÓN: Los tags están en ns={tags_ns} ({TAGS_NAMESPACE_URI})")
+        except KeyError:
+            print(f"\n>>> CONCLUSIÓN: El servidor no publica {TAGS_NAMESPACE_URI}")
         
         # =====================================================================
         # 3. ANÁLISIS DE TIPOS DE DATOS
@@ -85,13 +98,15 @@ async def full_diagnostic():
         print("=" * 80)
         
         test_tags = [
-            ("ns=6;s=YEAR", "YEAR (variable simple)"),
-            ("ns=6;s=Program:EdgeGateway.EdCommIn.Heartbeat", "Heartbeat (BOOL)"),
-            ("ns=6;s=Program:EdgeGateway.EgComOut.BarcodeValue", "BarcodeValue (STRING)"),
-            ("ns=6;s=Program:EdgeGateway.EdCommIn.UUID_pull", "UUID_pull (STRING)"),
-            ("ns=6;s=Program:EdgeGateway.EdCommIn.MaterialRecord_pull", "MaterialRecord_pull (ESTRUCTURA)"),
-            ("ns=6;s=Program:EdgeGateway.EgComOut.MaterialRecord_push", "MaterialRecord_push (ARRAY ESTRUCTURA)"),
+            (f"nsu={TAGS_NAMESPACE_URI};s=YEAR", "YEAR (variable simple)"),
+            (f"nsu={TAGS_NAMESPACE_URI};s=Program:EdgeGateway.EdCommIn.Heartbeat", "Heartbeat (BOOL)"),
+            (f"nsu={TAGS_NAMESPACE_URI};s=Program:EdgeGateway.EgComOut.BarcodeValue", "BarcodeValue (STRING)"),
+            (f"nsu={TAGS_NAMESPACE_URI};s=Program:EdgeGateway.EdCommIn.UUID_pull", "UUID_pull (STRING)"),
+            (MATERIAL_RECORD_PULL, "MaterialRecord_pull (ESTRUCTURA)"),
+            (f"nsu={TAGS_NAMESPACE_URI};s=Program:EdgeGateway.EgComOut.MaterialRecord_push", "MaterialRecord_push (ARRAY ESTRUCTURA)"),
         ]
+        resolved = await resolver.resolve([spec for spec, _ in test_tags])
+        test_tags = [(resolved[spec], description) for spec, description in test_tags]
         
         print("\nAnalizando tipos de datos:")
         print("-" * 80)
@@ -99,11 +114,22 @@ async def full_diagnostic():
         standard_types = []
         custom_types = []
         
+        # DataType de cache/attribute_cache.json (un Read la primera vez) y
+        # todos los valores en un solo Read del atributo Value
+        attribute_cache = AttributeCache(client, SERVER_URL)
+        node_ids = [node_id for node_id, _ in test_tags if node_id]
+        attributes = await attribute_cache.fill(node_ids)
+        data_values = dict(zip(node_ids, await attribute_cache.read_values(node_ids)))
+        
         for node_id, description in test_tags:
             try:
-                node = client.get_node(node_id)
-                value = await node.read_value()
-                data_type = await node.read_data_type_as_variant_type()
+                if attributes.get(node_id) is None:
+                    raise ValueError(f"{node_id}: el nodo no existe")
+                data_values[node_id].StatusCode.check()
+                value = data_values[node_id].Value.Value
+                data_type = attributes[node_id]["VariantType"]
+                if data_type is None:
+                    data_type = await client.get_node(node_id).read_data_type_as_variant_type()
                 
                 # Mapeo de tipos
                 type_names = {
@@ -175,10 +201,11 @@ async def full_diagnostic():
         
         # Intentar obtener más info sobre el tipo custom
         try:
-            node = client.get_node("ns=6;s=Program:EdgeGateway.EdCommIn.MaterialRecord_pull")
+            node = client.get_node(resolver.node_id(MATERIAL_RECORD_PULL))
             
-            # Obtener el DataType NodeId
-            data_type_node = await node.read_data_type()
+            # Obtener el DataType NodeId (ya en la caché de atributos)
+            attributes = attribute_cache.get(node.nodeid)
+            data_type_node = attributes["DataType"] if attributes else await node.read_data_type()
             print(f"\n  DataType NodeId: {data_type_node}")
             
             # Intentar leer el valor raw
@@ -188,6 +215,13 @@ async def full_diagnostic():
             if hasattr(value, 'Body'):
                 print(f"  Tamaño del Body (bytes): {len(value.Body)}")
                 
+            # Decodificación manual con el UDT del .L5K (sin cargar tipos)
+            if getattr(value, 'Body', None):
+                codec = codecs_from_l5k(parse_l5k_datatypes(), ["Syn_FileReadIn_Struct"])["Syn_FileReadIn_Struct"]
+                print("\n  Decodificado con Syn_FileReadIn_Struct del L5K (struct_codec):")
+                for name, field in codec.decode_dict(value.Body).items():
+                    print(f"    {name}: {field!r}")
+                
             print("\n  EXPLICACIÓN DEL PROBLEMA:")
             print("  " + "-" * 60)
             print("  El servidor OPC UA envía estructuras (UDT) como 'ExtensionObject'.")
@@ -218,7 +252,7 @@ async def full_diagnostic():
             print("  ✓ load_data_type_definitions() completado")
             
             # Volver a leer el tag
-            node = client.get_node("ns=6;s=Program:EdgeGateway.EdCommIn.MaterialRecord_pull")
+            node = client.get_node(resolver.node_id(MATERIAL_RECORD_PULL))
             value = await node.read_value()
             
             print(f"\n  Valor después de cargar tipos:")
@@ -316,16 +350,22 @@ async def test_structure_members():
         print(f"\nIntentando acceder a miembros de: {base_path}")
         print("-" * 60)
         
+        # Todos los candidatos en una sola petición Read
+        resolver = NodeIdResolver(client, SERVER_URL)
+        node_ids = await resolver.resolve(
+            {member: f"nsu={TAGS_NAMESPACE_URI};s={base_path}.{member}" for member in possible_members}
+        )
+        if None in node_ids.values():
+            print(f"  El servidor no publica {TAGS_NAMESPACE_URI}")
+            return
+        status_codes = await resolver.probe(list(node_ids.values()))
+        
         found_any = False
-        for member in possible_members:
-            node_id = f"ns=6;s={base_path}.{member}"
-            try:
-                node = client.get_node(node_id)
-                value = await node.read_value()
+        for (member, node_id), status in zip(node_ids.items(), status_codes):
+            if status.is_good():
+                value = await client.get_node(node_id).read_value()
                 print(f"  ✓ {member}: {value}")
                 found_any = True
-            except:
-                pass
         
         if not found_any:
             print("  No se encontraron miembros accesibles directamente")
@@ -6,6 +6,20 @@
     - Leer todos los tags de comunicación
     - Escribir valores a los tags
     - Simular flujos de trabajo típicos
+    - Monitorear tags por suscripción (MonitoredItems) en lugar de polling
+    - Leer y escribir muchos tags en una sola petición (read_tags/write_tags)
+    - Tags declarados por namespace URI y resueltos al conectar (NodeIdResolver);
+      si NamespaceArray cambia (en vivo o entre sesiones) se re-resuelven y
+      se recargan los tipos
+    - Definiciones de tipos en caché por endpoint (TypeDefinitionCache)
+    - Lecturas/escrituras parciales de arrays (IndexRange) y cursor de
+      append sobre MaterialRecord_push
+    - Flujos BarcodeReq / UUIDReq / WriteToDb como handshakes declarados
+      (HandshakeRunner) con timeouts configurables e histogramas de latencia
+    - Tags del handshake registrados (RegisterNodes) una vez por sesión:
+      lecturas y escrituras con los NodeIds optimizados del servidor
+    - Sesión resiliente opcional (SessionManager): reconexión, suscripción
+      transferida y tags registrados de nuevo tras cada caída
     
     Ejecutar con: python gateway_client.py
 ================================================================================
@@ -13,9 +27,18 @@
 
 import asyncio
 import logging
+import os
 from datetime import datetime
 from asyncua import Client
 
+from batch_io import BatchIO, chunks, to_nodeid
+from handshake import Handshake, HandshakeRunner, HandshakeTimeout
+from index_range import ArrayCursor, is_single_index, read_range, write_range
+from nodeid_resolver import NodeIdResolver
+from session_manager import SessionManager
+from tag_subscription import TagSubscription, PUBLISHING_INTERVAL_MS, SAMPLING_INTERVAL_MS
+from type_definition_cache import TypeDefinitionCache
+
 # Configurar logging (silenciar asyncua para output más limpio)
 logging.getLogger('asyncua').setLevel(logging.WARNING)
 logger = logging.getLogger("GatewayClient")
@@ -31,7 +54,27 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 # Para el Optix Edge de Rockwell (FTOptixApplication):
 SERVER_URL = "opc.tcp://192.168.101.100:59100"
 
-NAMESPACE_INDEX = 2  # Para el simulador
+# Namespace por URI (el índice ns=2 del simulador puede cambiar)
+NAMESPACE_URI = "urn:RockwellAutomation:EdgeGateway:Simulator"
+
+# Intervalo de polling (solo si el servidor no acepta suscripciones)
+POLL_INTERVAL = 0.1
+
+# Valor vacío de UUID_pull en el simulador
+EMPTY_UUID = '{"uuid": "", "timestamp": "", "data": {}}'
+
+# Timeouts de los handshakes con el gateway (segundos)
+BARCODE_TIMEOUT = 5.0
+UUID_TIMEOUT = 3.0
+WRITE_TO_DB_TIMEOUT = 3.0
+
+# Tiempo mínimo con un request abajo antes de volver a subirlo: el gateway
+# real muestrea los bits cada ~100 ms y detecta flancos (gateway_simulator.py
+# atiende cada escritura y no lo necesita)
+REQUEST_REARM = 0.2
+
+# Histogramas de latencia exportados al salir
+HANDSHAKE_HISTOGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "handshakes")
 
 # ============================================================================
 # DEFINICIÓN DE TAGS
@@ -39,67 +82,285 @@ NAMESPACE_INDEX = 2  # Para el simulador
 
 TAGS = {
     # Tags de entrada (Gateway -> PLC)
-    "Heartbeat": f"ns={NAMESPACE_INDEX};s=EgComIn_Heartbeat",
-    "RecordNotFound": f"ns={NAMESPACE_INDEX};s=EgComIn_RecordNotFound",
-    "WriteToDb_Confirmation": f"ns={NAMESPACE_INDEX};s=EgComIn_WriteToDb_Confirmation",
-    "UUID_pull": f"ns={NAMESPACE_INDEX};s=EgComIn_UUID_pull",
+    "Heartbeat": f"nsu={NAMESPACE_URI};s=EgComIn_Heartbeat",
+    "RecordNotFound": f"nsu={NAMESPACE_URI};s=EgComIn_RecordNotFound",
+    "WriteToDb_Confirmation": f"nsu={NAMESPACE_URI};s=EgComIn_WriteToDb_Confirmation",
+    "UUID_pull": f"nsu={NAMESPACE_URI};s=EgComIn_UUID_pull",
     
     # Tags de salida (PLC -> Gateway)
-    "BarcodeReq": f"ns={NAMESPACE_INDEX};s=EgComOut_BarcodeReq",
-    "BarcodeValue": f"ns={NAMESPACE_INDEX};s=EgComOut_BarcodeValue",
-    "UUIDReq": f"ns={NAMESPACE_INDEX};s=EgComOut_UUIDReq",
-    "WriteToDb": f"ns={NAMESPACE_INDEX};s=EgComOut_WriteToDb",
+    "BarcodeReq": f"nsu={NAMESPACE_URI};s=EgComOut_BarcodeReq",
+    "BarcodeValue": f"nsu={NAMESPACE_URI};s=EgComOut_BarcodeValue",
+    "UUIDReq": f"nsu={NAMESPACE_URI};s=EgComOut_UUIDReq",
+    "WriteToDb": f"nsu={NAMESPACE_URI};s=EgComOut_WriteToDb",
     
     # Tags de simulación
-    "SimulationCounter": f"ns={NAMESPACE_INDEX};s=SimulationCounter",
-    "LastUpdate": f"ns={NAMESPACE_INDEX};s=LastUpdate",
+    "SimulationCounter": f"nsu={NAMESPACE_URI};s=SimulationCounter",
+    "LastUpdate": f"nsu={NAMESPACE_URI};s=LastUpdate",
+}
+
+# Tags del handshake, leídos y escritos en cada ciclo: se registran con
+# RegisterNodes al abrir cada sesión
+HOT_TAGS = (
+    "Heartbeat", "RecordNotFound", "WriteToDb_Confirmation", "UUID_pull",
+    "BarcodeReq", "BarcodeValue", "UUIDReq", "WriteToDb",
+)
+
+# Arrays de estructuras: se leen por slot (IndexRange), fuera de la
+# suscripción y de read_tags() por defecto
+ARRAY_TAGS = {
+    "MaterialRecord_push": f"nsu={NAMESPACE_URI};s=EgComOut_MaterialRecord_push",
 }
 
 
+# ============================================================================
+# HANDSHAKES
+# ============================================================================
+
+def new_uuid(value) -> bool:
+    return bool(value) and value != EMPTY_UUID and '"uuid": ""' not in value
+
+
+def barcode_result(changes: dict):
+    """BarcodeReq: ("RecordNotFound", True) o ("UUID_pull", registro)."""
+    
+    if changes.get("RecordNotFound"):
+        return "RecordNotFound", True
+    if new_uuid(changes.get("UUID_pull")):
+        return "UUID_pull", changes["UUID_pull"]
+    return None
+
+
+BARCODE_LOOKUP = Handshake(
+    "BarcodeReq", ["UUID_pull", "RecordNotFound"], barcode_result,
+    timeout=BARCODE_TIMEOUT, release={"RecordNotFound": lambda v: not v},
+    rearm_delay=REQUEST_REARM,
+)
+REQUEST_UUID = Handshake(
+    "UUIDReq", ["UUID_pull"],
+    lambda changes: changes["UUID_pull"] if new_uuid(changes.get("UUID_pull")) else None,
+    timeout=UUID_TIMEOUT, rearm_delay=REQUEST_REARM,
+)
+WRITE_TO_DB = Handshake(
+    "WriteToDb", ["WriteToDb_Confirmation"],
+    lambda changes: changes.get("WriteToDb_Confirmation") or None,
+    timeout=WRITE_TO_DB_TIMEOUT, release={"WriteToDb_Confirmation": lambda v: not v},
+    rearm_delay=REQUEST_REARM,
+)
+
+
 class GatewayClient:
     """Cliente para comunicarse con el Gateway OPC UA."""
     
-    def __init__(self, url=SERVER_URL):
+    def __init__(self, url=SERVER_URL, use_subscriptions=True,
+                 publishing_interval=PUBLISHING_INTERVAL_MS,
+                 sampling_interval=SAMPLING_INTERVAL_MS,
+                 hot_tags=HOT_TAGS, resilient=False):
         self.url = url
         self.client = None
         self.connected = False
         
+        # Con resilient=True la sesión la mantiene un SessionManager
+        self.resilient = resilient
+        self.session = None
+        
+        # Suscripción a los tags (None = modo polling)
+        self.use_subscriptions = use_subscriptions
+        self.publishing_interval = publishing_interval
+        self.sampling_interval = sampling_interval
+        self.subscription = None
+        
+        # Lecturas/escrituras en lote (límites del servidor cargados en connect)
+        self.batch = None
+        
+        # NodeIds de TAGS con el índice de namespace de la sesión actual
+        self.resolver = None
+        self.node_ids = {}
+        self._namespace_task = None
+        
+        # NodeIds devueltos por RegisterNodes (válidos sólo en esta sesión)
+        self.hot_tags = hot_tags
+        self.registered = {}
+        
+        # Handshakes request/acknowledge (por suscripción o polling)
+        self.handshakes = None
+        
     async def connect(self):
-        """Conecta al servidor OPC UA."""
+        """
+        Conecta al servidor OPC UA.
         
-        self.client = Client(url=self.url)
+        En modo resilient espera (reintentando) hasta abrir la sesión.
+        """
         
         try:
-            await self.client.connect()
+            if self.resilient:
+                self.session = SessionManager(self.url)
+                self.session.on_connect(self._open_session)
+                await self.session.start()
+            else:
+                self.client = Client(url=self.url)
+                await self.client.connect()
+                await self._open_session(self.client, reconnected=False)
             self.connected = True
             
-            # Cargar definiciones de tipos (importante para estructuras)
-            await self.client.load_data_type_definitions()
-            
             logger.info(f"✅ Conectado a {self.url}")
+            
+            if self.use_subscriptions:
+                await self.subscribe()
+                
+            self.handshakes = HandshakeRunner(
+                self.write_tags, self.subscription,
+                read=self._read_values, poll_interval=POLL_INTERVAL,
+            )
+                
             return True
             
         except Exception as e:
             logger.error(f"❌ Error de conexión: {e}")
             return False
             
+    async def _open_session(self, client, reconnected):
+        """
+        Prepara cada sesión nueva. Tipos, NodeIds y límites se cargan con
+        la primera; en las siguientes sólo se relee NamespaceArray y, si
+        cambió (recarga de Optix), se re-resuelve todo. RegisterNodes y la
+        vigilancia de NamespaceArray se repiten porque mueren con la sesión.
+        """
+        
+        self.client = client
+        if not reconnected:
+            # Cargar definiciones de tipos (importante para estructuras),
+            # desde cache/type_definitions.json si el servidor no cambió
+            await TypeDefinitionCache(client, self.url).load()
+            
+            self.resolver = NodeIdResolver(client, self.url)
+            self.resolver.on_change(self._on_namespaces_changed)
+            self.node_ids = await self.resolver.resolve({**TAGS, **ARRAY_TAGS})
+            
+            self.batch = BatchIO(client)
+            await self.batch.load_limits()
+        else:
+            self.batch.client = client
+            self.resolver.client = client
+            await self.refresh_namespaces()
+            
+        await self.resolver.watch()
+        await self.register_hot_tags()
+        
+    async def refresh_namespaces(self) -> bool:
+        """
+        Relee NamespaceArray; si difiere de la tabla con la que se
+        resolvieron los tags, recarga los tipos, re-resuelve TAGS y redirige
+        la suscripción a los NodeIds nuevos. Retorna True si cambió.
+        """
+        
+        previous = self.resolver.namespaces
+        if await self.resolver.load() == previous:
+            return False
+            
+        logger.warning(f"⚠️  NamespaceArray de {self.url} cambió: tipos y NodeIds de nuevo")
+        await TypeDefinitionCache(self.client, self.url).load()
+        self.node_ids = await self.resolver.resolve({**TAGS, **ARRAY_TAGS})
+        if self.subscription is not None:
+            self.subscription.retarget({name: self.node_ids[name] for name in self.subscription.tags
+                                        if self.node_ids.get(name)})
+        return True
+        
+    def _on_namespaces_changed(self, namespaces):
+        """Cambio visto por la suscripción a NamespaceArray de la sesión en curso."""
+        
+        self._namespace_task = asyncio.get_running_loop().create_task(self._reload_live_session())
+        
+    async def _reload_live_session(self):
+        try:
+            if not await self.refresh_namespaces():
+                return
+            if self.subscription is not None and self.subscription.retargeted:
+                try:
+                    await self.subscription.subscription.delete()
+                except Exception as e:
+                    logger.warning(f"Error eliminando la suscripción vieja: {e}")
+                await self.subscription.recreate(self.client)
+            await self.register_hot_tags()
+        except Exception as e:
+            logger.error(f"❌ Error re-resolviendo tras el cambio de NamespaceArray: {e}")
+        
+    async def register_hot_tags(self):
+        """
+        RegisterNodes de los tags de hot_tags: el servidor puede devolver
+        NodeIds más cortos o ya resueltos, que se usan en cada Read/Write.
+        """
+        
+        self.registered = {}
+        node_ids = {name: to_nodeid(self.node_ids[name]) for name in self.hot_tags if self.node_ids.get(name)}
+        if not node_ids:
+            return {}
+            
+        names = list(node_ids)
+        size = self.batch.limits.get("MaxNodesPerRegisterNodes", 0)
+        try:
+            for batch in chunks(names, size):
+                registered = await self.client.uaclient.register_nodes([node_ids[name] for name in batch])
+                self.registered.update(zip(batch, registered))
+        except Exception as e:
+            logger.warning(f"⚠️  RegisterNodes no disponible, se usan los NodeIds completos: {e}")
+            self.registered = {}
+            return {}
+            
+        optimized = sum(self.registered[name] != node_ids[name] for name in names)
+        logger.info(f"📌 {len(names)} tags registrados, {optimized} con NodeId optimizado")
+        return self.registered
+        
+    def io_node_id(self, tag_name: str):
+        """NodeId para Read/Write: el registrado si lo hay."""
+        
+        return self.registered.get(tag_name) or self.node_ids[tag_name]
+        
     async def disconnect(self):
         """Desconecta del servidor."""
         
         if self.client and self.connected:
-            await self.client.disconnect()
+            if self.resolver:
+                await self.resolver.stop_watching()
+            if self.registered:
+                try:
+                    await self.client.uaclient.unregister_nodes(list(self.registered.values()))
+                except Exception as e:
+                    logger.warning(f"Error en UnregisterNodes: {e}")
+                self.registered = {}
+            if self.session:
+                await self.session.stop()
+                self.session = None
+                self.subscription = None
+            else:
+                if self.subscription:
+                    await self.subscription.stop()
+                    self.subscription = None
+                await self.client.disconnect()
             self.connected = False
             logger.info("🔌 Desconectado")
             
-    async def read_tag(self, tag_name: str):
-        """Lee un tag por su nombre."""
+    async def read_tag(self, tag_name: str, index_range: str = None):
+        """
+        Lee un tag por su nombre.
         
-        if tag_name not in TAGS:
+        index_range ("3", "0:1") lee sólo esos elementos de un array; con un
+        solo índice retorna el elemento en lugar de una lista de uno.
+        """
+        
+        if not self.node_ids.get(tag_name):
             logger.error(f"Tag desconocido: {tag_name}")
             return None
             
         try:
-            node = self.client.get_node(TAGS[tag_name])
+            if index_range is not None:
+                dv = await read_range(self.client, self.node_ids[tag_name], index_range)
+                dv.StatusCode.check()
+                value = dv.Value.Value
+                if is_single_index(index_range) and isinstance(value, list):
+                    return value[0] if value else None
+                return value
+                
+            node = self.client.get_node(self.io_node_id(tag_name))
             value = await node.read_value()
             return value
             
@@ -107,15 +368,27 @@ class GatewayClient:
             logger.error(f"Error leyendo {tag_name}: {e}")
             return None
             
-    async def write_tag(self, tag_name: str, value):
-        """Escribe un valor a un tag."""
+    async def write_tag(self, tag_name: str, value, index_range: str = None):
+        """
+        Escribe un valor a un tag.
         
-        if tag_name not in TAGS:
+        Con index_range reemplaza sólo esos elementos del array (value puede
+        ser un elemento suelto para un solo índice).
+        """
+        
+        if not self.node_ids.get(tag_name):
             logger.error(f"Tag desconocido: {tag_name}")
             return False
             
         try:
-            node = self.client.get_node(TAGS[tag_name])
+            if index_range is not None:
+                values = value if isinstance(value, list) else [value]
+                status = await write_range(self.client, self.node_ids[tag_name], values, index_range)
+                status.check()
+                logger.info(f"✏️  {tag_name}[{index_range}] = {value}")
+                return True
+                
+            node = self.client.get_node(self.io_node_id(tag_name))
             await node.write_value(value)
             logger.info(f"✏️  {tag_name} = {value}")
             return True
@@ -124,6 +397,165 @@ class GatewayClient:
             logger.error(f"Error escribiendo {tag_name}: {e}")
             return False
             
+    def array_cursor(self, tag_name: str, size: int = None, key=None) -> ArrayCursor:
+        """
+        Cursor de append sobre un array (MaterialRecord_push): poll() lee
+        sólo los slots nuevos desde la última vez. Usa el Client actual en
+        cada lectura, así sigue andando tras una reconexión.
+        """
+        
+        return ArrayCursor(lambda: self.client, self.node_ids[tag_name], size, key)
+        
+    async def read_tags(self, tag_names=None) -> dict:
+        """
+        Lee varios tags (todos por defecto) con una sola petición Read.
+        
+        Retorna {tag: {"value", "status", "source_timestamp",
+        "server_timestamp", "variant_type"}}.
+        """
+        
+        names = [name for name in (tag_names or TAGS) if self.node_ids.get(name)]
+        for name in set(tag_names or []) - set(names):
+            logger.error(f"Tag desconocido: {name}")
+            
+        data_values = await self.batch.read([self.io_node_id(name) for name in names])
+        
+        results = {}
+        for name, dv in zip(names, data_values):
+            variant = dv.Value
+            results[name] = {
+                "value": variant.Value if variant is not None else None,
+                "status": dv.StatusCode,
+                "source_timestamp": dv.SourceTimestamp,
+                "server_timestamp": dv.ServerTimestamp,
+                "variant_type": variant.VariantType if variant is not None else None,
+            }
+        return results
+        
+    async def _read_values(self, tag_names) -> dict:
+        """{tag: valor} con una lectura (handshakes en modo polling)."""
+        
+        return {name: result["value"] for name, result in (await self.read_tags(tag_names)).items()}
+        
+    async def handshake(self, definition: Handshake, values: dict = None):
+        """
+        Ejecuta un handshake (request, respuesta, reset) y retorna el
+        resultado de su predicado. Lanza HandshakeTimeout si no responde.
+        """
+        
+        return await self.handshakes.run(definition, values)
+        
+    async def write_tags(self, values: dict) -> dict:
+        """
+        Escribe {tag: valor} con una sola petición Write.
+        
+        Retorna {tag: StatusCode}.
+        """
+        
+        names = [name for name in values if self.node_ids.get(name)]
+        for name in set(values) - set(names):
+            logger.error(f"Tag desconocido: {name}")
+            
+        status_codes = await self.batch.write([(self.io_node_id(name), values[name]) for name in names])
+        
+        results = dict(zip(names, status_codes))
+        for name, status in results.items():
+            if status.is_good():
+                logger.info(f"✏️  {name} = {values[name]}")
+            else:
+                logger.error(f"Error escribiendo {name}: {status}")
+        return results
+        
+    async def subscribe(self, tag_names=None):
+        """
+        Crea una suscripción con MonitoredItems para los tags indicados
+        (todos por defecto). Si el servidor la rechaza se sigue en polling.
+        """
+        
+        names = [name for name in (tag_names or TAGS) if self.node_ids.get(name)]
+        
+        tags = {name: self.node_ids[name] for name in names}
+        
+        try:
+            if self.session:
+                # Sobrevive a las reconexiones (transferida o recreada)
+                self.subscription = await self.session.subscribe(
+                    tags,
+                    publishing_interval=self.publishing_interval,
+                    sampling_interval=self.sampling_interval,
+                )
+            else:
+                self.subscription = TagSubscription(
+                    self.client,
+                    publishing_interval=self.publishing_interval,
+                    sampling_interval=self.sampling_interval,
+                )
+                await self.subscription.start(tags)
+            logger.info(f"📡 Suscripción creada: {len(names)} tags, "
+                        f"publicación cada {self.publishing_interval} ms")
+            return self.subscription
+            
+        except Exception as e:
+            logger.warning(f"⚠️  Suscripción no disponible, usando polling: {e}")
+            self.subscription = None
+            return None
+            
+    def on_tag_change(self, tag_name: str, callback):
+        """Registra callback(name, value) para cada cambio de un tag suscrito."""
+        
+        if not self.subscription or not self.subscription.monitors(tag_name):
+            logger.error(f"Tag no suscrito: {tag_name}")
+            return False
+            
+        self.subscription.on_change(tag_name, callback)
+        return True
+        
+    async def get_tag(self, tag_name: str):
+        """Último valor del tag: desde la suscripción o con una lectura."""
+        
+        if self.subscription and tag_name in self.subscription.values:
+            return self.subscription.values[tag_name]
+        return await self.read_tag(tag_name)
+        
+    async def wait_for_tag(self, tag_name: str, predicate=bool, timeout: float = 5.0):
+        """
+        Espera hasta que predicate(valor) se cumpla para el tag.
+        
+        Retorna el valor, o None si se agota el timeout.
+        """
+        
+        result = await self.wait_for_any_tag({tag_name: predicate}, timeout)
+        return result[1] if result else None
+        
+    async def wait_for_any_tag(self, conditions: dict, timeout: float = 5.0):
+        """
+        Espera a que se cumpla cualquiera de {tag: predicate}.
+        
+        Retorna (tag, valor) de la primera condición cumplida, o None en timeout.
+        Con suscripción despierta en cuanto llega el cambio; sin ella hace
+        polling cada POLL_INTERVAL.
+        """
+        
+        subscribed = self.subscription and all(
+            self.subscription.monitors(name) for name in conditions
+        )
+        
+        if subscribed:
+            try:
+                return await self.subscription.wait_for_any(conditions, timeout)
+            except asyncio.TimeoutError:
+                return None
+                
+        for _ in range(max(1, int(timeout / POLL_INTERVAL))):
+            await asyncio.sleep(POLL_INTERVAL)
+            
+            for name, predicate in conditions.items():
+                value = await self.read_tag(name)
+                if predicate(value):
+                    return name, value
+                    
+        return None
+        
     async def read_all_tags(self):
         """Lee todos los tags y muestra sus valores."""
         
@@ -131,15 +563,17 @@ class GatewayClient:
         print("📊 ESTADO DE TODOS LOS TAGS")
         print("=" * 60)
         
-        for name, node_id in TAGS.items():
-            try:
-                node = self.client.get_node(node_id)
-                value = await node.read_value()
-                data_type = await node.read_data_type_as_variant_type()
-                print(f"  {name:30} = {str(value):20} [{data_type}]")
-                
-            except Exception as e:
-                print(f"  {name:30} = ERROR: {e}")
+        try:
+            results = await self.read_tags()
+        except Exception as e:
+            print(f"  ERROR: {e}")
+            results = {}
+            
+        for name, result in results.items():
+            if result["status"].is_good():
+                print(f"  {name:30} = {str(result['value']):20} [{result['variant_type'].name}]")
+            else:
+                print(f"  {name:30} = ERROR: {result['status'].name}")
                 
         print("=" * 60 + "\n")
 
@@ -152,44 +586,26 @@ async def workflow_barcode_lookup(client: GatewayClient, barcode: str):
     """
     Flujo de trabajo: Buscar información por código de barras.
     
-    1. Escribir BarcodeValue con el código
-    2. Activar BarcodeReq
-    3. Esperar respuesta (RecordNotFound o UUID_pull)
+    1. Escribir BarcodeValue con el código y activar BarcodeReq (una petición)
+    2. Esperar respuesta (RecordNotFound o UUID_pull nuevo)
+    3. Bajar BarcodeReq y esperar que RecordNotFound vuelva a False
     """
     
     print("\n" + "-" * 50)
     print(f"🔍 WORKFLOW: Búsqueda de Barcode '{barcode}'")
     print("-" * 50)
-    
-    # Paso 1: Escribir el barcode
-    await client.write_tag("BarcodeValue", barcode)
-    
-    # Paso 2: Activar request
-    await client.write_tag("BarcodeReq", True)
-    
-    # Paso 3: Esperar respuesta (timeout 5 segundos)
     print("⏳ Esperando respuesta...")
     
-    for i in range(50):  # 5 segundos
-        await asyncio.sleep(0.1)
-        
-        # Verificar si hay respuesta
-        record_not_found = await client.read_tag("RecordNotFound")
-        uuid_data = await client.read_tag("UUID_pull")
-        
-        if record_not_found:
+    try:
+        tag, value = await client.handshake(BARCODE_LOOKUP, {"BarcodeValue": barcode})
+        if tag == "RecordNotFound":
             print("❌ Registro NO encontrado")
-            break
-            
-        if uuid_data and uuid_data != '{"uuid": "", "timestamp": "", "data": {}}':
-            print(f"✅ Registro encontrado: {uuid_data}")
-            break
-    else:
-        print("⚠️  Timeout esperando respuesta")
+        else:
+            print(f"✅ Registro encontrado: {value}")
+    except HandshakeTimeout as e:
+        print(f"⚠️  Timeout: {e}")
         
-    # Reset request
-    await client.write_tag("BarcodeReq", False)
-    
+    print_last_latency(client, BARCODE_LOOKUP)
     print("-" * 50 + "\n")
 
 
@@ -198,33 +614,22 @@ async def workflow_request_uuid(client: GatewayClient):
     Flujo de trabajo: Solicitar un nuevo UUID.
     
     1. Activar UUIDReq
-    2. Esperar UUID_pull con datos
+    2. Esperar UUID_pull con datos nuevos
+    3. Bajar UUIDReq
     """
     
     print("\n" + "-" * 50)
     print("🔑 WORKFLOW: Solicitar UUID")
     print("-" * 50)
-    
-    # Activar request
-    await client.write_tag("UUIDReq", True)
-    
-    # Esperar respuesta
     print("⏳ Esperando UUID...")
     
-    for i in range(30):  # 3 segundos
-        await asyncio.sleep(0.1)
-        
-        uuid_data = await client.read_tag("UUID_pull")
-        
-        if uuid_data and '"uuid": ""' not in uuid_data:
-            print(f"✅ UUID recibido: {uuid_data}")
-            break
-    else:
-        print("⚠️  Timeout esperando UUID")
+    try:
+        uuid_data = await client.handshake(REQUEST_UUID)
+        print(f"✅ UUID recibido: {uuid_data}")
+    except HandshakeTimeout as e:
+        print(f"⚠️  Timeout: {e}")
         
-    # Reset request
-    await client.write_tag("UUIDReq", False)
-    
+    print_last_latency(client, REQUEST_UUID)
     print("-" * 50 + "\n")
 
 
@@ -234,32 +639,42 @@ async def workflow_write_to_db(client: GatewayClient):
     
     1. Activar WriteToDb
     2. Esperar WriteToDb_Confirmation
+    3. Bajar WriteToDb y esperar que la confirmación vuelva a False
     """
     
     print("\n" + "-" * 50)
     print("💾 WORKFLOW: Escribir a Base de Datos")
     print("-" * 50)
-    
-    # Activar write
-    await client.write_tag("WriteToDb", True)
-    
-    # Esperar confirmación
     print("⏳ Esperando confirmación...")
     
-    for i in range(30):  # 3 segundos
-        await asyncio.sleep(0.1)
-        
-        confirmation = await client.read_tag("WriteToDb_Confirmation")
-        
-        if confirmation:
-            print("✅ Escritura confirmada!")
-            break
-    else:
-        print("⚠️  Timeout esperando confirmación")
+    try:
+        await client.handshake(WRITE_TO_DB)
+        print("✅ Escritura confirmada!")
+    except HandshakeTimeout as e:
+        print(f"⚠️  Timeout: {e}")
         
-    # Reset
-    await client.write_tag("WriteToDb", False)
+    print_last_latency(client, WRITE_TO_DB)
+    print("-" * 50 + "\n")
+
+
+def print_last_latency(client: GatewayClient, definition: Handshake):
+    """Resumen acumulado de latencias del handshake."""
     
+    stats = client.handshakes.stats().get(definition.name)
+    if stats and stats["response"]["count"]:
+        response = stats["response"]
+        print(f"⏱️  {definition.name}: {response['count']} handshakes, "
+              f"p50={response['p50_ms']:.1f} ms, p99={response['p99_ms']:.1f} ms, "
+              f"máx={response['max_ms']:.1f} ms, timeouts={stats['timeouts']}")
+
+
+def print_handshake_stats(client: GatewayClient):
+    """Histogramas de todos los handshakes de la sesión."""
+    
+    print("\n" + "-" * 50)
+    print("⏱️  LATENCIAS DE HANDSHAKES")
+    print("-" * 50)
+    client.handshakes.print_stats()
     print("-" * 50 + "\n")
 
 
@@ -270,20 +685,36 @@ async def monitor_heartbeat(client: GatewayClient, duration: int = 10):
     print(f"💓 Monitoreando Heartbeat por {duration} segundos...")
     print("-" * 50)
     
-    last_value = None
     toggles = 0
     
-    for i in range(duration * 10):
-        current = await client.read_tag("Heartbeat")
-        counter = await client.read_tag("SimulationCounter")
-        
-        if current != last_value:
+    if client.subscription and client.subscription.monitors("Heartbeat"):
+        # Con suscripción: cada cambio llega como notificación, sin lecturas
+        def on_heartbeat(name, current):
+            nonlocal toggles
             toggles += 1
+            counter = client.subscription.values.get("SimulationCounter")
             status = "🟢" if current else "⚫"
             print(f"  {status} Heartbeat: {current}, Counter: {counter}")
-            last_value = current
             
-        await asyncio.sleep(0.1)
+        client.on_tag_change("Heartbeat", on_heartbeat)
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            client.subscription.remove_callback("Heartbeat", on_heartbeat)
+            
+    else:
+        last_value = None
+        for i in range(duration * 10):
+            current = await client.read_tag("Heartbeat")
+            counter = await client.read_tag("SimulationCounter")
+            
+            if current != last_value:
+                toggles += 1
+                status = "🟢" if current else "⚫"
+                print(f"  {status} Heartbeat: {current}, Counter: {counter}")
+                last_value = current
+                
+            await asyncio.sleep(0.1)
         
     print(f"\n📈 Total de toggles detectados: {toggles}")
     print("-" * 50 + "\n")
@@ -307,6 +738,7 @@ async def interactive_menu(client: GatewayClient):
         print("5. Workflow: Escribir a DB")
         print("6. Escribir tag manualmente")
         print("7. Leer tag específico")
+        print("8. Latencias de handshakes")
         print("0. Salir")
         print("-" * 60)
         
@@ -354,6 +786,9 @@ async def interactive_menu(client: GatewayClient):
             value = await client.read_tag(tag_name)
             print(f"\n  {tag_name} = {value}\n")
             
+        elif option == "8":
+            print_handshake_stats(client)
+            
         else:
             print("Opción no válida")
 
@@ -413,6 +848,11 @@ async def main():
                 await client.read_all_tags()
                 await asyncio.sleep(2)
                 
+        if client.handshakes.completed or client.handshakes.timeouts:
+            print_handshake_stats(client)
+            files = client.handshakes.export(HANDSHAKE_HISTOGRAMS)
+            print(f"📁 Histogramas exportados: {', '.join(files)}")
+            
         await client.disconnect()
         
     else:
@@ -8,17 +8,51 @@
     Tags simulados:
     - EgComIn_Heartbeat, EgComIn_RecordNotFound, EgComIn_UUID_pull, etc.
     - EgComOut_BarcodeReq, EgComOut_BarcodeValue, EgComOut_WriteToDb, etc.
+    - EgComOut_MaterialRecord_push: array de Syn_FileWriteOut_Struct (UDT
+      del L5K) con lecturas/escrituras parciales por IndexRange
     
-    Ejecutar con: python gateway_simulator.py
+    BarcodeReq se responde buscando BarcodeValue en un RecordStore
+    (record_store.py): EgComIn_UUID_pull si existe, EgComIn_RecordNotFound
+    si no. Sin --db el almacén está vacío (todo es RecordNotFound).
+    WriteToDb guarda MaterialRecord_push por el WritePipeline (group
+    commit) y levanta WriteToDb_Confirmation cuando el lote es durable.
+    
+    Los requests (BarcodeReq, UUIDReq, WriteToDb) se atienden por un hook
+    PostWrite del servidor: cada escritura de un cliente encola el flanco
+    y la respuesta sale en ~1 ms, sin muestrear los nodos propios cada
+    100 ms (un reset seguido de otro request ya no se pierde). El
+    heartbeat se agenda sobre el reloj monotónico del loop, sin deriva.
+    
+    Address space a escala (simulated_address_space.py), además de los
+    tags del gateway: tags del L5X, de omron_plc_tags.csv o sintéticos
+    (N estaciones x M tags con el layout de Optix en ns=9), creados en
+    lotes de AddNodes y con valores que cambian a ritmo fijo (--dynamics).
+    
+    Ejecutar con: python gateway_simulator.py [--db cache/records.db]
+        [--l5x [ruta] [--copies N]] [--csv [ruta]] [--synthetic 100x200 [--guid]]
+        [--dynamics toggle=0.1@1,ramp=0.05@10,walk=0.2@2]
 ================================================================================
 """
 
+import argparse
 import asyncio
+import dataclasses
+import json
 import logging
+import time
+import uuid
 from datetime import datetime
 from asyncua import Server, ua
+from asyncua.common.callback import CallbackType
 from asyncua.common.methods import uamethod
 
+from index_range import apply_read_range, apply_write_range
+from l5k_datatypes import create_datatypes, parse_l5k_datatypes
+from record_store import CachedRecordStore, MemoryRecordStore, RecordNotFound, SQLiteRecordStore
+from simulated_address_space import (CSV_PATH, L5X_PATH, DynamicsEngine, build_address_space,
+                                     csv_source, l5x_source, parse_synthetic, synthetic_source)
+from write_pipeline import WritePipeline
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("GatewaySimulator")
@@ -31,11 +65,31 @@ SERVER_URL = "opc.tcp://0.0.0.0:4840"  # Escucha en todas las interfaces
 SERVER_NAME = "EdgeGateway Simulator"
 NAMESPACE_URI = "urn:RockwellAutomation:EdgeGateway:Simulator"
 
+# MaterialRecord_push[3] en el PLC (EdgeGateway_WriteOut_Struct)
+MATERIAL_RECORD_TYPE = "Syn_FileWriteOut_Struct"
+MATERIAL_RECORD_SLOTS = 3
+
+# Requests del PLC atendidos por flanco (hook PostWrite del servidor)
+REQUEST_TAGS = ("BarcodeReq", "UUIDReq", "WriteToDb")
+HEARTBEAT_PERIOD_S = 1.0
+
 
 class GatewaySimulator:
     """Simulador del Edge Gateway con tags OPC UA."""
     
-    def __init__(self):
+    def __init__(self, url=SERVER_URL, material_record_slots=MATERIAL_RECORD_SLOTS, store=None,
+                 sources=(), dynamics=None):
+        self.url = url
+        self.material_record_slots = material_record_slots
+        self.store = store or MemoryRecordStore()
+        
+        # Address space a escala: TagSource de simulated_address_space y
+        # especificación de dinámica ("toggle=0.1@1,walk=0.2@5")
+        self.sources = sorted(sources, key=lambda source: source.namespace_index)
+        self.dynamics = dynamics
+        self.source_node_ids = {}     # nombre de la fuente -> {path: NodeId}
+        self.engines = []
+        self.pipeline = None
         self.server = None
         self.namespace_idx = None
         
@@ -43,8 +97,14 @@ class GatewaySimulator:
         self.tags = {}
         
         # Estado interno del simulador
+        self.heartbeat = False
         self.heartbeat_counter = 0
+        self.heartbeat_missed = 0     # Ticks salteados por un loop bloqueado
         self.simulation_running = True
+        self.requests = {name: False for name in REQUEST_TAGS}   # Último valor visto
+        self._request_nodes = {}      # NodeId -> nombre del request
+        self._request_queues = {}
+        self._tasks = []
         
     async def init_server(self):
         """Inicializa el servidor OPC UA."""
@@ -52,17 +112,21 @@ class GatewaySimulator:
         self.server = Server()
         await self.server.init()
         
-        self.server.set_endpoint(SERVER_URL)
+        self.server.set_endpoint(self.url)
         self.server.set_server_name(SERVER_NAME)
         
         # Registrar namespace
         self.namespace_idx = await self.server.register_namespace(NAMESPACE_URI)
         logger.info(f"Namespace registrado: ns={self.namespace_idx}")
         
-        # Crear estructura de objetos
+        # Crear estructura de objetos (NodeIds string: ns=X;s=EgComIn_...)
         await self._create_tag_structure()
+        self._install_index_range()
+        self._install_request_hooks()
+        self._install_transfer_subscriptions()
+        await self._create_simulated_sources()
         
-        logger.info(f"Servidor configurado en {SERVER_URL}")
+        logger.info(f"Servidor configurado en {self.url}")
         
     async def _create_tag_structure(self):
         """Crea la estructura de tags que simula el Gateway."""
@@ -81,7 +145,7 @@ class GatewaySimulator:
         
         # Heartbeat - Boolean
         self.tags["Heartbeat"] = await global_vars.add_variable(
-            self.namespace_idx,
+            ua.NodeId("EgComIn_Heartbeat", self.namespace_idx),
             "EgComIn_Heartbeat",
             False,
             ua.VariantType.Boolean
@@ -90,7 +154,7 @@ class GatewaySimulator:
         
         # RecordNotFound - Boolean
         self.tags["RecordNotFound"] = await global_vars.add_variable(
-            self.namespace_idx,
+            ua.NodeId("EgComIn_RecordNotFound", self.namespace_idx),
             "EgComIn_RecordNotFound",
             False,
             ua.VariantType.Boolean
@@ -99,7 +163,7 @@ class GatewaySimulator:
         
         # WriteToDb_Confirmation - Boolean
         self.tags["WriteToDb_Confirmation"] = await global_vars.add_variable(
-            self.namespace_idx,
+            ua.NodeId("EgComIn_WriteToDb_Confirmation", self.namespace_idx),
             "EgComIn_WriteToDb_Confirmation",
             False,
             ua.VariantType.Boolean
@@ -108,7 +172,7 @@ class GatewaySimulator:
         
         # UUID_pull - String (simulamos la estructura como string JSON)
         self.tags["UUID_pull"] = await global_vars.add_variable(
-            self.namespace_idx,
+            ua.NodeId("EgComIn_UUID_pull", self.namespace_idx),
             "EgComIn_UUID_pull",
             '{"uuid": "", "timestamp": "", "data": {}}',
             ua.VariantType.String
@@ -121,7 +185,7 @@ class GatewaySimulator:
         
         # BarcodeReq - Boolean
         self.tags["BarcodeReq"] = await global_vars.add_variable(
-            self.namespace_idx,
+            ua.NodeId("EgComOut_BarcodeReq", self.namespace_idx),
             "EgComOut_BarcodeReq",
             False,
             ua.VariantType.Boolean
@@ -130,7 +194,7 @@ class GatewaySimulator:
         
         # BarcodeValue - String
         self.tags["BarcodeValue"] = await global_vars.add_variable(
-            self.namespace_idx,
+            ua.NodeId("EgComOut_BarcodeValue", self.namespace_idx),
             "EgComOut_BarcodeValue",
             "",
             ua.VariantType.String
@@ -139,7 +203,7 @@ class GatewaySimulator:
         
         # UUIDReq - Boolean
         self.tags["UUIDReq"] = await global_vars.add_variable(
-            self.namespace_idx,
+            ua.NodeId("EgComOut_UUIDReq", self.namespace_idx),
             "EgComOut_UUIDReq",
             False,
             ua.VariantType.Boolean
@@ -148,20 +212,35 @@ class GatewaySimulator:
         
         # WriteToDb - Boolean
         self.tags["WriteToDb"] = await global_vars.add_variable(
-            self.namespace_idx,
+            ua.NodeId("EgComOut_WriteToDb", self.namespace_idx),
             "EgComOut_WriteToDb",
             False,
             ua.VariantType.Boolean
         )
         await self.tags["WriteToDb"].set_writable()
         
+        # MaterialRecord_push - Array de Syn_FileWriteOut_Struct (UDT del L5K)
+        datatypes = await create_datatypes(
+            self.server, self.namespace_idx, parse_l5k_datatypes(), [MATERIAL_RECORD_TYPE]
+        )
+        await self.server.load_data_type_definitions()
+        record_type = getattr(ua, MATERIAL_RECORD_TYPE)
+        self.tags["MaterialRecord_push"] = await global_vars.add_variable(
+            ua.NodeId("EgComOut_MaterialRecord_push", self.namespace_idx),
+            "EgComOut_MaterialRecord_push",
+            ua.Variant([record_type() for _ in range(self.material_record_slots)],
+                       ua.VariantType.ExtensionObject),
+            datatype=datatypes[MATERIAL_RECORD_TYPE]
+        )
+        await self.tags["MaterialRecord_push"].set_writable()
+        
         # ====================================================================
         # TAGS ADICIONALES PARA SIMULACIÓN
         # ====================================================================
         
         # Contador de simulación
         self.tags["SimulationCounter"] = await global_vars.add_variable(
-            self.namespace_idx,
+            ua.NodeId("SimulationCounter", self.namespace_idx),
             "SimulationCounter",
             0,
             ua.VariantType.Int32
@@ -169,7 +248,7 @@ class GatewaySimulator:
         
         # Timestamp
         self.tags["LastUpdate"] = await global_vars.add_variable(
-            self.namespace_idx,
+            ua.NodeId("LastUpdate", self.namespace_idx),
             "LastUpdate",
             datetime.now().isoformat(),
             ua.VariantType.String
@@ -180,80 +259,251 @@ class GatewaySimulator:
             node_id = node.nodeid.to_string()
             logger.info(f"  - {name}: {node_id}")
             
+    async def _create_simulated_sources(self):
+        """Crea los tags de las fuentes L5X / CSV / sintéticas en lotes."""
+        
+        for source in self.sources:
+            start = time.perf_counter()
+            self.source_node_ids[source.name] = await build_address_space(self.server, source)
+            elapsed = time.perf_counter() - start
+            logger.info(f"🏗️  {source.name}: {len(source.tags)} tags en {elapsed:.2f} s "
+                        f"({len(source.tags) / max(elapsed, 1e-6):,.0f} nodos/s)")
+            
+    def _start_dynamics(self):
+        """Arranca los generadores de valores sobre las fuentes simuladas."""
+        
+        if not self.dynamics:
+            return
+        for source in self.sources:
+            engine = DynamicsEngine(self.server, source, self.source_node_ids[source.name], self.dynamics)
+            engine.start()
+            self.engines.append(engine)
+            logger.info(f"🎲 {source.name}: {engine.tags} tags dinámicos, "
+                        f"~{engine.changes_per_second:,.0f} cambios/s")
+            
+    async def _stop_dynamics(self):
+        for engine in self.engines:
+            await engine.stop()
+        self.engines = []
+        
+    def _install_index_range(self):
+        """
+        Read/Write con IndexRange sobre arrays (el PLC real lo soporta;
+        el servidor de asyncua lo ignora y usaría el array completo).
+        """
+        
+        service = self.server.iserver.attribute_service
+        aspace = self.server.iserver.aspace
+        read, write = service.read, service.write
+        
+        def read_with_range(params):
+            results = read(params)
+            for i, rv in enumerate(params.NodesToRead):
+                if rv.IndexRange and rv.AttributeId == ua.AttributeIds.Value and results[i].StatusCode.is_good():
+                    results[i] = apply_read_range(results[i], rv.IndexRange)
+            return results
+            
+        async def write_with_range(params, *args, **kwargs):
+            rejected = {}
+            for i, wv in enumerate(params.NodesToWrite):
+                if wv.IndexRange and wv.AttributeId == ua.AttributeIds.Value:
+                    current = aspace.read_attribute_value(wv.NodeId, ua.AttributeIds.Value)
+                    try:
+                        wv.Value = apply_write_range(current, wv.Value, wv.IndexRange)
+                        wv.IndexRange = None
+                    except ua.UaStatusCodeError as e:
+                        rejected[i] = ua.StatusCode(e.code)
+            if rejected:
+                # Sin modificar params: el hook PostWrite los recorre junto a los resultados
+                accepted = ua.WriteParameters()
+                accepted.NodesToWrite = [wv for i, wv in enumerate(params.NodesToWrite) if i not in rejected]
+                results = await write(accepted, *args, **kwargs) if accepted.NodesToWrite else []
+            else:
+                results = await write(params, *args, **kwargs)
+            for i in sorted(rejected):
+                results.insert(i, rejected[i])
+            return results
+            
+        service.read = read_with_range
+        service.write = write_with_range
+        
+    def _install_transfer_subscriptions(self):
+        """
+        TransferSubscriptions como en el equipo real: el servidor de asyncua
+        responde por el canal nuevo pero sigue tomando las PublishRequest
+        del canal viejo, y la suscripción transferida queda muda.
+        """
+        
+        service = self.server.iserver.subscription_service
+        transfer = service.transfer_subscriptions
+        
+        async def transfer_with_requests(params, session_id, callback):
+            results = await transfer(params, session_id, callback)
+            processor = getattr(callback, "__self__", None)
+            for sub_id, result in zip(params.SubscriptionIds, results):
+                subscription = service.subscriptions.get(int(sub_id))
+                if processor is not None and subscription is not None and result.StatusCode.is_good():
+                    subscription.pub_request_callback = processor.get_publish_request
+            return results
+        
+        service.transfer_subscriptions = transfer_with_requests
+        
+    def _install_request_hooks(self):
+        """
+        Hook PostWrite: las escrituras de BarcodeReq / UUIDReq / WriteToDb
+        se encolan en el momento (una cola por request, en orden) en lugar
+        de descubrirse leyendo los nodos cada 100 ms.
+        """
+        
+        self._request_nodes = {self.tags[name].nodeid: name for name in REQUEST_TAGS}
+        self._request_queues = {name: asyncio.Queue() for name in REQUEST_TAGS}
+        self.server.subscribe_server_callback(CallbackType.PostWrite, self._on_post_write)
+        
+    async def _on_post_write(self, event, dispatcher):
+        """Encola los valores escritos en los tags de request (sin bloquear el Write)."""
+        
+        results = event.response_params or []
+        for wv, status in zip(event.request_params.NodesToWrite, results):
+            name = self._request_nodes.get(wv.NodeId)
+            if name is None or wv.AttributeId != ua.AttributeIds.Value or not status.is_good():
+                continue
+            self._request_queues[name].put_nowait(bool(wv.Value.Value.Value))
+            
     async def run_heartbeat(self):
-        """Ejecuta el heartbeat toggle automático."""
+        """
+        Toggle del heartbeat cada HEARTBEAT_PERIOD_S sobre el reloj monotónico
+        del loop: el próximo tick se calcula desde el anterior, no desde el
+        final de las escrituras, así el periodo no acumula deriva.
+        """
         
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
         while self.simulation_running:
             try:
-                # Toggle heartbeat
-                current = await self.tags["Heartbeat"].read_value()
-                await self.tags["Heartbeat"].write_value(not current)
-                
-                # Incrementar contador
+                self.heartbeat = not self.heartbeat
                 self.heartbeat_counter += 1
-                await self.tags["SimulationCounter"].write_value(self.heartbeat_counter)
-                
-                # Actualizar timestamp
+                await self.tags["Heartbeat"].write_value(self.heartbeat)
+                await self.tags["SimulationCounter"].write_value(
+                    ua.Variant(self.heartbeat_counter, ua.VariantType.Int32)
+                )
                 await self.tags["LastUpdate"].write_value(datetime.now().isoformat())
-                
-                await asyncio.sleep(1)  # Heartbeat cada segundo
-                
             except Exception as e:
                 logger.error(f"Error en heartbeat: {e}")
-                await asyncio.sleep(1)
                 
+            deadline += HEARTBEAT_PERIOD_S
+            delay = deadline - loop.time()
+            if delay < 0:
+                # Loop bloqueado más de un periodo: saltar los ticks perdidos
+                # en vez de emitirlos todos juntos
+                missed = int(-delay // HEARTBEAT_PERIOD_S) + 1
+                self.heartbeat_missed += missed
+                deadline += missed * HEARTBEAT_PERIOD_S
+                delay = deadline - loop.time()
+            await asyncio.sleep(delay)
+            
     async def run_simulation_logic(self):
-        """Simula la lógica del Gateway respondiendo a requests."""
+        """Simula la lógica del Gateway: un consumidor por tag de request."""
+        
+        await asyncio.gather(*(self.run_request_handler(name) for name in REQUEST_TAGS))
+        
+    async def run_request_handler(self, name):
+        """Atiende en orden los valores escritos en un tag de request."""
         
+        queue = self._request_queues[name]
         while self.simulation_running:
+            value = await queue.get()
+            previous, self.requests[name] = self.requests[name], value
+            if value == previous:
+                continue
             try:
-                # Verificar si hay solicitud de barcode
-                barcode_req = await self.tags["BarcodeReq"].read_value()
-                if barcode_req:
-                    # Simular lectura de barcode
-                    barcode = await self.tags["BarcodeValue"].read_value()
-                    if barcode:
-                        logger.info(f"📦 Barcode recibido: {barcode}")
-                        # Aquí iría la lógica de buscar en base de datos
-                        
-                        # Simular respuesta después de 500ms
-                        await asyncio.sleep(0.5)
-                        
-                        # Resetear el request (simula que PLC lo hace)
-                        # await self.tags["BarcodeReq"].write_value(False)
-                        
-                # Verificar si hay solicitud de UUID
-                uuid_req = await self.tags["UUIDReq"].read_value()
-                if uuid_req:
-                    logger.info("🔑 Solicitud de UUID recibida")
-                    
-                    # Simular respuesta con UUID
-                    import uuid
-                    new_uuid = str(uuid.uuid4())
-                    uuid_data = f'{{"uuid": "{new_uuid}", "timestamp": "{datetime.now().isoformat()}", "data": {{}}}}'
-                    await self.tags["UUID_pull"].write_value(uuid_data)
-                    
-                    logger.info(f"🔑 UUID generado: {new_uuid}")
-                    
-                # Verificar WriteToDb
-                write_db = await self.tags["WriteToDb"].read_value()
-                if write_db:
-                    logger.info("💾 Solicitud de escritura a DB recibida")
-                    
-                    # Simular escritura exitosa
-                    await asyncio.sleep(0.3)
-                    await self.tags["WriteToDb_Confirmation"].write_value(True)
-                    
-                    # Reset después de un momento
-                    await asyncio.sleep(0.5)
-                    await self.tags["WriteToDb_Confirmation"].write_value(False)
-                    
-                await asyncio.sleep(0.1)  # Check cada 100ms
-                
+                await self.handle_request(name, value)
             except Exception as e:
-                logger.error(f"Error en simulación: {e}")
-                await asyncio.sleep(1)
+                logger.error(f"Error en simulación ({name}): {e}")
+                
+    async def handle_request(self, name, value):
+        """Responde al flanco de subida (o bajada) de un request."""
+        
+        if name == "BarcodeReq":
+            if value:
+                barcode = await self.tags["BarcodeValue"].read_value()
+                logger.info(f"📦 Barcode recibido: {barcode}")
+                await self.lookup_barcode(barcode)
+            else:
+                # El PLC bajó el request: limpiar la respuesta
+                await self.tags["RecordNotFound"].write_value(False)
+                
+        elif name == "UUIDReq":
+            if value:
+                logger.info("🔑 Solicitud de UUID recibida")
+                new_uuid = str(uuid.uuid4())
+                uuid_data = f'{{"uuid": "{new_uuid}", "timestamp": "{datetime.now().isoformat()}", "data": {{}}}}'
+                await self.tags["UUID_pull"].write_value(uuid_data)
+                logger.info(f"🔑 UUID generado: {new_uuid}")
                 
+        elif name == "WriteToDb":
+            if value:
+                logger.info("💾 Solicitud de escritura a DB recibida")
+                await self.write_to_db()
+            else:
+                await self.tags["WriteToDb_Confirmation"].write_value(False)
+                
+    async def lookup_barcode(self, barcode):
+        """Busca el barcode en el almacén y escribe UUID_pull o RecordNotFound."""
+        
+        try:
+            record = await self.store.lookup(barcode or "")
+        except RecordNotFound:
+            logger.info(f"❌ Registro no encontrado: {barcode}")
+            await self.tags["RecordNotFound"].write_value(True)
+            return
+        
+        uuid_data = json.dumps({
+            "uuid": record.get("ContainerUUID") or str(uuid.uuid4()),
+            "timestamp": datetime.now().isoformat(),
+            "data": {"BARCD": barcode, "MATID": record.get("MATID", "")},
+        })
+        await self.tags["RecordNotFound"].write_value(False)
+        await self.tags["UUID_pull"].write_value(uuid_data)
+        logger.info(f"✅ Registro encontrado: {barcode}")
+        
+    async def write_to_db(self):
+        """Guarda MaterialRecord_push y confirma cuando el lote es durable."""
+        
+        records = await self.tags["MaterialRecord_push"].read_value()
+        records = [dataclasses.asdict(record) for record in records or []]
+        records = [record for record in records if record.get("BARCD")]
+        rows = await self.pipeline.submit("Simulator", records)
+        await self.tags["WriteToDb_Confirmation"].write_value(True)
+        logger.info(f"💾 Escritura confirmada: {rows} registros nuevos")
+        
+    async def start_background(self):
+        """Inicia servidor y simulación sin bloquear (para pruebas y benchmarks)."""
+        
+        await self.init_server()
+        await self.server.start()
+        
+        self.simulation_running = True
+        self.pipeline = WritePipeline(self.store)
+        self.pipeline.start()
+        self._start_dynamics()
+        self._tasks = [
+            asyncio.create_task(self.run_heartbeat()),
+            asyncio.create_task(self.run_simulation_logic()),
+        ]
+        
+    async def stop(self):
+        """Detiene lo iniciado con start_background()."""
+        
+        self.simulation_running = False
+        await self._stop_dynamics()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.pipeline.stop()
+        await self.server.stop()
+        await self.store.close()
+        
     async def start(self):
         """Inicia el servidor y las tareas de simulación."""
         
@@ -262,7 +512,7 @@ class GatewaySimulator:
         print("\n" + "=" * 70)
         print("🚀 GATEWAY SIMULATOR INICIADO")
         print("=" * 70)
-        print(f"\n📡 Servidor OPC UA corriendo en: {SERVER_URL}")
+        print(f"\n📡 Servidor OPC UA corriendo en: {self.url}")
         print(f"📂 Namespace Index: {self.namespace_idx}")
         print(f"🏷️  Namespace URI: {NAMESPACE_URI}")
         print("\n📋 Tags disponibles:")
@@ -270,10 +520,20 @@ class GatewaySimulator:
         for name, node in self.tags.items():
             print(f"   {node.nodeid.to_string()}")
         print("-" * 50)
+        for source in self.sources:
+            node_ids = self.source_node_ids[source.name]
+            example = next(iter(node_ids.values()), None)
+            print(f"   {source.name}: {len(node_ids)} tags en ns={example.NamespaceIndex if example else '-'}"
+                  + (f" (p.ej. {example.to_string()})" if example else ""))
+        if self.sources:
+            print("-" * 50)
         print("\n⏳ Presiona Ctrl+C para detener el servidor\n")
         
         async with self.server:
             # Iniciar tareas de simulación
+            self.pipeline = WritePipeline(self.store)
+            self.pipeline.start()
+            self._start_dynamics()
             heartbeat_task = asyncio.create_task(self.run_heartbeat())
             simulation_task = asyncio.create_task(self.run_simulation_logic())
             
@@ -287,13 +547,39 @@ class GatewaySimulator:
                 self.simulation_running = False
                 heartbeat_task.cancel()
                 simulation_task.cancel()
+                await self._stop_dynamics()
+                await self.pipeline.stop()
                 
         print("\n✅ Servidor detenido correctamente")
 
 
 async def main():
-    simulator = GatewaySimulator()
-    await simulator.start()
+    parser = argparse.ArgumentParser(description="Simulador del Edge Gateway")
+    parser.add_argument("--db", help="Base SQLite de registros (python record_store.py --generate N)")
+    parser.add_argument("--url", default=SERVER_URL, help="Endpoint del servidor")
+    parser.add_argument("--l5x", nargs="?", const=L5X_PATH, help="Tags del controlador desde un .L5X")
+    parser.add_argument("--copies", type=int, default=1, help="Copias del controlador del L5X (estaciones)")
+    parser.add_argument("--csv", nargs="?", const=CSV_PATH, help="Tags exportados del PLC Omron")
+    parser.add_argument("--synthetic", help="Estaciones x tags con layout Optix ns=9, p.ej. 100x200")
+    parser.add_argument("--guid", action="store_true", help="NodeIds GUID en el layout sintético")
+    parser.add_argument("--dynamics", help="Generadores de valores, p.ej. toggle=0.1@1,ramp=0.05@10,walk=0.2@2")
+    args = parser.parse_args()
+    
+    sources = []
+    if args.l5x:
+        sources.append(l5x_source(args.l5x, copies=args.copies))
+    if args.csv:
+        sources.append(csv_source(args.csv))
+    if args.synthetic:
+        stations, tags = parse_synthetic(args.synthetic)
+        sources.append(synthetic_source(stations, tags, guid=args.guid))
+        
+    store = CachedRecordStore(SQLiteRecordStore(args.db)) if args.db else None
+    simulator = GatewaySimulator(args.url, store=store, sources=sources, dynamics=args.dynamics)
+    try:
+        await simulator.start()
+    finally:
+        await simulator.store.close()
 
 
 if __name__ == "__main__":
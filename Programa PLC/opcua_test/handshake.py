@@ -0,0 +1,351 @@
+"""
+================================================================================
+    HANDSHAKE REQUEST/ACKNOWLEDGE SOBRE CAMBIOS DE DATO
+
+    Los flujos del PLC con el gateway siguen todos el mismo patrón: subir un
+    bit de request (con algún dato al lado, p.ej. BarcodeValue), esperar
+    que el gateway responda en uno o más tags, bajar el request y, en los
+    que tienen acknowledge, esperar que la respuesta vuelva a reposo.
+
+    Handshake declara ese patrón: tag de request, tags de respuesta,
+    predicado de finalización y timeout. HandshakeRunner lo ejecuta:
+
+    - Se despierta con las notificaciones de la TagSubscription (sin
+      polling); sin suscripción cae a lecturas cada POLL_INTERVAL_S
+    - complete(cambios) recibe {tag: valor} de las respuestas que cambiaron
+      desde que se subió el request; retorna el resultado o None
+    - Escribe el request y sus datos en una sola petición Write y siempre
+      baja el request al terminar (también en timeout o error)
+    - Varios handshakes en vuelo a la vez (otras estaciones u otros
+      requests); dos sobre el mismo request se ejecutan en orden
+    - Latencia de respuesta (request -> respuesta) y de ciclo completo
+      (hasta que la respuesta vuelve a reposo) en histogramas HDR por
+      handshake, exportables a JSON y .hgrm
+
+    Uso:
+        UUID = Handshake("UUIDReq", ["UUID_pull"],
+                         lambda changes: changes.get("UUID_pull"), timeout=3.0)
+        runner = HandshakeRunner(gateway.write_tags, subscription)
+        uuid = await runner.run(UUID)
+        runner.export("cache/handshakes")
+================================================================================
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from latency_histogram import LatencyHistogram
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+TIMEOUT_S = 5.0          # Espera de la respuesta por defecto
+RELEASE_TIMEOUT_S = 5.0  # Espera de la vuelta a reposo tras bajar el request
+POLL_INTERVAL_S = 0.1    # Sólo sin suscripción
+
+
+class HandshakeTimeout(asyncio.TimeoutError):
+    """El responder no completó el handshake dentro del timeout."""
+
+    def __init__(self, name: str, phase: str, timeout: float):
+        super().__init__(f"{name}: sin {phase} en {timeout:g} s")
+        self.name = name
+        self.phase = phase
+        self.timeout = timeout
+
+
+class Handshake:
+    """Definición de un handshake request/acknowledge."""
+
+    def __init__(self, request: str, responses, complete, timeout: float = TIMEOUT_S,
+                 name: str = None, request_value=True, reset_value=False,
+                 release: dict = None, release_timeout: float = RELEASE_TIMEOUT_S,
+                 rearm_delay: float = 0.0):
+        """
+        request:   tag que levanta el pedido (BarcodeReq, UUIDReq, WriteToDb)
+        responses: tags que escribe el responder
+        complete:  complete({tag: valor}) -> resultado, o None si todavía no
+        release:   {tag: predicado} que el responder cumple tras bajar el
+                   request (acknowledge en 4 fases); el siguiente handshake
+                   sobre el mismo request espera a que se cumpla
+        rearm_delay: segundos mínimos con el request abajo antes de volver a
+                   subirlo, para responders que muestrean el bit (sin eso
+                   un reset seguido de otro request no genera flanco)
+        """
+
+        self.request = request
+        self.responses = tuple(responses)
+        self.complete = complete
+        self.timeout = timeout
+        self.name = name or request
+        self.request_value = request_value
+        self.reset_value = reset_value
+        self.release = release or {}
+        self.release_timeout = release_timeout
+        self.rearm_delay = rearm_delay
+
+
+class _Pending:
+    """Un handshake en vuelo esperando su respuesta."""
+
+    def __init__(self, handshake: Handshake, prefix: str, baseline: dict, future):
+        self.handshake = handshake
+        self.prefix = prefix
+        self.baseline = baseline
+        self.future = future
+        self.changes = {}
+
+    def offer(self, tag: str, value) -> bool:
+        """Registra un cambio de una respuesta; True si completó el handshake."""
+
+        if tag in self.baseline and value == self.baseline[tag]:
+            self.changes.pop(tag, None)
+        else:
+            self.changes[tag] = value
+        if self.future.done() or not self.changes:
+            return False
+        try:
+            result = self.handshake.complete(dict(self.changes))
+        except Exception as e:
+            self.future.set_exception(e)
+            return True
+        if result is None:
+            return False
+        self.future.set_result((result, time.perf_counter()))
+        return True
+
+
+class HandshakeRunner:
+    """Ejecuta handshakes con varios en vuelo y mide sus latencias."""
+
+    def __init__(self, write, subscription=None, read=None, poll_interval: float = POLL_INTERVAL_S):
+        """
+        write:        async write({tag: valor}) -> {tag: StatusCode}, una petición
+        subscription: TagSubscription con las respuestas monitoreadas
+        read:         async read([tags]) -> {tag: valor}, sólo sin suscripción
+        """
+
+        if subscription is None and read is None:
+            raise ValueError("HandshakeRunner necesita una suscripción o una función de lectura")
+
+        self.write = write
+        self.subscription = subscription
+        self.read = read
+        self.poll_interval = poll_interval
+
+        self._pending = {}       # tag completo de respuesta -> [_Pending]
+        self._locks = {}         # tag completo de request -> asyncio.Lock
+        self._reset_at = {}      # tag completo de request -> perf_counter del último reset
+
+        self.latencies = {}      # nombre -> LatencyHistogram (request -> respuesta)
+        self.cycles = {}         # nombre -> LatencyHistogram (ciclo completo)
+        self.completed = {}
+        self.timeouts = {}
+        self.errors = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        if subscription is not None:
+            subscription.on_data(self._on_data)
+
+    # ========================================================================
+    # EJECUCIÓN
+    # ========================================================================
+
+    async def run(self, handshake: Handshake, values: dict = None, prefix: str = ""):
+        """
+        Ejecuta un handshake y retorna el resultado de complete().
+
+        values: tags escritos junto con el request (BarcodeValue).
+        prefix: antepuesto a todos los tags (una estación entre varias).
+        Lanza HandshakeTimeout si no hay respuesta (o vuelta a reposo) a tiempo.
+        """
+
+        request = prefix + handshake.request
+        lock = self._locks.get(request)
+        if lock is None:
+            lock = self._locks[request] = asyncio.Lock()
+
+        async with lock:
+            wait = handshake.rearm_delay - (time.perf_counter() - self._reset_at.get(request, 0.0))
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                return await self._run(handshake, values or {}, prefix)
+            except HandshakeTimeout:
+                self.timeouts[handshake.name] = self.timeouts.get(handshake.name, 0) + 1
+                raise
+            except Exception:
+                self.errors[handshake.name] = self.errors.get(handshake.name, 0) + 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def _run(self, handshake: Handshake, values: dict, prefix: str):
+        responses = [prefix + tag for tag in handshake.responses]
+        writes = {prefix + tag: value for tag, value in values.items()}
+        writes[prefix + handshake.request] = handshake.request_value
+
+        if self.subscription is not None:
+            baseline = {tag: self.subscription.values[prefix + tag]
+                        for tag in handshake.responses if prefix + tag in self.subscription.values}
+        else:
+            current = await self.read(responses)
+            baseline = {tag: current[prefix + tag] for tag in handshake.responses}
+
+        pending = _Pending(handshake, prefix, baseline, asyncio.get_running_loop().create_future())
+        for tag in responses:
+            self._pending.setdefault(tag, []).append(pending)
+
+        start = time.perf_counter()
+        try:
+            await self._write(writes)
+            try:
+                if self.subscription is not None:
+                    result, done = await asyncio.wait_for(asyncio.shield(pending.future), handshake.timeout)
+                else:
+                    result, done = await self._poll(pending, responses, handshake.timeout)
+            except asyncio.TimeoutError:
+                raise HandshakeTimeout(handshake.name, "respuesta", handshake.timeout) from None
+        finally:
+            for tag in responses:
+                self._pending[tag].remove(pending)
+                if not self._pending[tag]:
+                    del self._pending[tag]
+            if not pending.future.done():
+                pending.future.cancel()
+            await self._write({prefix + handshake.request: handshake.reset_value})
+            self._reset_at[prefix + handshake.request] = time.perf_counter()
+
+        self._histogram(self.latencies, handshake.name).record((done - start) * 1000)
+
+        if handshake.release:
+            await self._wait_released(handshake, prefix)
+        self._histogram(self.cycles, handshake.name).record((time.perf_counter() - start) * 1000)
+        self.completed[handshake.name] = self.completed.get(handshake.name, 0) + 1
+        return result
+
+    async def _write(self, values: dict):
+        results = await self.write(values)
+        for tag, status in (results or {}).items():
+            if not status.is_good():
+                raise RuntimeError(f"Error escribiendo {tag}: {status}")
+
+    async def _poll(self, pending: _Pending, responses: list, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            current = await self.read(responses)
+            for tag in responses:
+                pending.offer(tag[len(pending.prefix):], current[tag])
+            if pending.future.done():
+                return pending.future.result()
+        raise asyncio.TimeoutError()
+
+    async def _wait_released(self, handshake: Handshake, prefix: str):
+        try:
+            if self.subscription is not None:
+                for tag, predicate in handshake.release.items():
+                    await self.subscription.wait_for(prefix + tag, predicate, handshake.release_timeout)
+                return
+
+            deadline = time.monotonic() + handshake.release_timeout
+            tags = [prefix + tag for tag in handshake.release]
+            while True:
+                current = await self.read(tags)
+                if all(predicate(current[prefix + tag]) for tag, predicate in handshake.release.items()):
+                    return
+                if time.monotonic() >= deadline:
+                    raise asyncio.TimeoutError()
+                await asyncio.sleep(self.poll_interval)
+        except asyncio.TimeoutError:
+            raise HandshakeTimeout(handshake.name, "vuelta a reposo", handshake.release_timeout) from None
+
+    def _on_data(self, name: str, data_value):
+        """Listener de la suscripción: entrega el cambio a los handshakes en vuelo."""
+
+        waiting = self._pending.get(name)
+        if not waiting:
+            return
+        value = data_value.Value.Value if data_value.Value is not None else None
+        for pending in list(waiting):
+            pending.offer(name[len(pending.prefix):], value)
+
+    @staticmethod
+    def _histogram(histograms: dict, name: str) -> LatencyHistogram:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = LatencyHistogram()
+        return histogram
+
+    # ========================================================================
+    # MÉTRICAS
+    # ========================================================================
+
+    def stats(self) -> dict:
+        """{handshake: completados, timeouts, errores y percentiles (ms)}."""
+
+        names = set(self.latencies) | set(self.timeouts) | set(self.errors)
+        return {
+            name: {
+                "completed": self.completed.get(name, 0),
+                "timeouts": self.timeouts.get(name, 0),
+                "errors": self.errors.get(name, 0),
+                "response": self._histogram(self.latencies, name).summary(),
+                "cycle": self._histogram(self.cycles, name).summary(),
+            }
+            for name in sorted(names)
+        }
+
+    def print_stats(self):
+        for name, stats in self.stats().items():
+            for kind in ("response", "cycle"):
+                summary = stats[kind]
+                if not summary["count"]:
+                    continue
+                label = f"{name} ({'respuesta' if kind == 'response' else 'ciclo'})"
+                print(f"  {label:<32} n={summary['count']:<6} p50={summary['p50_ms']:8.2f} ms  "
+                      f"p99={summary['p99_ms']:8.2f} ms  p99.9={summary['p999_ms']:8.2f} ms  "
+                      f"máx={summary['max_ms']:8.2f} ms")
+            if stats["timeouts"] or stats["errors"]:
+                print(f"  {name:<32} timeouts={stats['timeouts']} errores={stats['errors']}")
+
+    def export(self, path: str) -> list:
+        """
+        Exporta los histogramas: path + ".json" (conteos, para merge o
+        recarga con LatencyHistogram.from_dict) y un path + "_<nombre>.hgrm"
+        por handshake con la distribución de percentiles de respuesta.
+        Retorna los archivos escritos.
+        """
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        data = {
+            "created": time.time(),
+            "handshakes": {
+                name: {
+                    "completed": self.completed.get(name, 0),
+                    "timeouts": self.timeouts.get(name, 0),
+                    "errors": self.errors.get(name, 0),
+                    "response": self._histogram(self.latencies, name).to_dict(),
+                    "cycle": self._histogram(self.cycles, name).to_dict(),
+                }
+                for name in sorted(set(self.latencies) | set(self.timeouts) | set(self.errors))
+            },
+        }
+        files = [path + ".json"]
+        with open(files[0], "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+        for name, histogram in self.latencies.items():
+            files.append(f"{path}_{name}.hgrm")
+            with open(files[-1], "w", encoding="utf-8") as f:
+                f.write(histogram.percentile_distribution())
+        return files
@@ -0,0 +1,764 @@
+"""
+================================================================================
+    HISTORIAN DE TAGS - ALMACÉN COLUMNAR POR SEGMENTOS
+
+    Guarda los cambios de los tags suscritos (Optix, Omron, simulador) en lugar
+    de sólo imprimirlos:
+
+    - Suscripción (TagSubscription.on_data): valor, SourceTimestamp y
+      StatusCode de cada cambio
+    - Filtro por tag: banda muerta y compresión swinging door (desviación
+      máxima de la interpolación lineal entre puntos archivados)
+    - Buffer en memoria, volcado por lotes (FLUSH_POINTS o FLUSH_INTERVAL_S)
+      en un hilo aparte
+    - Segmentos binarios append-only (historian/seg_XXXXXXXX.hseg), un bloque
+      columnar por tag y segmento:
+        tiempos   -> delta en µs desde t0 con el entero más estrecho (b/h/i/q)
+        valores   -> REAL: double; entero: delta; BOOL: byte;
+                     texto: diccionario del bloque + índices
+        calidad   -> diccionario de StatusCodes del bloque + índices
+      El pie de cada segmento indexa (tag, offset, t_min, t_max), así que una
+      consulta de un tag sólo lee sus bloques
+    - Catálogo (catalog.json): nombre -> id y tipo
+
+    Uso:
+        python historian.py record --duration 60
+        python historian.py record --url opc.tcp://192.168.101.100:59100 --tags tags.json
+        python historian.py query Heartbeat --start 2026-01-10T08:00 --end 2026-01-10T09:00
+        python historian.py info
+
+    tags.json: {"Heartbeat": "nsu=...;s=EgComIn_Heartbeat",
+                "Nivel": {"node_id": "ns=4;s=Nivel", "deadband": 0.1, "deviation": 0.5}}
+================================================================================
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from itertools import accumulate
+
+from tag_subscription import TagSubscription
+
+logger = logging.getLogger("Historian")
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+HISTORIAN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "historian")
+
+FLUSH_POINTS = 50000       # Puntos en buffer que fuerzan un volcado
+FLUSH_INTERVAL_S = 5.0     # Volcado periódico aunque el buffer no esté lleno
+
+# Tipos de columna de valores
+KIND_REAL, KIND_INT, KIND_BOOL, KIND_TEXT = range(4)
+KIND_NAMES = ("REAL", "INT", "BOOL", "TEXT")
+
+SEGMENT_MAGIC = b"HSEG1"
+BLOCK_HEADER = struct.Struct("<IBIq")          # tag_id, tipo, puntos, t0 (µs)
+SECTION = struct.Struct("<I")                  # longitud de cada columna
+INDEX_ENTRY = struct.Struct("<IQIqqI")         # tag_id, offset, bytes, t_min, t_max, puntos
+FOOTER = struct.Struct("<I5s")                 # entradas, magic
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def to_micros(timestamp) -> int:
+    """datetime (naive = UTC) -> µs desde epoch."""
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return round(timestamp.timestamp() * 1_000_000)
+
+
+def from_micros(micros: int) -> datetime:
+    return datetime.fromtimestamp(micros / 1_000_000, timezone.utc)
+
+
+def value_kind(value) -> int:
+    if isinstance(value, bool):
+        return KIND_BOOL
+    if isinstance(value, int):
+        return KIND_INT
+    if isinstance(value, float):
+        return KIND_REAL
+    return KIND_TEXT
+
+
+# ============================================================================
+# COLUMNAS
+# ============================================================================
+
+def _narrow(values) -> array:
+    """Array con el tipo entero más estrecho que contiene todos los valores."""
+
+    lo, hi = min(values, default=0), max(values, default=0)
+    for code in "bhi":
+        limit = 1 << (array(code).itemsize * 8 - 1)
+        if -limit <= lo and hi < limit:
+            return array(code, values)
+    return array("q", values)
+
+
+def _pack(column: array) -> bytes:
+    if not _LITTLE_ENDIAN:
+        column = array(column.typecode, column)
+        column.byteswap()
+    data = column.typecode.encode() + column.tobytes()
+    return SECTION.pack(len(data)) + data
+
+
+def _unpack(buffer: memoryview, pos: int) -> tuple:
+    """(array, nueva posición)"""
+
+    size, = SECTION.unpack_from(buffer, pos)
+    pos += SECTION.size
+    column = array(chr(buffer[pos]))
+    column.frombytes(buffer[pos + 1:pos + size])
+    if not _LITTLE_ENDIAN:
+        column.byteswap()
+    return column, pos + size
+
+
+def _pack_bytes(data: bytes) -> bytes:
+    return SECTION.pack(len(data)) + data
+
+
+def _deltas(values: list, base: int = 0) -> list:
+    return [b - a for a, b in zip([base] + values, values)]
+
+
+def _cumulative(deltas, base: int = 0) -> list:
+    return list(accumulate(deltas, initial=base))[1:]
+
+
+def _dictionary(values) -> tuple:
+    """(valores únicos en orden de aparición, índices)"""
+
+    codes = {}
+    indexes = [codes.setdefault(value, len(codes)) for value in values]
+    return list(codes), indexes
+
+
+def encode_block(tag_id: int, kind: int, times: list, values: list, qualities: list) -> bytes:
+    """Bloque columnar de un tag: cabecera + tiempos + valores + calidad."""
+
+    parts = [BLOCK_HEADER.pack(tag_id, kind, len(times), times[0])]
+    parts.append(_pack(_narrow(_deltas(times, times[0]))))
+
+    if kind == KIND_REAL:
+        parts.append(_pack(array("d", values)))
+    elif kind == KIND_INT:
+        parts.append(_pack(_narrow(_deltas(values))))
+    elif kind == KIND_BOOL:
+        parts.append(_pack(array("B", values)))
+    else:
+        words, indexes = _dictionary(values)
+        parts.append(_pack_bytes(json.dumps(words, ensure_ascii=False).encode()))
+        parts.append(_pack(_narrow(indexes)))
+
+    codes, indexes = _dictionary(qualities)
+    parts.append(_pack(array("I", codes)))
+    parts.append(_pack(_narrow(indexes)))
+    return b"".join(parts)
+
+
+def decode_block(buffer) -> tuple:
+    """Inverso de encode_block: (tag_id, kind, times, values, qualities)."""
+
+    buffer = memoryview(buffer)
+    tag_id, kind, _, t0 = BLOCK_HEADER.unpack_from(buffer, 0)
+    pos = BLOCK_HEADER.size
+
+    deltas, pos = _unpack(buffer, pos)
+    times = _cumulative(deltas, t0)
+
+    if kind == KIND_REAL:
+        values, pos = _unpack(buffer, pos)
+        values = values.tolist()
+    elif kind == KIND_INT:
+        deltas, pos = _unpack(buffer, pos)
+        values = _cumulative(deltas)
+    elif kind == KIND_BOOL:
+        values, pos = _unpack(buffer, pos)
+        values = [bool(v) for v in values]
+    else:
+        size, = SECTION.unpack_from(buffer, pos)
+        words = json.loads(bytes(buffer[pos + SECTION.size:pos + SECTION.size + size]))
+        pos += SECTION.size + size
+        indexes, pos = _unpack(buffer, pos)
+        values = [words[i] for i in indexes]
+
+    codes, pos = _unpack(buffer, pos)
+    indexes, pos = _unpack(buffer, pos)
+    qualities = [codes[i] for i in indexes]
+    return tag_id, kind, times, values, qualities
+
+
+# ============================================================================
+# FILTRO POR TAG: BANDA MUERTA + SWINGING DOOR
+# ============================================================================
+
+class TagFilter:
+    """
+    Decide qué puntos de un tag se archivan.
+
+    - deadband: se descartan cambios |v - último aceptado| <= deadband
+    - deviation: swinging door; se archiva el punto anterior cuando la
+      recta desde el último archivado hasta el punto nuevo ya no pasa a
+      <= deviation de todos los puntos intermedios. Con deviation la banda
+      muerta no descarta cambios numéricos: un cambio descartado no acota
+      la puerta y la interpolación podría alejarse de él más que deviation
+    BOOL/texto y cambios de calidad se archivan siempre que cambian.
+    """
+
+    __slots__ = ("deadband", "deviation", "_last", "_archived", "_held", "_upper", "_lower")
+
+    def __init__(self, deadband: float = 0.0, deviation: float = None):
+        self.deadband = deadband
+        self.deviation = deviation
+        self._last = None          # (valor, calidad) del último punto aceptado
+        self._archived = None      # (t, v) del último punto archivado
+        self._held = None          # (t, v, q) recibido y aún no archivado
+        self._upper = float("inf")
+        self._lower = float("-inf")
+
+    def offer(self, t: int, v, q: int) -> tuple:
+        """Retorna los puntos (t, v, q) que hay que archivar."""
+
+        last = self._last
+        numeric = isinstance(v, (int, float)) and not isinstance(v, bool)
+
+        if not numeric or last is None or q != last[1]:
+            if last is not None and (v, q) == last:
+                return ()
+            self._last = (v, q)
+            return self._restart(t, v, q)
+
+        if self.deviation is None:
+            if abs(v - last[0]) <= self.deadband:
+                return ()
+            self._last = (v, q)
+            return ((t, v, q),)
+        self._last = (v, q)
+
+        ta, va = self._archived
+        dt = t - ta
+        if dt <= 0:
+            self._held = (t, v, q)
+            return ()
+
+        # El punto puede archivarse más tarde si la recta desde el archivado
+        # hasta él queda dentro de la puerta de todos los intermedios
+        slope = (v - va) / dt
+        if self._lower <= slope <= self._upper:
+            self._upper = min(self._upper, (v + self.deviation - va) / dt)
+            self._lower = max(self._lower, (v - self.deviation - va) / dt)
+            self._held = (t, v, q)
+            return ()
+
+        # La puerta se abrió: el punto anterior pasa a ser el archivado
+        held = self._held
+        th, vh = held[0], held[1]
+        self._archived = (th, vh)
+        dt = max(t - th, 1)
+        self._upper = (v + self.deviation - vh) / dt
+        self._lower = (v - self.deviation - vh) / dt
+        self._held = (t, v, q)
+        return (held,)
+
+    def _restart(self, t, v, q) -> tuple:
+        points = (self._held, (t, v, q)) if self._held else ((t, v, q),)
+        self._archived = (t, v)
+        self._held = None
+        self._upper = float("inf")
+        self._lower = float("-inf")
+        return points
+
+    def pending(self):
+        """Punto retenido por swinging door, aún sin decidir (no lo archiva)."""
+
+        return self._held
+
+    def finish(self):
+        """Cierra el tag: retorna el punto retenido para archivarlo."""
+
+        held = self._held
+        if held is not None:
+            self._archived = (held[0], held[1])
+            self._held = None
+            self._upper = float("inf")
+            self._lower = float("-inf")
+        return held
+
+
+# ============================================================================
+# ALMACÉN DE SEGMENTOS
+# ============================================================================
+
+class TagSeries:
+    """Resultado de una consulta: columnas paralelas de un tag."""
+
+    __slots__ = ("name", "times", "values", "qualities")
+
+    def __init__(self, name: str, times: list, values: list, qualities: list):
+        self.name = name
+        self.times = times           # µs desde epoch (UTC)
+        self.values = values
+        self.qualities = qualities   # StatusCode (0 = Good)
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        return zip(self.times, self.values, self.qualities)
+
+
+class SegmentStore:
+    """Segmentos append-only con índice por tag cargado desde los pies."""
+
+    def __init__(self, directory: str = HISTORIAN_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self.tags = {}             # nombre -> {"id", "kind"}
+        self._names = {}           # id -> nombre
+        self.blocks = {}           # id -> [(t_min, t_max, path, offset, size, puntos)]
+        self._next_segment = 0
+        self._lock = threading.Lock()
+
+        self._load_catalog()
+        self._load_segments()
+
+    @property
+    def catalog_path(self) -> str:
+        return os.path.join(self.directory, "catalog.json")
+
+    def _load_catalog(self):
+        if os.path.exists(self.catalog_path):
+            with open(self.catalog_path, encoding="utf-8") as f:
+                self.tags = json.load(f)["tags"]
+        self._names = {info["id"]: name for name, info in self.tags.items()}
+
+    def _save_catalog(self):
+        tmp = self.catalog_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"tags": self.tags}, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, self.catalog_path)
+
+    def _load_segments(self):
+        for filename in sorted(os.listdir(self.directory)):
+            if not (filename.startswith("seg_") and filename.endswith(".hseg")):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                self._index_segment(path)
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"Segmento ignorado {filename}: {e}")
+            self._next_segment = max(self._next_segment, int(filename[4:12]) + 1)
+
+    def _index_segment(self, path: str):
+        with open(path, "rb") as f:
+            f.seek(-FOOTER.size, os.SEEK_END)
+            count, magic = FOOTER.unpack(f.read(FOOTER.size))
+            if magic != SEGMENT_MAGIC:
+                raise ValueError("pie inválido")
+            f.seek(-FOOTER.size - count * INDEX_ENTRY.size, os.SEEK_END)
+            index = f.read(count * INDEX_ENTRY.size)
+        for tag_id, offset, size, t_min, t_max, points in INDEX_ENTRY.iter_unpack(index):
+            self.blocks.setdefault(tag_id, []).append((t_min, t_max, path, offset, size, points))
+
+    def tag_id(self, name: str, kind: int) -> int:
+        info = self.tags.get(name)
+        if info is None:
+            info = self.tags[name] = {"id": len(self.tags), "kind": kind}
+            self._names[info["id"]] = name
+            self._save_catalog()
+        return info["id"]
+
+    def append(self, batch: dict, fsync: bool = False) -> int:
+        """
+        Escribe un segmento con {nombre: [(t, v, q), ...]}.
+
+        Retorna los bytes escritos (0 si el lote está vacío).
+        """
+
+        blocks, entries = [], []
+        offset = 0
+        for name, points in batch.items():
+            if not points:
+                continue
+            points.sort(key=lambda p: p[0])
+            times = [p[0] for p in points]
+            if name in self.tags:
+                kind = self.tags[name]["kind"]
+            else:
+                kind = next((value_kind(p[1]) for p in points if p[1] is not None), KIND_TEXT)
+            values = [_coerce(kind, p[1]) for p in points]
+            qualities = [p[2] for p in points]
+
+            tag_id = self.tag_id(name, kind)
+            data = encode_block(tag_id, kind, times, values, qualities)
+            blocks.append(data)
+            entries.append((tag_id, offset, len(data), times[0], times[-1], len(times)))
+            offset += len(data)
+
+        if not blocks:
+            return 0
+
+        with self._lock:
+            number = self._next_segment
+            self._next_segment += 1
+        path = os.path.join(self.directory, f"seg_{number:08d}.hseg")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.writelines(blocks)
+            f.writelines(INDEX_ENTRY.pack(*entry) for entry in entries)
+            f.write(FOOTER.pack(len(entries), SEGMENT_MAGIC))
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        with self._lock:
+            for tag_id, block_offset, size, t_min, t_max, points in entries:
+                self.blocks.setdefault(tag_id, []).append(
+                    (t_min, t_max, path, block_offset, size, points))
+        return offset + len(entries) * INDEX_ENTRY.size + FOOTER.size
+
+    def query(self, name: str, start: int = None, end: int = None) -> TagSeries:
+        """Puntos de un tag con start <= t <= end (µs). Sólo lee sus bloques."""
+
+        series = TagSeries(name, [], [], [])
+        info = self.tags.get(name)
+        if info is None:
+            return series
+        start = float("-inf") if start is None else start
+        end = float("inf") if end is None else end
+
+        with self._lock:
+            blocks = list(self.blocks.get(info["id"], ()))
+        for t_min, t_max, path, offset, size, _ in blocks:
+            if t_max < start or t_min > end:
+                continue
+            with open(path, "rb") as f:
+                f.seek(offset)
+                _, _, times, values, qualities = decode_block(f.read(size))
+            for t, v, q in zip(times, values, qualities):
+                if start <= t <= end:
+                    series.times.append(t)
+                    series.values.append(v)
+                    series.qualities.append(q)
+        return series
+
+    def stats(self) -> dict:
+        segments = {b[2] for blocks in self.blocks.values() for b in blocks}
+        return {
+            "tags": len(self.tags),
+            "segments": len(segments),
+            "points": sum(b[5] for blocks in self.blocks.values() for b in blocks),
+            "bytes": sum(os.path.getsize(path) for path in segments if os.path.exists(path)),
+        }
+
+
+def _coerce(kind: int, value):
+    """Valor para la columna del tag (None o tipo distinto -> convertido)."""
+
+    try:
+        if kind == KIND_REAL:
+            return float(value or 0.0)
+        if kind == KIND_INT:
+            return int(value or 0)
+        if kind == KIND_BOOL:
+            return 1 if value else 0
+    except (TypeError, ValueError):
+        return 0
+    return "" if value is None else str(value)
+
+
+# ============================================================================
+# HISTORIAN
+# ============================================================================
+
+class Historian:
+    """Buffer + filtros por tag + volcado por lotes a un SegmentStore."""
+
+    def __init__(self, store: SegmentStore = None, tags: dict = None,
+                 flush_points: int = FLUSH_POINTS, flush_interval: float = FLUSH_INTERVAL_S,
+                 fsync: bool = False):
+        self.store = store or SegmentStore()
+        self.flush_points = flush_points
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        self.config = {}           # nombre -> {"deadband", "deviation"}
+        self._filters = {}         # nombre -> TagFilter
+        self._buffer = {}          # nombre -> [(t, v, q)]
+        self._buffered = 0
+
+        self.received = 0
+        self.archived = 0
+        self.flushes = 0
+        self.bytes_written = 0
+        self._flush_task = None    # volcado programado por record()
+        self._flush_lock = asyncio.Lock()
+        self._subscription = None
+
+        for name, spec in (tags or {}).items():
+            self.configure(name, **{k: v for k, v in spec.items() if k != "node_id"})
+
+    def configure(self, name: str, deadband: float = 0.0, deviation: float = None):
+        self.config[name] = {"deadband": deadband, "deviation": deviation}
+        self._filters[name] = TagFilter(deadband, deviation)
+
+    # ------------------------------------------------------------------------
+    # INGESTA
+    # ------------------------------------------------------------------------
+
+    def record(self, name: str, value, timestamp: int, quality: int = 0):
+        """Registra un cambio (timestamp en µs). No hace I/O."""
+
+        self.received += 1
+        tag_filter = self._filters.get(name)
+        if tag_filter is None:
+            self.configure(name)
+            tag_filter = self._filters[name]
+
+        points = tag_filter.offer(timestamp, value, quality)
+        if points:
+            buffer = self._buffer.get(name)
+            if buffer is None:
+                buffer = self._buffer[name] = []
+            buffer.extend(points)
+            self._buffered += len(points)
+            if self._buffered >= self.flush_points and self._flush_task is None:
+                self._schedule_flush()
+
+    def on_data(self, name: str, data_value):
+        """Listener de TagSubscription.on_data()."""
+
+        timestamp = data_value.SourceTimestamp or data_value.ServerTimestamp
+        variant = data_value.Value
+        self.record(
+            name,
+            variant.Value if variant is not None else None,
+            to_micros(timestamp) if timestamp else time.time_ns() // 1000,
+            data_value.StatusCode.value if data_value.StatusCode is not None else 0,
+        )
+
+    async def attach(self, client, node_ids: dict, **subscription_options) -> TagSubscription:
+        """Suscribe {nombre: node_id} y alimenta el historian con cada cambio."""
+
+        self._subscription = TagSubscription(client, **subscription_options)
+        self._subscription.on_data(self.on_data)
+        await self._subscription.start(node_ids)
+        return self._subscription
+
+    # ------------------------------------------------------------------------
+    # VOLCADO
+    # ------------------------------------------------------------------------
+
+    def _take_batch(self, final: bool = False) -> dict:
+        """
+        Puntos ya decididos del buffer; con final=True también los que
+        swinging door retiene (cierre del historian).
+        """
+
+        batch, self._buffer, self._buffered = self._buffer, {}, 0
+        if final:
+            for name, tag_filter in self._filters.items():
+                held = tag_filter.finish()
+                if held is not None:
+                    batch.setdefault(name, []).append(held)
+        return batch
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+        self._flush_task = loop.create_task(self._scheduled_flush())
+
+    async def _scheduled_flush(self):
+        try:
+            await self.flush()
+        finally:
+            self._flush_task = None
+
+    def flush_sync(self, final: bool = False) -> int:
+        """Volcado en el hilo actual (sin event loop); final=True al terminar."""
+
+        batch = self._take_batch(final)
+        return self._written(batch, self.store.append(batch, self.fsync))
+
+    async def flush(self, final: bool = False) -> int:
+        """Vuelca el buffer a un segmento nuevo en un hilo aparte."""
+
+        # Un solo volcado a la vez, desde que se toma el lote hasta que el
+        # segmento y el catálogo quedan escritos: store.append no es reentrante
+        async with self._flush_lock:
+            batch = self._take_batch(final)
+            written = await asyncio.get_running_loop().run_in_executor(
+                None, self.store.append, batch, self.fsync)
+            return self._written(batch, written)
+
+    def _written(self, batch: dict, written: int) -> int:
+        if written:
+            self.flushes += 1
+            self.bytes_written += written
+            self.archived += sum(len(points) for points in batch.values())
+        return written
+
+    async def run(self, duration: float = None):
+        """Volcado periódico hasta duration (None = hasta cancelar)."""
+
+        deadline = None if duration is None else time.monotonic() + duration
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                wait = self.flush_interval
+                if deadline is not None:
+                    wait = min(wait, max(0.0, deadline - time.monotonic()))
+                await asyncio.sleep(wait)
+                await self.flush()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._subscription is not None:
+            await self._subscription.stop()
+            self._subscription = None
+        await self.flush(final=True)
+        if self._flush_task is not None:
+            await self._flush_task
+
+    # ------------------------------------------------------------------------
+    # CONSULTAS
+    # ------------------------------------------------------------------------
+
+    def query(self, name: str, start: int = None, end: int = None) -> TagSeries:
+        """Segmentos en disco + puntos aún en buffer o retenidos por el filtro."""
+
+        series = self.store.query(name, start, end)
+        lo = float("-inf") if start is None else start
+        hi = float("inf") if end is None else end
+        points = list(self._buffer.get(name, ()))
+        held = self._filters[name].pending() if name in self._filters else None
+        if held is not None:
+            points.append(held)
+        for t, v, q in sorted(points, key=lambda p: p[0]):
+            if lo <= t <= hi:
+                series.times.append(t)
+                series.values.append(v)
+                series.qualities.append(q)
+        return series
+
+
+# ============================================================================
+# LÍNEA DE COMANDOS
+# ============================================================================
+
+def load_tag_config(path: str = None) -> dict:
+    """{nombre: {"node_id", "deadband", "deviation"}} desde JSON o TAGS del gateway."""
+
+    if path is None:
+        from gateway_client import TAGS
+        raw = TAGS
+    else:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+    return {name: spec if isinstance(spec, dict) else {"node_id": spec}
+            for name, spec in raw.items()}
+
+
+def parse_time(text: str):
+    if text is None:
+        return None
+    return to_micros(datetime.fromisoformat(text))
+
+
+async def record(args):
+    from asyncua import Client
+    from nodeid_resolver import NodeIdResolver
+
+    tags = load_tag_config(args.tags)
+    historian = Historian(SegmentStore(args.dir), tags)
+
+    client = Client(url=args.url)
+    await client.connect()
+    try:
+        node_ids = await NodeIdResolver(client, args.url).resolve(
+            {name: spec["node_id"] for name, spec in tags.items()})
+        await historian.attach(client, node_ids, publishing_interval=args.publishing_interval)
+        print(f"📼 Registrando {len(node_ids)} tags en {args.dir} (Ctrl+C para salir)")
+        await historian.run(args.duration)
+    finally:
+        await client.disconnect()
+
+    print(f"  Cambios recibidos: {historian.received}   Archivados: {historian.archived}   "
+          f"Segmentos: {historian.flushes}   Bytes: {historian.bytes_written}")
+
+
+def query(args):
+    store = SegmentStore(args.dir)
+    series = store.query(args.tag, parse_time(args.start), parse_time(args.end))
+    print(f"📈 {args.tag}: {len(series)} puntos")
+    for t, v, q in series:
+        status = "" if q == 0 else f"  [0x{q:08X}]"
+        print(f"  {from_micros(t).isoformat(timespec='milliseconds')}  {v}{status}")
+
+
+def info(args):
+    store = SegmentStore(args.dir)
+    stats = store.stats()
+    print(f"📦 {args.dir}: {stats['tags']} tags, {stats['segments']} segmentos, "
+          f"{stats['points']} puntos, {stats['bytes']} bytes")
+    for name, tag in sorted(store.tags.items()):
+        blocks = store.blocks.get(tag["id"], [])
+        points = sum(b[5] for b in blocks)
+        print(f"  {name:<40} {KIND_NAMES[tag['kind']]:<5} {points:>10} puntos  {len(blocks)} bloques")
+
+
+def main():
+    from gateway_client import SERVER_URL
+    from tag_subscription import PUBLISHING_INTERVAL_MS
+
+    parser = argparse.ArgumentParser(description="Historian de tags OPC UA")
+    parser.add_argument("--dir", default=HISTORIAN_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="Suscribir y registrar")
+    rec.add_argument("--url", default=SERVER_URL)
+    rec.add_argument("--tags", help="JSON {nombre: node_id | {node_id, deadband, deviation}}")
+    rec.add_argument("--duration", type=float, help="Segundos (por defecto hasta Ctrl+C)")
+    rec.add_argument("--publishing-interval", type=float, default=PUBLISHING_INTERVAL_MS)
+
+    qry = commands.add_parser("query", help="Rango de un tag")
+    qry.add_argument("tag")
+    qry.add_argument("--start", help="ISO 8601 (UTC si no lleva zona)")
+    qry.add_argument("--end")
+
+    commands.add_parser("info", help="Resumen del almacén")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        try:
+            asyncio.run(record(args))
+        except KeyboardInterrupt:
+            print("\nDetenido")
+    elif args.command == "query":
+        query(args)
+    else:
+        info(args)
+
+
+if __name__ == "__main__":
+    main()
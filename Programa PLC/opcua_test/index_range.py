@@ -0,0 +1,211 @@
+"""
+================================================================================
+    LECTURAS / ESCRITURAS PARCIALES DE ARRAYS (IndexRange, NumericRange)
+
+    MaterialRecord_push es un array de estructuras: leerlo entero para
+    quedarse con un registro manda todo el payload por el enlace. Con
+    IndexRange ("3", "0:1") el servidor retorna / reemplaza sólo esos
+    elementos (OPC UA Parte 4, 7.22 NumericRange).
+
+    - read_range / write_range: una petición Read / Write con IndexRange
+    - ArrayCursor: cursor de "append" sobre un array que el PLC llena slot
+      a slot; cada poll() lee sólo el slot siguiente y avanza mientras
+      encuentre registros nuevos
+    - parse_index_range / apply_read_range / apply_write_range: lado
+      servidor (gateway_simulator.py, asyncua ignora IndexRange)
+
+    Uso:
+        record = await client.read_tag("MaterialRecord_push", index_range="2")
+        await client.write_tag("MaterialRecord_push", record, index_range="2")
+        cursor = client.array_cursor("MaterialRecord_push")
+        await cursor.sync()
+        nuevos = await cursor.poll()     # {slot: registro}
+================================================================================
+"""
+
+import logging
+
+from asyncua import ua
+
+from batch_io import to_nodeid
+
+logger = logging.getLogger("ArrayCursor")
+
+
+def format_index_range(start: int, stop: int = None) -> str:
+    """NumericRange de una dimensión: "3" o "1:3" (stop incluido)."""
+
+    if stop is None or stop == start:
+        return str(start)
+    return f"{start}:{stop}"
+
+
+def parse_index_range(index_range: str) -> tuple:
+    """
+    "3" -> (3, 3), "1:3" -> (1, 3). Sólo una dimensión.
+
+    Lanza ua.UaStatusCodeError(BadIndexRangeInvalid) si no es válido.
+    """
+
+    try:
+        parts = [int(part) for part in index_range.split(":")]
+    except (AttributeError, ValueError):
+        parts = []
+    if len(parts) == 1:
+        parts.append(parts[0])
+    if len(parts) != 2 or parts[0] < 0 or (parts[1] <= parts[0] and ":" in index_range):
+        raise ua.UaStatusCodeError(ua.StatusCodes.BadIndexRangeInvalid)
+    return parts[0], parts[1]
+
+
+def is_single_index(index_range: str) -> bool:
+    return ":" not in index_range and "," not in index_range
+
+
+# ============================================================================
+# CLIENTE
+# ============================================================================
+
+async def read_range(client, node_id, index_range: str) -> ua.DataValue:
+    """Una petición Read del atributo Value con IndexRange."""
+
+    rv = ua.ReadValueId()
+    rv.NodeId = to_nodeid(node_id)
+    rv.AttributeId = ua.AttributeIds.Value
+    rv.IndexRange = index_range
+    params = ua.ReadParameters()
+    params.NodesToRead.append(rv)
+    return (await client.uaclient.read(params))[0]
+
+
+async def write_range(client, node_id, values: list, index_range: str,
+                      variant_type: ua.VariantType = None) -> ua.StatusCode:
+    """Una petición Write que reemplaza sólo los elementos de index_range."""
+
+    wv = ua.WriteValue()
+    wv.NodeId = to_nodeid(node_id)
+    wv.AttributeId = ua.AttributeIds.Value
+    wv.IndexRange = index_range
+    wv.Value = ua.DataValue(ua.Variant(list(values), variant_type))
+    params = ua.WriteParameters()
+    params.NodesToWrite.append(wv)
+    return (await client.uaclient.write(params))[0]
+
+
+class ArrayCursor:
+    """
+    Cursor de append sobre un array de tamaño fijo escrito en anillo.
+
+    poll() lee el slot en la posición del cursor (IndexRange de un
+    elemento); si cambió respecto de lo último visto lo retorna y avanza,
+    hasta encontrar uno sin cambios o dar la vuelta. Sin registros nuevos
+    cuesta una lectura de un solo slot en lugar del array completo.
+
+    key(registro) opcional ordena los registros (p. ej. SampleNumber o
+    Timestamp) para que sync() ubique el cursor tras el más reciente.
+    Si el escritor salta slots o da más de una vuelta entre dos poll(),
+    los registros fuera de orden se ven recién cuando el cursor llega.
+
+    client puede ser el Client o una función que retorna el Client
+    actual (GatewayClient en modo resilient cambia de Client al
+    reconectar); se consulta en cada lectura.
+    """
+
+    def __init__(self, client, node_id, size: int = None, key=None):
+        self._client = client
+        self.node_id = node_id
+        self.size = size
+        self.key = key
+
+        # Último valor visto por slot y próximo slot a leer
+        self.values = {}
+        self.position = 0
+
+        # Lecturas hechas por poll() (para medir)
+        self.reads = 0
+
+    @property
+    def client(self):
+        return self._client() if callable(self._client) else self._client
+
+    async def sync(self) -> list:
+        """Lee el array completo una vez y ubica el cursor."""
+
+        dv = await read_range(self.client, self.node_id, None)
+        dv.StatusCode.check()
+        array = list(dv.Value.Value or [])
+        if self.size is None:
+            self.size = len(array)
+        self.values = dict(enumerate(array[:self.size]))
+        self.position = 0
+        if self.key is not None and self.values:
+            keys = [self.key(self.values[slot]) for slot in range(len(self.values))]
+            # Todos iguales (array vacío): el PLC empieza por el slot 0
+            if max(keys) != min(keys):
+                self.position = (keys.index(max(keys)) + 1) % self.size
+        return array
+
+    async def poll(self) -> dict:
+        """{slot: registro} de los slots nuevos desde el último poll()."""
+
+        if self.size is None:
+            await self.sync()
+            return {}
+
+        changed = {}
+        for _ in range(self.size):
+            slot = self.position
+            dv = await read_range(self.client, self.node_id, str(slot))
+            self.reads += 1
+            if not dv.StatusCode.is_good():
+                logger.warning(f"Slot {slot}: {dv.StatusCode}")
+                break
+            value = dv.Value.Value
+            if isinstance(value, list):
+                value = value[0] if value else None
+            if slot in self.values and self.values[slot] == value:
+                break
+            self.values[slot] = value
+            changed[slot] = value
+            self.position = (slot + 1) % self.size
+        return changed
+
+
+# ============================================================================
+# SERVIDOR
+# ============================================================================
+
+def _bad(code) -> ua.DataValue:
+    # Posicional: el campo es StatusCode_ en asyncua 1.x y StatusCode en 2.x
+    return ua.DataValue(None, ua.StatusCode(code))
+
+
+def apply_read_range(dv: ua.DataValue, index_range: str) -> ua.DataValue:
+    """DataValue con sólo los elementos de index_range (o el error)."""
+
+    try:
+        start, stop = parse_index_range(index_range)
+    except ua.UaStatusCodeError as e:
+        return _bad(e.code)
+    values = dv.Value.Value if dv.Value is not None else None
+    if not isinstance(values, list):
+        return _bad(ua.StatusCodes.BadIndexRangeInvalid)
+    if start >= len(values):
+        return _bad(ua.StatusCodes.BadIndexRangeNoData)
+    return ua.DataValue(ua.Variant(values[start:stop + 1], dv.Value.VariantType),
+                        SourceTimestamp=dv.SourceTimestamp, ServerTimestamp=dv.ServerTimestamp)
+
+
+def apply_write_range(current: ua.DataValue, new: ua.DataValue, index_range: str) -> ua.DataValue:
+    """DataValue del array completo con los elementos de index_range reemplazados."""
+
+    start, stop = parse_index_range(index_range)
+    values = list(current.Value.Value or [])
+    replacement = new.Value.Value if new.Value is not None else None
+    if not isinstance(replacement, list):
+        replacement = [replacement]
+    if stop >= len(values) or len(replacement) != stop - start + 1:
+        raise ua.UaStatusCodeError(ua.StatusCodes.BadIndexRangeNoData)
+    values[start:stop + 1] = replacement
+    return ua.DataValue(ua.Variant(values, current.Value.VariantType),
+                        SourceTimestamp=new.SourceTimestamp, ServerTimestamp=new.ServerTimestamp)
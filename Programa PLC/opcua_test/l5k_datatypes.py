@@ -0,0 +1,143 @@
+"""
+================================================================================
+    UDTs DEL CONTROLADOR (L5K) -> DataTypes OPC UA
+
+    Lee los bloques DATATYPE ... END_DATATYPE de un .L5K (CPS_001_ver1.L5K
+    define Syn_FileReadIn_Struct = MaterialRecord_pull,
+    Syn_FileWriteOut_Struct = MaterialRecord_push[3], Syn_UUID_Struct,
+    Date_Time, ...) y los crea en un servidor asyncua local con new_struct,
+    para probar contra estructuras como las que publica el 5069-L310ER.
+
+    - Tipos atómicos -> VariantType (DINT -> Int32, REAL -> Float, ...)
+    - Familia string (STR0016, PRINT_STR, ...) -> String
+    - Miembros BIT sobre el SINT oculto -> Boolean; los ocultos se omiten
+    - TIMER / COUNTER predefinidos
+    - Orden de creación por dependencias (Date_Time antes de
+      Syn_FileWriteOut_Struct)
+
+    Uso:
+        datatypes = parse_l5k_datatypes(L5K_PATH)
+        created = await create_datatypes(server, idx, datatypes)
+================================================================================
+"""
+
+import os
+import re
+
+from asyncua import ua
+
+L5K_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CPS_001_ver1.L5K")
+
+ATOMIC_TYPES = {
+    "BOOL": ua.VariantType.Boolean,
+    "BIT": ua.VariantType.Boolean,
+    "SINT": ua.VariantType.SByte,
+    "INT": ua.VariantType.Int16,
+    "DINT": ua.VariantType.Int32,
+    "LINT": ua.VariantType.Int64,
+    "USINT": ua.VariantType.Byte,
+    "UINT": ua.VariantType.UInt16,
+    "UDINT": ua.VariantType.UInt32,
+    "ULINT": ua.VariantType.UInt64,
+    "REAL": ua.VariantType.Float,
+    "LREAL": ua.VariantType.Double,
+    "STRING": ua.VariantType.String,
+}
+
+# Miembros visibles de los tipos predefinidos de Logix
+PREDEFINED = {
+    "TIMER": [("PRE", "DINT", 0), ("ACC", "DINT", 0),
+              ("EN", "BIT", 0), ("TT", "BIT", 0), ("DN", "BIT", 0)],
+    "COUNTER": [("PRE", "DINT", 0), ("ACC", "DINT", 0), ("CU", "BIT", 0), ("CD", "BIT", 0),
+                ("DN", "BIT", 0), ("OV", "BIT", 0), ("UN", "BIT", 0)],
+}
+
+_DATATYPE = re.compile(r"^\s*DATATYPE\s+(\w+)\s*\(FamilyType\s*:=\s*(\w+)\)(.*?)END_DATATYPE",
+                       re.MULTILINE | re.DOTALL)
+_MEMBER = re.compile(r"^\s*(\w+)\s+(\w+)(?:\[(\d+)\])?([^;]*);", re.MULTILINE)
+
+
+def parse_l5k_datatypes(path: str = L5K_PATH) -> dict:
+    """
+    {nombre: [(miembro, tipo, dimensión), ...]} en orden de declaración.
+
+    dimensión 0 = escalar. Los tipos de familia string no se incluyen
+    (se tratan como STRING).
+    """
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        text = f.read()
+
+    datatypes = {name: list(members) for name, members in PREDEFINED.items()}
+    strings = set()
+    for name, family, body in _DATATYPE.findall(text):
+        if family == "StringFamily":
+            strings.add(name)
+            continue
+        members = []
+        for data_type, member, dimension, rest in _MEMBER.findall(body):
+            if "Hidden := 1" in rest:
+                continue
+            members.append((member, data_type, int(dimension or 0)))
+        datatypes[name] = members
+
+    for name, members in datatypes.items():
+        datatypes[name] = [(m, "STRING" if t in strings else t, d) for m, t, d in members]
+    return datatypes
+
+
+def dependency_order(datatypes: dict) -> list:
+    """Nombres ordenados para que cada UDT se cree después de sus miembros."""
+
+    ordered, visiting = [], set()
+
+    def visit(name):
+        if name in ordered or name not in datatypes:
+            return
+        if name in visiting:
+            raise ValueError(f"UDT recursivo: {name}")
+        visiting.add(name)
+        for _, data_type, _ in datatypes[name]:
+            visit(data_type)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in datatypes:
+        visit(name)
+    return ordered
+
+
+async def create_datatypes(server, idx: int, datatypes: dict, names: list = None) -> dict:
+    """
+    Crea los UDTs (todos o names y sus dependencias) en el servidor.
+
+    Retorna {nombre: NodeId del DataType}. Después hay que llamar a
+    server.load_data_type_definitions() para poder crear variables.
+    """
+
+    from asyncua.common.structures104 import new_struct, new_struct_field
+
+    needed = set(names or datatypes)
+    for name in list(needed):
+        needed |= _dependencies(datatypes, name)
+
+    created = {}
+    for name in [n for n in dependency_order(datatypes) if n in needed]:
+        fields = []
+        for member, data_type, dimension in datatypes[name]:
+            field_type = ATOMIC_TYPES.get(data_type) or created.get(data_type)
+            if field_type is None:
+                raise ValueError(f"{name}.{member}: tipo desconocido {data_type}")
+            fields.append(new_struct_field(member, field_type, array=dimension > 0))
+        node, _ = await new_struct(server, idx, name, fields)
+        created[name] = node.nodeid
+    return created
+
+
+def _dependencies(datatypes: dict, name: str, seen: set = None) -> set:
+    seen = set() if seen is None else seen
+    for _, data_type, _ in datatypes.get(name, ()):
+        if data_type in datatypes and data_type not in seen:
+            seen.add(data_type)
+            _dependencies(datatypes, data_type, seen)
+    return seen
@@ -0,0 +1,235 @@
+"""
+================================================================================
+    HISTOGRAMA DE LATENCIAS ESTILO HDR
+
+    Mismo esquema de buckets que HdrHistogram: precisión relativa fija
+    (cifras significativas) desde 1 µs hasta el máximo rastreable, memoria
+    constante sin importar cuántas muestras se registren y percentiles
+    exactos dentro de esa precisión. Reemplaza a las listas de latencias
+    cuando el proceso corre horas (handshakes del PLC, daemon).
+
+    - record(ms) / percentile(99) / mean / max / count
+    - merge(): suma histogramas (por estación, por sesión, entre procesos)
+    - to_dict() / from_dict(): conteos dispersos en JSON para exportar
+    - percentile_distribution(): texto .hgrm (formato de HdrHistogram,
+      se puede graficar con el plotter de HdrHistogram)
+
+    Uso:
+        histogram = LatencyHistogram()
+        histogram.record(12.5)
+        print(histogram.percentile(99))
+================================================================================
+"""
+
+import math
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+LOWEST_US = 1                  # Menor valor distinguible (µs)
+HIGHEST_US = 60 * 1000000      # Mayor valor rastreable (60 s); lo mayor se satura
+SIGNIFICANT_FIGURES = 3        # Error relativo máximo de 0.1%
+TICKS_PER_HALF_DISTANCE = 5    # Filas del .hgrm por cada mitad hacia el 100%
+
+
+class LatencyHistogram:
+    """Histograma HDR de latencias en ms (guardadas en µs enteros)."""
+
+    def __init__(self, lowest_us: int = LOWEST_US, highest_us: int = HIGHEST_US,
+                 significant_figures: int = SIGNIFICANT_FIGURES):
+        self.lowest_us = lowest_us
+        self.highest_us = highest_us
+        self.significant_figures = significant_figures
+
+        resolution = 2 * 10 ** significant_figures
+        self._unit_magnitude = int(math.floor(math.log2(lowest_us)))
+        self._sub_bucket_count = 2 ** int(math.ceil(math.log2(resolution)))
+        self._half_count_magnitude = int(math.log2(self._sub_bucket_count)) - 1
+        self._half_count = self._sub_bucket_count // 2
+        self._sub_bucket_mask = (self._sub_bucket_count - 1) << self._unit_magnitude
+
+        smallest_untrackable = self._sub_bucket_count << self._unit_magnitude
+        self.bucket_count = 1
+        while smallest_untrackable <= highest_us:
+            smallest_untrackable <<= 1
+            self.bucket_count += 1
+
+        self.counts = [0] * ((self.bucket_count + 1) * self._half_count)
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.saturated = 0
+        self._total_us = 0
+        self._total_sq_us = 0
+        self._min_us = None
+        self._max_us = 0
+
+    # ========================================================================
+    # ÍNDICES (mismo cálculo que HdrHistogram)
+    # ========================================================================
+
+    def _index(self, value_us: int) -> int:
+        bucket = (value_us | self._sub_bucket_mask).bit_length() - self._unit_magnitude - (self._half_count_magnitude + 1)
+        sub_bucket = value_us >> (bucket + self._unit_magnitude)
+        return ((bucket + 1) << self._half_count_magnitude) + (sub_bucket - self._half_count)
+
+    def _lowest_at(self, index: int) -> int:
+        bucket = (index >> self._half_count_magnitude) - 1
+        sub_bucket = (index & (self._half_count - 1)) + self._half_count
+        if bucket < 0:
+            sub_bucket -= self._half_count
+            bucket = 0
+        return sub_bucket << (bucket + self._unit_magnitude)
+
+    def _highest_at(self, index: int) -> int:
+        bucket = max(0, (index >> self._half_count_magnitude) - 1)
+        return self._lowest_at(index) + (1 << (bucket + self._unit_magnitude)) - 1
+
+    # ========================================================================
+    # REGISTRO Y CONSULTA
+    # ========================================================================
+
+    def record(self, ms: float, count: int = 1):
+        """Registra una latencia en milisegundos."""
+
+        value_us = max(0, int(round(ms * 1000)))
+        if value_us > self.highest_us:
+            value_us = self.highest_us
+            self.saturated += count
+        self.counts[self._index(value_us)] += count
+        self.count += count
+        self._total_us += value_us * count
+        self._total_sq_us += value_us * value_us * count
+        self._min_us = value_us if self._min_us is None else min(self._min_us, value_us)
+        self._max_us = max(self._max_us, value_us)
+
+    def percentile(self, pct: float) -> float:
+        """Latencia (ms) por debajo de la cual está el pct% de las muestras."""
+
+        if not self.count:
+            return 0.0
+        target = max(1, int(min(pct, 100.0) / 100 * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._highest_at(index), self._max_us) / 1000
+        return self._max_us / 1000
+
+    @property
+    def mean(self) -> float:
+        return self._total_us / self.count / 1000 if self.count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        if not self.count:
+            return 0.0
+        mean = self._total_us / self.count
+        return math.sqrt(max(0.0, self._total_sq_us / self.count - mean * mean)) / 1000
+
+    @property
+    def min(self) -> float:
+        return (self._min_us or 0) / 1000
+
+    @property
+    def max(self) -> float:
+        return self._max_us / 1000
+
+    def merge(self, other: "LatencyHistogram"):
+        """Suma los conteos de otro histograma con la misma configuración."""
+
+        if (other.lowest_us, other.highest_us, other.significant_figures) != \
+                (self.lowest_us, self.highest_us, self.significant_figures):
+            raise ValueError("Histogramas con distinta configuración")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.saturated += other.saturated
+        self._total_us += other._total_us
+        self._total_sq_us += other._total_sq_us
+        if other._min_us is not None:
+            self._min_us = other._min_us if self._min_us is None else min(self._min_us, other._min_us)
+        self._max_us = max(self._max_us, other._max_us)
+        return self
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.mean,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "p999_ms": self.percentile(99.9),
+            "max_ms": self.max,
+        }
+
+    # ========================================================================
+    # EXPORTACIÓN
+    # ========================================================================
+
+    def to_dict(self) -> dict:
+        """Configuración y conteos dispersos {índice: conteo}, serializable a JSON."""
+
+        return {
+            "lowest_us": self.lowest_us,
+            "highest_us": self.highest_us,
+            "significant_figures": self.significant_figures,
+            "count": self.count,
+            "saturated": self.saturated,
+            "total_us": self._total_us,
+            "total_sq_us": self._total_sq_us,
+            "min_us": self._min_us,
+            "max_us": self._max_us,
+            "counts": {str(i): c for i, c in enumerate(self.counts) if c},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls(data["lowest_us"], data["highest_us"], data["significant_figures"])
+        for index, count in data["counts"].items():
+            histogram.counts[int(index)] = count
+        histogram.count = data["count"]
+        histogram.saturated = data.get("saturated", 0)
+        histogram._total_us = data["total_us"]
+        histogram._total_sq_us = data["total_sq_us"]
+        histogram._min_us = data["min_us"]
+        histogram._max_us = data["max_us"]
+        return histogram
+
+    def percentile_distribution(self, ticks: int = TICKS_PER_HALF_DISTANCE) -> str:
+        """Distribución de percentiles en formato .hgrm de HdrHistogram (ms)."""
+
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        if self.count:
+            # Mismo recorrido que el PercentileIterator de HdrHistogram
+            cumulative = []
+            seen = 0
+            for index, count in enumerate(self.counts):
+                if count:
+                    seen += count
+                    cumulative.append((index, seen))
+
+            pct = 0.0
+            position = 0
+            while True:
+                target = max(1, int(pct / 100 * self.count + 0.5))
+                while cumulative[position][1] < target:
+                    position += 1
+                index, seen = cumulative[position]
+                value = min(self._highest_at(index), self._max_us) / 1000
+                if seen >= self.count:
+                    lines.append(f"{value:12.3f} {1.0:14.12f} {seen:10d}")
+                    break
+                lines.append(f"{value:12.3f} {pct / 100:14.12f} {seen:10d} {1 / (1 - pct / 100):14.2f}")
+                half_distance = 2 ** (int(math.log2(100 / (100 - pct))) + 1)
+                pct += 100 / (half_distance * ticks)
+
+        lines.append(f"#[Mean    = {self.mean:12.3f}, StdDeviation   = {self.stddev:12.3f}]")
+        lines.append(f"#[Max     = {self.max:12.3f}, Total count    = {self.count:12d}]")
+        lines.append(f"#[Buckets = {self.bucket_count:12d}, SubBuckets     = {self._sub_bucket_count:12d}]")
+        return "\n".join(lines) + "\n"
@@ -5,36 +5,14 @@ Buscar todos los tags, especialmente en carpeta Model
 import asyncio
 from asyncua import Client
 
+from address_space_crawler import AddressSpaceCrawler
+
 SERVER_URL = "opc.tcp://192.168.101.100:55533"
 
-async def browse_all(node, path="", results=None, level=0, max_level=10):
-    if results is None:
-        results = []
-    if level > max_level:
-        return results
-    
-    try:
-        children = await node.get_children()
-        for child in children:
-            try:
-                name = await child.read_browse_name()
-                node_id = child.nodeid
-                current_path = f"{path}/{name.Name}" if path else name.Name
-                
-                # Guardar info del nodo
-                results.append({
-                    'path': current_path,
-                    'name': name.Name,
-                    'nodeid': str(node_id)
-                })
-                
-                await browse_all(child, current_path, results, level + 1, max_level)
-            except:
-                pass
-    except:
-        pass
-    
-    return results
+async def browse_all(client, start, path="", max_level=10):
+    """Recorre el árbol en anchura con AddressSpaceCrawler (tabla de nodos)."""
+    crawler = AddressSpaceCrawler(client, max_depth=max_level + 1)
+    return await crawler.crawl(start, path)
 
 async def main():
     print(f"Explorando: {SERVER_URL}")
@@ -48,8 +26,7 @@ async def main():
         print("✓ Conectado\n")
         
         # Explorar desde CPS001
-        cps_node = client.get_node("ns=9;s=CPS001")
-        all_nodes = await browse_all(cps_node, "CPS001", max_level=12)
+        all_nodes = await browse_all(client, "ns=9;s=CPS001", "CPS001", max_level=12)
         
         # Buscar nodos que contengan "Model" o "EgCom"
         print("=" * 80)
@@ -0,0 +1,332 @@
+"""
+================================================================================
+    RESOLUCIÓN DE NODEIDS POR NAMESPACE URI
+
+    Los índices de namespace (ns=2 simulador, ns=6 Rockwell, ns=9 Optix,
+    ns=4 Omron) dependen del orden de la tabla NamespaceArray del servidor y
+    cambian cuando Optix recarga namespaces. Los tags se declaran con el URI,
+    que es estable:
+
+        "nsu=urn:RockwellAutomation:5069-L310ER%2FA;s=Program:EdgeGateway.EdCommIn.Heartbeat"
+        BrowsePath("GlobalVars", "EgComIn_Heartbeat", namespace=OPTIX_URI)
+
+    - NamespaceArray se lee una vez por sesión (mismo Read que el límite
+      MaxNodesPerTranslateBrowsePathsToNodeIds)
+    - "nsu=" se traduce localmente a "ns=<índice actual>"
+    - Los BrowsePath pendientes se resuelven con UNA petición
+      TranslateBrowsePathsToNodeIds (dividida sólo si el servidor lo exige)
+    - Memo por endpoint en cache/nodeid_cache.json, guardado en forma "nsu="
+    - Si NamespaceArray cambia (al conectar o vía watch()) el memo se descarta
+      y se avisa a los callbacks de on_change() para que re-resuelvan
+
+    Uso:
+        resolver = NodeIdResolver(client)
+        node_ids = await resolver.resolve({"Heartbeat": "nsu=urn:...;s=EgComIn_Heartbeat"})
+        client.get_node(node_ids["Heartbeat"])
+================================================================================
+"""
+
+import json
+import logging
+import os
+import re
+
+from asyncua import ua
+
+from batch_io import FALLBACK_MAX_NODES, OPERATION_LIMITS, chunks, read_raw, to_nodeid
+from tag_subscription import PUBLISHING_INTERVAL_MS
+
+logger = logging.getLogger("NodeIdResolver")
+
+NODEID_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 "cache", "nodeid_cache.json")
+
+NAMESPACE_ARRAY = ua.NodeId(ua.ObjectIds.Server_NamespaceArray)
+
+_EXPANDED = re.compile(r"^nsu=(.+?);([isgb]=.*)$", re.DOTALL)
+
+
+def split_nodeid(nodeid: str) -> tuple:
+    """ "ns=9;s=CPS001.Tag" -> (9, "s=CPS001.Tag");  "i=85" -> (0, "i=85")."""
+
+    if nodeid.startswith("ns="):
+        ns, identifier = nodeid.split(";", 1)
+        return int(ns[3:]), identifier
+    return 0, nodeid
+
+
+def expanded_nodeid(namespace_uri: str, identifier: str) -> str:
+    """ ("urn:X", "s=Tag") -> "nsu=urn:X;s=Tag" """
+
+    return f"nsu={namespace_uri};{identifier}"
+
+
+class BrowsePath:
+    """
+    Ruta de BrowseNames desde un nodo inicial (Objects por defecto).
+
+    Cada elemento es "Nombre" (usa namespace) o (uri, "Nombre").
+    """
+
+    def __init__(self, *names, namespace: str = None, start=ua.ObjectIds.ObjectsFolder):
+        self.start = ua.NodeId(start) if isinstance(start, int) else to_nodeid(start)
+        self.elements = [
+            name if isinstance(name, tuple) else (namespace, name) for name in names
+        ]
+        if any(uri is None for uri, _ in self.elements):
+            raise ValueError("BrowsePath necesita el namespace URI de cada elemento")
+
+    @property
+    def key(self) -> str:
+        return self.start.to_string() + "/" + "/".join(f"{uri}|{name}" for uri, name in self.elements)
+
+    def __repr__(self):
+        return "BrowsePath(" + "/".join(name for _, name in self.elements) + ")"
+
+
+class NodeIdResolver:
+    """Traduce NodeIds estables (URI) a NodeIds de la sesión actual."""
+
+    def __init__(self, client, endpoint: str = None, cache_path: str = NODEID_CACHE_PATH):
+        self.client = client
+        self.endpoint = endpoint or client.server_url.geturl()
+        self.cache_path = cache_path
+
+        self.namespaces = None
+        self.max_nodes_per_translate = None
+        self._memo = {}            # BrowsePath.key -> "nsu=...;..."
+        self._subscription = None
+        self._listeners = []       # [callback(namespaces)] al cambiar NamespaceArray
+
+        # Estadísticas: peticiones de red y aciertos de memo
+        self.stats = {"namespace_reads": 0, "translate": 0, "memo_hits": 0}
+
+    # ------------------------------------------------------------------------
+    # TABLA DE NAMESPACES
+    # ------------------------------------------------------------------------
+
+    async def load(self) -> list:
+        """
+        Lee NamespaceArray (y el límite de Translate) en una petición Read.
+        Descarta el memo si la tabla difiere de la guardada para el endpoint.
+        """
+
+        limit_id = ua.NodeId(OPERATION_LIMITS["MaxNodesPerTranslateBrowsePathsToNodeIds"])
+        results = await read_raw(self.client, [NAMESPACE_ARRAY, limit_id],
+                                 timestamps=ua.TimestampsToReturn.Neither)
+        self.stats["namespace_reads"] += 1
+
+        namespaces = list(results[0].Value.Value)
+        limit = results[1].Value.Value if results[1].StatusCode.is_good() and results[1].Value else 0
+        self.max_nodes_per_translate = int(limit or FALLBACK_MAX_NODES)
+
+        stored = self._load_cache()
+        if stored.get("namespaces") == namespaces:
+            self._memo = stored.get("nodes", {})
+        else:
+            if stored:
+                logger.info(f"NamespaceArray de {self.endpoint} cambió: memo descartado")
+            self._memo = {}
+        self.namespaces = namespaces
+        return namespaces
+
+    def index(self, namespace_uri: str) -> int:
+        """Índice actual del URI (KeyError si el servidor no lo publica)."""
+
+        try:
+            return self.namespaces.index(namespace_uri)
+        except ValueError:
+            raise KeyError(f"Namespace no publicado por {self.endpoint}: {namespace_uri}") from None
+
+    def uri(self, index: int) -> str:
+        return self.namespaces[index]
+
+    def node_id(self, spec) -> str:
+        """
+        NodeId como string con el índice de esta sesión. Acepta "nsu=...",
+        "ns=..." / "i=..." (sin cambios) o ua.NodeId. No usa la red.
+        """
+
+        if isinstance(spec, ua.NodeId):
+            return spec.to_string()
+        match = _EXPANDED.match(spec)
+        if match is None:
+            return spec
+        namespace_uri, identifier = match.groups()
+        ns = self.index(namespace_uri)
+        return f"ns={ns};{identifier}" if ns else identifier
+
+    def expanded(self, node_id) -> str:
+        """Forma estable "nsu=URI;..." de un NodeId de esta sesión."""
+
+        ns, identifier = split_nodeid(to_nodeid(node_id).to_string())
+        return expanded_nodeid(self.namespaces[ns], identifier)
+
+    def invalidate(self):
+        """Descarta el memo y la tabla (el próximo resolve() vuelve a leerla)."""
+
+        self._memo = {}
+        self.namespaces = None
+
+    # ------------------------------------------------------------------------
+    # RESOLUCIÓN
+    # ------------------------------------------------------------------------
+
+    async def resolve(self, specs) -> dict:
+        """
+        Resuelve {nombre: spec} (o una lista de specs, usadas como nombre).
+
+        Retorna {nombre: "ns=N;..."}; None si el BrowsePath no existe o el
+        namespace no está publicado.
+        """
+
+        if not isinstance(specs, dict):
+            specs = {spec: spec for spec in specs}
+        if self.namespaces is None:
+            await self.load()
+
+        resolved = {}
+        pending = []
+        for name, spec in specs.items():
+            try:
+                if isinstance(spec, BrowsePath):
+                    cached = self._memo.get(spec.key)
+                    if cached is None:
+                        pending.append((name, spec))
+                        continue
+                    self.stats["memo_hits"] += 1
+                    spec = cached
+                resolved[name] = self.node_id(spec)
+            except KeyError as e:
+                logger.warning(f"{name}: {e}")
+                resolved[name] = None
+
+        if pending:
+            await self._translate(pending, resolved)
+            self._save_cache()
+        return resolved
+
+    async def _translate(self, pending: list, resolved: dict):
+        """TranslateBrowsePathsToNodeIds para todos los BrowsePath pendientes."""
+
+        for batch in chunks(pending, self.max_nodes_per_translate):
+            browse_paths = []
+            for name, spec in batch:
+                try:
+                    browse_paths.append(self._browse_path(spec))
+                except KeyError as e:
+                    logger.warning(f"{name}: {e}")
+                    browse_paths.append(None)
+
+            requests = [bp for bp in browse_paths if bp is not None]
+            self.stats["translate"] += 1
+            results = iter(await self.client.uaclient.translate_browsepaths_to_nodeids(requests))
+
+            for (name, spec), browse_path in zip(batch, browse_paths):
+                if browse_path is None:
+                    resolved[name] = None
+                    continue
+                result = next(results)
+                if not result.StatusCode.is_good() or not result.Targets:
+                    logger.warning(f"{name}: {spec} no existe ({result.StatusCode.name})")
+                    resolved[name] = None
+                    continue
+                target = result.Targets[0].TargetId
+                node_id = ua.NodeId(target.Identifier, target.NamespaceIndex, target.NodeIdType)
+                self._memo[spec.key] = self.expanded(node_id)
+                resolved[name] = self.node_id(self._memo[spec.key])
+
+    def _browse_path(self, spec: BrowsePath) -> ua.BrowsePath:
+        browse_path = ua.BrowsePath()
+        browse_path.StartingNode = spec.start
+        for namespace_uri, name in spec.elements:
+            element = ua.RelativePathElement()
+            element.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+            element.IncludeSubtypes = True
+            element.IsInverse = False
+            element.TargetName = ua.QualifiedName(name, self.index(namespace_uri))
+            browse_path.RelativePath.Elements.append(element)
+        return browse_path
+
+    async def probe(self, node_ids: list) -> list:
+        """
+        Comprueba en una petición Read (atributo NodeClass) qué NodeIds existen.
+        Retorna un StatusCode por NodeId; reemplaza las lecturas de prueba una a una.
+        """
+
+        results = []
+        for batch in chunks(list(node_ids), FALLBACK_MAX_NODES):
+            data_values = await read_raw(self.client, batch, ua.AttributeIds.NodeClass,
+                                         timestamps=ua.TimestampsToReturn.Neither)
+            results.extend(dv.StatusCode for dv in data_values)
+        return results
+
+    # ------------------------------------------------------------------------
+    # INVALIDACIÓN EN VIVO
+    # ------------------------------------------------------------------------
+
+    def on_change(self, callback):
+        """Registra callback(namespaces) para cuando watch() ve cambiar NamespaceArray."""
+
+        self._listeners.append(callback)
+
+    async def watch(self) -> bool:
+        """
+        Suscripción a NamespaceArray en la sesión de self.client: si cambia,
+        se descarta el memo y se llama a los callbacks de on_change(). Tras
+        una reconexión se vuelve a llamar con el Client nuevo.
+        """
+
+        # La suscripción de una sesión anterior murió con ella
+        self._subscription = None
+        try:
+            self._subscription = await self.client.create_subscription(PUBLISHING_INTERVAL_MS, self)
+            await self._subscription.subscribe_data_change(self.client.get_node(NAMESPACE_ARRAY))
+            return True
+        except Exception as e:
+            logger.warning(f"No se pudo vigilar NamespaceArray: {e}")
+            return False
+
+    async def stop_watching(self):
+        subscription, self._subscription = self._subscription, None
+        if subscription is not None:
+            try:
+                await subscription.delete()
+            except Exception as e:
+                logger.warning(f"Error eliminando la suscripción a NamespaceArray: {e}")
+
+    def datachange_notification(self, node, val, data):
+        namespaces = list(val)
+        if self.namespaces is not None and namespaces != self.namespaces:
+            logger.warning(f"NamespaceArray de {self.endpoint} cambió: NodeIds invalidados")
+            self.invalidate()
+            for callback in self._listeners:
+                callback(namespaces)
+
+    def status_change_notification(self, status):
+        logger.warning(f"Suscripción NamespaceArray: {status}")
+
+    # ------------------------------------------------------------------------
+    # PERSISTENCIA
+    # ------------------------------------------------------------------------
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f).get(self.endpoint, {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data[self.endpoint] = {"namespaces": self.namespaces, "nodes": self._memo}
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, self.cache_path)
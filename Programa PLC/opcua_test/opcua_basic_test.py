@@ -26,6 +26,12 @@ except ImportError:
     print("O para la versión asyncio: pip install asyncua")
     print("=" * 60)
 
+# Caché de atributos (usa los tipos de asyncua); sin ella, lectura nodo a nodo
+try:
+    from attribute_cache import AttributeCache
+except ImportError:
+    AttributeCache = None
+
 # ============================================================================
 # CONFIGURACIÓN - MODIFICAR SEGÚN TU ENTORNO
 # ============================================================================
@@ -229,15 +235,34 @@ def test_read_variables(client):
     
     results = []
     
+    # Tipos desde cache/attribute_cache.json y valores en un solo Read
+    cache = None
+    if AttributeCache is not None:
+        try:
+            cache = AttributeCache(client, OPC_SERVER_URL)
+            node_ids = [tag['node_id'] for tag in TEST_TAGS]
+            attributes = cache.fill_sync(node_ids)
+            data_values = dict(zip(node_ids, cache.read_values_sync(node_ids)))
+        except Exception as e:
+            print(f"⚠️  Caché de atributos no disponible ({e}), lectura nodo a nodo")
+            cache = None
+    
     for tag in TEST_TAGS:
         print(f"\n--- {tag['name']} ---")
         print(f"NodeId: {tag['node_id']}")
         print(f"Tipo esperado: {tag['expected_type']}")
         
         try:
-            node = client.get_node(tag['node_id'])
-            value = node.get_value()
-            data_type = node.get_data_type_as_variant_type()
+            if cache is not None:
+                dv = data_values[tag['node_id']]
+                if not dv.StatusCode.is_good():
+                    raise ua.UaStatusCodeError(dv.StatusCode.value)
+                value = dv.Value.Value
+                data_type = attributes[tag['node_id']]["VariantType"]
+            else:
+                node = client.get_node(tag['node_id'])
+                value = node.get_value()
+                data_type = node.get_data_type_as_variant_type()
             
             print(f"✓ LECTURA EXITOSA")
             print(f"  Valor: {value}")
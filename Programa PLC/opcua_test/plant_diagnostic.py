@@ -0,0 +1,408 @@
+"""
+================================================================================
+    DIAGNÓSTICO DE PLANTA - TODOS LOS ENDPOINTS EN PARALELO
+
+    Reemplaza correr a mano, uno tras otro, full_diagnostic.py,
+    explore_old_plc.py, scan_namespaces.py y verify_config.py: toma un
+    inventario de endpoints y corre contra todos a la vez las mismas
+    pruebas, cada endpoint con su propio timeout:
+
+    - connect:    sesión OPC UA (TCP + Hello + CreateSession/Activate)
+    - server:     BuildInfo (fabricante, producto, versión) y
+                  ServerStatus.State en un Read
+    - namespaces: NamespaceArray y los URIs que el endpoint debe publicar
+    - read:       tags declarados por URI ("nsu=..."), valor y tipo
+                  (attribute_cache.py) con un Read de atributos y otro de
+                  valores
+    - write:      AccessLevel (CurrentWrite) de los tags de escritura; con
+                  --write se escribe de vuelta el valor actual
+
+    Un endpoint que no responde se corta a los --timeout segundos y queda
+    en el reporte con la prueba en curso; el resto no lo espera. El
+    resultado es un único JSON (cache/plant_diagnostic.json por defecto).
+
+    Ejecutar con: python plant_diagnostic.py [--inventory inventario.json]
+                  [--only rockwell,omron] [--timeout S] [--write]
+                  [--output reporte.json | -]
+================================================================================
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+from asyncua import Client, ua
+
+from attribute_cache import AttributeCache
+from batch_io import read_raw
+from nodeid_resolver import NodeIdResolver
+
+logging.getLogger("asyncua").setLevel(logging.CRITICAL)
+logger = logging.getLogger("PlantDiagnostic")
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+ROCKWELL_URI = "urn:RockwellAutomation:5069-L310ER%2FA"
+OMRON_URI = "urn:OMRON:NxOpcUaServer:FactoryAutomation"
+
+# Un dict por endpoint; --inventory carga la misma estructura desde JSON
+INVENTORY = [
+    {
+        "name": "rockwell",
+        "description": "PLC Rockwell 5069-L310ER/A (CPS_001)",
+        "url": "opc.tcp://192.168.101.96:4840",
+        "namespaces": [ROCKWELL_URI],
+        "read": {
+            "YEAR": f"nsu={ROCKWELL_URI};s=YEAR",
+            "Heartbeat": f"nsu={ROCKWELL_URI};s=Program:EdgeGateway.EdCommIn.Heartbeat",
+            "UUID_pull": f"nsu={ROCKWELL_URI};s=Program:EdgeGateway.EdCommIn.UUID_pull",
+        },
+        "write": {
+            "BarcodeReq": f"nsu={ROCKWELL_URI};s=Program:EdgeGateway.EgComOut.BarcodeReq",
+        },
+    },
+    {
+        "name": "optix_edge",
+        "description": "Optix Edge (tags del Rockwell)",
+        "url": "opc.tcp://192.168.101.100:59100",
+        "namespaces": [ROCKWELL_URI],
+        "read": {
+            "Heartbeat": f"nsu={ROCKWELL_URI};s=Program:EdgeGateway.EdCommIn.Heartbeat",
+            "RecordNotFound": f"nsu={ROCKWELL_URI};s=Program:EdgeGateway.EdCommIn.RecordNotFound",
+        },
+    },
+    {
+        "name": "omron",
+        "description": "PLC Omron viejo / NxOpcUaServer (:55533)",
+        "url": "opc.tcp://192.168.101.100:55533",
+        "namespaces": [OMRON_URI],
+        "read": {
+            "DBoard_PLC_Heartbeat": f"nsu={OMRON_URI};s=DBoard_PLC_Heartbeat",
+            "EgComIn_Heartbeat": f"nsu={OMRON_URI};s=EgComIn_Heartbeat",
+            "EgComIn_RecordNotFound": f"nsu={OMRON_URI};s=EgComIn_RecordNotFound",
+        },
+    },
+    {
+        "name": "vmek",
+        "description": "Contador VMEK",
+        "url": "opc.tcp://192.168.101.105:55532",
+    },
+]
+
+ENDPOINT_TIMEOUT_S = 15.0       # Todo el diagnóstico de un endpoint
+REQUEST_TIMEOUT_S = 4.0         # Cada petición OPC UA
+# Varios clientes en el mismo loop: el watchdog de 1 s por defecto sobra
+WATCHDOG_INTERVAL_S = 10.0
+REPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "cache", "plant_diagnostic.json")
+
+PROBES = ("connect", "server", "namespaces", "read", "write")
+OK, WARNING, FAIL, SKIPPED = "ok", "warning", "fail", "skipped"
+SEVERITY = {SKIPPED: 0, OK: 0, WARNING: 1, FAIL: 2}
+
+SERVER_INFO = {
+    "manufacturer": ua.ObjectIds.Server_ServerStatus_BuildInfo_ManufacturerName,
+    "product": ua.ObjectIds.Server_ServerStatus_BuildInfo_ProductName,
+    "version": ua.ObjectIds.Server_ServerStatus_BuildInfo_SoftwareVersion,
+    "build": ua.ObjectIds.Server_ServerStatus_BuildInfo_BuildNumber,
+    "state": ua.ObjectIds.Server_ServerStatus_State,
+}
+
+VALUE_MAX_CHARS = 200
+
+
+def jsonable(value):
+    """Valor OPC UA en forma JSON (estructuras y tipos raros como texto)."""
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [jsonable(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    text = str(value)
+    return text if len(text) <= VALUE_MAX_CHARS else text[:VALUE_MAX_CHARS] + "..."
+
+
+def load_inventory(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        inventory = json.load(f)
+    for endpoint in inventory:
+        if "name" not in endpoint or "url" not in endpoint:
+            raise ValueError(f"Endpoint sin name/url en {path}: {endpoint}")
+    return inventory
+
+
+class PlantDiagnostic:
+    """Pruebas connect/server/namespaces/read/write contra varios endpoints a la vez."""
+
+    def __init__(self, inventory=INVENTORY, endpoint_timeout=ENDPOINT_TIMEOUT_S,
+                 request_timeout=REQUEST_TIMEOUT_S, write=False):
+        self.inventory = inventory
+        self.endpoint_timeout = endpoint_timeout
+        self.request_timeout = request_timeout
+        self.write = write
+
+    async def run(self) -> dict:
+        """Diagnostica todos los endpoints en paralelo; retorna el reporte."""
+
+        started = datetime.now()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.diagnose(endpoint) for endpoint in self.inventory))
+
+        summary = dict.fromkeys((OK, WARNING, FAIL), 0)
+        for result in results:
+            summary[result["status"]] += 1
+        return {
+            "generated_at": started.isoformat(timespec="seconds"),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "write_probes": self.write,
+            "summary": summary,
+            "endpoints": results,
+        }
+
+    async def diagnose(self, endpoint: dict) -> dict:
+        """Todas las pruebas de un endpoint, cortadas a endpoint_timeout."""
+
+        timeout = endpoint.get("timeout", self.endpoint_timeout)
+        result = {
+            "name": endpoint["name"],
+            "url": endpoint["url"],
+            "description": endpoint.get("description", ""),
+            "status": None,
+            "duration_ms": None,
+            "probes": {},
+        }
+        client = Client(endpoint["url"], timeout=self.request_timeout,
+                        watchdog_intervall=WATCHDOG_INTERVAL_S)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._probes(client, endpoint, result), timeout)
+        except asyncio.TimeoutError:
+            running = next((name for name in PROBES if name not in result["probes"]), None)
+            if running is not None:
+                result["probes"][running] = {"status": FAIL, "error": f"timeout del endpoint ({timeout:g} s)"}
+        finally:
+            result["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            for name in PROBES:
+                result["probes"].setdefault(name, {"status": SKIPPED})
+            await self._disconnect(client, result)
+
+        result["status"] = max((probe["status"] for probe in result["probes"].values()),
+                               key=SEVERITY.get)
+        if result["status"] == SKIPPED:
+            result["status"] = OK
+        return result
+
+    async def _probes(self, client, endpoint, result):
+        if not await self._run(result, "connect", self._connect(client)):
+            return
+
+        await self._run(result, "server", self._server(client))
+        resolver = NodeIdResolver(client, endpoint["url"])
+        await self._run(result, "namespaces", self._namespaces(resolver, endpoint))
+
+        tags = {**endpoint.get("read", {}), **endpoint.get("write", {})}
+        if not tags:
+            return
+        cache = AttributeCache(client, endpoint["url"])
+        values = {}
+        await self._run(result, "read", self._read(client, resolver, cache, tags, values))
+        if endpoint.get("write"):
+            await self._run(result, "write", self._write(client, cache, endpoint["write"], values))
+
+    async def _run(self, result, name, probe) -> bool:
+        """Corre una prueba y guarda su detalle; False si falló."""
+
+        start = time.perf_counter()
+        try:
+            detail = await probe
+        except (asyncio.TimeoutError, TimeoutError):
+            detail = {"status": FAIL, "error": f"sin respuesta en {self.request_timeout:g} s"}
+        except Exception as e:
+            detail = {"status": FAIL, "error": f"{type(e).__name__}: {e}"}
+        detail.setdefault("status", OK)
+        detail["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        result["probes"][name] = detail
+        return detail["status"] != FAIL
+
+    async def _disconnect(self, client, result):
+        if result["probes"]["connect"]["status"] != OK:
+            client.disconnect_socket()
+            return
+        try:
+            await asyncio.wait_for(client.disconnect(), self.request_timeout)
+        except Exception:
+            client.disconnect_socket()
+
+    # ========================================================================
+    # PRUEBAS
+    # ========================================================================
+
+    async def _connect(self, client) -> dict:
+        await client.connect()
+        return {}
+
+    async def _server(self, client) -> dict:
+        data_values = await read_raw(client, [ua.NodeId(object_id) for object_id in SERVER_INFO.values()],
+                                     timestamps=ua.TimestampsToReturn.Neither)
+        detail = {}
+        for name, dv in zip(SERVER_INFO, data_values):
+            detail[name] = jsonable(dv.Value.Value) if dv.StatusCode.is_good() and dv.Value else None
+        if detail["state"] is not None:
+            detail["state"] = ua.ServerState(detail["state"]).name
+        if detail["state"] != "Running":
+            detail["status"] = WARNING
+        return detail
+
+    async def _namespaces(self, resolver, endpoint) -> dict:
+        namespaces = await resolver.load()
+        expected = {uri: (namespaces.index(uri) if uri in namespaces else None)
+                    for uri in endpoint.get("namespaces", [])}
+        detail = {"namespaces": namespaces, "expected": expected}
+        missing = [uri for uri, index in expected.items() if index is None]
+        if missing:
+            detail["status"] = FAIL
+            detail["error"] = f"no publica {', '.join(missing)}"
+        return detail
+
+    async def _read(self, client, resolver, cache, tags, values) -> dict:
+        node_ids = await resolver.resolve(tags)
+        found = [node_id for node_id in node_ids.values() if node_id]
+        attributes = await cache.fill(found)
+        data_values = dict(zip(found, await cache.read_values(found)))
+
+        detail = {"status": OK, "tags": {}}
+        for name, node_id in node_ids.items():
+            entry = {"node_id": node_id}
+            if node_id is None or attributes.get(node_id) is None:
+                entry["status"] = "BadNodeIdUnknown"
+            else:
+                dv = data_values[node_id]
+                entry["status"] = dv.StatusCode.name
+                variant_type = attributes[node_id]["VariantType"]
+                entry["type"] = variant_type.name if variant_type else None
+                if dv.StatusCode.is_good():
+                    value = dv.Value.Value if dv.Value else None
+                    values[name] = (node_id, value, variant_type)
+                    entry["value"] = jsonable(value)
+            if entry["status"] != "Good":
+                detail["status"] = FAIL
+            detail["tags"][name] = entry
+        return detail
+
+    async def _write(self, client, cache, tags, values) -> dict:
+        """
+        Sin --write sólo se mira AccessLevel; con --write se escribe el valor
+        recién leído (el PLC no ve un cambio).
+        """
+
+        detail = {"status": OK, "mode": "write-back" if self.write else "access-level", "tags": {}}
+        params = ua.WriteParameters()
+        pending = []
+        for name in tags:
+            if name not in values:
+                detail["tags"][name] = {"status": "sin lectura"}
+                detail["status"] = FAIL
+                continue
+            node_id, value, variant_type = values[name]
+            access = cache.get(node_id)["AccessLevel"] or 0
+            writable = bool(access & ua.AccessLevel.CurrentWrite.mask)
+            detail["tags"][name] = {"node_id": node_id, "writable": writable}
+            if not writable:
+                detail["tags"][name]["status"] = "BadNotWritable"
+                detail["status"] = FAIL
+            elif self.write:
+                wv = ua.WriteValue()
+                wv.NodeId = ua.NodeId.from_string(node_id)
+                wv.AttributeId = ua.AttributeIds.Value
+                wv.Value = ua.DataValue(ua.Variant(value, variant_type))
+                params.NodesToWrite.append(wv)
+                pending.append(name)
+
+        if pending:
+            for name, status in zip(pending, await client.uaclient.write(params)):
+                detail["tags"][name]["status"] = status.name
+                if not status.is_good():
+                    detail["status"] = FAIL
+        return detail
+
+
+# ============================================================================
+# REPORTE
+# ============================================================================
+
+STATUS_ICONS = {OK: "✅", WARNING: "⚠️ ", FAIL: "❌", SKIPPED: "·"}
+
+
+def print_report(report: dict):
+    print("-" * 70)
+    for result in report["endpoints"]:
+        print(f"  {STATUS_ICONS[result['status']]} {result['name']:<12} {result['url']:<34} "
+              f"{result['duration_ms']:8.0f} ms")
+        probes = "  ".join(f"{name} {STATUS_ICONS[probe['status']]}" for name, probe in result["probes"].items())
+        print(f"       {probes}")
+        for name, probe in result["probes"].items():
+            if probe.get("error"):
+                print(f"       {name}: {probe['error']}")
+            for tag, entry in probe.get("tags", {}).items():
+                if entry.get("status") not in ("Good", None):
+                    print(f"       {name}: {tag} -> {entry['status']}")
+    print("-" * 70)
+    summary = report["summary"]
+    print(f"  {len(report['endpoints'])} endpoints en {report['duration_ms'] / 1000:.1f} s: "
+          f"{summary[OK]} ok, {summary[WARNING]} con avisos, {summary[FAIL]} con fallas")
+
+
+def write_report(report: dict, path: str):
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if path == "-":
+        print(text)
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    print(f"  📄 Reporte: {path}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Diagnóstico OPC UA de todos los endpoints de la planta")
+    parser.add_argument("--inventory", help="JSON con la lista de endpoints (por defecto INVENTORY)")
+    parser.add_argument("--only", help="Nombres de endpoints separados por coma")
+    parser.add_argument("--timeout", type=float, default=ENDPOINT_TIMEOUT_S, help="s por endpoint")
+    parser.add_argument("--request-timeout", type=float, default=REQUEST_TIMEOUT_S, help="s por petición")
+    parser.add_argument("--write", action="store_true", help="Escribir de vuelta el valor de los tags de escritura")
+    parser.add_argument("--output", default=REPORT_PATH, help="Archivo del reporte JSON ('-' = stdout)")
+    args = parser.parse_args()
+
+    inventory = load_inventory(args.inventory) if args.inventory else INVENTORY
+    if args.only:
+        names = set(args.only.split(","))
+        inventory = [endpoint for endpoint in inventory if endpoint["name"] in names]
+
+    # Con --output - el JSON va a stdout y el resumen a stderr
+    with contextlib.redirect_stdout(sys.stderr if args.output == "-" else sys.stdout):
+        print("=" * 70)
+        print("🏭 DIAGNÓSTICO DE PLANTA OPC UA")
+        print(f"   {len(inventory)} endpoints en paralelo, timeout {args.timeout:g} s por endpoint")
+        print("=" * 70)
+
+        diagnostic = PlantDiagnostic(inventory, args.timeout, args.request_timeout, args.write)
+        report = await diagnostic.run()
+        print_report(report)
+    write_report(report, args.output)
+    return 0 if report["summary"][FAIL] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,497 @@
+"""
+================================================================================
+    ALMACÉN DE REGISTROS DE MATERIAL (backend del Edge Gateway)
+
+    Lo que el gateway consulta y escribe en cada handshake:
+
+    - lookup(barcode): registro de material (campos de MaterialRecord) para
+      BarcodeReq; lanza RecordNotFound si no existe -> EgComIn_RecordNotFound
+    - save(station, records): registros de MaterialRecord_push para
+      WriteToDb; la confirmación se escribe al PLC cuando save() retorna
+    - save_batch([(clave, estación, registros)]): varios WriteToDb en una
+      sola transacción (write_pipeline.py); una clave ya guardada no se
+      vuelve a escribir (pulso repetido)
+
+    Interfaz asíncrona para que cualquier backend (SQL, HTTP, ...) se pueda
+    enchufar en edge_gateway_daemon.py sin bloquear las demás estaciones.
+
+    Backends:
+    - MemoryRecordStore: dict en memoria (simulador y pruebas)
+    - SQLiteRecordStore: cache/records.db en modo WAL con fsync en cada
+      commit, índice único sobre BARCD y sentencias fijas (sqlite3 las
+      compila una vez y las reutiliza); las consultas corren en un hilo
+      propio para no frenar el event loop
+    - CachedRecordStore: caché LRU con TTL delante de cualquier backend,
+      con caché negativa de RecordNotFound (relecturas de etiquetas malas)
+
+    generate_records() crea registros sintéticos (millones) para pruebas.
+
+    Uso:
+        store = CachedRecordStore(SQLiteRecordStore())
+        record = await store.lookup("BC0000000001")
+        await store.save("CPS_001", [record])
+
+    Ejecutar con: python record_store.py --generate 1000000 [--db RUTA]
+                  python record_store.py --lookup BC0000000001
+================================================================================
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("RecordStore")
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+RECORD_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "cache", "records.db")
+
+# Campos de MaterialRecord_pull (Syn_FileReadIn_Struct del L5K) + UUID
+RECORD_FIELDS = (
+    "ABARN", "BARCD", "MATID", "GENCD", "ABBRC", "HGHNM", "ADMNC", "REMRK",
+    "CGENES", "MINRNG", "MINROW", "CRPNM", "SDTRT", "COATI", "TRLID", "BGPCD",
+    "EXTNO", "LINCD", "YEAR", "SEACD", "REG", "RSRGT", "SPLOC", "CNT", "GMO",
+    "GGORG", "MVRMK", "SHPHD", "HRVDT", "BGPNM", "LOSCT", "PMATID",
+    "ContainerUUID",
+)
+
+CACHE_MAX_ENTRIES = 10000
+CACHE_TTL_S = 300.0          # Registros encontrados
+NEGATIVE_TTL_S = 5.0         # RecordNotFound: corto, por si el registro se carga
+
+INSERT_BATCH = 50000
+
+
+class RecordNotFound(KeyError):
+    """No hay registro para el código de barras."""
+
+
+class RecordStore:
+    """Interfaz de los almacenes de registros."""
+
+    async def lookup(self, barcode: str) -> dict:
+        """Registro del código de barras; RecordNotFound si no existe."""
+        raise NotImplementedError
+
+    async def save(self, station: str, records: list) -> int:
+        """Guarda los registros de una estación; retorna cuántos guardó."""
+        raise NotImplementedError
+
+    async def save_batch(self, entries: list) -> list:
+        """
+        Guarda [(clave, estación, registros)]; retorna las filas escritas por
+        entrada (0 si la clave ya estaba guardada). Por defecto llama a save()
+        por entrada, sin deduplicar.
+        """
+        return [await self.save(station, records) for _, station, records in entries]
+
+    async def close(self):
+        pass
+
+
+class MemoryRecordStore(RecordStore):
+    """
+    Registros en un dict (simulador y pruebas).
+
+    latency_ms emula el tiempo de ida y vuelta a una base de datos real.
+    """
+
+    def __init__(self, records: dict = None, latency_ms: float = 0.0):
+        self.records = dict(records or {})
+        self.latency_ms = latency_ms
+
+        # Registros recibidos por WriteToDb: [(estación, registro)]
+        self.saved = []
+        self.keys = set()
+
+    async def lookup(self, barcode: str) -> dict:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        try:
+            return self.records[barcode]
+        except KeyError:
+            raise RecordNotFound(barcode) from None
+
+    async def save(self, station: str, records: list) -> int:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        self.saved.extend((station, record) for record in records)
+        return len(records)
+
+    async def save_batch(self, entries: list) -> list:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        written = []
+        for key, station, records in entries:
+            if key is not None and key in self.keys:
+                written.append(0)
+                continue
+            if key is not None:
+                self.keys.add(key)
+            self.saved.extend((station, record) for record in records)
+            written.append(len(records))
+        return written
+
+
+# ============================================================================
+# SQLITE
+# ============================================================================
+
+_COLUMNS = ", ".join(RECORD_FIELDS)
+
+SQL_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS material_records ({", ".join(f"{name} TEXT NOT NULL DEFAULT ''" for name in RECORD_FIELDS)});
+CREATE TABLE IF NOT EXISTS saved_records (
+    id INTEGER PRIMARY KEY,
+    station TEXT NOT NULL,
+    BARCD TEXT NOT NULL,
+    record TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    request_key TEXT
+);
+CREATE TABLE IF NOT EXISTS write_requests (
+    request_key TEXT PRIMARY KEY,
+    station TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    saved_at REAL NOT NULL
+);
+"""
+SQL_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_material_records_barcd ON material_records (BARCD)"
+SQL_LOOKUP = f"SELECT {_COLUMNS} FROM material_records WHERE BARCD = ?"
+SQL_LOOKUP_SCAN = f"SELECT {_COLUMNS} FROM material_records NOT INDEXED WHERE BARCD = ?"
+SQL_INSERT = f"INSERT OR REPLACE INTO material_records ({_COLUMNS}) VALUES ({', '.join('?' * len(RECORD_FIELDS))})"
+SQL_SAVE = "INSERT INTO saved_records (station, BARCD, record, saved_at, request_key) VALUES (?, ?, ?, ?, ?)"
+SQL_REQUEST = "INSERT OR IGNORE INTO write_requests (request_key, station, rows, saved_at) VALUES (?, ?, ?, ?)"
+SQL_SAVED_COLUMNS = "PRAGMA table_info(saved_records)"
+SQL_COUNT = "SELECT COUNT(*) FROM material_records"
+
+
+class SQLiteRecordStore(RecordStore):
+    """
+    Registros en SQLite.
+
+    Una conexión en un hilo dedicado: las consultas no bloquean el event
+    loop y la conexión nunca se comparte entre hilos. WAL permite leer
+    mientras otro proceso escribe; synchronous=FULL hace fsync del WAL en
+    cada commit, así que lo que save() / save_batch() retornan sobrevive
+    a un corte de energía. Por eso conviene agrupar los WriteToDb en una
+    transacción (write_pipeline.py) en lugar de un commit por pulso.
+
+    use_index=False consulta con NOT INDEXED (recorrido completo), sólo
+    para comparar en benchmarks.
+    """
+
+    def __init__(self, path: str = RECORD_DB_PATH, use_index: bool = True):
+        self.path = path
+        self.use_index = use_index
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._connection = None
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, cached_statements=64)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=FULL")
+            connection.execute("PRAGMA cache_size=-65536")     # 64 MB de páginas
+            connection.execute("PRAGMA mmap_size=268435456")
+            connection.executescript(SQL_SCHEMA)
+            # Bases creadas antes de las claves de idempotencia
+            if "request_key" not in [row[1] for row in connection.execute(SQL_SAVED_COLUMNS)]:
+                connection.execute("ALTER TABLE saved_records ADD COLUMN request_key TEXT")
+            connection.execute(SQL_INDEX)
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    # ------------------------------------------------------------------------
+    # Operaciones en el hilo de SQLite
+    # ------------------------------------------------------------------------
+
+    def _lookup(self, barcode: str):
+        return self._connect().execute(SQL_LOOKUP if self.use_index else SQL_LOOKUP_SCAN, (barcode,)).fetchone()
+
+    def _save_batch(self, entries: list) -> list:
+        connection = self._connect()
+        now = time.time()
+        written = []
+        with connection:
+            for key, station, records in entries:
+                if key is not None and connection.execute(SQL_REQUEST, (key, station, len(records), now)).rowcount == 0:
+                    written.append(0)
+                    continue
+                connection.executemany(SQL_SAVE, [
+                    (station, str(record.get("BARCD", "")), json.dumps(record, default=str), now, key)
+                    for record in records
+                ])
+                written.append(len(records))
+        return written
+
+    def _insert(self, rows) -> int:
+        """
+        Carga masiva en transacciones de INSERT_BATCH filas. El índice único
+        sobre BARCD queda puesto durante la carga: es el destino del
+        conflicto de INSERT OR REPLACE, así que volver a cargar los mismos
+        códigos reemplaza las filas en lugar de duplicarlas.
+        """
+
+        connection = self._connect()
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH:
+                with connection:
+                    connection.executemany(SQL_INSERT, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            with connection:
+                connection.executemany(SQL_INSERT, batch)
+            count += len(batch)
+        return count
+
+    def _count(self) -> int:
+        return self._connect().execute(SQL_COUNT).fetchone()[0]
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    # ------------------------------------------------------------------------
+    # Interfaz asíncrona
+    # ------------------------------------------------------------------------
+
+    async def lookup(self, barcode: str) -> dict:
+        row = await self._run(self._lookup, barcode)
+        if row is None:
+            raise RecordNotFound(barcode)
+        return dict(zip(RECORD_FIELDS, row))
+
+    async def save(self, station: str, records: list) -> int:
+        return (await self.save_batch([(None, station, records)]))[0]
+
+    async def save_batch(self, entries: list) -> list:
+        return await self._run(self._save_batch, [(key, station, list(records)) for key, station, records in entries])
+
+    async def insert(self, rows) -> int:
+        """Inserta/reemplaza filas (tuplas en el orden de RECORD_FIELDS)."""
+        return await self._run(self._insert, rows)
+
+    async def count(self) -> int:
+        return await self._run(self._count)
+
+    async def close(self):
+        if self._executor is None:
+            return
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+
+# ============================================================================
+# CACHÉ LRU / TTL
+# ============================================================================
+
+_NOT_FOUND = object()
+
+
+class CachedRecordStore(RecordStore):
+    """
+    Caché de lectura delante de otro RecordStore.
+
+    - LRU de hasta max_entries códigos; cada entrada vence a los ttl segundos
+    - RecordNotFound también se cachea (negative_ttl, más corto)
+    - Consultas simultáneas del mismo código esperan una sola consulta
+      al backend
+    - save() / save_batch() invalidan los códigos guardados
+
+    Los dicts retornados son compartidos: no modificarlos.
+    """
+
+    def __init__(self, store: RecordStore, max_entries: int = CACHE_MAX_ENTRIES,
+                 ttl: float = CACHE_TTL_S, negative_ttl: float = NEGATIVE_TTL_S):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._entries = OrderedDict()     # barcode -> (vence, registro o _NOT_FOUND)
+        self._inflight = {}               # barcode -> Future de la consulta en curso
+
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0}
+
+    async def lookup(self, barcode: str) -> dict:
+        entry = self._entries.get(barcode)
+        if entry is not None:
+            expires, value = entry
+            if expires > time.monotonic():
+                self._entries.move_to_end(barcode)
+                if value is _NOT_FOUND:
+                    self.stats["negative_hits"] += 1
+                    raise RecordNotFound(barcode)
+                self.stats["hits"] += 1
+                return value
+            del self._entries[barcode]
+
+        inflight = self._inflight.get(barcode)
+        if inflight is not None:
+            value = await asyncio.shield(inflight)
+        else:
+            self.stats["misses"] += 1
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[barcode] = future
+            try:
+                try:
+                    value = await self.store.lookup(barcode)
+                    ttl = self.ttl
+                except RecordNotFound:
+                    value, ttl = _NOT_FOUND, self.negative_ttl
+                self._put(barcode, value, ttl)
+                future.set_result(value)
+            except BaseException as e:
+                future.set_exception(e)
+                # Nadie más espera: evitar "exception was never retrieved"
+                future.exception()
+                raise
+            finally:
+                del self._inflight[barcode]
+
+        if value is _NOT_FOUND:
+            raise RecordNotFound(barcode)
+        return value
+
+    def _put(self, barcode: str, value, ttl: float):
+        if ttl <= 0:
+            return
+        self._entries[barcode] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(barcode)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, barcode: str = None):
+        """Olvida un código (o toda la caché)."""
+        if barcode is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(barcode, None)
+
+    async def save(self, station: str, records: list) -> int:
+        count = await self.store.save(station, records)
+        for record in records:
+            self.invalidate(record.get("BARCD"))
+        return count
+
+    async def save_batch(self, entries: list) -> list:
+        written = await self.store.save_batch(entries)
+        for _, _, records in entries:
+            for record in records:
+                self.invalidate(record.get("BARCD"))
+        return written
+
+    async def close(self):
+        await self.store.close()
+
+
+# ============================================================================
+# DATOS SINTÉTICOS
+# ============================================================================
+
+def barcode_for(number: int) -> str:
+    """Código de barras del registro sintético número `number`."""
+    return f"BC{number:010d}"
+
+
+def generate_records(count: int, start: int = 0, seed: int = 1):
+    """
+    Genera `count` filas (tuplas en el orden de RECORD_FIELDS) con códigos
+    barcode_for(start) ... barcode_for(start + count - 1). Determinista.
+    """
+
+    rng = random.Random(seed)
+    crops = ("CORN", "SOY", "WHEAT", "SORGHUM", "COTTON", "CANOLA")
+    seasons = ("S1", "S2", "W1")
+    regions = ("NA", "LATAM", "EMEA", "APAC")
+    treatments = ("NONE", "FUNG", "INSECT", "FUNG+INSECT")
+
+    for number in range(start, start + count):
+        crop = crops[number % len(crops)]
+        material = f"MAT{rng.randrange(10**7):07d}"
+        yield (
+            f"A{number:09d}",                               # ABARN
+            barcode_for(number),                            # BARCD
+            material,                                       # MATID
+            f"G{rng.randrange(10**5):05d}",                 # GENCD
+            crop[:3],                                       # ABBRC
+            f"H{rng.randrange(1000):03d}",                  # HGHNM
+            f"ADM{rng.randrange(100):02d}",                 # ADMNC
+            "",                                             # REMRK
+            f"CG{rng.randrange(100):02d}",                  # CGENES
+            str(rng.randrange(1, 40)),                      # MINRNG
+            str(rng.randrange(1, 60)),                      # MINROW
+            crop,                                           # CRPNM
+            treatments[rng.randrange(len(treatments))],     # SDTRT
+            "Y" if rng.random() < 0.5 else "N",             # COATI
+            f"T{rng.randrange(10**6):06d}",                 # TRLID
+            f"BG{rng.randrange(1000):03d}",                 # BGPCD
+            str(rng.randrange(10)),                         # EXTNO
+            f"L{rng.randrange(10**4):04d}",                 # LINCD
+            str(2018 + number % 8),                         # YEAR
+            seasons[number % len(seasons)],                 # SEACD
+            regions[rng.randrange(len(regions))],           # REG
+            f"R{rng.randrange(100):02d}",                   # RSRGT
+            f"LOC{rng.randrange(500):03d}",                 # SPLOC
+            str(rng.randrange(1, 5000)),                    # CNT
+            "Y" if rng.random() < 0.3 else "N",             # GMO
+            f"ORG{rng.randrange(50):02d}",                  # GGORG
+            "",                                             # MVRMK
+            f"SH{rng.randrange(100):02d}",                  # SHPHD
+            f"{2018 + number % 8}-{1 + number % 12:02d}-{1 + number % 28:02d}",  # HRVDT
+            f"BGP{rng.randrange(1000):03d}",                # BGPNM
+            f"LS{rng.randrange(10**4):04d}",                # LOSCT
+            material,                                       # PMATID
+            str(uuid.UUID(int=rng.getrandbits(128), version=4)),  # ContainerUUID
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Almacén de registros de material (SQLite)")
+    parser.add_argument("--db", default=RECORD_DB_PATH)
+    parser.add_argument("--generate", type=int, metavar="N", help="Carga N registros sintéticos")
+    parser.add_argument("--lookup", metavar="BARCODE")
+    args = parser.parse_args()
+
+    store = SQLiteRecordStore(args.db)
+    try:
+        if args.generate:
+            start = time.perf_counter()
+            count = await store.insert(generate_records(args.generate))
+            print(f"✅ {count:,} registros en {time.perf_counter() - start:.1f} s -> {args.db}")
+        if args.lookup:
+            try:
+                print(json.dumps(await store.lookup(args.lookup), indent=2))
+            except RecordNotFound:
+                print(f"❌ {args.lookup}: RecordNotFound")
+        print(f"📦 Registros: {await store.count():,}")
+    finally:
+        await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
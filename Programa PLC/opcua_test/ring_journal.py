@@ -0,0 +1,484 @@
+"""
+================================================================================
+    JOURNAL EN ANILLO (mmap) PARA STORE-AND-FORWARD DEL GATEWAY
+
+    Cuando la base de datos o el enlace con Optix se caen, lo que el gateway
+    debía escribir (registros de MaterialRecord_push, eventos) se guarda en
+    un archivo de tamaño fijo mapeado en memoria y se reenvía en orden al
+    volver el destino.
+
+    - RingJournal: archivo de capacity bytes (64 MB por defecto, pensado
+      para el disco y la RAM de la Jetson: el mmap usa page cache, no heap).
+      Registros [magic | largo | seq | crc32 | datos] alineados a 8 bytes;
+      dos copias del encabezado (head / tail / seq) con CRC, alternadas, para
+      que un encabezado a medio escribir no invalide el journal. Al abrir se
+      recorren los registros posteriores al último encabezado guardado y se
+      descarta el primero incompleto o con CRC inválido (escritura cortada).
+    - StoreAndForward: submit(entrada) la entrega al destino si está
+      disponible y no hay nada pendiente; si no, la agrega al journal y
+      espera el fsync (agrupado: un msync por ventana de sync_interval_ms).
+      Una tarea drena el journal en orden a rate_per_s entradas/s como
+      máximo y reintenta con espera si el destino vuelve a fallar.
+
+    La entrega es "al menos una vez": tras una caída pueden repetirse
+    entradas ya entregadas cuyo ack no llegó al encabezado; el destino
+    las descarta por su clave de idempotencia (write_pipeline.py).
+
+    Uso:
+        journal = RingJournal("cache/journal.bin")
+        forwarder = StoreAndForward(journal, sink, rate_per_s=200)
+        forwarder.start()
+        await forwarder.submit({"station": "CPS_001", "records": [...]})
+
+    Ejecutar con: python ring_journal.py [--path RUTA]   (estado del journal)
+================================================================================
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+
+logger = logging.getLogger("RingJournal")
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "cache", "journal.bin")
+JOURNAL_CAPACITY = 64 * 1024 * 1024
+
+SYNC_INTERVAL_MS = 20.0      # Ventana de agrupación de fsync
+DRAIN_RATE_PER_S = 200.0     # Entradas reenviadas por segundo (máximo)
+DRAIN_BATCH = 50             # Entradas por llamada al destino
+RETRY_INTERVAL_S = 2.0       # Espera tras un fallo del destino
+
+# ============================================================================
+# FORMATO
+# ============================================================================
+
+_MAGIC = b"RJNL"
+_VERSION = 1
+_HEADER_SLOT = 512                       # Dos copias: offset 0 y 512
+_DATA_START = 4096
+
+# magic, versión, capacidad, generación, head, tail, head_seq, tail_seq, crc
+_HEADER = struct.Struct("<4sIQQQQQQI")
+_RECORD = struct.Struct("<IIQI")         # magic, largo, seq, crc32
+_RECORD_MAGIC = 0x52454331               # "REC1"
+_WRAP_MAGIC = 0x57524150                 # "WRAP": seguir desde _DATA_START
+_ALIGN = 8
+
+
+class JournalFull(Exception):
+    """No hay espacio en el journal para la entrada."""
+
+
+def _aligned(size: int) -> int:
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class RingJournal:
+    """
+    Journal de registros binarios en un archivo mmap de tamaño fijo.
+
+    append() escribe en el mapa (sin sync); flush() hace msync y guarda el
+    encabezado: recién entonces lo agregado es durable. peek() / ack()
+    leen y liberan desde el registro más antiguo.
+
+    overwrite=True descarta los registros más antiguos cuando no hay
+    espacio (cuenta en .dropped); por defecto append() lanza JournalFull.
+    """
+
+    def __init__(self, path: str = JOURNAL_PATH, capacity: int = JOURNAL_CAPACITY,
+                 overwrite: bool = False):
+        self.path = path
+        self.overwrite = overwrite
+
+        # Posiciones: head = registro más antiguo, tail = próxima escritura
+        self.head = self.tail = _DATA_START
+        self.head_seq = self.tail_seq = 0
+        self.generation = 0
+        self._saved_head = self.head       # head del último encabezado escrito
+
+        self.dropped = 0
+        self.recovered = 0         # Registros recuperados tras el último encabezado
+        self.discarded_tail = False
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        exists = os.path.exists(path) and os.path.getsize(path) >= _DATA_START
+        self._file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            capacity = os.path.getsize(path)
+        else:
+            self._file.truncate(capacity)
+        self.capacity = capacity // _ALIGN * _ALIGN
+        self._map = mmap.mmap(self._file.fileno(), self.capacity)
+
+        if exists and self._load_header():
+            self._recover()
+        else:
+            self._write_header()
+            self.flush()
+
+    # ------------------------------------------------------------------------
+    # Encabezado
+    # ------------------------------------------------------------------------
+
+    def _load_header(self) -> bool:
+        best = None
+        for slot in (0, _HEADER_SLOT):
+            raw = self._map[slot:slot + _HEADER.size]
+            fields = _HEADER.unpack(raw)
+            if fields[0] != _MAGIC or fields[1] != _VERSION:
+                continue
+            if zlib.crc32(raw[:-4]) != fields[-1]:
+                continue
+            if best is None or fields[3] > best[3]:
+                best = fields
+        if best is None:
+            logger.warning(f"Encabezado inválido en {self.path}: journal reiniciado")
+            return False
+        _, _, _, self.generation, self.head, self.tail, self.head_seq, self.tail_seq, _ = best
+        self._saved_head = self.head
+        return True
+
+    def _write_header(self):
+        self.generation += 1
+        raw = _HEADER.pack(_MAGIC, _VERSION, self.capacity, self.generation,
+                           self.head, self.tail, self.head_seq, self.tail_seq, 0)[:-4]
+        raw += struct.pack("<I", zlib.crc32(raw))
+        slot = _HEADER_SLOT * (self.generation % 2)
+        self._map[slot:slot + len(raw)] = raw
+        self._saved_head = self.head
+
+    def _recover(self):
+        """Avanza tail sobre los registros válidos escritos tras el encabezado."""
+
+        while True:
+            position, header = self._read_at(self.tail)
+            if header is None:
+                break
+            magic, length, seq, crc = header
+            if magic != _RECORD_MAGIC or seq != self.tail_seq or length > self.capacity:
+                if magic == _RECORD_MAGIC and seq >= self.tail_seq:
+                    self.discarded_tail = True
+                break
+            start = position + _RECORD.size
+            if start + length > self.capacity or zlib.crc32(self._map[start:start + length]) != crc:
+                self.discarded_tail = True
+                # Borrar el encabezado cortado para no volver a encontrarlo
+                _RECORD.pack_into(self._map, position, 0, 0, 0, 0)
+                break
+            self.tail = position + _aligned(_RECORD.size + length)
+            self.tail_seq += 1
+            self.recovered += 1
+        if len(self):
+            position, header = self._read_at(self.head)
+            if header is None or header[0] != _RECORD_MAGIC or header[2] != self.head_seq:
+                logger.warning(f"Registro más antiguo inválido en {self.path}: "
+                               f"{len(self)} entradas pendientes descartadas")
+                self.head, self.head_seq = self.tail, self.tail_seq
+                self.discarded_tail = True
+        if self.recovered or self.discarded_tail:
+            logger.info(f"Journal recuperado: {self.recovered} registros tras el último encabezado"
+                        + (", registro incompleto descartado" if self.discarded_tail else ""))
+            self.flush()
+
+    # ------------------------------------------------------------------------
+    # Registros
+    # ------------------------------------------------------------------------
+
+    def _read_at(self, position: int):
+        """(posición real, encabezado) saltando marcas de vuelta."""
+
+        for _ in range(2):
+            if self.capacity - position < _RECORD.size:
+                position = _DATA_START
+                continue
+            header = _RECORD.unpack_from(self._map, position)
+            if header[0] == _WRAP_MAGIC:
+                position = _DATA_START
+                continue
+            return position, header
+        return position, None
+
+    def __len__(self) -> int:
+        return self.tail_seq - self.head_seq
+
+    @property
+    def used_bytes(self) -> int:
+        if not len(self):
+            return 0
+        used = (self.tail - self.head) % (self.capacity - _DATA_START)
+        return used or self.capacity - _DATA_START
+
+    def _free_for(self, size: int):
+        """Posición donde cabe un registro de size bytes, o None."""
+
+        if not len(self):
+            # Vacío: se puede volver al principio
+            if self.capacity - self.tail >= size:
+                return self.tail
+            return _DATA_START if self.capacity - _DATA_START >= size else None
+        if self.tail >= self.head:
+            if self.capacity - self.tail >= size:
+                return self.tail
+            # Dar la vuelta; no alcanzar head (tail == head significa vacío)
+            if self.head - _DATA_START > size:
+                return _DATA_START
+            return None
+        if self.head - self.tail > size:
+            return self.tail
+        return None
+
+    def append(self, payload: bytes) -> int:
+        """Agrega un registro (no durable hasta flush()); retorna su seq."""
+
+        size = _aligned(_RECORD.size + len(payload))
+        if size > self.capacity - _DATA_START:
+            raise JournalFull(f"Registro de {len(payload)} bytes mayor que el journal")
+
+        position = self._free_for(size)
+        while position is None:
+            if not self.overwrite or not len(self):
+                raise JournalFull(f"Journal lleno ({len(self)} registros, {self.used_bytes} bytes)")
+            self._advance_head()
+            self.dropped += 1
+            position = self._free_for(size)
+
+        # Espacio liberado por ack() o descartado desde el último encabezado:
+        # el encabezado se actualiza antes de sobrescribirlo, para que una
+        # caída no deje head apuntando a datos nuevos
+        if self.head != self._saved_head:
+            self._write_header()
+        if position != self.tail and self.capacity - self.tail >= _RECORD.size:
+            _RECORD.pack_into(self._map, self.tail, _WRAP_MAGIC, 0, 0, 0)
+        if not len(self):
+            self.head = position
+
+        # Datos primero, encabezado del registro al final: un proceso
+        # terminado a mitad de escritura deja un encabezado viejo (seq menor)
+        # o inválido, y la recuperación se detiene ahí
+        start = position + _RECORD.size
+        self._map[start:start + len(payload)] = payload
+        _RECORD.pack_into(self._map, position, _RECORD_MAGIC, len(payload), self.tail_seq, zlib.crc32(payload))
+
+        seq = self.tail_seq
+        self.tail = position + size
+        self.tail_seq += 1
+        return seq
+
+    def _advance_head(self):
+        position, header = self._read_at(self.head)
+        length = header[1]
+        self.head = position + _aligned(_RECORD.size + length)
+        self.head_seq += 1
+        if not len(self):
+            self.head = self.tail
+
+    def peek(self, count: int = 1) -> list:
+        """Hasta count registros [(seq, datos)] desde el más antiguo."""
+
+        result = []
+        position, seq = self.head, self.head_seq
+        while len(result) < count and seq < self.tail_seq:
+            position, header = self._read_at(position)
+            _, length, record_seq, _ = header
+            start = position + _RECORD.size
+            result.append((record_seq, bytes(self._map[start:start + length])))
+            position = position + _aligned(_RECORD.size + length)
+            seq += 1
+        return result
+
+    def ack(self, seq: int):
+        """Libera los registros hasta seq inclusive (durable en el próximo flush)."""
+
+        while self.head_seq <= seq and len(self):
+            self._advance_head()
+
+    def flush(self):
+        """msync de los datos y luego del encabezado: todo lo agregado queda durable."""
+
+        self._map.flush()
+        self._write_header()
+        self._map.flush(0, mmap.PAGESIZE)
+
+    def close(self):
+        if self._map is not None:
+            self.flush()
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def stats(self) -> dict:
+        return {
+            "records": len(self),
+            "used_bytes": self.used_bytes,
+            "capacity": self.capacity,
+            "head_seq": self.head_seq,
+            "tail_seq": self.tail_seq,
+            "dropped": self.dropped,
+        }
+
+
+# ============================================================================
+# STORE-AND-FORWARD
+# ============================================================================
+
+class StoreAndForward:
+    """
+    Entrega entradas (dicts JSON) a un destino asíncrono sink(entradas),
+    guardándolas en un RingJournal mientras el destino falla.
+
+    sink recibe una lista de entradas en orden y lanza una excepción si no
+    pudo entregarlas; se reintenta el lote completo.
+    """
+
+    def __init__(self, journal: RingJournal, sink, rate_per_s: float = DRAIN_RATE_PER_S,
+                 batch: int = DRAIN_BATCH, sync_interval_ms: float = SYNC_INTERVAL_MS,
+                 retry_interval: float = RETRY_INTERVAL_S):
+        self.journal = journal
+        self.sink = sink
+        self.rate_per_s = rate_per_s
+        self.batch = batch
+        self.sync_interval_ms = sync_interval_ms
+        self.retry_interval = retry_interval
+
+        self.online = True
+        self._sync_waiters = []
+        self._sync_task = None
+        self._drain_task = None
+        self._pending = asyncio.Event()
+
+        self.delivered = 0
+        self.journaled = 0
+        self.drained = 0
+        self.failures = 0
+        self.syncs = 0
+
+    def start(self):
+        if len(self.journal):
+            self.online = False
+            self._pending.set()
+        self._drain_task = asyncio.create_task(self._drain())
+
+    async def stop(self):
+        for task in (self._drain_task, self._sync_task):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(t for t in (self._drain_task, self._sync_task) if t), return_exceptions=True)
+        self._drain_task = self._sync_task = None
+        self.journal.flush()
+
+    async def submit(self, entry: dict) -> bool:
+        """
+        Entrega o guarda la entrada. True si la entregó al destino, False
+        si quedó en el journal (durable al retornar).
+        """
+
+        if self.online and not len(self.journal):
+            try:
+                await self.sink([entry])
+                self.delivered += 1
+                return True
+            except Exception as e:
+                self.failures += 1
+                self.online = False
+                logger.warning(f"Destino no disponible, guardando en journal: {e}")
+
+        self.journal.append(json.dumps(entry, default=str).encode("utf-8"))
+        self.journaled += 1
+        self._pending.set()
+        await self._sync()
+        return False
+
+    async def _sync(self):
+        """Espera el próximo msync agrupado."""
+
+        future = asyncio.get_running_loop().create_future()
+        self._sync_waiters.append(future)
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._sync_later())
+        await future
+
+    async def _sync_later(self):
+        await asyncio.sleep(self.sync_interval_ms / 1000)
+        waiters, self._sync_waiters = self._sync_waiters, []
+        try:
+            self.journal.flush()
+            self.syncs += 1
+        except Exception as e:
+            for future in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+    async def _drain(self):
+        """Reenvía el journal en orden, a rate_per_s como máximo."""
+
+        while True:
+            await self._pending.wait()
+            entries = self.journal.peek(self.batch)
+            if not entries:
+                self._pending.clear()
+                self.online = True
+                continue
+            try:
+                start = time.monotonic()
+                await self.sink([json.loads(payload) for _, payload in entries])
+            except Exception as e:
+                self.failures += 1
+                self.online = False
+                logger.warning(f"Reenvío fallido ({len(self.journal)} pendientes): {e}")
+                await asyncio.sleep(self.retry_interval)
+                continue
+            self.journal.ack(entries[-1][0])
+            self.journal.flush()
+            self.drained += len(entries)
+            if self.rate_per_s:
+                await asyncio.sleep(max(0.0, len(entries) / self.rate_per_s - (time.monotonic() - start)))
+
+    def stats(self) -> dict:
+        return {
+            "online": self.online,
+            "delivered": self.delivered,
+            "journaled": self.journaled,
+            "drained": self.drained,
+            "failures": self.failures,
+            "syncs": self.syncs,
+            **self.journal.stats(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estado del journal de store-and-forward")
+    parser.add_argument("--path", default=JOURNAL_PATH)
+    parser.add_argument("--show", type=int, default=5, help="Entradas pendientes a mostrar")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"❌ No existe {args.path}")
+        return
+    journal = RingJournal(args.path)
+    try:
+        stats = journal.stats()
+        print(f"📦 {args.path}: {stats['records']} entradas pendientes, "
+              f"{stats['used_bytes']:,} / {stats['capacity']:,} bytes, seq {stats['head_seq']}..{stats['tail_seq']}")
+        for seq, payload in journal.peek(args.show):
+            print(f"   [{seq}] {payload[:100].decode('utf-8', 'replace')}")
+    finally:
+        journal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,37 +5,19 @@ Explorar TODO el servidor buscando EgComIn_Heartbeat en cualquier ubicación
 import asyncio
 from asyncua import Client
 
-SERVER_URL = "opc.tcp://192.168.101.100:55533"
+from address_space_crawler import AddressSpaceCrawler
 
-found_nodes = []
+SERVER_URL = "opc.tcp://192.168.101.100:55533"
 
-async def browse_everything(node, path="", level=0, max_level=15):
-    if level > max_level:
-        return
+async def browse_everything(client, start, path="", max_level=15):
+    """Recorre todo el árbol y retorna los nodos EgCom / Heartbeat / EdgeGateway."""
+    crawler = AddressSpaceCrawler(client, max_depth=max_level + 1)
+    table = await crawler.crawl(start, path)
     
-    try:
-        children = await node.get_children()
-        for child in children:
-            try:
-                name = await child.read_browse_name()
-                node_id = child.nodeid
-                current_path = f"{path}/{name.Name}" if path else name.Name
-                
-                # Buscar cualquier cosa con EgCom o Heartbeat
-                name_lower = name.Name.lower()
-                if 'egcom' in name_lower or 'heartbeat' in name_lower or 'edgegateway' in name_lower:
-                    found_nodes.append({
-                        'path': current_path,
-                        'name': name.Name,
-                        'nodeid': str(node_id),
-                        'ns': node_id.NamespaceIndex
-                    })
-                
-                await browse_everything(child, current_path, level + 1, max_level)
-            except:
-                pass
-    except:
-        pass
+    return [
+        row for row in table
+        if any(text in row['name'].lower() for text in ('egcom', 'heartbeat', 'edgegateway'))
+    ]
 
 async def main():
     print(f"Explorando TODO: {SERVER_URL}")
@@ -50,7 +32,7 @@ async def main():
         
         # Explorar desde Root
         root = client.get_root_node()
-        await browse_everything(root, "", 0, 15)
+        found_nodes = await browse_everything(client, root, "", 15)
         
         print(f"Encontrados {len(found_nodes)} nodos relevantes:\n")
         print("-" * 80)
@@ -0,0 +1,335 @@
+"""
+================================================================================
+    SESIÓN OPC UA RESILIENTE - KEEPALIVE, RECONEXIÓN Y TRANSFERENCIA
+
+    Mantiene una sesión con el equipo y la recupera sola tras una caída de
+    red, sin volver a hacer nada que ya se sabe:
+
+    - Keepalive: Read de ServerStatus.State cada KEEPALIVE_INTERVAL_S con un
+      timeout corto (detecta también enlaces mudos, sin RST)
+    - Sin red: se sondea el puerto TCP cada REACHABILITY_POLL_S, y en cuanto
+      responde se abre la sesión. Los intentos de sesión fallidos con el
+      equipo alcanzable (p. ej. sin sesiones libres) esperan con backoff
+      exponencial y jitter
+    - Al reconectar: TransferSubscriptions (SendInitialValues) de las
+      suscripciones de la sesión vieja a la nueva y Republish de los
+      mensajes que quedaron sin confirmar. Si el equipo ya no tiene la
+      sesión vieja (pasó SESSION_TIMEOUT_MS) o no soporta la transferencia,
+      cada suscripción se recrea desde sus NodeIds guardados con un único
+      CreateMonitoredItems: nunca se vuelve a browsear ni a resolver
+      NodeIds, y los tipos se cargan una sola vez (on_connect)
+    - Métricas de cada caída: detección, sesión restaurada y primer dato
+
+    TransferSubscriptions y Republish usan internals de asyncua (registro
+    del callback de publish en la sesión nueva); si la versión instalada no
+    los tiene, las suscripciones se recrean.
+
+    Uso:
+        manager = SessionManager("opc.tcp://192.168.101.100:59100")
+        manager.on_connect(cargar_tipos)        # async (client, reconnected)
+        await manager.start()
+        sub = await manager.subscribe({"Heartbeat": "ns=2;s=EgComIn_Heartbeat"})
+        ...
+        await manager.stop()
+================================================================================
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from asyncua import Client, ua
+
+from tag_subscription import TagSubscription
+
+logger = logging.getLogger("SessionManager")
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+KEEPALIVE_INTERVAL_S = 0.5
+KEEPALIVE_TIMEOUT_S = 1.0
+REACHABILITY_POLL_S = 0.05      # Sondeo TCP mientras no hay red
+REACHABILITY_TIMEOUT_S = 0.5
+REQUEST_TIMEOUT_S = 2.0
+BACKOFF_INITIAL_S = 0.5         # Intentos de sesión fallidos con red
+BACKOFF_MAX_S = 30.0
+BACKOFF_JITTER = 0.2
+SESSION_TIMEOUT_MS = 60000      # Lo que el equipo guarda la sesión vieja (y sus suscripciones)
+# El keepalive propio detecta la caída; el watchdog de asyncua queda de respaldo
+WATCHDOG_INTERVAL_S = 10.0
+
+
+class SessionManager:
+    """Sesión OPC UA que se reconecta sola y conserva sus suscripciones."""
+
+    def __init__(self, url, keepalive_interval=KEEPALIVE_INTERVAL_S,
+                 keepalive_timeout=KEEPALIVE_TIMEOUT_S, backoff_max=BACKOFF_MAX_S,
+                 session_timeout_ms=SESSION_TIMEOUT_MS, transfer=True):
+        self.url = url
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 4840
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_timeout = keepalive_timeout
+        self.backoff_max = backoff_max
+        self.session_timeout_ms = session_timeout_ms
+        self.transfer = transfer
+
+        self.client = None
+        self.subscriptions = []     # TagSubscription restauradas en cada reconexión
+        self.stats = Counter()
+        self.outages = []           # Una entrada por caída (tiempos en time.monotonic())
+
+        self._hooks = []            # [async callback(client, reconnected)]
+        self._connected = None
+        self._outage = None
+        self._task = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected is not None and self._connected.is_set()
+
+    def on_connect(self, callback):
+        """Registra async callback(client, reconnected) tras abrir cada sesión."""
+        self._hooks.append(callback)
+
+    async def start(self):
+        """Abre la primera sesión (reintentando) y arranca el keepalive."""
+
+        self._connected = asyncio.Event()
+        self.client = await self._establish(reconnected=False)
+        self._connected.set()
+        self._task = asyncio.create_task(self._supervise())
+        logger.info(f"Conectado a {self.url}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.client is not None:
+            if self.connected:
+                for subscription in self.subscriptions:
+                    await subscription.stop()
+            try:
+                await self.client.disconnect()
+            except Exception as e:
+                logger.debug(f"Error cerrando la sesión: {e!r}")
+            self.client = None
+        if self._connected is not None:
+            self._connected.clear()
+
+    async def wait_connected(self, timeout=None):
+        await asyncio.wait_for(self._connected.wait(), timeout)
+        return self.client
+
+    async def subscribe(self, tags: dict, **kwargs) -> TagSubscription:
+        """TagSubscription sobre {nombre: node_id} que sobrevive a las reconexiones."""
+
+        await self.wait_connected()
+        subscription = TagSubscription(self.client, **kwargs)
+        subscription.on_data(self._on_data)
+        await subscription.start(tags)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    # ========================================================================
+    # KEEPALIVE Y RECONEXIÓN
+    # ========================================================================
+
+    async def _supervise(self):
+        state = ua.NodeId(ua.ObjectIds.Server_ServerStatus_State)
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await asyncio.wait_for(self.client.get_node(state).read_value(), self.keepalive_timeout)
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Sesión perdida: {e!r}")
+
+            self._connected.clear()
+            self._outage = {"detected_at": time.monotonic()}
+            self.outages.append(self._outage)
+            await self._release(self.client)
+            self.client = await self._establish(reconnected=True)
+            self._connected.set()
+            self.stats["reconnects"] += 1
+            outage = self._outage
+            logger.info(f"Reconectado tras {outage['restored_at'] - outage['detected_at']:.2f} s "
+                        f"({outage['mode']}, {outage['attempts']} intento/s)")
+
+    async def _establish(self, reconnected):
+        """Abre una sesión y restaura las suscripciones; reintenta hasta lograrlo."""
+
+        delay = BACKOFF_INITIAL_S
+        attempts = 0
+        while True:
+            await self._wait_reachable()
+            attempts += 1
+            client = Client(self.url, timeout=REQUEST_TIMEOUT_S, watchdog_intervall=WATCHDOG_INTERVAL_S)
+            client.session_timeout = self.session_timeout_ms
+            try:
+                await asyncio.wait_for(client.connect(), REQUEST_TIMEOUT_S * 2)
+                for hook in self._hooks:
+                    await hook(client, reconnected)
+                mode = await self._restore(client)
+            except asyncio.CancelledError:
+                client.disconnect_socket()
+                raise
+            except Exception as e:
+                self.stats["failed_attempts"] += 1
+                await self._release(client)
+                wait = delay * random.uniform(1 - BACKOFF_JITTER, 1 + BACKOFF_JITTER)
+                logger.warning(f"Intento de sesión fallido ({e!r}); reintento en {wait:.1f} s")
+                await asyncio.sleep(wait)
+                delay = min(delay * 2, self.backoff_max)
+                continue
+
+            if self._outage is not None:
+                self._outage.update(restored_at=time.monotonic(), mode=mode, attempts=attempts)
+            return client
+
+    async def _wait_reachable(self):
+        """Sondea el puerto TCP: sin red no se gastan intentos de sesión ni backoff."""
+
+        while True:
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), REACHABILITY_TIMEOUT_S)
+            except (OSError, asyncio.TimeoutError):
+                await asyncio.sleep(REACHABILITY_POLL_S)
+                continue
+            writer.close()
+            return
+
+    async def _release(self, client):
+        """
+        Suelta el Client sin CloseSession: la sesión (y sus suscripciones)
+        queda viva en el equipo para poder transferirla.
+        """
+
+        callbacks = client.uaclient._subscription_callbacks
+        for subscription in self.subscriptions:
+            if subscription.subscription is not None:
+                callbacks.pop(subscription.subscription.subscription_id, None)
+        client.disconnect_socket()
+        # Sin socket close_session no envía nada: solo cancela las tareas del Client
+        try:
+            await asyncio.wait_for(client.close_session(), 1.0)
+        except Exception:
+            pass
+
+    # ========================================================================
+    # RESTAURACIÓN DE SUSCRIPCIONES
+    # ========================================================================
+
+    async def _restore(self, client):
+        """TransferSubscriptions de la sesión vieja o recreación desde NodeIds."""
+
+        if not self.subscriptions:
+            return "sin suscripciones"
+
+        transferred = await self._transfer(client)
+        modes = set()
+        for subscription in self.subscriptions:
+            result = None if subscription.retargeted else transferred.get(
+                subscription.subscription.subscription_id)
+            if result is not None:
+                _adopt(client, subscription.subscription)
+                self.stats["republished"] += await self._republish(
+                    client, subscription.subscription, result.AvailableSequenceNumbers)
+                subscription.client = client
+                self.stats["transferred"] += 1
+                modes.add("transfer")
+            else:
+                await subscription.recreate(client)
+                self.stats["recreated"] += 1
+                modes.add("recreate")
+        _ensure_publish_loop(client)
+        return "+".join(sorted(modes))
+
+    async def _transfer(self, client):
+        transfer = getattr(client.uaclient, "transfer_subscriptions", None)
+        # Las redirigidas (retarget) se recrean: transferirlas traería los NodeIds viejos
+        ids = [s.subscription.subscription_id for s in self.subscriptions if not s.retargeted]
+        if not ids or not self.transfer or transfer is None:
+            return {}
+
+        params = ua.TransferSubscriptionsParameters()
+        params.SubscriptionIds = ids
+        params.SendInitialValues = True
+        try:
+            results = await transfer(params)
+        except Exception as e:
+            logger.info(f"TransferSubscriptions rechazado ({e!r}); se recrean las suscripciones")
+            return {}
+        for sub_id, result in zip(ids, results):
+            if not result.StatusCode.is_good():
+                logger.info(f"Suscripción {sub_id} no transferida: {result.StatusCode.name}")
+        return {sub_id: result for sub_id, result in zip(ids, results) if result.StatusCode.is_good()}
+
+    async def _republish(self, client, subscription, available):
+        """Reentrega los mensajes que el equipo guardó sin confirmar."""
+
+        republish = getattr(_session(client), "republish", None)
+        if republish is None or not available:
+            return 0
+
+        # asyncua 2.x lleva el último número de secuencia recibido
+        last = getattr(subscription, "last_sequence_number", None) or 0
+        count = 0
+        for sequence in sorted(s for s in available if s > last):
+            try:
+                message = await republish(subscription.subscription_id, sequence)
+            except Exception:
+                break
+            result = subscription.publish_callback(
+                ua.PublishResult(SubscriptionId=subscription.subscription_id, NotificationMessage=message))
+            if asyncio.iscoroutine(result):
+                await result
+            count += 1
+        return count
+
+    def _on_data(self, name, data_value):
+        outage = self._outage
+        if outage is not None and "restored_at" in outage and "data_at" not in outage:
+            outage["data_at"] = time.monotonic()
+
+    def print_stats(self):
+        print(f"  Sesión: {self.url} | {len(self.subscriptions)} suscripciones, "
+              f"{sum(len(s.tags) for s in self.subscriptions)} tags")
+        for key, value in sorted(self.stats.items()):
+            print(f"    {key:<28} {value}")
+
+
+# ============================================================================
+# INTERNALS DE ASYNCUA (1.x: UaClient, 2.x: UaClient.session)
+# ============================================================================
+
+def _session(client):
+    return getattr(client.uaclient, "session", client.uaclient)
+
+
+def _adopt(client, subscription):
+    """Mueve una Subscription transferida a la sesión del Client nuevo."""
+    session = _session(client)
+    subscription.server = session
+    session._subscription_callbacks[subscription.subscription_id] = subscription.publish_callback
+
+
+def _ensure_publish_loop(client):
+    session = _session(client)
+    if hasattr(session, "ensure_publish_loop"):
+        session.ensure_publish_loop()
+    elif session._subscription_callbacks and (session._publish_task is None or session._publish_task.done()):
+        session._publish_task = asyncio.create_task(session._publish_loop())
@@ -0,0 +1,490 @@
+"""
+================================================================================
+    ADDRESS SPACE SIMULADO A ESCALA (L5X / CSV / SINTÉTICO)
+
+    Genera miles de tags para gateway_simulator a partir de:
+
+    - L5X del controlador (CPS_001_ver2_PULL_SYSTEM.L5X): tags de
+      controlador y de programa, TIMER/COUNTER con sus miembros, alias con
+      el tipo declarado; layout Rockwell (ns=6, s=Tag / s=Program:P.Tag),
+      replicable N veces (un controlador por estación)
+    - omron_plc_tags.csv: NodeIds, tipos y valores tal como los exportó el
+      PLC Omron (ns=4, GlobalVars / DeviceStatus)
+    - Sintético: N estaciones x M tags con el layout de Optix en ns=9
+      (CPS001/CommDrivers/RAEtherNet_IPDriver1/RAEtherNet_IPStationN/
+      Tags/Program:EdgeGateway/GroupNN/TagNNNN), NodeIds string con el path
+      o GUID (como los g=... que genera Optix por defecto)
+
+    build_address_space() crea los nodos con AddNodes en lotes de
+    BATCH_SIZE directo sobre la sesión interna del servidor (sin un
+    add_variable + set_writable por nodo), así 50.000 nodos se crean en
+    segundos. Los índices de namespace se reservan para que la URI quede
+    en el mismo ns que el equipo real.
+
+    Dinámica de valores: DynamicsEngine cambia una fracción de los tags a
+    un ritmo fijo con generadores toggle (Boolean), ramp y walk (numéricos).
+    Especificación: "toggle=0.1@1,ramp=0.05@10,walk=0.2@2" = 10% de los
+    Boolean alternan a 1 Hz, 5% de los numéricos rampa a 10 Hz, ...
+
+    Uso:
+        source = synthetic_source(stations=100, tags_per_station=200)
+        node_ids = await build_address_space(server, source)
+        engine = DynamicsEngine(server, source, node_ids, "toggle=0.1@1")
+        engine.start()
+================================================================================
+"""
+
+import ast
+import asyncio
+import csv
+import logging
+import os
+import random
+import re
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+from asyncua import ua
+
+from l5k_datatypes import ATOMIC_TYPES, PREDEFINED
+
+logger = logging.getLogger("SimulatedAddressSpace")
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+L5X_PATH = os.path.join(BASE_DIR, "..", "CPS_001_ver2_PULL_SYSTEM.L5X")
+CSV_PATH = os.path.join(BASE_DIR, "omron_plc_tags.csv")
+
+ROCKWELL_NAMESPACE = ("urn:Simulator:Rockwell:Logix", 6)
+OMRON_NAMESPACE = ("urn:Simulator:Omron:NJ", 4)
+OPTIX_NAMESPACE = ("urn:Simulator:FTOptix:Application", 9)
+
+OPTIX_APPLICATION = "CPS001"
+OPTIX_DRIVER_PATH = ("CommDrivers", "RAEtherNet_IPDriver1")
+OPTIX_PROGRAM = "Program:EdgeGateway"
+TAGS_PER_FOLDER = 50         # Tags por carpeta GroupNN en el layout sintético
+
+BATCH_SIZE = 1000            # Nodos por llamada a AddNodes
+DYNAMICS_SEED = 7
+
+# Tipos de los tags sintéticos (en ciclo)
+SYNTHETIC_TYPES = (
+    (ua.VariantType.Boolean, False),
+    (ua.VariantType.Int32, 0),
+    (ua.VariantType.Float, 0.0),
+    (ua.VariantType.Boolean, False),
+    (ua.VariantType.Int16, 0),
+    (ua.VariantType.Double, 0.0),
+    (ua.VariantType.String, ""),
+)
+
+NUMERIC_TYPES = {
+    ua.VariantType.SByte: (-128, 127), ua.VariantType.Byte: (0, 255),
+    ua.VariantType.Int16: (-32768, 32767), ua.VariantType.UInt16: (0, 65535),
+    ua.VariantType.Int32: (-2 ** 31, 2 ** 31 - 1), ua.VariantType.UInt32: (0, 2 ** 32 - 1),
+    ua.VariantType.Int64: (-2 ** 63, 2 ** 63 - 1), ua.VariantType.UInt64: (0, 2 ** 64 - 1),
+    ua.VariantType.Float: (-1e30, 1e30), ua.VariantType.Double: (-1e300, 1e300),
+}
+INTEGER_TYPES = {vt for vt in NUMERIC_TYPES if vt not in (ua.VariantType.Float, ua.VariantType.Double)}
+
+
+class SimTag:
+    """Un tag del address space simulado."""
+
+    __slots__ = ("folders", "name", "variant_type", "value", "identifier")
+
+    def __init__(self, folders: tuple, name: str, variant_type, value, identifier: str = None):
+        self.folders = tuple(folders)        # Carpetas bajo Objects
+        self.name = name                     # BrowseName
+        self.variant_type = variant_type
+        self.value = value
+        self.identifier = identifier         # NodeId string; None = path con "."
+
+    @property
+    def path(self) -> tuple:
+        return self.folders + (self.name,)
+
+
+class TagSource:
+    """Conjunto de tags con su namespace (URI e índice deseado)."""
+
+    def __init__(self, name: str, namespace, tags: list, guid: bool = False):
+        self.name = name
+        self.namespace_uri, self.namespace_index = namespace
+        self.tags = tags
+        self.guid = guid         # NodeIds GUID derivados del path (layout Optix)
+
+    def node_identifier(self, path: tuple, identifier: str = None):
+        if self.guid:
+            return uuid.uuid5(uuid.NAMESPACE_URL, self.namespace_uri + "/" + "/".join(path))
+        return identifier or ".".join(path)
+
+
+# ============================================================================
+# FUENTES
+# ============================================================================
+
+def _l5x_value(text: str, variant_type):
+    text = (text or "").strip()
+    if variant_type == ua.VariantType.Boolean:
+        return text not in ("", "0", "false", "False")
+    if variant_type in (ua.VariantType.Float, ua.VariantType.Double):
+        return float(text or 0)
+    if variant_type == ua.VariantType.String:
+        return text.strip("'")
+    return int(text or 0)
+
+
+def _l5x_tags(element, folders: tuple, prefix: str) -> list:
+    tags = []
+    for tag in element.findall("Tags/Tag"):
+        name, data_type = tag.get("Name"), tag.get("DataType")
+        identifier = prefix + name
+        if data_type in PREDEFINED:
+            for member, member_type, _ in PREDEFINED[data_type]:
+                variant_type = ATOMIC_TYPES[member_type]
+                tags.append(SimTag(folders + (name,), member, variant_type,
+                                   _l5x_value("", variant_type), f"{identifier}.{member}"))
+            continue
+        variant_type = ATOMIC_TYPES.get(data_type)
+        if variant_type is None:
+            logger.warning(f"Tipo no soportado en el L5X: {name} ({data_type})")
+            continue
+        data = tag.find("Data[@Format='Decorated']")
+        if data is None:
+            data = tag.find("Data[@Format='L5K']")
+        value = _l5x_value(data.text if data is not None else "", variant_type)
+        dimensions = int(tag.get("Dimensions", "0") or 0)
+        if dimensions:
+            value = [_l5x_value("", variant_type)] * dimensions
+        tags.append(SimTag(folders, name, variant_type, value, identifier))
+    return tags
+
+
+def l5x_source(path: str = L5X_PATH, copies: int = 1) -> TagSource:
+    """
+    Tags de controlador y de programa de un .L5X. Con copies > 1 replica el
+    controlador (CPS_001, CPS_002, ...) para simular varias estaciones.
+    """
+
+    controller = ET.parse(path).getroot().find("Controller")
+    base = controller.get("Name")
+    stem = re.sub(r"_?\d+$", "", base)
+
+    tags = []
+    for copy in range(1, copies + 1):
+        name = base if copies == 1 else f"{stem}_{copy:03d}"
+        # En copias el NodeId lleva el controlador para no repetirse
+        scope = "" if copies == 1 else f"{name}."
+        tags.extend(_l5x_tags(controller, (name, "Tags"), scope))
+        for program in controller.findall("Programs/Program"):
+            program_name = program.get("Name")
+            tags.extend(_l5x_tags(program, (name, "Programs", program_name),
+                                  f"{scope}Program:{program_name}."))
+    return TagSource(f"L5X {os.path.basename(path)} x{copies}", ROCKWELL_NAMESPACE, tags)
+
+
+_CSV_IDENTIFIER = re.compile(r"Identifier='([^']*)'")
+_CSV_NAMESPACE = re.compile(r"NamespaceIndex=(\d+)")
+
+
+def _csv_value(text: str, variant_type):
+    if text.startswith("[") and text.endswith("]"):
+        # Array: "[0, 0, 0]", "['a', 'b']"
+        try:
+            items = ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            items = []
+        return [_csv_value(item if isinstance(item, str) else repr(item), variant_type) for item in items]
+    if variant_type == ua.VariantType.Boolean:
+        return text == "True"
+    if variant_type in (ua.VariantType.Float, ua.VariantType.Double):
+        return float(text or 0)
+    if variant_type == ua.VariantType.DateTime:
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            return datetime.now()
+    if variant_type in INTEGER_TYPES:
+        return int(text or 0)
+    return text
+
+
+def csv_source(path: str = CSV_PATH) -> TagSource:
+    """Tags exportados del PLC Omron (Tag Name, NodeId, Data Type, Current Value)."""
+
+    tags = []
+    namespace_index = OMRON_NAMESPACE[1]
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                variant_type = ua.VariantType(int(row["Data Type"]))
+            except ValueError:
+                variant_type = None
+            if variant_type is None or variant_type == ua.VariantType.ExtensionObject:
+                logger.warning(f"Tipo no soportado en el CSV: {row['Tag Name']} ({row['Data Type']})")
+                continue
+            *folders, name = row["Tag Name"].split(".")
+            identifier = _CSV_IDENTIFIER.search(row["NodeId"])
+            namespace = _CSV_NAMESPACE.search(row["NodeId"])
+            if namespace:
+                namespace_index = int(namespace.group(1))
+            tags.append(SimTag(folders, name, variant_type, _csv_value(row["Current Value"], variant_type),
+                               identifier.group(1) if identifier else None))
+    return TagSource(f"CSV {os.path.basename(path)}", (OMRON_NAMESPACE[0], namespace_index), tags)
+
+
+def synthetic_source(stations: int, tags_per_station: int, guid: bool = False,
+                     tags_per_folder: int = TAGS_PER_FOLDER) -> TagSource:
+    """N estaciones x M tags con el layout de Optix (ns=9)."""
+
+    tags = []
+    for station in range(1, stations + 1):
+        base = (OPTIX_APPLICATION,) + OPTIX_DRIVER_PATH + (f"RAEtherNet_IPStation{station}", "Tags", OPTIX_PROGRAM)
+        for t in range(tags_per_station):
+            variant_type, value = SYNTHETIC_TYPES[t % len(SYNTHETIC_TYPES)]
+            tags.append(SimTag(base + (f"Group{t // tags_per_folder:02d}",), f"Tag{t:04d}", variant_type, value))
+    return TagSource(f"Sintético {stations}x{tags_per_station}", OPTIX_NAMESPACE, tags, guid=guid)
+
+
+def parse_synthetic(spec: str) -> tuple:
+    """ "100x200" -> (100, 200)."""
+
+    stations, tags = spec.lower().split("x")
+    return int(stations), int(tags)
+
+
+# ============================================================================
+# CREACIÓN DE NODOS EN LOTES
+# ============================================================================
+
+async def reserve_namespace(server, uri: str, index: int) -> int:
+    """Registra la URI en el índice pedido (rellenando los anteriores)."""
+
+    namespaces = await server.get_namespace_array()
+    if uri in namespaces:
+        return namespaces.index(uri)
+    while len(namespaces) < index:
+        await server.register_namespace(f"urn:Simulator:Reserved:{len(namespaces)}")
+        namespaces = await server.get_namespace_array()
+    registered = await server.register_namespace(uri)
+    if registered != index:
+        logger.warning(f"{uri} quedó en ns={registered} (pedido ns={index})")
+    return registered
+
+
+def _folder_item(node_id, parent_id, name: str, idx: int) -> ua.AddNodesItem:
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = node_id
+    item.BrowseName = ua.QualifiedName(name, idx)
+    item.NodeClass = ua.NodeClass.Object
+    item.ParentNodeId = parent_id
+    item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.Organizes)
+    item.TypeDefinition = ua.NodeId(ua.ObjectIds.FolderType)
+    attrs = ua.ObjectAttributes()
+    attrs.DisplayName = ua.LocalizedText(name)
+    attrs.EventNotifier = 0
+    item.NodeAttributes = attrs
+    return item
+
+
+def _variable_item(node_id, parent_id, tag: SimTag, idx: int) -> ua.AddNodesItem:
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = node_id
+    item.BrowseName = ua.QualifiedName(tag.name, idx)
+    item.NodeClass = ua.NodeClass.Variable
+    item.ParentNodeId = parent_id
+    item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasComponent)
+    item.TypeDefinition = ua.NodeId(ua.ObjectIds.BaseDataVariableType)
+    attrs = ua.VariableAttributes()
+    attrs.DisplayName = ua.LocalizedText(tag.name)
+    attrs.DataType = ua.NodeId(tag.variant_type.value)
+    attrs.Value = ua.Variant(tag.value, tag.variant_type)
+    if isinstance(tag.value, list):
+        attrs.ValueRank = ua.ValueRank.OneDimension
+        attrs.ArrayDimensions = [len(tag.value)]
+    else:
+        attrs.ValueRank = ua.ValueRank.Scalar
+    access = ua.AccessLevel.CurrentRead.mask | ua.AccessLevel.CurrentWrite.mask
+    attrs.AccessLevel = access
+    attrs.UserAccessLevel = access
+    item.NodeAttributes = attrs
+    return item
+
+
+async def build_address_space(server, source: TagSource, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Crea carpetas y variables de la fuente en lotes de AddNodes.
+
+    Retorna {path del tag: NodeId}.
+    """
+
+    idx = await reserve_namespace(server, source.namespace_uri, source.namespace_index)
+    objects = ua.NodeId(ua.ObjectIds.ObjectsFolder)
+    session = server.iserver.isession
+
+    folders = {(): objects}
+    items = []
+    for tag in source.tags:
+        for depth in range(1, len(tag.folders) + 1):
+            path = tag.folders[:depth]
+            if path not in folders:
+                folders[path] = ua.NodeId(source.node_identifier(path), idx)
+                items.append(_folder_item(folders[path], folders[path[:-1]], path[-1], idx))
+
+    node_ids = {}
+    for tag in source.tags:
+        node_ids[tag.path] = ua.NodeId(source.node_identifier(tag.path, tag.identifier), idx)
+        items.append(_variable_item(node_ids[tag.path], folders[tag.folders], tag, idx))
+
+    failed = 0
+    for start in range(0, len(items), batch_size):
+        results = await session.add_nodes(items[start:start + batch_size])
+        for item, result in zip(items[start:start + batch_size], results):
+            if not result.StatusCode.is_good():
+                failed += 1
+                logger.warning(f"No se creó {item.RequestedNewNodeId.to_string()}: {result.StatusCode.name}")
+        # Deja correr al resto del loop entre lotes
+        await asyncio.sleep(0)
+
+    logger.info(f"{source.name}: {len(folders) - 1} carpetas, {len(node_ids)} variables en ns={idx}"
+                + (f", {failed} con error" if failed else ""))
+    return node_ids
+
+
+# ============================================================================
+# DINÁMICA DE VALORES
+# ============================================================================
+
+class Toggle:
+    """Boolean que alterna en cada paso."""
+
+    kinds = {ua.VariantType.Boolean}
+
+    def __init__(self, variant_type, value, rng):
+        self.value = bool(value)
+
+    def next(self):
+        self.value = not self.value
+        return self.value
+
+
+class Ramp:
+    """Sube de a un paso hasta el máximo y vuelve a cero (diente de sierra)."""
+
+    kinds = set(NUMERIC_TYPES)
+    LIMIT = 1000
+
+    def __init__(self, variant_type, value, rng):
+        low, high = NUMERIC_TYPES[variant_type]
+        self.low, self.high = max(low, 0), min(high, self.LIMIT)
+        self.step = 1 if variant_type in INTEGER_TYPES else 0.5
+        self.value = min(max(value or 0, self.low), self.high)
+
+    def next(self):
+        self.value = self.value + self.step
+        if self.value > self.high:
+            self.value = self.low
+        return self.value
+
+
+class RandomWalk:
+    """Paso aleatorio acotado alrededor del valor actual."""
+
+    kinds = set(NUMERIC_TYPES)
+    LIMIT = 1000
+
+    def __init__(self, variant_type, value, rng):
+        low, high = NUMERIC_TYPES[variant_type]
+        self.low, self.high = max(low, -self.LIMIT), min(high, self.LIMIT)
+        self.integer = variant_type in INTEGER_TYPES
+        self.rng = rng
+        self.value = min(max(value or 0, self.low), self.high)
+
+    def next(self):
+        step = self.rng.choice((-1, 1)) if self.integer else self.rng.uniform(-1.0, 1.0)
+        self.value = min(max(self.value + step, self.low), self.high)
+        return self.value
+
+
+GENERATORS = {"toggle": Toggle, "ramp": Ramp, "walk": RandomWalk}
+
+
+def parse_dynamics(spec: str) -> list:
+    """ "toggle=0.1@1,walk=0.2@5" -> [("toggle", 0.1, 1.0), ("walk", 0.2, 5.0)]."""
+
+    groups = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        kind, rest = part.split("=")
+        fraction, rate = rest.split("@")
+        if kind not in GENERATORS:
+            raise ValueError(f"Generador desconocido: {kind} (opciones: {', '.join(GENERATORS)})")
+        groups.append((kind, float(fraction), float(rate)))
+    return groups
+
+
+class DynamicsEngine:
+    """Cambia valores de los tags simulados a ritmo fijo."""
+
+    def __init__(self, server, source: TagSource, node_ids: dict, spec: str, seed: int = DYNAMICS_SEED):
+        self.server = server
+        self.groups = []       # [(tipo, hz, [(node_id, variant_type, generador)])]
+        self.changes = 0
+        self._tasks = []
+
+        rng = random.Random(seed)
+        taken = set()
+        for kind, fraction, rate in parse_dynamics(spec):
+            generator = GENERATORS[kind]
+            eligible = [tag for tag in source.tags
+                        if tag.variant_type in generator.kinds and tag.path not in taken
+                        and not isinstance(tag.value, list)]
+            chosen = rng.sample(eligible, int(len(eligible) * fraction)) if eligible else []
+            taken.update(tag.path for tag in chosen)
+            self.groups.append((kind, rate, [
+                (node_ids[tag.path], tag.variant_type, generator(tag.variant_type, tag.value, rng))
+                for tag in chosen
+            ]))
+
+    @property
+    def tags(self) -> int:
+        return sum(len(members) for _, _, members in self.groups)
+
+    @property
+    def changes_per_second(self) -> float:
+        return sum(rate * len(members) for _, rate, members in self.groups)
+
+    def start(self):
+        for kind, rate, members in self.groups:
+            if members and rate > 0:
+                self._tasks.append(asyncio.create_task(self._run(rate, members)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, rate: float, members: list):
+        loop = asyncio.get_running_loop()
+        period = 1.0 / rate
+        deadline = loop.time()
+        while True:
+            deadline += period
+            now = datetime.now(timezone.utc)
+            for node_id, variant_type, generator in members:
+                value = generator.next()
+                await self.server.write_attribute_value(node_id, ua.DataValue(
+                    ua.Variant(value, variant_type), SourceTimestamp=now, ServerTimestamp=now,
+                ))
+            self.changes += len(members)
+            delay = deadline - loop.time()
+            if delay < 0:
+                # Atrasado (demasiados tags para el ritmo pedido): no acumular
+                deadline = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
@@ -0,0 +1,513 @@
+"""
+================================================================================
+    CODEC BINARIO PRECOMPILADO PARA ESTRUCTURAS (ExtensionObject)
+
+    El 5069-L310ER entrega MaterialRecord_pull, MaterialRecord_push[3] y
+    UUID_pull[5] como ExtensionObject; sin load_data_type_definitions()
+    (que el servidor corta, ver REPORTE_DIAGNOSTICO.md) llegan como bytes
+    sin parsear, y con ella asyncua decodifica campo por campo creando un
+    objeto Python por registro.
+
+    StructCodec compila una vez por tipo (desde el .L5K o desde una
+    StructureDefinition) un decodificador y un codificador:
+
+    - Campos numéricos consecutivos -> un solo struct.Struct
+      (unpack_from / pack), sin pasar por Buffer
+    - STRING: Int32 de longitud + UTF-8 (None si la longitud es -1)
+    - UDTs anidados (Date_Time) y arrays de miembros
+    - Arrays completos (Variant de ExtensionObject) -> array estructurado
+      de NumPy: los registros quedan empaquetados en un solo bloque, sin
+      un objeto Python por campo
+    - DateTime se deja como Int64 (ticks de 100 ns desde 1601)
+    - Sin NumPy, decode_records() / decode_variant() retornan tuplas
+
+    Sólo estructuras simples (StructureType.Structure): las que tienen
+    campos opcionales o son uniones se dejan al decodificador de asyncua.
+
+    Uso:
+        codecs = codecs_from_l5k(parse_l5k_datatypes())
+        push = codecs["Syn_FileWriteOut_Struct"]
+        records = push.decode_records(await node.read_value())  # ExtensionObjects
+        records["BARCD"], records["SHPHD"]["Year"]
+        await node.write_value(ua.Variant(push.encode_records(records),
+                                          ua.VariantType.ExtensionObject))
+================================================================================
+"""
+
+import struct
+
+from asyncua import ua
+from asyncua.ua.ua_binary import nodeid_to_binary
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Longitud de un STRING de Logix (columnas 'U' del array de NumPy)
+STRING_SIZE = 82
+
+# Tipos atómicos: (código struct, dtype NumPy)
+ATOMIC = {
+    ua.VariantType.Boolean: ("?", "?"),
+    ua.VariantType.SByte: ("b", "i1"),
+    ua.VariantType.Byte: ("B", "u1"),
+    ua.VariantType.Int16: ("h", "<i2"),
+    ua.VariantType.UInt16: ("H", "<u2"),
+    ua.VariantType.Int32: ("i", "<i4"),
+    ua.VariantType.UInt32: ("I", "<u4"),
+    ua.VariantType.Int64: ("q", "<i8"),
+    ua.VariantType.UInt64: ("Q", "<u8"),
+    ua.VariantType.Float: ("f", "<f4"),
+    ua.VariantType.Double: ("d", "<f8"),
+    ua.VariantType.DateTime: ("q", "<i8"),
+}
+TEXT = (ua.VariantType.String, ua.VariantType.ByteString)
+
+# DataTypes de ns=0 con el mismo número que su VariantType (i=1 .. i=15)
+BUILTIN_TYPES = {kind.value: kind for kind in list(ATOMIC) + list(TEXT)}
+
+# Elementos en el array NumPy para campos array sin ArrayDimensions
+UNBOUNDED_ARRAY_SIZE = 16
+
+_INT32 = struct.Struct("<i")
+_NULL = _INT32.pack(-1)
+_BINARY_BODY = 0x01
+_ARRAY_MASK = 0x80
+
+
+# ============================================================================
+# HELPERS USADOS POR EL CÓDIGO GENERADO
+# ============================================================================
+
+def _read_atomic_array(buf, pos, code, size):
+    n = _INT32.unpack_from(buf, pos)[0]
+    pos += 4
+    if n <= 0:
+        return (), pos
+    return struct.unpack_from(f"<{n}{code}", buf, pos), pos + n * size
+
+
+def _read_text_array(buf, pos, null, text):
+    n = _INT32.unpack_from(buf, pos)[0]
+    pos += 4
+    values = []
+    for _ in range(max(n, 0)):
+        length = _INT32.unpack_from(buf, pos)[0]
+        pos += 4
+        if length < 0:
+            values.append(null)
+        else:
+            chunk = buf[pos:pos + length]
+            values.append(chunk.decode("utf-8", "replace") if text else chunk)
+            pos += length
+    return tuple(values), pos
+
+
+def _read_struct_array(buf, pos, decode):
+    n = _INT32.unpack_from(buf, pos)[0]
+    pos += 4
+    values = []
+    for _ in range(max(n, 0)):
+        value, pos = decode(buf, pos)
+        values.append(value)
+    return tuple(values), pos
+
+
+def _pad(values, dim, fill, field):
+    """Completa un array al tamaño fijo del campo NumPy (más largo: error)."""
+    if len(values) > dim:
+        raise ValueError(f"{field}: {len(values)} elementos, el campo NumPy admite {dim}")
+    return values + (fill,) * (dim - len(values))
+
+
+def _write_text(value, ap):
+    if value is None:
+        ap(_NULL)
+        return
+    data = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+    ap(_INT32.pack(len(data)))
+    ap(data)
+
+
+def _write_atomic_array(values, code, ap):
+    if values is None:
+        ap(_NULL)
+        return
+    ap(_INT32.pack(len(values)))
+    ap(struct.pack(f"<{len(values)}{code}", *values))
+
+
+def _write_text_array(values, ap):
+    if values is None:
+        ap(_NULL)
+        return
+    ap(_INT32.pack(len(values)))
+    for value in values:
+        _write_text(value, ap)
+
+
+def _write_struct_array(values, encode, ap):
+    if values is None:
+        ap(_NULL)
+        return
+    ap(_INT32.pack(len(values)))
+    for value in values:
+        encode(value, ap)
+
+
+def _skip_nodeid(buf, pos):
+    """Posición tras un NodeId binario (el TypeId del ExtensionObject)."""
+    kind = buf[pos] & 0x3F
+    if kind == 0:
+        return pos + 2
+    if kind == 1:
+        return pos + 4
+    if kind == 2:
+        return pos + 7
+    if kind == 4:
+        return pos + 19
+    if kind in (3, 5):
+        length = _INT32.unpack_from(buf, pos + 3)[0]
+        return pos + 7 + max(length, 0)
+    raise ValueError(f"NodeId binario no soportado: {kind}")
+
+
+# ============================================================================
+# CODEC
+# ============================================================================
+
+class StructCodec:
+    """
+    Decodificador/codificador compilado de una estructura OPC UA.
+
+    fields: [(nombre, tipo, dimensión)] en orden de codificación; tipo es
+    un ua.VariantType atómico/String/ByteString u otro StructCodec;
+    dimensión 0 = escalar, N = array (N elementos en el array NumPy).
+    """
+
+    def __init__(self, name: str, fields: list, encoding_id: ua.NodeId = None):
+        self.name = name
+        self.fields = list(fields)
+        self.names = [field[0] for field in self.fields]
+        self.encoding_id = encoding_id
+        self._dtype = None
+        self._compile()
+
+    def __repr__(self):
+        return f"StructCodec({self.name}, {len(self.fields)} campos)"
+
+    # ------------------------------------------------------------------------
+    # COMPILACIÓN
+    # ------------------------------------------------------------------------
+
+    def _compile(self):
+        env = {
+            "_INT32": _INT32, "_LEN": _INT32.pack, "_NULL": _NULL, "_pad": _pad,
+            "_read_atomic_array": _read_atomic_array, "_read_text_array": _read_text_array,
+            "_read_struct_array": _read_struct_array, "_write_text": _write_text,
+            "_write_atomic_array": _write_atomic_array, "_write_text_array": _write_text_array,
+            "_write_struct_array": _write_struct_array,
+        }
+        decode = {False: ["def _decode(buf, pos):"], True: ["def _decode_np(buf, pos):"]}
+        encode = ["def _encode(v, ap):"]
+        run = []            # [(índice, código)] de campos atómicos consecutivos
+
+        def flush_run():
+            if not run:
+                return
+            n = len(env)
+            layout = struct.Struct("<" + "".join(code for _, code in run))
+            env[f"_U{n}"], env[f"_P{n}"] = layout.unpack_from, layout.pack
+            targets = ", ".join(f"v{i}" for i, _ in run)
+            for lines in decode.values():
+                lines.append(f"    {targets}, = _U{n}(buf, pos)")
+                lines.append(f"    pos += {layout.size}")
+            encode.append(f"    ap(_P{n}({', '.join(f'v[{i}]' for i, _ in run)}))")
+            run.clear()
+
+        for i, (name, kind, dim) in enumerate(self.fields):
+            if isinstance(kind, StructCodec):
+                flush_run()
+                env[f"_D{i}"], env[f"_N{i}"], env[f"_E{i}"] = kind._decode, kind._decode_np, kind._encode
+                if dim:
+                    for numpy, lines in decode.items():
+                        lines.append(f"    v{i}, pos = _read_struct_array(buf, pos, {'_N' if numpy else '_D'}{i})")
+                    decode[True].append(f"    v{i} = _pad(v{i}, {dim}, {kind._empty_np()!r}, {self.name + '.' + name!r})")
+                    encode.append(f"    _write_struct_array(v[{i}], _E{i}, ap)")
+                else:
+                    decode[False].append(f"    v{i}, pos = _D{i}(buf, pos)")
+                    decode[True].append(f"    v{i}, pos = _N{i}(buf, pos)")
+                    encode.append(f"    _E{i}(v[{i}], ap)")
+            elif kind in TEXT:
+                flush_run()
+                text = kind == ua.VariantType.String
+                if dim:
+                    for numpy, lines in decode.items():
+                        null = repr("" if text else b"") if numpy else "None"
+                        lines.append(f"    v{i}, pos = _read_text_array(buf, pos, {null}, {text})")
+                    decode[True].append(f"    v{i} = _pad(v{i}, {dim}, {'' if text else b''!r}, {self.name + '.' + name!r})")
+                    encode.append(f"    _write_text_array(v[{i}], ap)")
+                else:
+                    for numpy, lines in decode.items():
+                        null = repr("" if text else b"") if numpy else "None"
+                        value = 'buf[pos:pos + n].decode("utf-8", "replace")' if text else "buf[pos:pos + n]"
+                        lines.append("    n = _INT32.unpack_from(buf, pos)[0]")
+                        lines.append("    pos += 4")
+                        lines.append("    if n < 0:")
+                        lines.append(f"        v{i} = {null}")
+                        lines.append("    else:")
+                        lines.append(f"        v{i} = {value}")
+                        lines.append("        pos += n")
+                    encode.append(f"    s = v[{i}]")
+                    encode.append("    if s is None:")
+                    encode.append("        ap(_NULL)")
+                    encode.append("    else:")
+                    encode.append('        s = s.encode("utf-8") if s.__class__ is str else bytes(s)')
+                    encode.append("        ap(_LEN(len(s)))")
+                    encode.append("        ap(s)")
+            elif kind in ATOMIC:
+                code = ATOMIC[kind][0]
+                if dim:
+                    flush_run()
+                    size = struct.calcsize("<" + code)
+                    for lines in decode.values():
+                        lines.append(f"    v{i}, pos = _read_atomic_array(buf, pos, {code!r}, {size})")
+                    decode[True].append(f"    v{i} = _pad(v{i}, {dim}, {False if code == '?' else 0}, {self.name + '.' + name!r})")
+                    encode.append(f"    _write_atomic_array(v[{i}], {code!r}, ap)")
+                else:
+                    run.append((i, code))
+            else:
+                raise ValueError(f"{self.name}.{name}: tipo no soportado {kind}")
+        flush_run()
+
+        values = "".join(f"v{i}, " for i in range(len(self.fields)))
+        for lines in decode.values():
+            lines.append(f"    return ({values}), pos")
+        if len(encode) == 1:
+            encode.append("    pass")
+
+        source = "\n".join(decode[False] + decode[True] + encode) + "\n"
+        exec(compile(source, f"<StructCodec {self.name}>", "exec"), env)
+        self._decode, self._decode_np, self._encode = env["_decode"], env["_decode_np"], env["_encode"]
+        self.source = source
+
+    def _empty_np(self) -> tuple:
+        """Registro vacío (relleno de arrays en el array NumPy)."""
+        values = []
+        for _, kind, dim in self.fields:
+            if isinstance(kind, StructCodec):
+                value = kind._empty_np()
+            elif kind in TEXT:
+                value = "" if kind == ua.VariantType.String else b""
+            else:
+                value = False if kind == ua.VariantType.Boolean else 0
+            values.append((value,) * dim if dim else value)
+        return tuple(values)
+
+    # ------------------------------------------------------------------------
+    # DECODIFICACIÓN
+    # ------------------------------------------------------------------------
+
+    @property
+    def dtype(self):
+        """dtype estructurado de NumPy equivalente (STRING -> U82)."""
+        if self._dtype is None:
+            if np is None:
+                raise ImportError("numpy no está instalado")
+            spec = []
+            for name, kind, dim in self.fields:
+                if isinstance(kind, StructCodec):
+                    field_type = kind.dtype
+                elif kind == ua.VariantType.String:
+                    field_type = f"<U{STRING_SIZE}"
+                elif kind == ua.VariantType.ByteString:
+                    field_type = f"S{STRING_SIZE}"
+                else:
+                    field_type = ATOMIC[kind][1]
+                spec.append((name, field_type, (dim,)) if dim else (name, field_type))
+            self._dtype = np.dtype(spec)
+        return self._dtype
+
+    def decode(self, body) -> tuple:
+        """Body binario -> tupla con los campos en orden."""
+        return self._decode(bytes(body), 0)[0]
+
+    def decode_dict(self, body) -> dict:
+        return dict(zip(self.names, self.decode(body)))
+
+    def decode_records(self, values, numpy: bool = True):
+        """
+        ExtensionObjects sin decodificar (o sus Body) -> array estructurado
+        (o lista de tuplas con numpy=False o sin NumPy instalado).
+
+        Acepta lo que retorna read_value() de MaterialRecord_push cuando
+        los tipos no están cargados; toma el encoding_id del primero.
+        """
+        numpy = numpy and np is not None
+        decode = self._decode_np if numpy else self._decode
+        rows = []
+        for value in values:
+            body = getattr(value, "Body", value)
+            if self.encoding_id is None and hasattr(value, "TypeId"):
+                self.encoding_id = value.TypeId
+            rows.append(decode(bytes(body), 0)[0])
+        return np.array(rows, dtype=self.dtype) if numpy else rows
+
+    def decode_variant(self, data, numpy: bool = True):
+        """
+        Variant binario con un array de ExtensionObject -> array NumPy
+        (o lista de tuplas con numpy=False o sin NumPy instalado), sin
+        pasar por asyncua.
+        """
+        numpy = numpy and np is not None
+        buf = bytes(data)
+        mask = buf[0]
+        if mask & 0x3F != ua.VariantType.ExtensionObject.value or not mask & _ARRAY_MASK:
+            raise ValueError(f"{self.name}: el Variant no es un array de ExtensionObject")
+        count = _INT32.unpack_from(buf, 1)[0]
+        pos = 5
+        decode = self._decode_np if numpy else self._decode
+        rows = []
+        for _ in range(max(count, 0)):
+            pos = _skip_nodeid(buf, pos)
+            if not buf[pos] & _BINARY_BODY:
+                raise ValueError(f"{self.name}: ExtensionObject sin cuerpo binario")
+            length = _INT32.unpack_from(buf, pos + 1)[0]
+            pos += 5
+            rows.append(decode(buf, pos)[0])
+            pos += length
+        return np.array(rows, dtype=self.dtype) if numpy else rows
+
+    # ------------------------------------------------------------------------
+    # CODIFICACIÓN
+    # ------------------------------------------------------------------------
+
+    def encode(self, values) -> bytes:
+        """Tupla / registro NumPy / dict / objeto ua -> Body binario."""
+        parts = []
+        self._encode(self._as_sequence(values), parts.append)
+        return b"".join(parts)
+
+    def encode_records(self, records) -> list:
+        """Registros -> [ua.ExtensionObject] listos para write_value()."""
+        if self.encoding_id is None:
+            raise ValueError(f"{self.name}: falta encoding_id (bind() o decode_records() antes)")
+        return [ua.ExtensionObject(TypeId=self.encoding_id, Body=self.encode(values))
+                for values in self._rows(records)]
+
+    def encode_variant(self, records) -> bytes:
+        """Registros -> Variant binario (array de ExtensionObject)."""
+        if self.encoding_id is None:
+            raise ValueError(f"{self.name}: falta encoding_id (bind() o decode_records() antes)")
+        rows = self._rows(records)
+        prefix = nodeid_to_binary(self.encoding_id) + bytes((_BINARY_BODY,))
+        encode = self._encode
+        parts = [bytes((ua.VariantType.ExtensionObject.value | _ARRAY_MASK,)), _INT32.pack(len(rows))]
+        for values in rows:
+            body = []
+            encode(values, body.append)
+            body = b"".join(body)
+            parts.append(prefix)
+            parts.append(_INT32.pack(len(body)))
+            parts.append(body)
+        return b"".join(parts)
+
+    def _rows(self, records) -> list:
+        if np is not None and isinstance(records, np.ndarray):
+            return records.tolist()
+        return [self._as_sequence(values) for values in records]
+
+    def _as_sequence(self, values):
+        if isinstance(values, (tuple, list)):
+            return values
+        if np is not None and isinstance(values, np.void):
+            return values.tolist()
+        if isinstance(values, dict):
+            raw = [values.get(name) for name in self.names]
+        else:
+            raw = [getattr(values, name) for name in self.names]
+        for i, (_, kind, dim) in enumerate(self.fields):
+            if isinstance(kind, StructCodec) and raw[i] is not None:
+                raw[i] = [kind._as_sequence(item) for item in raw[i]] if dim else kind._as_sequence(raw[i])
+        return raw
+
+    async def bind(self, client, data_type):
+        """Lee el encoding "Default Binary" del DataType en el servidor."""
+        node = client.get_node(data_type)
+        for ref in await node.get_references(refs=ua.ObjectIds.HasEncoding):
+            if ref.BrowseName.Name == "Default Binary":
+                self.encoding_id = ref.NodeId
+                return self.encoding_id
+        raise ValueError(f"{self.name}: el DataType {data_type} no tiene encoding Default Binary")
+
+
+# ============================================================================
+# CONSTRUCCIÓN DE CODECS
+# ============================================================================
+
+def codecs_from_l5k(datatypes: dict, names: list = None) -> dict:
+    """
+    {nombre: StructCodec} para los UDTs de parse_l5k_datatypes() (todos o
+    names y sus dependencias). El orden de campos es el de declaración,
+    que es el que usa el servidor del 5069-L310ER.
+    """
+    from l5k_datatypes import ATOMIC_TYPES, _dependencies, dependency_order
+
+    needed = set(names or datatypes)
+    for name in list(needed):
+        needed |= _dependencies(datatypes, name)
+
+    codecs = {}
+    for name in [n for n in dependency_order(datatypes) if n in needed]:
+        fields = []
+        for member, data_type, dimension in datatypes[name]:
+            kind = ATOMIC_TYPES.get(data_type) or codecs.get(data_type)
+            if kind is None:
+                raise ValueError(f"{name}.{member}: tipo desconocido {data_type}")
+            fields.append((member, kind, dimension))
+        codecs[name] = StructCodec(name, fields)
+    return codecs
+
+
+def codecs_from_definitions(definitions: dict) -> dict:
+    """
+    {nombre: StructCodec} desde {nombre: (NodeId del DataType,
+    StructureDefinition)} (p. ej. leídas con el atributo
+    DataTypeDefinition o de cache/type_definitions.json).
+
+    Las estructuras con campos opcionales, uniones o valores con subtipos
+    (y las que las contienen) dan ValueError: su codificación depende de
+    máscaras o selectores que el codec no genera; quedan para
+    load_data_type_definitions() de asyncua.
+    """
+    by_node = {data_type: name for name, (data_type, _) in definitions.items()}
+    codecs = {}
+
+    def build(name, seen=()):
+        if name in codecs:
+            return codecs[name]
+        if name in seen:
+            raise ValueError(f"Estructura recursiva: {name}")
+        data_type, sdef = definitions[name]
+        if sdef.StructureType != ua.StructureType.Structure:
+            raise ValueError(f"{name}: {ua.StructureType(sdef.StructureType).name} no soportado "
+                             f"(usar el decodificador de asyncua)")
+        fields = []
+        for field in sdef.Fields:
+            if field.DataType in by_node:
+                kind = build(by_node[field.DataType], seen + (name,))
+            elif field.DataType.NamespaceIndex == 0 and field.DataType.Identifier in BUILTIN_TYPES:
+                kind = BUILTIN_TYPES[field.DataType.Identifier]
+            else:
+                raise ValueError(f"{name}.{field.Name}: tipo no soportado {field.DataType}")
+            dim = 0
+            if field.ValueRank >= 1:
+                dim = (field.ArrayDimensions or [0])[0] or UNBOUNDED_ARRAY_SIZE
+            fields.append((field.Name, kind, dim))
+        codecs[name] = StructCodec(name, fields, sdef.DefaultEncodingId)
+        return codecs[name]
+
+    for name in definitions:
+        build(name)
+    return codecs
@@ -0,0 +1,244 @@
+"""
+================================================================================
+    SUSCRIPCIÓN DE TAGS OPC UA - MONITOREO POR CAMBIO DE DATO
+
+    Reemplaza el polling de read_value() cada 100 ms por una Subscription con
+    MonitoredItems: el servidor muestrea los tags y publica solo los cambios.
+
+    - Intervalos de muestreo (sampling) y publicación configurables
+    - Caché con el último valor de cada tag
+    - Callbacks por tag: on_change("Heartbeat", callback)
+    - DataValue completo (timestamps, StatusCode) de todos los tags: on_data()
+    - Esperas awaitable: await wait_for("UUID_pull", predicado, timeout)
+
+    Uso:
+        sub = TagSubscription(client, publishing_interval=50)
+        await sub.start({"Heartbeat": "ns=2;s=EgComIn_Heartbeat"})
+        value = await sub.wait_for("Heartbeat", lambda v: v is True, timeout=5)
+================================================================================
+"""
+
+import asyncio
+import logging
+
+from asyncua import ua
+
+logger = logging.getLogger("TagSubscription")
+
+# ============================================================================
+# CONFIGURACIÓN POR DEFECTO
+# ============================================================================
+
+PUBLISHING_INTERVAL_MS = 50   # Cada cuánto publica el servidor los cambios
+SAMPLING_INTERVAL_MS = 0      # 0 = el servidor muestrea lo más rápido posible
+QUEUE_SIZE = 1                # Solo interesa el último valor de cada tag
+
+
+class TagSubscription:
+    """Suscripción a un conjunto de tags con caché de último valor."""
+
+    def __init__(self, client, publishing_interval=PUBLISHING_INTERVAL_MS,
+                 sampling_interval=SAMPLING_INTERVAL_MS, queue_size=QUEUE_SIZE):
+        self.client = client
+        self.publishing_interval = publishing_interval
+        self.sampling_interval = sampling_interval
+        self.queue_size = queue_size
+
+        self.subscription = None
+
+        # True si retarget() cambió NodeIds: hay que recrear, no transferir
+        self.retargeted = False
+
+        # Último valor recibido por tag y contador de notificaciones
+        self.values = {}
+        self.notifications = 0
+
+        self._names = {}       # NodeId -> nombre del tag
+        self._handles = {}     # nombre del tag -> handle del MonitoredItem
+        self._callbacks = {}   # nombre del tag -> [callback(name, value)]
+        self._listeners = []   # [callback(name, data_value)] para todos los tags
+        self._waiters = {}     # nombre del tag -> [(predicate, future)]
+
+    async def start(self, tags: dict):
+        """Crea la suscripción y los MonitoredItems para {nombre: node_id}."""
+
+        self.subscription = await self.client.create_subscription(
+            self.publishing_interval, self
+        )
+        await self.add(tags)
+
+    async def add(self, tags: dict):
+        """Agrega tags a una suscripción ya creada."""
+
+        nodes = []
+        for name, node_id in tags.items():
+            node = self.client.get_node(node_id)
+            self._names[node.nodeid] = name
+            nodes.append(node)
+
+        if not nodes:
+            return
+
+        handles = await self.subscription.subscribe_data_change(
+            nodes,
+            queuesize=self.queue_size,
+            sampling_interval=self.sampling_interval,
+        )
+
+        for node, handle in zip(nodes, handles):
+            name = self._names[node.nodeid]
+            if isinstance(handle, ua.StatusCode):
+                logger.error(f"No se pudo monitorear {name}: {handle}")
+                continue
+            self._handles[name] = handle
+
+    async def stop(self):
+        """Elimina la suscripción del servidor y cancela las esperas pendientes."""
+
+        for waiters in self._waiters.values():
+            for _, future in waiters:
+                if not future.done():
+                    future.cancel()
+        self._waiters.clear()
+
+        if self.subscription is not None:
+            try:
+                await self.subscription.delete()
+            except Exception as e:
+                logger.warning(f"Error eliminando suscripción: {e}")
+            self.subscription = None
+
+    async def recreate(self, client):
+        """
+        Crea de nuevo la suscripción en la sesión de otro Client.
+
+        Usa los NodeIds ya resueltos de los tags: no hay browse ni
+        traducción de nombres, un único CreateMonitoredItems.
+        """
+
+        tags = self.tags
+        self.client = client
+        self.subscription = None
+        self._handles.clear()
+        await self.start(tags)
+        self.retargeted = False
+
+    def retarget(self, tags: dict):
+        """
+        Nuevos NodeIds para {nombre: node_id} (p. ej. tras un cambio de
+        NamespaceArray). Los MonitoredItems existentes siguen apuntando a
+        los viejos: recreate() crea la suscripción con los nuevos.
+        """
+
+        current = self.tags
+        current.update((name, node_id) for name, node_id in tags.items() if name in current)
+        self._names = {self.client.get_node(node_id).nodeid: name for name, node_id in current.items()}
+        self.retargeted = True
+
+    @property
+    def tags(self) -> dict:
+        """{nombre: NodeId} de los tags de la suscripción."""
+        return {name: node_id for node_id, name in self._names.items()}
+
+    def monitors(self, name: str) -> bool:
+        """True si el tag está monitoreado por esta suscripción."""
+        return name in self._handles
+
+    def on_change(self, name: str, callback):
+        """Registra callback(name, value) que se llama en cada cambio del tag."""
+        self._callbacks.setdefault(name, []).append(callback)
+
+    def on_data(self, callback):
+        """Registra callback(name, data_value) para los cambios de todos los tags."""
+        self._listeners.append(callback)
+
+    def remove_callback(self, name: str, callback):
+        """Quita un callback registrado con on_change()."""
+        callbacks = self._callbacks.get(name, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    async def wait_for(self, name: str, predicate=bool, timeout=None):
+        """
+        Espera hasta que predicate(valor) sea verdadero para el tag.
+
+        Si el último valor recibido ya cumple la condición retorna de inmediato.
+        Lanza asyncio.TimeoutError si no se cumple dentro del timeout.
+        """
+
+        if name in self.values and predicate(self.values[name]):
+            return self.values[name]
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (predicate, future)
+        waiters = self._waiters.setdefault(name, [])
+        waiters.append(entry)
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if entry in waiters:
+                waiters.remove(entry)
+
+    async def wait_for_any(self, conditions: dict, timeout=None):
+        """
+        Espera a que se cumpla cualquiera de {nombre: predicate}.
+
+        Retorna la tupla (nombre, valor) de la primera condición cumplida.
+        """
+
+        tasks = {
+            asyncio.ensure_future(self.wait_for(name, predicate)): name
+            for name, predicate in conditions.items()
+        }
+
+        try:
+            done, _ = await asyncio.wait(
+                tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise asyncio.TimeoutError()
+            task = done.pop()
+            return tasks[task], task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # ========================================================================
+    # HANDLER DE ASYNCUA
+    # ========================================================================
+
+    def datachange_notification(self, node, val, data):
+        """Llamado por asyncua cada vez que el servidor publica un cambio."""
+
+        name = self._names.get(node.nodeid)
+        if name is None:
+            return
+
+        self.notifications += 1
+        self.values[name] = val
+
+        for callback in self._listeners:
+            try:
+                callback(name, data.monitored_item.Value)
+            except Exception as e:
+                logger.error(f"Error en listener de {name}: {e}")
+
+        for callback in list(self._callbacks.get(name, [])):
+            try:
+                callback(name, val)
+            except Exception as e:
+                logger.error(f"Error en callback de {name}: {e}")
+
+        for predicate, future in list(self._waiters.get(name, [])):
+            if future.done():
+                continue
+            try:
+                if predicate(val):
+                    future.set_result(val)
+            except Exception as e:
+                future.set_exception(e)
+
+    def status_change_notification(self, status):
+        """Llamado por asyncua cuando cambia el estado de la suscripción."""
+        logger.warning(f"Estado de suscripción: {status}")
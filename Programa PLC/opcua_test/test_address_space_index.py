@@ -0,0 +1,131 @@
+"""
+================================================================================
+    TEST DE INVALIDACIÓN DEL ÍNDICE POR ModelChangeEvents
+
+    Servidor asyncua local con Objects/Plant/StationNN/FolderN/TagNN:
+
+    1. refresh() inicial: recorrido completo y suscripción a
+       GeneralModelChangeEventType
+    2. En una carpeta se borra un tag y se agrega otro (mismo número de
+       referencias: el refresco incremental por sí solo no la vuelve a
+       recorrer) y el servidor emite el ModelChangeEvent de la carpeta
+    3. El evento marca la carpeta como sucia; el siguiente refresh()
+       re-expande sólo esa rama, el tag nuevo aparece, el borrado
+       desaparece y la marca se limpia
+    4. Un evento sobre un nodo que el índice no conoce pide recorrido
+       completo (FULL_REFRESH)
+
+    Ejecutar con: python test_address_space_index.py
+================================================================================
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from asyncua import Client, Server, ua
+
+from address_space_index import FULL_REFRESH, AddressSpaceIndex
+
+TEST_URL = "opc.tcp://127.0.0.1:48431"
+NAMESPACE_URI = "urn:Syngenta:APL:IndexTest"
+STATIONS = 3
+FOLDERS = 2
+TAGS = 10
+EVENT_TIMEOUT_S = 5.0
+
+logging.getLogger("asyncua").setLevel(logging.ERROR)
+logging.getLogger("AddressSpaceIndex").setLevel(logging.WARNING)
+
+
+async def build_server():
+    server = Server()
+    await server.init()
+    server.set_endpoint(TEST_URL)
+    idx = await server.register_namespace(NAMESPACE_URI)
+
+    plant = await server.nodes.objects.add_folder(ua.NodeId("Plant", idx), "Plant")
+    for s in range(STATIONS):
+        station = await plant.add_folder(ua.NodeId(f"Station{s:02d}", idx), f"Station{s:02d}")
+        for f in range(FOLDERS):
+            folder = await station.add_folder(ua.NodeId(f"Station{s:02d}.Folder{f}", idx), f"Folder{f}")
+            for v in range(TAGS):
+                await folder.add_variable(ua.NodeId(f"Station{s:02d}.Folder{f}.Tag{v:02d}", idx),
+                                          f"Tag{v:02d}", v, ua.VariantType.Int32)
+    return server, idx
+
+
+async def emit_model_change(generator, affected: ua.NodeId, verb: int):
+    generator.event.Changes = [ua.ModelChangeStructureDataType(
+        Affected=affected, AffectedType=ua.NodeId(ua.ObjectIds.FolderType), Verb=verb)]
+    await generator.trigger()
+
+
+async def wait_dirty(index, path: str):
+    deadline = time.monotonic() + EVENT_TIMEOUT_S
+    while path not in index.dirty_paths():
+        assert time.monotonic() < deadline, f"el ModelChangeEvent no marcó {path}"
+        await asyncio.sleep(0.05)
+
+
+async def main():
+    print("=" * 70)
+    print("🧪 TEST: ÍNDICE DEL ADDRESS SPACE + ModelChangeEvents")
+    print("=" * 70)
+
+    server, idx = await build_server()
+    directory = tempfile.mkdtemp(prefix="address_space_index_test_")
+    path = os.path.join(directory, "address_space_index.db")
+    index = AddressSpaceIndex(TEST_URL, path)
+    try:
+        async with server:
+            generator = await server.get_event_generator(ua.ObjectIds.GeneralModelChangeEventType,
+                                                          server.nodes.server)
+            # asyncua guarda el DataType de Changes (ns=0;i=877) como tipo del
+            # Variant; el servidor sólo sabe mandarlo como ExtensionObject
+            generator.event.data_types["Changes"] = ua.VariantType.ExtensionObject
+            async with Client(TEST_URL, watchdog_intervall=10.0) as client:
+                stats = await index.refresh(client)
+                assert index.watching, "refresh() no se suscribió a ModelChangeEvents"
+                total = index.node_count
+                print(f"  Recorrido inicial: {total} nodos, {stats['expanded']} expandidos, suscripto")
+
+                # Borrar un tag y agregar otro en la misma carpeta
+                folder_id = ua.NodeId("Station01.Folder1", idx)
+                folder_path = index.path_for_nodeid(folder_id)
+                await server.delete_nodes([server.get_node(ua.NodeId("Station01.Folder1.Tag05", idx))])
+                await server.get_node(folder_id).add_variable(
+                    ua.NodeId("Station01.Folder1.Tag99", idx), "Tag99", 99, ua.VariantType.Int32)
+                await emit_model_change(generator, folder_id, ua.ModelChangeStructureVerbMask.ReferenceAdded
+                                        | ua.ModelChangeStructureVerbMask.ReferenceDeleted)
+                await wait_dirty(index, folder_path)
+                print(f"  ✅ ModelChangeEvent -> sucio: {folder_path}")
+
+                stats = await index.refresh(client)
+                names = [row["name"] for row in index.children(folder_path)]
+                assert "Tag99" in names and "Tag05" not in names, names
+                assert not index.dirty_paths(), index.dirty_paths()
+                assert index.node_count == total
+                assert stats["expanded"] < total / 2, stats
+                print(f"  ✅ Refresco incremental: {stats['expanded']} nodos expandidos de {total}, "
+                      f"Tag99 indexado, Tag05 borrado, marcas limpias")
+
+                # Nodo que el índice no conoce: no se sabe dónde cuelga
+                await emit_model_change(generator, ua.NodeId("NoIndexado", idx),
+                                        ua.ModelChangeStructureVerbMask.NodeAdded)
+                await wait_dirty(index, FULL_REFRESH)
+                stats = await index.refresh(client)
+                assert not index.dirty_paths() and stats["skipped"] == 0, stats
+                print(f"  ✅ Nodo desconocido -> recorrido completo ({stats['expanded']} expandidos)")
+
+                await index.stop_watching()
+    finally:
+        index.close()
+        os.remove(path)
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,233 @@
+"""
+================================================================================
+    TEST DEL PROXY AGREGADOR: 50 CLIENTES LOCALES, UNA SESIÓN AL EQUIPO
+
+    gateway_simulator.py (tags del gateway + sintéticos con dinámica) hace
+    de equipo y aggregating_proxy.py se conecta a él. Se cuentan las
+    peticiones que el proxy envía aguas arriba (RequestCounter):
+
+    1. Carga: 1 cliente y luego 50 clientes locales, cada uno suscrito a
+       los tags del gateway y a tags sintéticos que cambian, leyendo en
+       bucle. La carga aguas arriba debe ser la misma en los dos casos.
+    2. Write a través del proxy: UUIDReq -> UUID_pull llega a la
+       suscripción local del cliente.
+    3. maxAge: con el piso por defecto, 50 Reads con maxAge=0 salen de la
+       caché; sin piso van al equipo, pero los Reads simultáneos de los
+       mismos nodos se comparten.
+    4. Caída del equipo: los valores pasan a UncertainLastUsableValue y
+       vuelven a Good al reconectar.
+
+    Ejecutar con: python test_aggregating_proxy.py [clientes] [segundos]
+================================================================================
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import random
+import sys
+import time
+
+from asyncua import Client, ua
+
+from aggregating_proxy import MAX_AGE_FLOOR_MS, PROBE_INTERVAL_S, RECONNECT_INTERVAL_S, AggregatingProxy
+from benchmark_utils import RequestCounter, Stopwatch
+from gateway_simulator import GatewaySimulator
+from simulated_address_space import synthetic_source
+from tag_subscription import TagSubscription
+
+logging.getLogger("asyncua").setLevel(logging.CRITICAL)
+logging.getLogger("GatewaySimulator").setLevel(logging.WARNING)
+logging.getLogger("SimulatedAddressSpace").setLevel(logging.WARNING)
+logging.getLogger("AggregatingProxy").setLevel(logging.ERROR)
+logging.getLogger("TagSubscription").setLevel(logging.ERROR)
+
+SIMULATOR_URL = "opc.tcp://127.0.0.1:48418"
+PROXY_URL = "opc.tcp://127.0.0.1:48419"
+CLIENTS = 50
+PHASE_S = 5.0
+SYNTHETIC = (10, 50)                 # Estaciones x tags
+DYNAMICS = "toggle=0.2@5,walk=0.2@2"
+TAGS_PER_CLIENT = 20                 # Sintéticos por cliente, además de los del gateway
+READ_INTERVAL_S = 0.2
+# Simulador, proxy y clientes comparten el loop; el watchdog de 1 s por
+# defecto daría conexiones por perdidas bajo carga
+WATCHDOG_S = 10.0
+
+GATEWAY_TAGS = ["EgComIn_Heartbeat", "EgComIn_RecordNotFound", "EgComIn_WriteToDb_Confirmation",
+                "EgComIn_UUID_pull", "EgComOut_BarcodeReq", "EgComOut_BarcodeValue",
+                "EgComOut_UUIDReq", "EgComOut_WriteToDb", "SimulationCounter"]
+
+
+async def start_simulator():
+    simulator = GatewaySimulator(SIMULATOR_URL, sources=[synthetic_source(*SYNTHETIC)], dynamics=DYNAMICS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await simulator.start_background()
+    return simulator
+
+
+async def read_max_age(client, node_ids, max_age):
+    params = ua.ReadParameters()
+    params.MaxAge = max_age
+    params.TimestampsToReturn = ua.TimestampsToReturn.Both
+    for node_id in node_ids:
+        rv = ua.ReadValueId()
+        rv.NodeId = node_id
+        rv.AttributeId = ua.AttributeIds.Value
+        params.NodesToRead.append(rv)
+    return await client.uaclient.read(params)
+
+
+async def local_client(index, tags, duration, results):
+    """Cliente local: suscripción a sus tags y Reads periódicos."""
+
+    rng = random.Random(index)
+    async with Client(PROXY_URL, watchdog_intervall=WATCHDOG_S) as client:
+        subscription = TagSubscription(client, publishing_interval=100, queue_size=10)
+        await subscription.start({node_id.to_string(): node_id for node_id in tags})
+        reads = 0
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            await read_max_age(client, rng.sample(tags, 5), 0)
+            reads += 1
+            await asyncio.sleep(READ_INTERVAL_S)
+        await subscription.stop()
+        results.append((subscription.notifications, reads))
+
+
+async def run_load(proxy, counter, clients, tags_for, duration):
+    counter.reset()
+    stats = dict(proxy.stats)
+    results = []
+    with Stopwatch() as sw:
+        await asyncio.gather(*(local_client(i, tags_for(i), duration, results) for i in range(clients)))
+    seconds = sw.ms / 1000
+
+    notifications = sum(n for n, _ in results)
+    reads = sum(r for _, r in results)
+    upstream = ", ".join(f"{kind.replace('Request', '')} {count / seconds:.1f}"
+                         for kind, count in sorted(counter.counts.items()))
+    print(f"  {clients:3d} clientes: {reads:5d} Reads y {notifications:6d} notificaciones locales | "
+          f"aguas arriba {counter.total / seconds:5.1f} peticiones/s ({upstream})")
+    print(f"               Reads aguas arriba: {proxy.stats['upstream_reads'] - stats.get('upstream_reads', 0)}, "
+          f"CreateMonitoredItems: {proxy.stats['upstream_monitor_requests'] - stats.get('upstream_monitor_requests', 0)}")
+    return counter.total / seconds, results
+
+
+async def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else CLIENTS
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else PHASE_S
+
+    print("=" * 70)
+    print("🧪 TEST: PROXY AGREGADOR (una sesión aguas arriba)")
+    print("=" * 70)
+
+    simulator = await start_simulator()
+    proxy = AggregatingProxy(SIMULATOR_URL, PROXY_URL)
+    await proxy.start()
+    counter = RequestCounter(proxy.client).install()
+    print(f"  Equipo: {SIMULATOR_URL} | Proxy: {PROXY_URL} | "
+          f"{len(proxy.variables)} variables espejadas")
+
+    ns = simulator.namespace_idx
+    gateway = [ua.NodeId(tag, ns) for tag in GATEWAY_TAGS]
+    # Tags sintéticos que cambian (los que mueve la dinámica del simulador)
+    synthetic = [node_id for engine in simulator.engines
+                 for _, _, members in engine.groups for node_id, _, _ in members]
+
+    def tags_for(index):
+        return gateway + random.Random(index).sample(synthetic, TAGS_PER_CLIENT)
+
+    try:
+        # ====================================================================
+        print(f"\n▶ Carga: 1 vs {clients} clientes durante {duration:.0f} s")
+        print("-" * 70)
+        # Calentamiento: que los tags de todos los clientes ya estén suscritos
+        await run_load(proxy, counter, clients, tags_for, 1.0)
+        single, _ = await run_load(proxy, counter, 1, tags_for, duration)
+        many, results = await run_load(proxy, counter, clients, tags_for, duration)
+        assert all(n > 0 for n, _ in results), "clientes sin notificaciones"
+        assert many < single * 1.5 + 1, f"la carga aguas arriba creció: {single:.1f}/s -> {many:.1f}/s"
+        print(f"  ✅ Carga aguas arriba constante: {single:.1f}/s con 1 cliente, {many:.1f}/s con {clients}")
+
+        # ====================================================================
+        print("\n▶ Write a través del proxy (UUIDReq -> UUID_pull)")
+        print("-" * 70)
+        async with Client(PROXY_URL, watchdog_intervall=WATCHDOG_S) as client:
+            subscription = TagSubscription(client, publishing_interval=10)
+            await subscription.start({"UUID_pull": ua.NodeId("EgComIn_UUID_pull", ns)})
+            await asyncio.sleep(0.3)
+            previous = subscription.values.get("UUID_pull")
+            request = client.get_node(ua.NodeId("EgComOut_UUIDReq", ns))
+            with Stopwatch() as sw:
+                await request.write_value(True)
+                value = await subscription.wait_for("UUID_pull", lambda v: v != previous, timeout=3)
+            await request.write_value(False)
+            await subscription.stop()
+        upstream_value = await simulator.tags["UUID_pull"].read_value()
+        assert value == upstream_value, "el valor del proxy no coincide con el equipo"
+        print(f"  ✅ UUID recibido por la suscripción local en {sw.ms:.1f} ms (igual al del equipo)")
+
+        # ====================================================================
+        print(f"\n▶ maxAge=0 desde {clients} clientes a la vez")
+        print("-" * 70)
+        sample = random.Random(0).sample(synthetic, 20)
+        local = [Client(PROXY_URL, watchdog_intervall=WATCHDOG_S) for _ in range(clients)]
+        await asyncio.gather(*(c.connect() for c in local))
+        try:
+            for floor in (proxy.max_age_floor_ms, 0):
+                proxy.max_age_floor_ms = floor
+                before = proxy.stats["upstream_reads"], proxy.stats["shared_reads"]
+                replies = await asyncio.gather(*(read_max_age(c, sample, 0) for c in local))
+                reads = proxy.stats["upstream_reads"] - before[0]
+                shared = proxy.stats["shared_reads"] - before[1]
+                assert all(dv.StatusCode.is_good() for reply in replies for dv in reply)
+                print(f"  Piso {floor:5.0f} ms: {clients} Reads locales -> {reads} Reads aguas arriba "
+                      f"({shared} nodos servidos por un Read ya en curso)")
+                if floor:
+                    assert reads == 0, "con el piso los Reads deberían salir de la caché"
+                else:
+                    assert 0 < reads < clients, "los Reads simultáneos no se compartieron"
+            proxy.max_age_floor_ms = MAX_AGE_FLOOR_MS
+        finally:
+            await asyncio.gather(*(c.disconnect() for c in local), return_exceptions=True)
+        print("  ✅ maxAge respetado, Reads simultáneos compartidos")
+
+        # ====================================================================
+        print("\n▶ Caída y vuelta del equipo")
+        print("-" * 70)
+        async with Client(PROXY_URL, watchdog_intervall=WATCHDOG_S) as client:
+            heartbeat = [ua.NodeId("EgComIn_Heartbeat", ns)]
+
+            async def status():
+                return (await read_max_age(client, heartbeat, 0))[0].StatusCode
+
+            await simulator.stop()
+            with Stopwatch() as sw:
+                while (await status()).is_good():
+                    await asyncio.sleep(0.1)
+            lost = await status()
+            print(f"  Equipo detenido: {lost.name} tras {sw.ms / 1000:.1f} s "
+                  f"(sondeo cada {PROBE_INTERVAL_S:.0f} s)")
+            assert lost.value == ua.StatusCodes.UncertainLastUsableValue
+
+            simulator = await start_simulator()
+            counter.uninstall()
+            with Stopwatch() as sw:
+                while not (await status()).is_good():
+                    await asyncio.sleep(0.1)
+            print(f"  Equipo de vuelta: Good tras {sw.ms / 1000:.1f} s "
+                  f"(reintento cada {RECONNECT_INTERVAL_S:.0f} s), {proxy.stats['reconnects']} reconexión")
+        print("  ✅ Caché marcada como incierta durante la caída y recuperada al reconectar")
+
+        print("\n📈 Contadores del proxy")
+        proxy.print_stats()
+    finally:
+        counter.uninstall()
+        await proxy.stop()
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,9 +5,15 @@
     Este script prueba diferentes formatos de NodeId para encontrar
     el correcto para tu PLC. Esto es clave para resolver el problema
     de "identificadores no legibles" mencionado en la reunión.
+    
+    Con asyncua todas las combinaciones namespace x formato se comprueban
+    en una sola petición Read (NodeIdResolver.probe) y el resultado se
+    reporta también por URI, que no cambia al reordenarse los namespaces.
 ================================================================================
 """
 
+import asyncio
+import importlib.util
 import sys
 
 try:
@@ -15,7 +21,6 @@ try:
     OPCUA_AVAILABLE = True
 except ImportError:
     try:
-        import asyncio
         from asyncua import Client as AsyncClient
         OPCUA_AVAILABLE = True
         ASYNC_MODE = True
@@ -166,6 +171,8 @@ def test_with_opcua():
 async def test_with_asyncua():
     """Versión asíncrona con asyncua."""
     from asyncua import Client
+    from batch_io import BatchIO
+    from nodeid_resolver import NodeIdResolver
     
     print("=" * 70)
     print("PRUEBA DE FORMATOS DE NODEID (asyncua)")
@@ -182,40 +189,42 @@ async def test_with_asyncua():
         
         # Mostrar namespaces disponibles
         print("--- Namespaces Disponibles ---")
-        ns_array = await client.get_namespace_array()
+        resolver = NodeIdResolver(client, SERVER_URL)
+        ns_array = await resolver.load()
         for i, ns in enumerate(ns_array):
             print(f"  ns={i}: {ns}")
         print()
         
-        # Probar cada combinación
+        # Todas las combinaciones en una sola petición Read
         print("--- Probando Formatos de NodeId ---")
         
-        found_formats = []
+        candidates = [
+            node_id
+            for ns in NAMESPACE_RANGE if ns < len(ns_array)
+            for node_id in generate_nodeid_formats(TEST_TAG, ns)
+        ]
+        status_codes = await resolver.probe(candidates)
+        found = [node_id for node_id, status in zip(candidates, status_codes) if status.is_good()]
+        print(f"  {len(candidates)} combinaciones comprobadas en una petición")
         
-        for ns in NAMESPACE_RANGE:
-            if ns >= len(ns_array):
-                break
-                
-            formats = generate_nodeid_formats(TEST_TAG, ns)
-            
-            for node_id in formats:
-                try:
-                    node = client.get_node(node_id)
-                    value = await node.read_value()
-                    print(f"✓ ENCONTRADO: {node_id}")
-                    print(f"  Valor: {value}\n")
-                    found_formats.append({
-                        "node_id": node_id,
-                        "value": value
-                    })
-                except:
-                    pass
+        found_formats = []
+        if found:
+            batch = BatchIO(client)
+            for node_id, dv in zip(found, await batch.read(found)):
+                value = dv.Value.Value if dv.Value is not None else None
+                print(f"✓ ENCONTRADO: {node_id}")
+                print(f"  Estable: {resolver.expanded(node_id)}")
+                print(f"  Valor: {value}\n")
+                found_formats.append({
+                    "node_id": node_id,
+                    "value": value
+                })
         
         # Resumen
         print("=" * 70)
         if found_formats:
             print(f"✓ Formatos válidos encontrados: {len(found_formats)}")
-            print(f"  Recomendado: {found_formats[0]['node_id']}")
+            print(f"  Recomendado: {resolver.expanded(found_formats[0]['node_id'])}")
         else:
             print("✗ No se encontró ningún formato válido")
             print("  Usar UaExpert para explorar manualmente")
@@ -232,13 +241,11 @@ def main():
         print("Instalar: pip install opcua  o  pip install asyncua")
         return
     
-    # Intentar con opcua primero
-    try:
-        from opcua import Client
-        test_with_opcua()
-    except ImportError:
-        import asyncio
+    # asyncua primero: todas las combinaciones en una sola petición
+    if importlib.util.find_spec("asyncua"):
         asyncio.run(test_with_asyncua())
+    else:
+        test_with_opcua()
 
 
 if __name__ == "__main__":
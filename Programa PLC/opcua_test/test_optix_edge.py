@@ -13,6 +13,8 @@
 import asyncio
 from asyncua import Client
 
+from attribute_cache import AttributeCache
+
 # ============================================================================
 # CONFIGURACIÓN CORRECTA PARA OPTIX EDGE
 # ============================================================================
@@ -108,14 +110,20 @@ async def test_read_tags():
         success_count = 0
         error_count = 0
         
-        for tag in DISCOVERED_TAGS:
+        # Tipos desde cache/attribute_cache.json; valores en un solo Read
+        cache = AttributeCache(client, SERVER_URL)
+        node_ids = [tag['node_id'] for tag in DISCOVERED_TAGS]
+        attributes = await cache.fill(node_ids)
+        data_values = await cache.read_values(node_ids)
+        
+        for tag, dv in zip(DISCOVERED_TAGS, data_values):
             print(f"\n--- {tag['name']} ---")
             print(f"NodeId: {tag['node_id']}")
             
             try:
-                node = client.get_node(tag['node_id'])
-                value = await node.read_value()
-                data_type = await node.read_data_type_as_variant_type()
+                dv.StatusCode.check()
+                value = dv.Value.Value
+                data_type = attributes[tag['node_id']]["VariantType"]
                 
                 print(f"✓ Valor: {value}")
                 print(f"  Tipo: {data_type}")
@@ -4,7 +4,7 @@ Test de Conexión OPC UA - FactoryTalk Optix Gateway
 Script para probar conectividad con Optix y verificar tags del Edge Gateway.
 
 Servidor: opc.tcp://192.168.101.100:59100
-Namespace: 9
+Namespace: 9 (se resuelve por URI; el índice cambia si Optix recarga namespaces)
 
 Tags a verificar:
 - GlobalVars.EgComIn_Heartbeat           [Boolean]
@@ -22,12 +22,19 @@ import sys
 from datetime import datetime
 from asyncua import Client, ua
 
+from batch_io import BatchIO
+from nodeid_resolver import NodeIdResolver
+
 # ============================================================================
 # CONFIGURACIÓN
 # ============================================================================
 OPTIX_URL = "opc.tcp://192.168.101.100:59100"
 NAMESPACE = 9
 
+# URI del namespace de GlobalVars (ver TEST 2). None = tomar el URI que hoy
+# está en ns=NAMESPACE; fijarlo aquí para no depender del índice.
+NAMESPACE_URI = None
+
 # Tags del Edge Gateway
 GATEWAY_TAGS = {
     # Inputs TO PLC (Gateway escribe estos)
@@ -42,6 +49,9 @@ GATEWAY_TAGS = {
     "EgComOut_WriteToDb": "Boolean",
 }
 
+# NodeIds de la sesión actual (resolve_gateway_tags)
+NODE_IDS = {}
+
 # ============================================================================
 # UTILIDADES DE IMPRESIÓN
 # ============================================================================
@@ -107,7 +117,8 @@ async def explore_namespaces(client: Client):
         ns_array = await client.get_namespace_array()
         print_info(f"Namespaces disponibles ({len(ns_array)}):")
         for i, ns in enumerate(ns_array):
-            marker = " ◄── OBJETIVO" if i == NAMESPACE else ""
+            target = ns == NAMESPACE_URI if NAMESPACE_URI else i == NAMESPACE
+            marker = " ◄── OBJETIVO" if target else ""
             print(f"      ns={i}: {ns}{marker}")
         
         if NAMESPACE < len(ns_array):
@@ -118,6 +129,21 @@ async def explore_namespaces(client: Client):
     except Exception as e:
         print_error(f"Error explorando namespaces: {e}")
 
+async def resolve_gateway_tags(client: Client) -> NodeIdResolver:
+    """Traduce los tags de GlobalVars al índice de namespace de esta sesión"""
+    resolver = NodeIdResolver(client, OPTIX_URL)
+    await resolver.load()
+    
+    try:
+        uri = NAMESPACE_URI or resolver.uri(NAMESPACE)
+        specs = {tag: f"nsu={uri};s=GlobalVars.{tag}" for tag in GATEWAY_TAGS}
+        NODE_IDS.update(await resolver.resolve(specs))
+        print_info(f"Namespace {uri} -> ns={resolver.index(uri)}")
+    except (IndexError, KeyError) as e:
+        print_error(f"No se pudo resolver el namespace ({e}), usando ns={NAMESPACE}")
+        NODE_IDS.update({tag: f"ns={NAMESPACE};s=GlobalVars.{tag}" for tag in GATEWAY_TAGS})
+    return resolver
+
 async def explore_namespace_nodes(client: Client):
     """Explora nodos en el namespace objetivo"""
     print_section("TEST 3: Explorar Nodos en Namespace 9")
@@ -144,35 +170,34 @@ async def explore_namespace_nodes(client: Client):
     except Exception as e:
         print_error(f"Error explorando nodos: {e}")
 
-async def find_globalvars_node(client: Client):
+async def find_globalvars_node(client: Client, resolver: NodeIdResolver):
     """Intenta encontrar el nodo GlobalVars de diferentes formas"""
     print_section("TEST 4: Buscar GlobalVars")
     
-    # Diferentes formatos de NodeID a probar
+    ns = int(NODE_IDS["EgComIn_Heartbeat"].split(";")[0][3:])
+    
+    # Diferentes formatos de NodeID a probar (una sola petición Read)
     node_formats = [
-        f"ns={NAMESPACE};s=GlobalVars",
-        f"ns={NAMESPACE};s=GlobalVars.EgComIn_Heartbeat",
-        f"ns={NAMESPACE};s=Root.GlobalVars",
-        f"ns={NAMESPACE};s=Root.GlobalVars.EgComIn_Heartbeat",
-        f"ns={NAMESPACE};s=/GlobalVars",
-        f"ns={NAMESPACE};s=/GlobalVars/EgComIn_Heartbeat",
-        f"ns={NAMESPACE};s=Objects.GlobalVars",
-        f"ns={NAMESPACE};s=EgComIn_Heartbeat",
+        f"ns={ns};s=GlobalVars",
+        f"ns={ns};s=GlobalVars.EgComIn_Heartbeat",
+        f"ns={ns};s=Root.GlobalVars",
+        f"ns={ns};s=Root.GlobalVars.EgComIn_Heartbeat",
+        f"ns={ns};s=/GlobalVars",
+        f"ns={ns};s=/GlobalVars/EgComIn_Heartbeat",
+        f"ns={ns};s=Objects.GlobalVars",
+        f"ns={ns};s=EgComIn_Heartbeat",
     ]
     
     print_info("Probando diferentes formatos de NodeID:")
     
     found_format = None
-    for node_format in node_formats:
-        try:
-            node = client.get_node(node_format)
-            value = await node.read_value()
-            print_ok(f"ENCONTRADO: {node_format} = {value}")
+    status_codes = await resolver.probe(node_formats)
+    for node_format, status in zip(node_formats, status_codes):
+        if status.is_good():
+            print_ok(f"ENCONTRADO: {node_format}")
             found_format = node_format
-        except Exception as e:
-            error_short = str(e).split('\n')[0][:50]
+        else:
             print(f"      ✗ {node_format}")
-            # print(f"        Error: {error_short}...")
     
     return found_format
 
@@ -180,27 +205,13 @@ async def read_all_tags(client: Client, base_format: str = None):
     """Lee todos los tags del gateway"""
     print_section("TEST 5: Leer Tags del Gateway")
     
-    # Si encontramos un formato válido, usarlo
     if base_format:
-        # Extraer el patrón base
-        if "EgCom" in base_format:
-            base = base_format.rsplit(".", 1)[0] if "." in base_format else f"ns={NAMESPACE};s=GlobalVars"
-        else:
-            base = base_format
-    else:
-        base = f"ns={NAMESPACE};s=GlobalVars"
-    
-    print_info(f"Usando base: {base}")
+        print_info(f"Formato encontrado: {base_format}")
     print_info("Leyendo tags:")
     
     results = {}
     for tag_name, expected_type in GATEWAY_TAGS.items():
-        node_id = f"{base}.{tag_name}" if not base.endswith(tag_name) else base
-        # Si el base ya tiene el prefijo ns=X;s=, construir correctamente
-        if not node_id.startswith("ns="):
-            node_id = f"ns={NAMESPACE};s=GlobalVars.{tag_name}"
-        else:
-            node_id = f"ns={NAMESPACE};s=GlobalVars.{tag_name}"
+        node_id = NODE_IDS[tag_name]
             
         try:
             node = client.get_node(node_id)
@@ -218,7 +229,7 @@ async def test_heartbeat_write(client: Client):
     """Prueba escribir al tag Heartbeat"""
     print_section("TEST 6: Prueba de Escritura (Heartbeat)")
     
-    node_id = f"ns={NAMESPACE};s=GlobalVars.EgComIn_Heartbeat"
+    node_id = NODE_IDS["EgComIn_Heartbeat"]
     
     try:
         node = client.get_node(node_id)
@@ -257,11 +268,10 @@ async def monitor_tags_live(client: Client, duration: int = 30):
     
     tag_names = list(GATEWAY_TAGS.keys())
     
-    # Obtener nodos
-    nodes = {}
-    for tag in tag_names:
-        node_id = f"ns={NAMESPACE};s=GlobalVars.{tag}"
-        nodes[tag] = client.get_node(node_id)
+    # NodeIds de todos los tags: se leen juntos en una sola petición Read
+    node_ids = [NODE_IDS[tag] for tag in tag_names]
+    batch = BatchIO(client)
+    await batch.load_limits()
     
     # Cabecera
     print(f"  {'TIMESTAMP':<12} | ", end="")
@@ -277,16 +287,13 @@ async def monitor_tags_live(client: Client, duration: int = 30):
     try:
         while asyncio.get_event_loop().time() - start_time < duration:
             values = {}
-            changed = False
             
-            for tag, node in nodes.items():
-                try:
-                    value = await node.read_value()
-                    values[tag] = value
-                    if tag in last_values and last_values[tag] != value:
-                        changed = True
-                except:
-                    values[tag] = "ERR"
+            try:
+                data_values = await batch.read(node_ids)
+                for tag, dv in zip(tag_names, data_values):
+                    values[tag] = dv.Value.Value if dv.StatusCode.is_good() else "ERR"
+            except Exception:
+                values = dict.fromkeys(tag_names, "ERR")
             
             # Imprimir línea
             print(f"  {timestamp():<12} | ", end="")
@@ -372,8 +379,7 @@ async def write_specific_tag(client: Client):
             print_error(f"Tipo {tag_type} no soportado para escritura manual")
             return
         
-        node_id = f"ns={NAMESPACE};s=GlobalVars.{tag_name}"
-        node = client.get_node(node_id)
+        node = client.get_node(NODE_IDS[tag_name])
         
         await node.write_value(ua.DataValue(ua.Variant(new_value, variant_type)))
         
@@ -410,12 +416,13 @@ async def main():
         
         # Test 2: Namespaces
         await explore_namespaces(client)
+        resolver = await resolve_gateway_tags(client)
         
         # Test 3: Explorar nodos
         await explore_namespace_nodes(client)
         
         # Test 4: Buscar GlobalVars
-        found_format = await find_globalvars_node(client)
+        found_format = await find_globalvars_node(client, resolver)
         
         # Test 5: Leer tags
         await read_all_tags(client, found_format)
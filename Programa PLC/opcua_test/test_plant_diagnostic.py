@@ -0,0 +1,147 @@
+"""
+================================================================================
+    TEST DEL DIAGNÓSTICO DE PLANTA CONTRA ENDPOINTS LOCALES
+
+    plant_diagnostic.py con un inventario de endpoints locales:
+
+    - sano:     gateway_simulator.py, todos los tags y escritura de vuelta
+    - roto:     otro simulador con un namespace que no publica, un tag que
+                no existe y un tag de escritura de sólo lectura
+    - apagado:  puerto sin servidor (conexión rechazada)
+    - mudo:     acepta TCP pero nunca responde; se corta por el timeout
+                propio del endpoint y, en otra entrada, por el de petición
+
+    Verifica el estado de cada endpoint, que el mudo no demora al resto
+    (el total queda cerca de un timeout, no de la suma) y que el reporte
+    es un JSON válido. Compara contra correr los endpoints uno por uno.
+
+    Ejecutar con: python test_plant_diagnostic.py
+================================================================================
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import tempfile
+
+from benchmark_utils import Stopwatch
+from gateway_simulator import NAMESPACE_URI, GatewaySimulator
+from plant_diagnostic import FAIL, OK, PlantDiagnostic, print_report, write_report
+
+logging.getLogger("GatewaySimulator").setLevel(logging.WARNING)
+logging.getLogger("AttributeCache").setLevel(logging.WARNING)
+
+HEALTHY_URL = "opc.tcp://127.0.0.1:48426"
+BROKEN_URL = "opc.tcp://127.0.0.1:48427"
+OFF_PORT = 48428
+MUTE_PORT = 48429
+TIMEOUT_S = 2.0
+REQUEST_TIMEOUT_S = 1.0
+MUTE_TIMEOUT_S = 0.5
+
+
+def tag(name):
+    return f"nsu={NAMESPACE_URI};s={name}"
+
+
+INVENTORY = [
+    {
+        "name": "sano",
+        "url": HEALTHY_URL,
+        "namespaces": [NAMESPACE_URI],
+        "read": {"Heartbeat": tag("EgComIn_Heartbeat"), "UUID_pull": tag("EgComIn_UUID_pull")},
+        "write": {"BarcodeValue": tag("EgComOut_BarcodeValue")},
+    },
+    {
+        "name": "roto",
+        "url": BROKEN_URL,
+        "namespaces": [NAMESPACE_URI, "urn:no:publicado"],
+        "read": {"Heartbeat": tag("EgComIn_Heartbeat"), "NoExiste": tag("EgComIn_NoExiste")},
+        "write": {"SimulationCounter": tag("SimulationCounter")},
+    },
+    {"name": "apagado", "url": f"opc.tcp://127.0.0.1:{OFF_PORT}"},
+    # Timeout propio más corto que el de petición: lo corta el del endpoint
+    {"name": "mudo", "url": f"opc.tcp://127.0.0.1:{MUTE_PORT}", "timeout": MUTE_TIMEOUT_S},
+    {"name": "mudo_peticion", "url": f"opc.tcp://127.0.0.1:{MUTE_PORT}"},
+]
+
+
+async def start_mute():
+    """Servidor TCP que acepta conexiones y nunca contesta."""
+
+    connections = []
+
+    async def hold(reader, writer):
+        connections.append(writer)
+        await reader.read()
+
+    server = await asyncio.start_server(hold, "127.0.0.1", MUTE_PORT)
+    return server, connections
+
+
+async def main():
+    print("=" * 70)
+    print(f"🧪 TEST: DIAGNÓSTICO DE PLANTA ({len(INVENTORY)} endpoints locales)")
+    print("=" * 70)
+
+    simulators = [GatewaySimulator(HEALTHY_URL), GatewaySimulator(BROKEN_URL)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for simulator in simulators:
+            await simulator.start_background()
+    mute, connections = await start_mute()
+
+    directory = tempfile.mkdtemp(prefix="plant_diagnostic_test_")
+    report_path = os.path.join(directory, "plant_diagnostic.json")
+    try:
+        diagnostic = PlantDiagnostic(INVENTORY, TIMEOUT_S, REQUEST_TIMEOUT_S, write=True)
+        report = await diagnostic.run()
+        print_report(report)
+        write_report(report, report_path)
+
+        with open(report_path, encoding="utf-8") as f:
+            results = {result["name"]: result for result in json.load(f)["endpoints"]}
+
+        healthy = results["sano"]
+        assert healthy["status"] == OK, healthy
+        assert healthy["probes"]["server"]["state"] == "Running"
+        assert healthy["probes"]["read"]["tags"]["Heartbeat"]["type"] == "Boolean"
+        assert healthy["probes"]["write"]["tags"]["BarcodeValue"]["status"] == "Good"
+
+        broken = results["roto"]["probes"]
+        assert results["roto"]["status"] == FAIL
+        assert broken["namespaces"]["expected"]["urn:no:publicado"] is None
+        assert broken["read"]["tags"]["Heartbeat"]["status"] == "Good"
+        assert broken["read"]["tags"]["NoExiste"]["status"] == "BadNodeIdUnknown"
+        assert broken["write"]["tags"]["SimulationCounter"]["writable"] is False
+
+        assert results["apagado"]["probes"]["connect"]["status"] == FAIL
+        assert results["apagado"]["probes"]["read"]["status"] == "skipped"
+        assert "timeout del endpoint" in results["mudo"]["probes"]["connect"]["error"]
+        assert results["mudo"]["duration_ms"] < REQUEST_TIMEOUT_S * 1000
+        assert "sin respuesta" in results["mudo_peticion"]["probes"]["connect"]["error"]
+        assert report["duration_ms"] < TIMEOUT_S * 1000 * 1.5, "el endpoint mudo demoró al resto"
+        print(f"  ✅ Estados esperados; total {report['duration_ms'] / 1000:.1f} s con endpoints "
+              f"mudos cortados a {MUTE_TIMEOUT_S:g} s y {REQUEST_TIMEOUT_S:g} s")
+
+        print("\n▶ Uno por uno (como correr cada script a mano)")
+        print("-" * 70)
+        with Stopwatch() as sw:
+            for endpoint in INVENTORY:
+                await PlantDiagnostic([endpoint], TIMEOUT_S, REQUEST_TIMEOUT_S, write=True).run()
+        print(f"  En serie: {sw.ms / 1000:.1f} s   en paralelo: {report['duration_ms'] / 1000:.1f} s")
+    finally:
+        mute.close()
+        for writer in connections:
+            writer.close()
+        for simulator in simulators:
+            await simulator.stop()
+        if os.path.exists(report_path):
+            os.remove(report_path)
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,236 @@
+"""
+================================================================================
+    TEST DEL JOURNAL EN ANILLO: CAÍDAS A MITAD DE ESCRITURA Y REENVÍO
+
+    1. Caídas: un proceso hijo agrega registros a un journal chico (da la
+       vuelta muchas veces), hace flush cada pocos registros, libera (ack)
+       parte de los más antiguos y avisa por stdout qué es durable. El
+       padre lo mata con SIGKILL en un momento al azar; en algunas rondas
+       el hijo se mata solo a mitad de un registro (datos sin encabezado,
+       o encabezado con datos incompletos). Tras cada caída se reabre y se
+       verifica:
+       - no falta nada de lo confirmado como durable ni nada sin ack
+       - los registros son consecutivos y su contenido es el esperado
+    2. Reenvío: StoreAndForward con un destino caído unos segundos; lo
+       guardado se entrega en orden, sin pérdidas y al ritmo configurado.
+
+    Ejecutar con: python test_ring_journal.py [rondas]
+================================================================================
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+import zlib
+
+from ring_journal import _RECORD, RingJournal, StoreAndForward
+
+logging.getLogger("RingJournal").setLevel(logging.ERROR)
+
+JOURNAL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "test_journal.bin")
+CAPACITY = 4096 + 64 * 1024
+ROUNDS = 40
+FLUSH_EVERY = 7
+MAX_KILL_DELAY_S = 0.3
+
+OUTAGE_START_S = 0.3
+OUTAGE_S = 1.5
+DRAIN_RATE = 400.0
+STATIONS = 10
+SUBMIT_INTERVAL_S = 0.01
+
+
+def payload_for(seq: int) -> bytes:
+    """Contenido determinista del registro seq (largo variable)."""
+
+    digest = hashlib.sha256(str(seq).encode()).hexdigest().encode()
+    return f"{seq}:".encode() + digest * (1 + seq % 7)
+
+
+# ============================================================================
+# PROCESO HIJO
+# ============================================================================
+
+def child(path: str, seed: int, torn: bool):
+    rng = random.Random(seed)
+    journal = RingJournal(path, capacity=CAPACITY)
+    torn_at = rng.randrange(50, 400) if torn else None
+    appended = 0
+
+    def report(line: str):
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+    while True:
+        if torn_at is not None and appended == torn_at:
+            # Escritura cortada: datos sin encabezado, o encabezado con datos a medias
+            seq = journal.tail_seq
+            data = payload_for(seq)
+            position = journal._free_for(((_RECORD.size + len(data)) + 7) // 8 * 8)
+            if position is not None:
+                start = position + _RECORD.size
+                half = len(data) // 2
+                journal._map[start:start + half] = data[:half]
+                if seed % 2:
+                    _RECORD.pack_into(journal._map, position, 0x52454331, len(data), seq, zlib.crc32(data))
+            os.kill(os.getpid(), signal.SIGKILL)
+
+        if len(journal) and rng.random() < 0.3:
+            entries = journal.peek(rng.randrange(1, 10))
+            report(f"ACK {entries[-1][0]}")
+            journal.ack(entries[-1][0])
+
+        try:
+            journal.append(payload_for(journal.tail_seq))
+            appended += 1
+        except Exception:
+            # Lleno: liberar lo más antiguo
+            entries = journal.peek(20)
+            report(f"ACK {entries[-1][0]}")
+            journal.ack(entries[-1][0])
+            continue
+
+        if appended % FLUSH_EVERY == 0:
+            journal.flush()
+            report(f"DURABLE {journal.tail_seq}")
+
+
+# ============================================================================
+# CAÍDAS
+# ============================================================================
+
+def verify(path: str, durable_tail: int, acked: int) -> RingJournal:
+    journal = RingJournal(path)
+    assert journal.capacity == CAPACITY
+    entries = journal.peek(len(journal))
+    assert len(entries) == len(journal)
+    assert journal.head_seq <= acked + 1, f"se perdieron registros sin ack: head={journal.head_seq} ack={acked}"
+    assert journal.tail_seq >= durable_tail, f"se perdieron registros durables: tail={journal.tail_seq} < {durable_tail}"
+    for expected, (seq, data) in enumerate(entries, start=journal.head_seq):
+        assert seq == expected, f"seq {seq} != {expected}"
+        assert data == payload_for(seq), f"contenido inválido en seq {seq}"
+    return journal
+
+
+def run_crashes(rounds: int):
+    print(f"\n▶ {rounds} caídas (SIGKILL al azar y escrituras cortadas)")
+    print("-" * 70)
+
+    if os.path.exists(JOURNAL_FILE):
+        os.remove(JOURNAL_FILE)
+    RingJournal(JOURNAL_FILE, capacity=CAPACITY).close()
+
+    durable_tail, acked = 0, -1
+    recovered = discarded = 0
+    for round_ in range(rounds):
+        torn = round_ % 4 == 3
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--child", JOURNAL_FILE, str(round_), "1" if torn else "0"],
+            stdout=subprocess.PIPE, text=True,
+        )
+        if not torn:
+            time.sleep(random.uniform(0.05, MAX_KILL_DELAY_S))
+            process.send_signal(signal.SIGKILL)
+        output, _ = process.communicate()
+        for line in output.splitlines():
+            kind, value = line.split()
+            if kind == "DURABLE":
+                durable_tail = max(durable_tail, int(value))
+            else:
+                acked = max(acked, int(value))
+
+        journal = verify(JOURNAL_FILE, durable_tail, acked)
+        recovered += journal.recovered
+        discarded += journal.discarded_tail
+        print(f"  Ronda {round_ + 1:2d} {'(cortada)' if torn else '(SIGKILL)':<10} "
+              f"seq {journal.head_seq}..{journal.tail_seq}, {len(journal)} pendientes, "
+              f"{journal.recovered} recuperados tras el encabezado"
+              + (", registro incompleto descartado" if journal.discarded_tail else ""))
+        # Lo que quedó tras la recuperación es el nuevo piso
+        durable_tail = journal.tail_seq
+        acked = max(acked, journal.head_seq - 1)
+        journal.close()
+
+    print(f"\n  ✅ {rounds} caídas sin pérdidas ni corrupción "
+          f"({recovered} registros recuperados sin flush, {discarded} escrituras cortadas descartadas)")
+
+
+# ============================================================================
+# REENVÍO
+# ============================================================================
+
+async def run_forwarding():
+    print(f"\n▶ Reenvío: {STATIONS} estaciones, destino caído {OUTAGE_S} s, "
+          f"drenaje a {DRAIN_RATE:.0f} entradas/s")
+    print("-" * 70)
+
+    path = JOURNAL_FILE + ".forward"
+    if os.path.exists(path):
+        os.remove(path)
+
+    delivered = {station: [] for station in range(STATIONS)}
+    begin = time.monotonic()
+    outage = (begin + OUTAGE_START_S, begin + OUTAGE_START_S + OUTAGE_S)
+
+    async def sink(entries):
+        if outage[0] <= time.monotonic() < outage[1]:
+            raise ConnectionError("destino no disponible")
+        for entry in entries:
+            delivered[entry["station"]].append(entry["n"])
+
+    journal = RingJournal(path, capacity=CAPACITY * 4)
+    forwarder = StoreAndForward(journal, sink, rate_per_s=DRAIN_RATE, retry_interval=0.1)
+    forwarder.start()
+    submitted = [0] * STATIONS
+
+    async def station(index: int):
+        while time.monotonic() < outage[1] - 0.2:
+            await forwarder.submit({"station": index, "n": submitted[index]})
+            submitted[index] += 1
+            await asyncio.sleep(SUBMIT_INTERVAL_S)
+
+    try:
+        await asyncio.gather(*(station(i) for i in range(STATIONS)))
+        while sum(map(len, delivered.values())) < sum(submitted):
+            await asyncio.sleep(0.005)
+        drain_s = time.monotonic() - outage[1]
+    finally:
+        await forwarder.stop()
+        journal.close()
+        os.remove(path)
+
+    for index in range(STATIONS):
+        assert delivered[index] == list(range(submitted[index])), f"estación {index}: fuera de orden o faltantes"
+    print(f"  {sum(submitted)} entradas: {forwarder.delivered} entregadas directo, "
+          f"{forwarder.journaled} guardadas en el journal con {forwarder.syncs} fsync agrupados "
+          f"({forwarder.journaled / max(1, forwarder.syncs):.1f} por fsync)")
+    print(f"  Drenaje tras la vuelta: {forwarder.drained} entradas en {drain_s:.2f} s "
+          f"(~{forwarder.drained / drain_s:.0f}/s, límite {DRAIN_RATE:.0f}/s)")
+    print("  ✅ Entregadas en orden por estación, sin pérdidas")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]), sys.argv[4] == "1")
+        return
+
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else ROUNDS
+
+    print("=" * 70)
+    print("🧪 TEST: JOURNAL EN ANILLO (caídas y reenvío)")
+    print("=" * 70)
+    print(f"  Journal: {JOURNAL_FILE} ({CAPACITY - 4096:,} bytes de datos)")
+
+    run_crashes(rounds)
+    asyncio.run(run_forwarding())
+    os.remove(JOURNAL_FILE)
+
+
+if __name__ == "__main__":
+    main()
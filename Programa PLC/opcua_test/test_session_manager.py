@@ -0,0 +1,215 @@
+"""
+================================================================================
+    TEST DE LA SESIÓN RESILIENTE: CAÍDAS DE RED INYECTADAS
+
+    gateway_simulator.py (tags sintéticos cambiando a 20 Hz) detrás de un
+    relé TCP local en el que se inyectan caídas; session_manager.py se
+    conecta a través del relé y monitorea los tags. Por cada caída:
+
+    - reset: el relé corta las conexiones y rechaza las nuevas
+    - mudo: las conexiones quedan abiertas pero sin tráfico (cable
+      desenchufado) y las nuevas se rechazan
+
+    se mide la detección, el tiempo desde que vuelve la red hasta el primer
+    dato (objetivo: un publishing interval) y desde el corte hasta el primer
+    dato. Se corre con TransferSubscriptions y forzando la recreación desde
+    NodeIds, y se cuentan las peticiones de cada reconexión (ningún Browse).
+
+    Ejecutar con: python test_session_manager.py
+================================================================================
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import time
+from collections import Counter
+
+from asyncua import ua
+
+from benchmark_utils import RequestCounter, print_stats
+from gateway_simulator import GatewaySimulator
+from session_manager import SessionManager
+from simulated_address_space import synthetic_source
+
+logging.getLogger("asyncua").setLevel(logging.CRITICAL)
+logging.getLogger("GatewaySimulator").setLevel(logging.WARNING)
+logging.getLogger("SimulatedAddressSpace").setLevel(logging.WARNING)
+logging.getLogger("SessionManager").setLevel(logging.ERROR)
+logging.getLogger("TagSubscription").setLevel(logging.ERROR)
+
+RELAY_PORT = 48420
+SIMULATOR_URL = "opc.tcp://127.0.0.1:48421"
+RELAY_URL = f"opc.tcp://127.0.0.1:{RELAY_PORT}"
+SYNTHETIC = (2, 10)
+DYNAMICS = "walk=0.5@20"
+PUBLISHING_INTERVAL_MS = 100
+# (modo, segundos sin red)
+OUTAGES = [("reset", 0.5), ("reset", 2.0), ("mudo", 0.5), ("mudo", 3.0)]
+RESUME_TIMEOUT_S = 15.0
+
+
+class FlakyLink:
+    """Relé TCP local entre cliente y servidor en el que se inyectan caídas."""
+
+    def __init__(self, port, target_host, target_port):
+        self.port = port
+        self.target = (target_host, target_port)
+        self._server = None
+        self._open = asyncio.Event()
+        self._open.set()
+        self._transports = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+
+    def close(self):
+        self._server.close()
+        for transport in list(self._transports):
+            transport.abort()
+
+    async def cut(self, seconds, mode):
+        """Deja la red caída unos segundos; retorna time.monotonic() de la vuelta."""
+
+        self._server.close()              # Conexiones nuevas rechazadas
+        if mode == "reset":
+            for transport in list(self._transports):
+                transport.abort()
+        else:
+            self._open.clear()            # Los bytes quedan retenidos
+        await asyncio.sleep(seconds)
+        await self.start()
+        self._open.set()
+        return time.monotonic()
+
+    async def _handle(self, reader, writer):
+        try:
+            up_reader, up_writer = await asyncio.open_connection(*self.target)
+        except OSError:
+            writer.close()
+            return
+        transports = {writer.transport, up_writer.transport}
+        self._transports |= transports
+        try:
+            await asyncio.gather(self._pipe(reader, up_writer), self._pipe(up_reader, writer))
+        finally:
+            self._transports -= transports
+
+    async def _pipe(self, reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                await self._open.wait()
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run_outages(link, tags, transfer):
+    """Conecta a través del relé, inyecta OUTAGES y mide cada recuperación."""
+
+    manager = SessionManager(RELAY_URL, transfer=transfer)
+    counters = []
+
+    async def count_requests(client, reconnected):
+        if reconnected:
+            counters.append(RequestCounter(client).install())
+
+    manager.on_connect(count_requests)
+    await manager.start()
+    arrivals = []
+    subscription = await manager.subscribe(tags, publishing_interval=PUBLISHING_INTERVAL_MS, queue_size=10)
+    subscription.on_data(lambda name, dv: arrivals.append(time.monotonic()))
+    await asyncio.sleep(1.0)
+
+    results = []
+    try:
+        for mode, seconds in OUTAGES:
+            cut_at = time.monotonic()
+            up_at = await link.cut(seconds, mode)
+            deadline = time.monotonic() + RESUME_TIMEOUT_S
+            while not any(t > up_at for t in arrivals):
+                assert time.monotonic() < deadline, f"sin datos tras la caída {mode} de {seconds} s"
+                await asyncio.sleep(0.005)
+            data_at = next(t for t in arrivals if t > up_at)
+            outage = next((o for o in manager.outages if o["detected_at"] >= cut_at), None)
+            results.append((mode, seconds, cut_at, up_at, data_at, outage))
+            await asyncio.sleep(1.0)
+    finally:
+        for counter in counters:
+            counter.uninstall()
+        await manager.stop()
+
+    requests = Counter()
+    for counter in counters:
+        requests.update(counter.counts)
+    return manager, results, requests
+
+
+def report(results, requests, reconnects):
+    resumes = []
+    for mode, seconds, cut_at, up_at, data_at, outage in results:
+        resume = (data_at - up_at) * 1000
+        resumes.append(resume)
+        if outage is None:
+            detail = "sesión conservada"
+        else:
+            detail = (f"detectada a los {(outage['detected_at'] - cut_at) * 1000:4.0f} ms, "
+                      f"{outage.get('mode', '?')}")
+        print(f"  {mode:<5} {seconds:3.1f} s: red -> dato {resume:6.1f} ms | "
+              f"corte -> dato {(data_at - cut_at) * 1000:6.0f} ms | {detail}")
+    print_stats("Vuelta de la red -> primer dato", resumes)
+    # Sin Publish ni el Read del keepalive: lo que cuesta restaurar las suscripciones
+    per_reconnect = ", ".join(f"{kind.replace('Request', '')} {count / max(reconnects, 1):.1f}"
+                              for kind, count in sorted(requests.items())
+                              if kind not in ("PublishRequest", "ReadRequest"))
+    print(f"  Peticiones por reconexión (tras abrir la sesión): {per_reconnect}")
+    return resumes
+
+
+async def main():
+    print("=" * 70)
+    print("🧪 TEST: SESIÓN RESILIENTE CON CAÍDAS DE RED INYECTADAS")
+    print("=" * 70)
+
+    simulator = GatewaySimulator(SIMULATOR_URL, sources=[synthetic_source(*SYNTHETIC)], dynamics=DYNAMICS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await simulator.start_background()
+    link = FlakyLink(RELAY_PORT, "127.0.0.1", int(SIMULATOR_URL.rsplit(":", 1)[1]))
+    await link.start()
+
+    ns = simulator.namespace_idx
+    tags = {"Heartbeat": ua.NodeId("EgComIn_Heartbeat", ns)}
+    for engine in simulator.engines:
+        for _, _, members in engine.groups:
+            tags.update({node_id.to_string(): node_id for node_id, _, _ in members})
+    print(f"  Simulador: {SIMULATOR_URL} | relé: {RELAY_URL} | {len(tags)} tags, "
+          f"publishing {PUBLISHING_INTERVAL_MS} ms")
+
+    try:
+        for transfer, title in ((True, "TransferSubscriptions + Republish"),
+                                (False, "recreación desde NodeIds guardados")):
+            print(f"\n▶ {title}")
+            print("-" * 70)
+            manager, results, requests = await run_outages(link, tags, transfer)
+            resumes = report(results, requests, manager.stats["reconnects"])
+            assert not requests.get("BrowseRequest"), "la reconexión volvió a browsear"
+            kind = "transferred" if transfer else "recreated"
+            assert manager.stats[kind] > 0, f"ninguna suscripción {kind}"
+            within = sum(r <= PUBLISHING_INTERVAL_MS for r in resumes)
+            print(f"  {'✅' if within == len(resumes) else '⚠️'} {within}/{len(resumes)} recuperaciones "
+                  f"dentro de un publishing interval ({PUBLISHING_INTERVAL_MS} ms)")
+            manager.print_stats()
+    finally:
+        link.close()
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
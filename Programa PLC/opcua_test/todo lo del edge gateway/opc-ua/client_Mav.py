@@ -4,6 +4,8 @@
 
 import asyncio
 import logging
+import os
+import sys
 import time
 import json
 
@@ -12,6 +14,23 @@ from asyncua import Client, Node, ua
 logger = logging.getLogger('asyncua')
 logging.disable(logging.WARNING)
 
+# Caché de definiciones de tipos y sesión resiliente de opcua_test (no están
+# en la imagen Docker, que sólo copia este directorio: ahí se usa la carga
+# completa y el bucle de reconexión cada 10 s)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+try:
+    from type_definition_cache import TypeDefinitionCache
+except ImportError:
+    TypeDefinitionCache = None
+try:
+    from session_manager import SessionManager
+except ImportError:
+    SessionManager = None
+
+URL = "opc.tcp://192.168.101.100:59100/"
+#URL = "opc.tcp://172.18.20.10:4840/"
+PRINT_INTERVAL_S = 10
+
 
 async def dict_format(keys, values):
   return dict(zip(keys, values))
@@ -36,22 +55,81 @@ async def get_subnodes(client, nodes, level, max_level):
         return {}
 
 
+async def load_types(client):
+    if TypeDefinitionCache is not None:
+        await TypeDefinitionCache(client, URL).load()
+    else:
+        await client.load_data_type_definitions()
+
+
+async def browse(client):
+    root = client.get_root_node()
+    aux_nodes = await root.get_children()
+    objects_node = aux_nodes[0]
+    nodes = await objects_node.get_children()
+    return await get_subnodes(client, nodes, 1, 9)
+
+
+def leaf_ids(node_tree_str):
+    leaves = []
+    for node_id, subtree in node_tree_str.items():
+        if subtree:
+            leaves.extend(leaf_ids(subtree))
+        else:
+            leaves.append(node_id)
+    return leaves
+
+
+async def variables_only(client, node_ids):
+    """Filtra las Variables con un único Read de NodeClass."""
+    params = ua.ReadParameters()
+    for node_id in node_ids:
+        rv = ua.ReadValueId()
+        rv.NodeId = ua.NodeId.from_string(node_id)
+        rv.AttributeId = ua.AttributeIds.NodeClass
+        params.NodesToRead.append(rv)
+    results = await client.uaclient.read(params)
+    return [node_id for node_id, dv in zip(node_ids, results)
+            if dv.StatusCode.is_good() and dv.Value.Value == ua.NodeClass.Variable]
+
+
 async def main():
+    if SessionManager is None:
+        await main_reconnect_loop()
+        return
+
+    # Una sola sesión: tipos y browse una vez; tras una caída el manager
+    # transfiere (o recrea desde los NodeIds) la suscripción sin re-browsear
+    manager = SessionManager(URL)
+
+    async def on_connect(client, reconnected):
+        if not reconnected:
+            await load_types(client)
+
+    manager.on_connect(on_connect)
+    await manager.start()
+    node_tree, node_tree_str = await browse(manager.client)
+    print(json.dumps(node_tree, indent=4))
+    print(json.dumps(node_tree_str, indent=4))
+
+    variables = await variables_only(manager.client, leaf_ids(node_tree_str))
+    subscription = await manager.subscribe({node_id: ua.NodeId.from_string(node_id) for node_id in variables})
+    try:
+        while True:
+            await asyncio.sleep(PRINT_INTERVAL_S)
+            print(json.dumps(subscription.values, indent=4, default=str))
+    finally:
+        await manager.stop()
+
+
+async def main_reconnect_loop():
     while True:
-        url = "opc.tcp://192.168.101.100:59100/"
-        #url = "opc.tcp://172.18.20.10:4840/"
-        async with Client(url=url) as client:
-            await client.load_data_type_definitions()
-            data_list = []
-            #idx = 2
-            root = client.get_root_node()
-            aux_nodes = await root.get_children()
-            objects_node = aux_nodes[0]
-            nodes = await objects_node.get_children()
-            node_tree, node_tree_str = await get_subnodes(client, nodes, 1, 9)
+        async with Client(url=URL) as client:
+            await load_types(client)
+            node_tree, node_tree_str = await browse(client)
             print(json.dumps(node_tree, indent=4))
             print(json.dumps(node_tree_str, indent=4))
-            await asyncio.sleep(10)
+            await asyncio.sleep(PRINT_INTERVAL_S)
 
 if __name__ == '__main__':
     asyncio.run(main())
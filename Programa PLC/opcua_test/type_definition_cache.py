@@ -0,0 +1,367 @@
+"""
+================================================================================
+    CACHÉ PERSISTENTE DE DEFINICIONES DE TIPOS (load_data_type_definitions)
+
+    client.load_data_type_definitions() recorre todos los DataTypes del
+    servidor (alias de tipos base, enums, OptionSets, estructuras) con
+    cientos de Browse/Read y genera las clases Python en cada conexión.
+    Con Optix/Rockwell eso son segundos en cada arranque y reconexión.
+
+    Esta caché guarda en cache/type_definitions.json, por endpoint, lo
+    necesario para regenerar las clases sin recorrer el servidor:
+
+    - Estructuras: nombre, NodeId del DataType, DefaultEncodingId y
+      StructureDefinition (binario OPC UA)
+    - Enums / OptionSets: nombre, NodeId y EnumDefinition
+    - Alias de tipos base: nombre, NodeId y tipo padre
+
+    Clave: URIs de NamespaceArray + hash de las definiciones publicadas.
+    El hash se calcula con pocas peticiones (Read de NamespaceArray +
+    BuildInfo, un Browse por nivel de subtipos de Structure/Union/
+    Enumeration, Read de sus DataTypeDefinition); si no coincide se hace
+    la carga completa y se reescribe la caché.
+
+    Uso (en lugar de await client.load_data_type_definitions()):
+        types = await TypeDefinitionCache(client, url).load()
+
+        python type_definition_cache.py [url] [--refresh]
+================================================================================
+"""
+
+import argparse
+import asyncio
+import base64
+import enum
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+
+from asyncua import ua
+from asyncua.common import structures104
+from asyncua.ua.ua_binary import struct_from_binary, struct_to_binary
+from asyncua.common.utils import Buffer
+
+from batch_io import FALLBACK_MAX_NODES, chunks, read_attributes_raw, read_raw, release_continuation_points
+
+logger = logging.getLogger("TypeDefinitionCache")
+
+TYPE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "cache", "type_definitions.json")
+
+FINGERPRINT_NODES = [
+    ua.ObjectIds.Server_NamespaceArray,
+    ua.ObjectIds.Server_ServerStatus_BuildInfo_ProductUri,
+    ua.ObjectIds.Server_ServerStatus_BuildInfo_SoftwareVersion,
+    ua.ObjectIds.Server_ServerStatus_BuildInfo_BuildNumber,
+]
+
+# Raíces cuyos subtipos entran en el hash
+TYPE_ROOTS = [ua.ObjectIds.Structure, ua.ObjectIds.Union, ua.ObjectIds.Enumeration]
+
+DEFINITION_CLASSES = {
+    "struct": ua.StructureDefinition,
+    "enum": ua.EnumDefinition,
+    "optionset": ua.EnumDefinition,
+}
+
+
+class _RegistrationRecorder:
+    """
+    Registra qué tipos da de alta load_data_type_definitions(), envolviendo
+    ua.register_basetype / register_enum / register_extension_object
+    mientras dura el bloque with.
+    """
+
+    NAMES = ("register_basetype", "register_enum", "register_extension_object")
+
+    def __init__(self):
+        self.entries = []
+        self._originals = {}
+
+    def __enter__(self):
+        entries = self.entries
+        self._originals = {name: getattr(ua, name) for name in self.NAMES}
+        register_basetype, register_enum, register_extension_object = (
+            self._originals[name] for name in self.NAMES)
+
+        def record_basetype(name, nodeid, class_type):
+            entries.append({"kind": "alias", "name": name, "data_type": nodeid.to_string(),
+                            "parent": class_type.__name__})
+            return register_basetype(name, nodeid, class_type)
+
+        def record_enum(name, nodeid, class_type):
+            kind = "optionset" if issubclass(class_type, enum.IntFlag) else "enum"
+            entries.append({"kind": kind, "name": name, "data_type": nodeid.to_string()})
+            return register_enum(name, nodeid, class_type)
+
+        def record_extension_object(name, encoding_nodeid, class_type, datatype_nodeid=None):
+            if datatype_nodeid is not None:
+                entries.append({"kind": "struct", "name": name, "data_type": datatype_nodeid.to_string(),
+                                "encoding": encoding_nodeid.to_string()})
+            return register_extension_object(name, encoding_nodeid, class_type, datatype_nodeid)
+
+        ua.register_basetype = record_basetype
+        ua.register_enum = record_enum
+        ua.register_extension_object = record_extension_object
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self._originals.items():
+            setattr(ua, name, original)
+        return False
+
+
+async def _generate(name, definition, **kwargs):
+    # asyncua 1.x genera el código con exec (async); 2.x construye la clase
+    env = structures104._generate_object(name, definition, **kwargs)
+    if inspect.isawaitable(env):
+        env = await env
+    return env[name]
+
+
+class TypeDefinitionCache:
+    """load_data_type_definitions() con caché en disco por endpoint."""
+
+    def __init__(self, client, endpoint: str = None, cache_path: str = TYPE_CACHE_PATH):
+        self.client = client
+        self.endpoint = endpoint or getattr(client.server_url, "geturl", lambda: str(client.server_url))()
+        self.cache_path = cache_path
+
+        # "cache" o "server" tras load(); tiempos en ms para diagnóstico
+        self.source = None
+        self.timings = {}
+
+    # ------------------------------------------------------------------------
+    # HUELLA DEL SERVIDOR
+    # ------------------------------------------------------------------------
+
+    async def fingerprint(self) -> tuple:
+        """(namespace_uris, hash hex) de las definiciones de tipos publicadas."""
+
+        results = await read_raw(self.client, [ua.NodeId(i) for i in FINGERPRINT_NODES],
+                                 timestamps=ua.TimestampsToReturn.Neither)
+        namespace_uris = list(results[0].Value.Value or [])
+        digest = hashlib.sha256(json.dumps(namespace_uris).encode())
+        for dv in results[1:]:
+            digest.update(repr(dv.Value.Value if dv.Value is not None else None).encode())
+
+        subtypes = await self._browse_subtypes([ua.NodeId(i) for i in TYPE_ROOTS])
+        subtypes.sort(key=lambda ref: ref.NodeId.to_string())
+        for ref in subtypes:
+            digest.update(f"{ref.NodeId.to_string()}|{ref.BrowseName.to_string()}\n".encode())
+
+        items = [(ref.NodeId, ua.AttributeIds.DataTypeDefinition) for ref in subtypes
+                 if ref.NodeId.NamespaceIndex != 0]
+        for batch in chunks(items, FALLBACK_MAX_NODES):
+            for dv in await read_attributes_raw(self.client, batch, ua.TimestampsToReturn.Neither):
+                value = dv.Value.Value if dv.Value is not None else None
+                digest.update(struct_to_binary(value) if value is not None else b"-")
+
+        return namespace_uris, digest.hexdigest()
+
+    async def _browse_subtypes(self, roots: list) -> list:
+        """
+        Árbol HasSubtype completo de las raíces, nivel por nivel. Se baja
+        también por los tipos de ns=0: un tipo propio puede derivar de un
+        subtipo estándar intermedio (Structure -> ns=0 -> ns=N).
+        """
+
+        references, level = [], roots
+        while level:
+            found = []
+            for batch in chunks(level, FALLBACK_MAX_NODES):
+                found.extend(await self._browse_level(batch))
+            references.extend(found)
+            level = [ref.NodeId for ref in found]
+        return references
+
+    async def _browse_level(self, node_ids: list) -> list:
+        """Una petición Browse para todos los nodos, con BrowseNext."""
+
+        params = ua.BrowseParameters()
+        for node_id in node_ids:
+            desc = ua.BrowseDescription()
+            desc.NodeId = node_id
+            desc.BrowseDirection = ua.BrowseDirection.Forward
+            desc.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasSubtype)
+            desc.IncludeSubtypes = False
+            desc.NodeClassMask = ua.NodeClass.DataType
+            desc.ResultMask = ua.BrowseResultMask.BrowseName
+            params.NodesToBrowse.append(desc)
+
+        results = await self.client.uaclient.browse(params)
+        pending = [result.ContinuationPoint for result in results]
+        references = []
+        try:
+            for i, result in enumerate(results):
+                references.extend(result.References)
+                while pending[i]:
+                    next_params = ua.BrowseNextParameters()
+                    next_params.ContinuationPoints = [pending[i]]
+                    next_result = (await self.client.uaclient.browse_next(next_params))[0]
+                    if not next_result.StatusCode.is_good():
+                        break
+                    references.extend(next_result.References)
+                    pending[i] = next_result.ContinuationPoint
+        finally:
+            await release_continuation_points(self.client, pending)
+        return references
+
+    # ------------------------------------------------------------------------
+    # CARGA
+    # ------------------------------------------------------------------------
+
+    async def load(self, refresh: bool = False) -> dict:
+        """
+        Registra los tipos del servidor en ua y retorna {nombre: clase}.
+
+        Desde la caché si la huella coincide; si no (o refresh=True) con la
+        carga completa de asyncua, y se guarda la caché.
+        """
+
+        start = time.perf_counter()
+        namespace_uris, digest = await self.fingerprint()
+        self.timings["fingerprint_ms"] = (time.perf_counter() - start) * 1000
+
+        cache = self._load_cache()
+        entry = cache.get(self.endpoint)
+        if (not refresh and entry and entry.get("namespace_uris") == namespace_uris
+                and entry.get("hash") == digest):
+            start = time.perf_counter()
+            try:
+                types = await self._register(entry["types"])
+                self.source = "cache"
+                self.timings["register_ms"] = (time.perf_counter() - start) * 1000
+                logger.info(f"Tipos desde caché: {len(types)} ({self.endpoint})")
+                return types
+            except Exception as e:
+                logger.warning(f"Caché de tipos inválida, carga completa: {e}")
+
+        start = time.perf_counter()
+        types, entries = await self._load_from_server()
+        self.source = "server"
+        self.timings["server_ms"] = (time.perf_counter() - start) * 1000
+
+        cache[self.endpoint] = {
+            "namespace_uris": namespace_uris,
+            "hash": digest,
+            "saved_at": time.time(),
+            "types": entries,
+        }
+        self._save_cache(cache)
+        return types
+
+    async def _load_from_server(self) -> tuple:
+        """Carga completa de asyncua + DataTypeDefinition de lo registrado."""
+
+        with _RegistrationRecorder() as recorder:
+            types = await self.client.load_data_type_definitions()
+
+        entries = recorder.entries
+        defined = [entry for entry in entries if entry["kind"] in DEFINITION_CLASSES]
+        items = [(ua.NodeId.from_string(entry["data_type"]), ua.AttributeIds.DataTypeDefinition)
+                 for entry in defined]
+        definitions = []
+        for batch in chunks(items, FALLBACK_MAX_NODES):
+            definitions.extend(await read_attributes_raw(self.client, batch, ua.TimestampsToReturn.Neither))
+
+        usable = []
+        for entry in entries:
+            if entry["kind"] in DEFINITION_CLASSES:
+                dv = definitions[defined.index(entry)]
+                if not dv.StatusCode.is_good() or dv.Value is None or dv.Value.Value is None:
+                    logger.warning(f"Sin DataTypeDefinition para {entry['name']}; no se cachea")
+                    continue
+                entry["definition"] = base64.b64encode(struct_to_binary(dv.Value.Value)).decode()
+            usable.append(entry)
+        return types, usable
+
+    async def _register(self, entries: list) -> dict:
+        """Regenera y registra las clases en el orden en que asyncua las registró."""
+
+        types = {}
+        for entry in entries:
+            name = entry["name"]
+            kind = entry["kind"]
+            data_type = ua.NodeId.from_string(entry["data_type"])
+
+            existing = getattr(ua, name, None)
+            if kind == "alias":
+                if existing is None:
+                    ua.register_basetype(name, data_type, getattr(ua, entry["parent"]))
+                    types[name] = getattr(ua, entry["parent"])
+                continue
+            if existing is not None and getattr(existing, "data_type", None) == data_type:
+                types[name] = existing
+                continue
+
+            definition = struct_from_binary(DEFINITION_CLASSES[kind],
+                                            Buffer(base64.b64decode(entry["definition"])))
+            if kind == "struct":
+                cls = await _generate(name, definition, data_type=data_type)
+                cls.data_type = data_type
+                ua.register_extension_object(name, ua.NodeId.from_string(entry["encoding"]), cls, data_type)
+            else:
+                cls = await _generate(name, definition, enum=True, option_set=kind == "optionset")
+                ua.register_enum(name, data_type, cls)
+            types[name] = cls
+        return types
+
+    # ------------------------------------------------------------------------
+    # PERSISTENCIA
+    # ------------------------------------------------------------------------
+
+    def invalidate(self):
+        """Descarta la entrada de este endpoint."""
+
+        cache = self._load_cache()
+        if cache.pop(self.endpoint, None) is not None:
+            self._save_cache(cache)
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache: dict):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la caché de tipos: {e}")
+
+
+async def main():
+    from asyncua import Client
+    from gateway_client import SERVER_URL
+
+    parser = argparse.ArgumentParser(description="Caché de definiciones de tipos OPC UA")
+    parser.add_argument("url", nargs="?", default=SERVER_URL)
+    parser.add_argument("--refresh", action="store_true", help="Ignorar la caché y recargar")
+    args = parser.parse_args()
+
+    client = Client(url=args.url)
+    start = time.perf_counter()
+    await client.connect()
+    try:
+        cache = TypeDefinitionCache(client, args.url)
+        types = await cache.load(refresh=args.refresh)
+    finally:
+        await client.disconnect()
+
+    print(f"{args.url}: {len(types)} tipos desde {cache.source} en "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms (conexión incluida)")
+    for key, value in cache.timings.items():
+        print(f"  {key}: {value:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,193 @@
+"""
+================================================================================
+    PIPELINE DE WriteToDb CON GROUP COMMIT
+
+    Cada pulso de EgComOut_WriteToDb entra en una cola asyncio; una tarea
+    junta los pedidos pendientes y los guarda en una sola transacción
+    (RecordStore.save_batch) cuando:
+
+    - pasaron flush_interval_ms desde el primer pedido del lote (0: lo que
+      se acumuló mientras se guardaba el lote anterior), o
+    - el lote juntó max_batch_rows registros
+
+    submit() retorna recién cuando la transacción de su lote es durable
+    (SQLite con fsync en el commit): sólo entonces se levanta
+    EgComIn_WriteToDb_Confirmation. Con decenas de estaciones un fsync
+    atiende a todas las que pidieron escribir en esa ventana.
+
+    Idempotencia: cada pedido lleva una clave (por defecto el hash de la
+    estación y los registros). Un pulso repetido con los mismos registros,
+    en vuelo o ya guardado, no genera filas duplicadas y se confirma igual.
+
+    stats() expone latencia de commit, latencia por pedido, tamaño de lote
+    y filas/s para dimensionar flush_interval_ms.
+
+    Uso:
+        pipeline = WritePipeline(store)
+        pipeline.start()
+        rows = await pipeline.submit("CPS_001", records)
+        await pipeline.stop()
+================================================================================
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import deque
+
+from benchmark_utils import percentile
+
+logger = logging.getLogger("WritePipeline")
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+# Espera máxima del primer pedido de un lote. Con 0 el lote es lo que se
+# acumuló mientras se hacía el commit anterior (sin demora extra); subirlo
+# sólo conviene si el fsync es caro y los pedidos llegan dispersos
+FLUSH_INTERVAL_MS = 0.0
+MAX_BATCH_ROWS = 500         # Registros por transacción
+METRICS_WINDOW = 10000       # Muestras de latencia guardadas
+
+
+def idempotency_key(station: str, records: list) -> str:
+    """Clave de un pedido: SHA-256 de la estación y los registros."""
+
+    payload = json.dumps([station, records], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class WritePipeline:
+    """Cola de pedidos WriteToDb guardados por lotes en un RecordStore."""
+
+    def __init__(self, store, flush_interval_ms: float = FLUSH_INTERVAL_MS,
+                 max_batch_rows: int = MAX_BATCH_ROWS):
+        self.store = store
+        self.flush_interval_ms = flush_interval_ms
+        self.max_batch_rows = max_batch_rows
+
+        self.queue = asyncio.Queue()
+        self._inflight = {}      # clave -> Future del pedido encolado
+        self._task = None
+
+        # Métricas
+        self.requests = 0
+        self.duplicates = 0
+        self.rows = 0
+        self.commits = 0
+        self.commit_latencies_ms = deque(maxlen=METRICS_WINDOW)
+        self.request_latencies_ms = deque(maxlen=METRICS_WINDOW)
+        self.batch_sizes = deque(maxlen=METRICS_WINDOW)
+        self._first_commit = None
+        self._last_commit = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Guarda lo que quedó en la cola y detiene la tarea."""
+
+        if self._task is None:
+            return
+        while not self.queue.empty() or self._inflight:
+            await asyncio.sleep(self.flush_interval_ms / 1000)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def submit(self, station: str, records: list, key: str = None) -> int:
+        """
+        Encola un pedido y espera a que su lote sea durable.
+
+        Retorna las filas escritas (0 si la clave ya estaba guardada o en
+        vuelo). Lanza la excepción del backend si la transacción falla.
+        """
+
+        records = list(records)
+        key = key or idempotency_key(station, records)
+        self.requests += 1
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.duplicates += 1
+            await asyncio.shield(inflight)
+            return 0
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.queue.put_nowait((key, station, records, future, time.perf_counter()))
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            rows = len(batch[0][2])
+            deadline = loop.time() + self.flush_interval_ms / 1000
+
+            while rows < self.max_batch_rows:
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self.queue.get_nowait()
+                batch.append(item)
+                rows += len(item[2])
+
+            await self._commit(batch)
+
+    async def _commit(self, batch: list):
+        start = time.perf_counter()
+        try:
+            written = await self.store.save_batch([(key, station, records) for key, station, records, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Error guardando lote de {len(batch)} pedidos: {e}")
+            for key, _, _, future, _ in batch:
+                del self._inflight[key]
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        now = time.perf_counter()
+        self.commits += 1
+        self.commit_latencies_ms.append((now - start) * 1000)
+        self.batch_sizes.append(len(batch))
+        if self._first_commit is None:
+            self._first_commit = start
+        self._last_commit = now
+
+        for (key, _, records, future, queued), count in zip(batch, written):
+            del self._inflight[key]
+            self.rows += count
+            if count == 0 and records:
+                self.duplicates += 1
+            self.request_latencies_ms.append((now - queued) * 1000)
+            if not future.done():
+                future.set_result(count)
+
+    def stats(self) -> dict:
+        """Métricas para dimensionar flush_interval_ms / max_batch_rows."""
+
+        elapsed = (self._last_commit - self._first_commit) if self.commits else 0.0
+        commits, requests = list(self.commit_latencies_ms), list(self.request_latencies_ms)
+        return {
+            "requests": self.requests,
+            "duplicates": self.duplicates,
+            "rows": self.rows,
+            "commits": self.commits,
+            "rows_per_s": self.rows / elapsed if elapsed else 0.0,
+            "mean_batch": sum(self.batch_sizes) / len(self.batch_sizes) if self.batch_sizes else 0.0,
+            "commit_p50_ms": percentile(commits, 50),
+            "commit_p99_ms": percentile(commits, 99),
+            "request_p50_ms": percentile(requests, 50),
+            "request_p99_ms": percentile(requests, 99),
+        }
@@ -0,0 +1,118 @@
+"""
+================================================================================
+    BENCHMARK: INTÉRPRETE LADDER L5X
+
+    Compila CPS_001_ver2_PULL_SYSTEM.L5X con l5x_interpreter.py y mide:
+
+    - Tiempo de análisis + compilación (una vez)
+    - Escaneos por segundo de la rutina Main (8 JSR, 51 rungs) con dt de
+      10 ms (Rate de MainTask) y estímulos periódicos: botones del
+      operador, sensores de material, fallo de aire
+    - Factor sobre tiempo real (escaneos/s x 10 ms)
+    - Referencia: PLCLogic.scan() escrito a mano (cps_simulator.py)
+
+    Ejecutar con: python benchmark_ladder.py [escaneos]
+================================================================================
+"""
+
+import os
+import sys
+import time
+
+from cps_simulator import PLCLogic, PLCTags
+from l5x_interpreter import load_l5x
+
+L5X_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "..", "CPS_001_ver2_PULL_SYSTEM.L5X")
+
+SCANS = 200000
+TASK_RATE = 0.010          # MainTask Rate="10" (ms)
+STIMULUS_EVERY = 100       # Escaneos entre estímulos (1 s simulado)
+
+PERMISSIVES = ["Compressed_Air", "Dust_Collector_ON", "AEC_Sheller_ON", "VMEK_Rdy",
+               "R12_Ready", "R12_Envelope_Present_Sensor"]
+
+# (segundo dentro del ciclo de 60 s, tag, valor)
+STIMULUS = [
+    (1, "Barcode_Scanned", 1),
+    (2, "BATCH_READY_Button", 1),
+    (3, "BATCH_READY_Button", 0),
+    (5, "START_Button", 1),
+    (6, "START_Button", 0),
+    (10, "AEC_Material_Sensor", 1),
+    (20, "AEC_Material_Sensor", 0),
+    (15, "Aspirator_Hopper_Sensor", 1),
+    (25, "Aspirator_Hopper_Sensor", 0),
+    (22, "R12_Hopper_Sensor", 1),
+    (35, "R12_Hopper_Sensor", 0),
+    (45, "Compressed_Air", 0),
+    (47, "Compressed_Air", 1),
+    (48, "E_Stop_Reset_Button", 1),
+    (49, "E_Stop_Reset_Button", 0),
+]
+
+
+def run_ladder(scans: int) -> dict:
+    with_compile = time.perf_counter()
+    program = load_l5x(L5X_PATH)
+    compile_ms = (time.perf_counter() - with_compile) * 1000
+
+    tags = program.tags
+    for name in PERMISSIVES:
+        tags[name] = 1
+    schedule = {}
+    for second, name, value in STIMULUS:
+        schedule.setdefault(second, []).append((name, value))
+
+    steps_seen = set()
+    scan = program.scan
+    start = time.perf_counter()
+    for n in range(scans):
+        if n % STIMULUS_EVERY == 0:
+            for name, value in schedule.get((n // STIMULUS_EVERY) % 60, ()):
+                tags[name] = value
+            steps_seen.add(tags["Cycle_Step"])
+        scan(TASK_RATE)
+    elapsed = time.perf_counter() - start
+
+    return {"compile_ms": compile_ms, "elapsed": elapsed, "steps_seen": steps_seen,
+            "cycles_step": tags["Cycle_Step"], "program": program}
+
+
+def run_handwritten(scans: int) -> float:
+    tags = PLCTags()
+    plc = PLCLogic(tags)
+    start = time.perf_counter()
+    for _ in range(scans):
+        plc.scan(TASK_RATE)
+    return time.perf_counter() - start
+
+
+def main():
+    scans = int(sys.argv[1]) if len(sys.argv) > 1 else SCANS
+
+    print("=" * 70)
+    print("📊 BENCHMARK: INTÉRPRETE LADDER L5X")
+    print("=" * 70)
+
+    ladder = run_ladder(scans)
+    program = ladder["program"]
+    rungs = sum(len(r) for r in program.routine_texts.values())
+    rate = scans / ladder["elapsed"]
+
+    print(f"  Programa: {len(program.tags.types)} tags, {len(program.routines)} rutinas, {rungs} rungs")
+    print(f"  Análisis + compilación: {ladder['compile_ms']:.1f} ms")
+    print(f"\n▶ L5X compilado ({scans} escaneos, dt = {TASK_RATE * 1000:.0f} ms)")
+    print("-" * 70)
+    print(f"  Tiempo: {ladder['elapsed']:.2f} s   {rate:,.0f} escaneos/s   "
+          f"{rate * TASK_RATE:,.0f}x tiempo real")
+    print(f"  Rungs/s: {rate * rungs:,.0f}   Cycle_Step observados: {sorted(ladder['steps_seen'])}")
+
+    handwritten = scans / run_handwritten(scans)
+    print("\n▶ Referencia: PLCLogic.scan() escrito a mano")
+    print("-" * 70)
+    print(f"  {handwritten:,.0f} escaneos/s (L5X compilado: {rate / handwritten:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+================================================================================
+    BENCHMARK: ALMACÉN DE TAGS COMPILADO (tag_store.py)
+
+    Escaneos por segundo con detección de cambios en cada escaneo (lo que
+    necesita un publicador OPC UA, un historian o una UI):
+
+    - Antes:   PLCLogic.scan() sobre atributos dinámicos (dict por
+               instancia, el PLCTags anterior); snapshot con dict(vars())
+    - Después: PLCLogic.scan() sobre PLCTags con slots fijos;
+               snapshot() en una tupla que se reutiliza si nada cambió,
+               diff() inmediato entre snapshots iguales
+    - Antes:   L5X compilado; snapshot con dict nombre -> valor (as_dict)
+    - Después: L5X compilado sobre TagStore; snapshot() sin copia si nada
+               cambió, diff() con XOR de los BOOL
+
+    También: escaneo sin snapshot (misma lógica antes/después), coste de
+    un snapshot sin cambios y memoria del estado.
+
+    Ejecutar con: python benchmark_tag_store.py [escaneos]
+================================================================================
+"""
+
+import sys
+import time
+import tracemalloc
+
+from benchmark_ladder import L5X_PATH, PERMISSIVES, STIMULUS, STIMULUS_EVERY, TASK_RATE
+from cps_simulator import PLC_TAGS, PLCLogic, PLCTags
+from l5x_interpreter import load_l5x
+
+SCANS = 100000
+REPEAT = 5               # Sólo escaneo: mejor de N pasadas alternadas antes/después
+
+# Mismo estímulo sobre los nombres de PLCTags
+PLCTAGS_NAMES = {"R12_Envelope_Present_Sensor": "R12_Envelope_Present"}
+
+
+def _schedule():
+    schedule = {}
+    for second, name, value in STIMULUS:
+        schedule.setdefault(second, []).append((name, value))
+    return schedule
+
+
+class DictTags:
+    """Mismos tags que PLCTags en atributos dinámicos (dict por instancia), como antes."""
+
+    def __init__(self):
+        for name, (_, value) in PLC_TAGS.items():
+            setattr(self, name, value)
+
+
+def run_plctags(scans: int, monitor: bool, tags_class=PLCTags) -> tuple:
+    tags = tags_class()
+    plc = PLCLogic(tags)
+    schedule = _schedule()
+    changes = 0
+    slots = tags_class is PLCTags
+    previous = tags.snapshot() if slots else dict(vars(tags))
+
+    start = time.perf_counter()
+    for n in range(scans):
+        if n % STIMULUS_EVERY == 0:
+            for name, value in schedule.get((n // STIMULUS_EVERY) % 60, ()):
+                name = PLCTAGS_NAMES.get(name, name)
+                if hasattr(tags, name):
+                    setattr(tags, name, bool(value))
+        plc.scan(TASK_RATE)
+        if monitor and slots:
+            current = tags.snapshot()
+            changes += len(tags.diff(previous, current))
+            previous = current
+        elif monitor:
+            current = dict(vars(tags))
+            changes += sum(1 for name, value in current.items() if previous[name] != value)
+            previous = current
+    return scans / (time.perf_counter() - start), changes
+
+
+def run_ladder(scans: int, monitor: str) -> tuple:
+    """monitor: None | "dict" | "store" """
+    program = load_l5x(L5X_PATH)
+    store = program.tags
+    for name in PERMISSIVES:
+        store[name] = 1
+    schedule = _schedule()
+    scan = program.scan
+    changes = 0
+    previous = store.as_dict() if monitor == "dict" else store.snapshot()
+
+    start = time.perf_counter()
+    for n in range(scans):
+        if n % STIMULUS_EVERY == 0:
+            for name, value in schedule.get((n // STIMULUS_EVERY) % 60, ()):
+                store[name] = value
+        scan(TASK_RATE)
+        if monitor == "dict":
+            current = store.as_dict()
+            changes += sum(1 for name, value in current.items() if previous[name] != value)
+            previous = current
+        elif monitor == "store":
+            current = store.snapshot()
+            changes += len(store.diff(previous, current))
+            previous = current
+    return scans / (time.perf_counter() - start), changes
+
+
+def unchanged_snapshot_cost(take, repeat: int = 20000) -> tuple:
+    """(µs por snapshot, bytes reservados por snapshot) con el estado sin cambios."""
+    take()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        take()
+    us = (time.perf_counter() - start) / repeat * 1e6
+
+    kept = [None] * 1000
+    tracemalloc.start()
+    for i in range(len(kept)):
+        kept[i] = take()
+    allocated = tracemalloc.get_traced_memory()[0] / len(kept)
+    tracemalloc.stop()
+    return us, allocated
+
+
+def main():
+    scans = int(sys.argv[1]) if len(sys.argv) > 1 else SCANS
+
+    print("=" * 70)
+    print("📊 BENCHMARK: ALMACÉN DE TAGS COMPILADO")
+    print("=" * 70)
+    print(f"  {scans} escaneos, dt = {TASK_RATE * 1000:.0f} ms, estímulo cada {STIMULUS_EVERY} escaneos")
+
+    print("\n▶ Escaneo + snapshot + diff en cada escaneo")
+    print("-" * 70)
+    rows = [
+        ("Antes:   dict de atributos + dict(vars())", *run_plctags(scans, True, DictTags)),
+        ("Después: PLCTags slots + snapshot/diff", *run_plctags(scans, True)),
+        ("Antes:   L5X + dict nombre -> valor", *run_ladder(scans, monitor="dict")),
+        ("Después: L5X + TagStore snapshot/diff", *run_ladder(scans, monitor="store")),
+    ]
+    for label, rate, changes in rows:
+        print(f"  {label:<40} {rate:>10,.0f} escaneos/s   {changes} cambios")
+
+    print(f"\n▶ Sólo escaneo (sin detección de cambios, mejor de {REPEAT})")
+    print("-" * 70)
+    before = after = 0.0
+    for _ in range(REPEAT):
+        before = max(before, run_plctags(scans, False, DictTags)[0])
+        after = max(after, run_plctags(scans, False)[0])
+    print(f"  {'Antes:   PLCLogic.scan(), dict':<40} {before:>10,.0f} escaneos/s")
+    print(f"  {'Después: PLCLogic.scan(), slots':<40} {after:>10,.0f} escaneos/s   ({after / before:.2f}x)")
+    print(f"  {'L5X compilado sobre TagStore':<40} {run_ladder(scans, monitor=None)[0]:>10,.0f} escaneos/s")
+
+    tags = PLCTags()
+    dict_tags = DictTags()
+    store = load_l5x(L5X_PATH).tags
+    print("\n▶ Snapshot con el estado sin cambios")
+    print("-" * 70)
+    for label, take in (("dict(vars()) de atributos dinámicos", lambda: dict(vars(dict_tags))),
+                        ("PLCTags.snapshot()", tags.snapshot),
+                        ("TagStore.as_dict()", store.as_dict),
+                        ("TagStore.snapshot()", store.snapshot)):
+        us, allocated = unchanged_snapshot_cost(take)
+        print(f"  {label:<40} {us:8.2f} µs   {allocated:8.0f} bytes reservados")
+
+    state_bytes = len(store.bits) + store.dints.itemsize * len(store.dints) + store.reals.itemsize * len(store.reals)
+    print("\n▶ Estado")
+    print("-" * 70)
+    print(f"  TagStore: {len(store)} tags -> {len(store.bits)} bytes de BOOL + "
+          f"{len(store.dints)} DINT = {state_bytes} bytes")
+    print(f"  PLCTags:  {len(PLC_TAGS)} slots -> objeto de {sys.getsizeof(tags)} bytes "
+          f"(antes: dict de {sys.getsizeof(vars(dict_tags))} bytes)")
+
+
+if __name__ == "__main__":
+    main()
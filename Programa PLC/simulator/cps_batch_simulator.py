@@ -0,0 +1,336 @@
+"""
+================================================================================
+    CPS_001 - SIMULADOR POR LOTES (NumPy)
+
+    Misma lógica que PLCLogic.scan() de cps_simulator.py (secciones 0-7 +
+    _simulate_material_transfer), pero para N líneas CPS independientes a la
+    vez y con un dt simulado fijo, sin reloj real ni UI:
+
+    - Cada tag de PLCTags es un array de N elementos (BOOL -> bool,
+      DINT -> int32, REAL -> float64)
+    - Cada rung se evalúa con máscaras sobre todas las líneas, en el mismo
+      orden que el escaneo escalar (resultados idénticos paso a paso,
+      ver test_batch_conformance.py)
+    - BatchOperator emula al operador (escanear, Batch Ready, START) para
+      medir ciclos por turno
+
+    Uso:
+        tags = BatchTags(1000)
+        plc = BatchPLCLogic(tags)
+        stats = plc.run(hours_to_steps(8), operator=BatchOperator(tags))
+
+    Ejecutar benchmark: python cps_batch_simulator.py [lineas] [horas]
+================================================================================
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from cps_simulator import SCAN_CYCLE, PLCTags
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+DT = SCAN_CYCLE          # dt simulado por escaneo (s)
+LOAD_TIME = 60.0         # Tiempo del operador para cargar, escanear y Batch Ready (s)
+
+LINES = 10000
+HOURS = 1.0
+
+# Tipo Python de PLCTags -> dtype del array
+TAG_DTYPES = {bool: np.bool_, int: np.int32, float: np.float64}
+
+
+def hours_to_steps(hours: float, dt: float = DT) -> int:
+    return int(round(hours * 3600.0 / dt))
+
+
+# ============================================================================
+# ESTADO DE N LÍNEAS
+# ============================================================================
+class BatchTags:
+    """Tags de PLCTags como arrays de N líneas (mismos nombres de atributo)."""
+
+    def __init__(self, lines: int, template: PLCTags = None):
+        template = template or PLCTags()
+        self.lines = lines
+        values = template.as_dict()
+        self.names = list(values)
+        for name, value in values.items():
+            setattr(self, name, np.full(lines, value, dtype=TAG_DTYPES[type(value)]))
+
+    def line(self, i: int) -> PLCTags:
+        """Copia escalar (PLCTags) de la línea i."""
+
+        tags = PLCTags()
+        for name in self.names:
+            setattr(tags, name, getattr(self, name)[i].item())
+        return tags
+
+    def set_line(self, i: int, tags: PLCTags):
+        """Carga el estado de un PLCTags en la línea i."""
+
+        for name in self.names:
+            getattr(self, name)[i] = getattr(tags, name)
+
+
+# ============================================================================
+# LÓGICA DEL PLC VECTORIZADA
+# ============================================================================
+class BatchPLCLogic:
+    def __init__(self, tags: BatchTags):
+        self.tags = tags
+
+    def scan(self, dt=DT):
+        """Un ciclo de escaneo de todas las líneas (dt escalar o array de N)."""
+
+        t = self.tags
+
+        # ============================================================
+        # SECTION 0: OPERATOR WORKFLOW
+        # ============================================================
+
+        # RUNG 0.2: Batch Ready Latch
+        m = t.Barcode_Scanned & t.BATCH_READY_Button & ~t.Cycle_Active
+        t.Batch_Ready_Latched |= m
+        t.BATCH_READY_Button &= ~m
+
+        # RUNG 0.3: Clear Batch Ready when cycle completes
+        m = t.Cycle_Complete
+        t.Batch_Ready_Latched &= ~m
+        t.Barcode_Scanned &= ~m
+
+        # ============================================================
+        # SECTION 1: GROUP STATUS DETECTION
+        # ============================================================
+        g1, g2, g3, g4 = (t._material_in_group1, t._material_in_group2,
+                          t._material_in_group3, t._material_in_group4)
+
+        t.Group1_Has_Material = g1 > 5
+        t.Group2_Has_Material = g2 > 5
+        t.Group3_Has_Material = g3 > 5
+        t.Group4_Has_Material = g4 > 5
+
+        t.Group1_Empty = ~t.Batch_Ready_Latched & (g1 < 5)
+        t.Group2_Empty = g2 < 5
+        t.Group3_Empty = g3 < 5
+        t.Group4_Empty = g4 < 5
+
+        t.AEC_Material_Sensor = t.Group2_Has_Material.copy()
+        t.Aspirator_Hopper_Sensor = t.Group3_Has_Material.copy()
+        t.R12_Hopper_Sensor = t.Group4_Has_Material.copy()
+
+        # ============================================================
+        # SECTION 2: SYSTEM READY CONDITIONS
+        # ============================================================
+
+        # RUNG 2.1: System Ready
+        t.CPS_RDY = t.Compressed_Air & t.Dust_Collector_ON & t.AEC_Sheller_ON & t.VMEK_Rdy
+
+        # RUNG 2.2: Cycle Start Enable
+        t.Cycle_Start_Enabled = (t.CPS_RDY & t.Group4_Empty & t.R12_Ready &
+                                 t.R12_Envelope_Present & t.Batch_Ready_Latched &
+                                 ~t.E_Stop_Active)
+
+        # ============================================================
+        # SECTION 3: SEQUENTIAL PULL SEQUENCE
+        # ============================================================
+
+        # RUNG 3.1: Start Cycle
+        m = t.Cycle_Start_Enabled & t.START_Button & ~t.Cycle_Active
+        t.Cycle_Active |= m
+        np.copyto(t.Cycle_Step, 1, where=m)
+        t.Cycle_Complete &= ~m
+        t.START_Button &= ~m
+        np.copyto(g1, 100.0, where=m)
+
+        # RUNG 3.3: Step 1 - R12_Hopper_Gate
+        t.Step1_Active = t.Cycle_Active & (t.Cycle_Step == 1) & t.Group4_Empty
+        t.R12_Hopper_Gate |= t.Step1_Active
+
+        # RUNG 3.4: Step 1 Complete
+        np.copyto(t.Cycle_Step, 2, where=t.Step1_Active & t.Group3_Empty & (g3 < 5))
+
+        # RUNG 3.5: Step 2 - Aspirator_Hopper_Gate
+        t.Step2_Active = t.Cycle_Active & (t.Cycle_Step == 2) & t.Group3_Empty
+        t.Aspirator_Hopper_Gate |= t.Step2_Active
+
+        # RUNG 3.6: Step 2 Complete
+        np.copyto(t.Cycle_Step, 3, where=t.Step2_Active & t.Group2_Empty & (g2 < 5))
+
+        # RUNG 3.7: Step 3 - Material_Gate + Air_Conveyor + Aspirator_Gate
+        t.Step3_Active = t.Cycle_Active & (t.Cycle_Step == 3) & t.Group2_Empty
+        t.Material_Gate_Open |= t.Step3_Active
+        t.Air_Conveyor |= t.Step3_Active
+        t.Aspirator_Gate |= t.Step3_Active
+
+        # RUNG 3.8: Step 3 Complete
+        m = t.Step3_Active & (g1 < 5)
+        np.copyto(t.Cycle_Step, 4, where=m)
+        t.Batch_Ready_Latched &= ~m
+
+        # RUNG 3.9-3.10: Step 4 - Waiting for all groups to empty
+        t.Waiting_For_Group4_Empty = (t.Cycle_Active & (t.Cycle_Step == 4) &
+                                      t.Group1_Empty & t.Group2_Empty & t.Group3_Empty)
+        t.Cycle_Complete |= t.Waiting_For_Group4_Empty & t.Group4_Empty
+
+        # RUNG 3.11: Reset Cycle
+        t.Cycle_Active &= ~t.Cycle_Complete
+        np.copyto(t.Cycle_Step, 0, where=t.Cycle_Complete)
+
+        # ============================================================
+        # SECTION 4: GATE AUTO-CLOSE
+        # ============================================================
+        t.R12_Hopper_Gate &= t.Step1_Active
+        t.Aspirator_Hopper_Gate &= t.Step2_Active
+        t.Material_Gate_Open &= t.Step3_Active
+        t.Air_Conveyor &= t.Step3_Active
+        t.Aspirator_Gate &= t.Step3_Active
+
+        # ============================================================
+        # SECTION 5: R12 PERMIT
+        # ============================================================
+        t.R12_Permit = t.R12_Hopper_Sensor & t.R12_Ready & t.CPS_RDY
+
+        # ============================================================
+        # SECTION 6: INDICATORS
+        # ============================================================
+        t.Ready_To_Load_Light = t.CPS_RDY & ~t.Batch_Ready_Latched & ~t.Cycle_Active
+        t.Cycle_In_Progress_Light = t.Cycle_Active.copy()
+        t.Cycle_Complete_Light = t.Cycle_Complete.copy()
+        t.Material_Incoming_Light = t.Group3_Has_Material.copy()
+        t.R12_Processing_Light = t.Group4_Has_Material.copy()
+
+        # ============================================================
+        # SECTION 7: E-STOP
+        # ============================================================
+        t.E_Stop_Condition = ~t.Compressed_Air | ~t.Dust_Collector_ON | t.E_Stop_Button
+        t.E_Stop_Active |= t.E_Stop_Condition
+
+        m = t.E_Stop_Active & t.E_Stop_Reset_Button & ~t.E_Stop_Condition
+        t.E_Stop_Active &= ~m
+        t.E_Stop_Reset_Button &= ~m
+
+        # ============================================================
+        # SIMULATION: Material Transfer Physics
+        # ============================================================
+        self._simulate_material_transfer(dt)
+
+    def _simulate_material_transfer(self, dt):
+        """Movimiento físico del material (mismo orden que la versión escalar)"""
+        t = self.tags
+        transfer_rate = 50.0 * np.asarray(dt, dtype=np.float64)
+        g1, g2, g3, g4 = (t._material_in_group1, t._material_in_group2,
+                          t._material_in_group3, t._material_in_group4)
+
+        # Group1 → Group2 → Group3 → Group4: cada transferencia ve el
+        # resultado de la anterior, como en el escaneo escalar
+        for gate, src, dst in ((t.Material_Gate_Open, g1, g2),
+                               (t.Aspirator_Hopper_Gate, g2, g3),
+                               (t.R12_Hopper_Gate, g3, g4)):
+            m = gate & (src > 0)
+            transfer = np.minimum(transfer_rate, src)
+            np.subtract(src, transfer, out=src, where=m)
+            np.add(dst, transfer, out=dst, where=m)
+
+        # R12 procesa material (cuando R12_Permit)
+        m = t.R12_Permit & (g4 > 0)
+        np.subtract(g4, transfer_rate * 0.5, out=g4, where=m)
+        np.copyto(g4, 0.0, where=m & (g4 < 0))
+
+    # ------------------------------------------------------------------------
+    # EJECUCIÓN SIN UI
+    # ------------------------------------------------------------------------
+
+    def run(self, steps: int, dt=DT, operator=None) -> dict:
+        """
+        Ejecuta steps escaneos. Con operator (BatchOperator) las entradas de
+        operador se generan antes de cada escaneo, como handle_input().
+
+        Retorna ciclos completados por línea (flancos de Cycle_Complete),
+        tiempo simulado y tiempo real.
+        """
+
+        t = self.tags
+        cycles = np.zeros(t.lines, dtype=np.int64)
+        previous = t.Cycle_Complete.copy()
+
+        start = time.perf_counter()
+        for _ in range(steps):
+            if operator is not None:
+                operator.step(dt)
+            self.scan(dt)
+            cycles += t.Cycle_Complete & ~previous
+            previous[:] = t.Cycle_Complete
+        wall_s = time.perf_counter() - start
+
+        return {
+            "steps": steps,
+            "lines": t.lines,
+            "simulated_s": steps * float(np.max(dt)),
+            "wall_s": wall_s,
+            "cycles": cycles,
+        }
+
+
+# ============================================================================
+# OPERADOR AUTOMÁTICO
+# ============================================================================
+class BatchOperator:
+    """
+    Teclas [1], [2] y [3] de SimulatorUI para todas las líneas: tras
+    load_time segundos con Ready_To_Load_Light escanea y pulsa Batch Ready;
+    pulsa START en cuanto Cycle_Start_Enabled.
+    """
+
+    def __init__(self, tags: BatchTags, load_time: float = LOAD_TIME):
+        self.tags = tags
+        self.load_time = load_time
+        self.timer = np.zeros(tags.lines)
+
+    def step(self, dt):
+        t = self.tags
+
+        loading = t.Ready_To_Load_Light & ~t.Barcode_Scanned
+        np.add(self.timer, dt, out=self.timer, where=loading)
+        loaded = loading & (self.timer >= self.load_time)
+        t.Barcode_Scanned |= loaded
+        t.BATCH_READY_Button |= loaded
+        np.copyto(self.timer, 0.0, where=~loading | loaded)
+
+        t.START_Button |= t.Cycle_Start_Enabled & ~t.Cycle_Active
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else LINES
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else HOURS
+
+    print("=" * 70)
+    print("📊 CPS_001 - SIMULACIÓN POR LOTES")
+    print("=" * 70)
+    print(f"  Líneas: {lines}   Horas simuladas: {hours}   dt: {DT} s")
+
+    tags = BatchTags(lines)
+    plc = BatchPLCLogic(tags)
+    stats = plc.run(hours_to_steps(hours), operator=BatchOperator(tags))
+
+    line_hours = stats["lines"] * stats["simulated_s"] / 3600.0
+    steps, counts = np.unique(tags.Cycle_Step, return_counts=True)
+
+    print(f"\n  Escaneos:               {stats['steps']} x {lines} líneas")
+    print(f"  Tiempo real:            {stats['wall_s']:.2f} s "
+          f"({stats['steps'] / stats['wall_s']:.0f} escaneos/s)")
+    print(f"  Horas-línea por minuto: {line_hours / stats['wall_s'] * 60:,.0f}")
+    print(f"  Ciclos completados:     {int(stats['cycles'].sum())} "
+          f"({stats['cycles'].mean():.2f} por línea)")
+    print("  Cycle_Step final:       " +
+          "   ".join(f"{step}: {count}" for step, count in zip(steps, counts)))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,29 @@
     Version 2.0 - PULL SYSTEM Simulation
     
     Simula la lógica del PLC para probar antes de implementar
+
+    Ejecutar:
+        python cps_simulator.py                         (consola interactiva)
+        python cps_simulator.py --scenario scenarios/ciclo_basico.yaml --clock event
+            (sin UI, entradas desde el escenario; ver sim_scenario.py / sim_clock.py)
 ================================================================================
 """
 
+import argparse
 import time
 import os
+import select
 import sys
 import threading
-import msvcrt  # Windows keyboard input
+
+from tag_store import parse_l5k_declarations
+
+try:
+    import msvcrt  # Windows keyboard input
+except ImportError:
+    msvcrt = None  # Linux: termios + select
+    import termios
+    import tty
 
 # ============================================================================
 # CONFIGURACIÓN DE TIEMPOS (en segundos para simulación rápida)
@@ -23,77 +38,109 @@ SCAN_CYCLE = 0.1         # Velocidad del ciclo de escaneo
 # ============================================================================
 # ESTADO DEL SISTEMA (Tags del PLC simulados)
 # ============================================================================
+L5K_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "..", "CPS_001_ver2_PULL_SYSTEM.L5K")
+
+# Nombre -> (tipo, valor inicial): un slot fijo de PLCTags por tag.
+# Las E/S de campo están en los módulos Local:N (el L5K sólo las mapea en
+# texto), así que se declaran aquí con el estado inicial de la simulación
+PLC_IO = {
+    # --- INPUTS (Sensores) ---
+    "Compressed_Air": ("BOOL", True),
+    "Dust_Collector_ON": ("BOOL", True),
+    "AEC_Sheller_ON": ("BOOL", True),
+    "VMEK_Rdy": ("BOOL", True),
+    "R12_Ready": ("BOOL", True),
+    "R12_Envelope_Present": ("BOOL", True),
+
+    # Sensores de material
+    "AEC_Material_Sensor": ("BOOL", False),
+    "Aspirator_Hopper_Sensor": ("BOOL", False),
+    "R12_Hopper_Sensor": ("BOOL", False),
+
+    # --- OUTPUTS (Actuadores) ---
+    "R12_Hopper_Gate": ("BOOL", False),
+    "Aspirator_Hopper_Gate": ("BOOL", False),
+    "Material_Gate_Open": ("BOOL", False),
+    "Air_Conveyor": ("BOOL", False),
+    "Aspirator_Gate": ("BOOL", False),
+    "R12_Permit": ("BOOL", False),
+}
+
+# --- SIMULATION INTERNAL ---
+SIM_TAGS = {
+    "_material_in_group1": ("REAL", 0.0),  # Cantidad de material (0-100%)
+    "_material_in_group2": ("REAL", 0.0),
+    "_material_in_group3": ("REAL", 0.0),
+    "_material_in_group4": ("REAL", 0.0),
+    "_transfer_progress": ("REAL", 0.0),
+}
+
+# Tipo L5K -> tipo Python del slot (los TIMER los simula PLCLogic con el reloj)
+TAG_TYPES = {"BOOL": bool, "DINT": int, "REAL": float}
+
+
+def load_plc_tags(l5k_path: str = L5K_PATH) -> dict:
+    """E/S de campo + tags de controlador escalares del L5K + internos de la simulación."""
+    tags = dict(PLC_IO)
+    for name, (data_type, value) in parse_l5k_declarations(l5k_path).items():
+        if data_type in TAG_TYPES:
+            tags[name] = (data_type, TAG_TYPES[data_type](value))
+    tags.update(SIM_TAGS)
+    return tags
+
+
+PLC_TAGS = load_plc_tags()
+
+
 class PLCTags:
+    """
+    Tags del PLC en slots generados de PLC_TAGS: cada tag tiene un offset
+    fijo en el objeto y no hay dict por instancia, así que los t.Nombre de
+    PLCLogic.scan() son accesos directos al slot.
+    """
+    __slots__ = (*PLC_TAGS, "_last")
+
     def __init__(self):
-        # --- INPUTS (Sensores) ---
-        self.Compressed_Air = True
-        self.Dust_Collector_ON = True
-        self.AEC_Sheller_ON = True
-        self.VMEK_Rdy = True
-        self.R12_Ready = True
-        self.R12_Envelope_Present = True
-        
-        # Sensores de material
-        self.AEC_Material_Sensor = False
-        self.Aspirator_Hopper_Sensor = False
-        self.R12_Hopper_Sensor = False
-        
-        # Botones
-        self.Barcode_Scanned = False
-        self.BATCH_READY_Button = False
-        self.START_Button = False
-        self.E_Stop_Button = False
-        self.E_Stop_Reset_Button = False
-        
-        # --- INTERNAL (Lógica interna) ---
-        self.Batch_Ready_Latched = False
-        self.CPS_RDY = False
-        self.Cycle_Start_Enabled = False
-        self.Cycle_Active = False
-        self.Cycle_Complete = False
-        self.Cycle_Step = 0
-        
-        # Group Status
-        self.Group1_Empty = True
-        self.Group2_Empty = True
-        self.Group3_Empty = True
-        self.Group4_Empty = True
-        self.Group1_Has_Material = False
-        self.Group2_Has_Material = False
-        self.Group3_Has_Material = False
-        self.Group4_Has_Material = False
-        
-        # Step Active flags
-        self.Step1_Active = False
-        self.Step2_Active = False
-        self.Step3_Active = False
-        self.Waiting_For_Group4_Empty = False
-        
-        # E-Stop
-        self.E_Stop_Condition = False
-        self.E_Stop_Active = False
-        
-        # --- OUTPUTS (Actuadores) ---
-        self.R12_Hopper_Gate = False
-        self.Aspirator_Hopper_Gate = False
-        self.Material_Gate_Open = False
-        self.Air_Conveyor = False
-        self.Aspirator_Gate = False
-        self.R12_Permit = False
-        
-        # Luces indicadoras
-        self.Ready_To_Load_Light = False
-        self.Cycle_In_Progress_Light = False
-        self.Cycle_Complete_Light = False
-        self.Material_Incoming_Light = False
-        self.R12_Processing_Light = False
-        
-        # --- SIMULATION INTERNAL ---
-        self._material_in_group1 = 0.0  # Cantidad de material (0-100%)
-        self._material_in_group2 = 0.0
-        self._material_in_group3 = 0.0
-        self._material_in_group4 = 0.0
-        self._transfer_progress = 0.0
+        for name, (_, value) in PLC_TAGS.items():
+            setattr(self, name, value)
+        self._last = None
+
+    def as_dict(self) -> dict:
+        return dict(zip(PLC_TAGS, _read_tags(self)))
+
+    def snapshot(self) -> tuple:
+        """
+        Valores de todos los tags en el orden de PLC_TAGS. Si nada cambió
+        desde el snapshot anterior retorna esa misma tupla (la leída para
+        comparar se libera en el acto: no queda memoria reservada).
+        """
+        current = _read_tags(self)
+        if current != self._last:
+            self._last = current
+        return self._last
+
+    @staticmethod
+    def diff(old: tuple, new: tuple) -> list:
+        """Nombres de los tags que difieren entre dos snapshot()."""
+        if old is new or old == new:
+            return []
+        return [name for name, a, b in zip(PLC_TAGS, old, new) if a != b]
+
+
+def _compile_reader(names):
+    """
+    tags -> tupla de valores como una sola expresión (t.A, t.B, ...): cada
+    acceso es un LOAD_ATTR de slot, ~40% más rápido que attrgetter(*names),
+    que busca cada nombre por string.
+    """
+    source = f"def read(t):\n    return ({', '.join(f't.{name}' for name in names)},)\n"
+    namespace = {}
+    exec(compile(source, "<PLCTags snapshot>", "exec"), namespace)
+    return namespace["read"]
+
+
+_read_tags = _compile_reader(PLC_TAGS)
 
 # ============================================================================
 # LÓGICA DEL PLC (Traducción del programa L5K)
@@ -103,9 +150,10 @@ class PLCLogic:
         self.tags = tags
         self.last_scan_time = time.time()
     
-    def scan(self):
-        """Ejecuta un ciclo de escaneo del PLC"""
-        dt = time.time() - self.last_scan_time
+    def scan(self, dt=None):
+        """Ejecuta un ciclo de escaneo del PLC (dt fijo opcional, en segundos)"""
+        if dt is None:
+            dt = time.time() - self.last_scan_time
         self.last_scan_time = time.time()
         
         t = self.tags
@@ -286,12 +334,71 @@ class PLCLogic:
             if t._material_in_group4 < 0:
                 t._material_in_group4 = 0
 
+# ============================================================================
+# ENTRADAS DEL OPERADOR
+# ============================================================================
+def apply_key(tags: PLCTags, key: str):
+    """Aplica una tecla de control a los tags. Retorna el mensaje para el log."""
+    t = tags
+    
+    if key == '1':
+        t.Barcode_Scanned = True
+        return "Barcode scanned - Product: CORN_LOT_001"
+    elif key == '2':
+        if t.Barcode_Scanned:
+            t.BATCH_READY_Button = True
+            return "Batch Ready button pressed"
+        return "ERROR: Scan barcode first!"
+    elif key == '3':
+        if t.Cycle_Start_Enabled:
+            t.START_Button = True
+            return "START pressed - Beginning cycle..."
+        return "ERROR: System not ready to start!"
+    elif key == 'e':
+        t.E_Stop_Button = True
+        return "!!! E-STOP ACTIVATED !!!"
+    elif key == 'r':
+        t.E_Stop_Button = False
+        t.E_Stop_Reset_Button = True
+        return "E-Stop Reset pressed"
+    return None
+
+class Keyboard:
+    """Lectura de teclas sin bloqueo: msvcrt en Windows, termios + select en Linux"""
+    def __enter__(self):
+        self._saved = None
+        if msvcrt is None and sys.stdin.isatty():
+            self._saved = termios.tcgetattr(sys.stdin)
+            tty.setcbreak(sys.stdin.fileno())
+        return self
+    
+    def __exit__(self, *exc):
+        if self._saved is not None:
+            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self._saved)
+    
+    def read_key(self):
+        """Tecla pulsada (en minúscula) o None si no hay ninguna"""
+        if msvcrt is not None:
+            if msvcrt.kbhit():
+                return msvcrt.getch().decode('utf-8', errors='ignore').lower()
+            return None
+        if select.select([sys.stdin], [], [], 0)[0]:
+            return sys.stdin.read(1).lower()
+        return None
+    
+    def wait_key(self):
+        if msvcrt is not None:
+            msvcrt.getch()
+        else:
+            sys.stdin.read(1)
+
 # ============================================================================
 # INTERFAZ DE USUARIO (Consola)
 # ============================================================================
 class SimulatorUI:
-    def __init__(self, tags: PLCTags):
+    def __init__(self, tags: PLCTags, keyboard: Keyboard = None):
         self.tags = tags
+        self.keyboard = keyboard
         self.running = True
         self.messages = []
     
@@ -373,35 +480,15 @@ class SimulatorUI:
         print("""╚══════════════════════════════════════════════════════════════════════════════╝""")
     
     def handle_input(self):
-        if msvcrt.kbhit():
-            key = msvcrt.getch().decode('utf-8', errors='ignore').lower()
-            t = self.tags
-            
-            if key == '1':
-                t.Barcode_Scanned = True
-                self.add_message("Barcode scanned - Product: CORN_LOT_001")
-            elif key == '2':
-                if t.Barcode_Scanned:
-                    t.BATCH_READY_Button = True
-                    self.add_message("Batch Ready button pressed")
-                else:
-                    self.add_message("ERROR: Scan barcode first!")
-            elif key == '3':
-                if t.Cycle_Start_Enabled:
-                    t.START_Button = True
-                    self.add_message("START pressed - Beginning cycle...")
-                else:
-                    self.add_message("ERROR: System not ready to start!")
-            elif key == 'e':
-                t.E_Stop_Button = True
-                self.add_message("!!! E-STOP ACTIVATED !!!")
-            elif key == 'r':
-                t.E_Stop_Button = False
-                t.E_Stop_Reset_Button = True
-                self.add_message("E-Stop Reset pressed")
-            elif key == 'q':
+        key = self.keyboard.read_key()
+        if key:
+            if key == 'q':
                 self.running = False
                 self.add_message("Shutting down...")
+            else:
+                message = apply_key(self.tags, key)
+                if message:
+                    self.add_message(message)
             
             return True
         return False
@@ -410,35 +497,49 @@ class SimulatorUI:
 # MAIN
 # ============================================================================
 def main():
-    print("Iniciando CPS-001 Simulator...")
-    print("Presiona cualquier tecla para continuar...")
-    msvcrt.getch()
+    parser = argparse.ArgumentParser(description="CPS-001 Simulator")
+    parser.add_argument("--scenario", help="Escenario YAML/JSON: ejecución sin UI ni teclado")
+    parser.add_argument("--clock", choices=("realtime", "fixed", "event"), default="event",
+                        help="Reloj del escenario (la consola interactiva es siempre realtime)")
+    parser.add_argument("--dt", type=float, default=SCAN_CYCLE, help="Periodo de escaneo (s)")
+    args = parser.parse_args()
     
-    tags = PLCTags()
-    plc = PLCLogic(tags)
-    ui = SimulatorUI(tags)
+    if args.scenario:
+        from sim_scenario import run_file
+        return run_file(args.scenario, args.clock, args.dt)
     
-    ui.add_message("Sistema iniciado - Listo para operar")
-    ui.add_message("Presiona [1] para escanear código de barras")
+    from sim_clock import RealTimeClock
     
-    last_render = 0
-    render_interval = 0.1  # Actualizar pantalla cada 100ms
+    print("Iniciando CPS-001 Simulator...")
+    print("Presiona cualquier tecla para continuar...")
     
-    while ui.running:
-        # PLC Scan
-        plc.scan()
+    with Keyboard() as keyboard:
+        keyboard.wait_key()
+        
+        tags = PLCTags()
+        plc = PLCLogic(tags)
+        ui = SimulatorUI(tags, keyboard)
+        clock = RealTimeClock(args.dt)
         
-        # Handle keyboard input
-        ui.handle_input()
+        ui.add_message("Sistema iniciado - Listo para operar")
+        ui.add_message("Presiona [1] para escanear código de barras")
         
-        # Render UI (throttled)
-        if time.time() - last_render > render_interval:
-            ui.render()
-            last_render = time.time()
+        last_render = 0
+        render_interval = 0.1  # Actualizar pantalla cada 100ms
         
-        time.sleep(SCAN_CYCLE)
+        while ui.running:
+            # PLC Scan (espera al siguiente periodo de escaneo)
+            clock.step(plc)
+            
+            # Handle keyboard input
+            ui.handle_input()
+            
+            # Render UI (throttled)
+            if time.time() - last_render > render_interval:
+                ui.render()
+                last_render = time.time()
     
     print("\n\nSimulador terminado.")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
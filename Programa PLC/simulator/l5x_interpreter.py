@@ -0,0 +1,392 @@
+"""
+================================================================================
+    CPS_001 - INTÉRPRETE LADDER (L5X)
+
+    Ejecuta directamente las rutinas de CPS_001_ver2_PULL_SYSTEM.L5X en lugar
+    de la traducción a mano de PLCLogic.scan():
+
+    - <Tags> del controlador -> tag_store.TagStore (nombre -> offset,
+      construido una vez): BOOL y bits de TIMER (.EN/.TT/.DN) en un byte
+      cada uno; DINT y .PRE/.ACC en un array('l')
+    - Valores iniciales de <Data Format="L5K">; si faltan (TIMER sin datos
+      en el L5X) se toman de la declaración "Tag : TIMER := [0, 3000, 0];"
+      del .L5K hermano
+    - <Rung><Text> (texto neutro: XIC(a)[XIO(b),XIC(c)]OTE(d);) se analiza
+      una sola vez y se genera una función Python por rutina con los
+      índices ya resueltos; compile() la convierte en bytecode. El escaneo
+      no vuelve a analizar texto ni a buscar nombres
+    - JSR llama a la función de la rutina; los TON/TOF acumulan el dt del
+      escaneo en ms
+
+    Instrucciones: XIC XIO OTE OTL OTU ONS EQU NEQ GRT GEQ LES LEQ MOV
+                   TON TOF RES JSR NOP AFI
+
+    Uso:
+        program = load_l5x("../CPS_001_ver2_PULL_SYSTEM.L5X")
+        program.tags["Compressed_Air"] = 1
+        program.scan(0.010)
+        print(program.tags["Cycle_Step"], program.tags["Group2_Empty_Dly.DN"])
+================================================================================
+"""
+
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+from tag_store import TIMER_BITS, TIMER_WORDS, TagStore, parse_l5k_declarations, parse_value
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+COMPARISONS = {"EQU": "==", "NEQ": "!=", "GRT": ">", "GEQ": ">=", "LES": "<", "LEQ": "<="}
+
+_NUMBER = re.compile(r"^[+-]?\d+$")
+_MNEMONIC = re.compile(r"([A-Za-z_]\w*)\(")
+
+
+class L5XError(ValueError):
+    pass
+
+
+# ============================================================================
+# ANÁLISIS DEL TEXTO NEUTRO
+# ============================================================================
+def parse_rung(text: str) -> list:
+    """
+    "XIC(a)[XIO(b),XIC(c)]OTE(d);" ->
+        [("XIC", ["a"]), ("branch", [[("XIO", ["b"])], [("XIC", ["c"])]]), ("OTE", ["d"])]
+    """
+    elements, pos = _parse_sequence(text, 0, top=True)
+    if text[pos:].strip() not in ("", ";"):
+        raise L5XError(f"Texto sobrante en el rung: {text[pos:]!r}")
+    return elements
+
+
+def _parse_sequence(text: str, pos: int, top: bool):
+    elements = []
+    while pos < len(text):
+        char = text[pos]
+        if char.isspace():
+            pos += 1
+        elif char == "[":
+            legs = []
+            pos += 1
+            while True:
+                leg, pos = _parse_sequence(text, pos, top=False)
+                legs.append(leg)
+                if pos >= len(text):
+                    raise L5XError(f"Rama sin cerrar: {text!r}")
+                pos += 1
+                if text[pos - 1] == "]":
+                    break
+            elements.append(("branch", legs))
+        elif char in ",]":
+            if top:
+                raise L5XError(f"'{char}' fuera de una rama: {text!r}")
+            return elements, pos
+        elif char == ";":
+            if not top:
+                raise L5XError(f"Rama sin cerrar: {text!r}")
+            return elements, pos
+        else:
+            match = _MNEMONIC.match(text, pos)
+            if match is None:
+                raise L5XError(f"Instrucción inválida en {text[pos:]!r}")
+            end = text.index(")", match.end())
+            args = [arg.strip() for arg in text[match.end():end].split(",")]
+            elements.append((match.group(1).upper(), args))
+            pos = end + 1
+    if not top:
+        raise L5XError(f"Rama sin cerrar: {text!r}")
+    return elements, pos
+
+
+# ============================================================================
+# GENERACIÓN DE CÓDIGO
+# ============================================================================
+class _Bit:
+    """Código para leer / escribir un BOOL (un byte 0/1 del store)."""
+
+    def __init__(self, index: int):
+        self.read = f"B[{index}]"
+        self.set = f"B[{index}] = 1"
+        self.clear = f"B[{index}] = 0"
+
+    def assign(self, condition: str) -> str:
+        # Las condiciones son 0/1/True/False: el bytearray las guarda tal cual
+        return self.set if condition == "True" else f"{self.read} = {condition}"
+
+
+class _RoutineCompiler:
+    """Genera el cuerpo Python de una rutina a partir de sus rungs analizados."""
+
+    def __init__(self, tags: TagStore, routines: set):
+        self.tags = tags
+        self.routines = routines
+        self.lines = []
+        self._n = 0
+
+    def _var(self) -> str:
+        self._n += 1
+        return f"s{self._n}"
+
+    def _emit(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def _offset(self, operand: str) -> tuple:
+        try:
+            return self.tags.offset(operand)
+        except KeyError:
+            raise L5XError(f"Operando no declarado en <Tags>: {operand}") from None
+
+    def _bit(self, operand: str) -> "_Bit":
+        offset = self._offset(operand)
+        if offset[0] != "B":
+            raise L5XError(f"{operand} no es BOOL")
+        return _Bit(offset[1])
+
+    def _word(self, operand: str) -> str:
+        if _NUMBER.match(operand):
+            return str(int(operand))
+        kind, index = self._offset(operand)
+        return f"{kind}[{index}]"
+
+    def rung(self, number, elements: list):
+        """
+        La condición del rung se acumula como expresión Python
+        ("B[1] and not B[4]") y sólo se guarda en una variable justo antes de
+        la primera instrucción de salida, que es cuando la evaluaría el PLC.
+        """
+        self._emit(1, f"# Rung {number}")
+        if elements and elements[-1][0] == "OTE" and self._is_pure(elements[:-1]):
+            # Caso más común (entradas + una bobina): una sola asignación
+            expr = self._sequence(elements[:-1], "True", 1)
+            self._emit(1, self._bit(elements[-1][1][0]).assign(expr))
+            return
+        self._sequence(elements, "True", 1)
+
+    def _and(self, expr: str, condition: str) -> str:
+        return condition if expr == "True" else f"{expr} and {condition}"
+
+    def _materialize(self, expr: str, indent: int, fresh: bool = False) -> str:
+        if expr == "True" or (not fresh and re.fullmatch(r"s\d+", expr)):
+            return expr
+        var = self._var()
+        self._emit(indent, f"{var} = {expr}")
+        return var
+
+    def _is_pure(self, elements: list) -> bool:
+        """Sólo instrucciones de entrada sin estado (sin ONS ni salidas)."""
+        for element in elements:
+            if element[0] == "branch":
+                if not all(self._is_pure(leg) for leg in element[1]):
+                    return False
+            elif element[0] not in ("XIC", "XIO", "AFI", "NOP") and element[0] not in COMPARISONS:
+                return False
+        return True
+
+    def _sequence(self, elements: list, expr: str, indent: int) -> str:
+        for element in elements:
+            if element[0] == "branch":
+                legs = element[1]
+                if all(self._is_pure(leg) for leg in legs):
+                    alternatives = [self._sequence(leg, "True", indent) for leg in legs]
+                    expr = self._and(expr, "(" + " or ".join(f"({a})" for a in alternatives) + ")")
+                    continue
+                # Ramas con salidas: se ejecutan en orden, cada una con la misma entrada
+                state = self._materialize(expr, indent)
+                results = []
+                for leg in legs:
+                    results.append(self._materialize(self._sequence(leg, state, indent), indent, fresh=True))
+                expr = "(" + " or ".join(results) + ")"
+            else:
+                expr = self._instruction(element[0], element[1], expr, indent)
+        return expr
+
+    def _instruction(self, mnemonic: str, args: list, expr: str, i: int) -> str:
+        emit = self._emit
+        if mnemonic == "XIC":
+            return self._and(expr, self._bit(args[0]).read)
+        if mnemonic == "XIO":
+            return self._and(expr, f"not {self._bit(args[0]).read}")
+        if mnemonic in COMPARISONS:
+            return self._and(expr, f"{self._word(args[0])} {COMPARISONS[mnemonic]} {self._word(args[1])}")
+        if mnemonic == "AFI":
+            return self._and(expr, "False")
+        if mnemonic == "NOP":
+            return expr
+
+        if mnemonic == "ONS":
+            s = self._materialize(expr, i, fresh=True)
+            bit = self._bit(args[0])
+            emit(i, f"if {s}:")
+            emit(i + 1, f"{s} = not {bit.read}")
+            emit(i + 1, bit.set)
+            emit(i, "else:")
+            emit(i + 1, bit.clear)
+            return s
+
+        s = self._materialize(expr, i)
+        if mnemonic == "OTE":
+            emit(i, self._bit(args[0]).assign(s))
+        elif mnemonic in ("OTL", "OTU"):
+            bit = self._bit(args[0])
+            emit(i, f"if {s}: {bit.set if mnemonic == 'OTL' else bit.clear}")
+        elif mnemonic == "MOV":
+            emit(i, f"if {s}: {self._word(args[1])} = {self._word(args[0])}")
+        elif mnemonic == "RES":
+            timer = args[0]
+            emit(i, f"if {s}:")
+            emit(i + 1, f"{self._word(timer + '.ACC')} = 0")
+            for bit in TIMER_BITS:
+                emit(i + 1, self._bit(f"{timer}.{bit}").clear)
+        elif mnemonic in ("TON", "TOF"):
+            self._timer(mnemonic, args, s, i)
+        elif mnemonic == "JSR":
+            routine = args[0]
+            if routine not in self.routines:
+                raise L5XError(f"JSR a rutina inexistente: {routine}")
+            emit(i, f"if {s}: R_{routine}(dt_ms)")
+        else:
+            raise L5XError(f"Instrucción no soportada: {mnemonic}")
+        return s
+
+    def _timer(self, mnemonic: str, args: list, s: str, i: int):
+        # TON(timer, PRE, ACC): PRE/ACC del texto son sólo de visualización
+        # ("?" en este L5X); la instrucción usa .PRE/.ACC del tag
+        timer = args[0]
+        en, tt, dn = (self._bit(f"{timer}.{bit}") for bit in TIMER_BITS)
+        pre, acc = (self._word(f"{timer}.{word}") for word in TIMER_WORDS)
+        emit = self._emit
+
+        if mnemonic == "TON":
+            emit(i, f"if {s}:")
+            emit(i + 1, en.set)
+            emit(i + 1, f"if not {dn.read}:")
+            emit(i + 2, f"a = {acc} + dt_ms")
+            emit(i + 2, f"if a >= {pre}:")
+            emit(i + 3, f"{acc} = {pre}; {dn.set}; {tt.clear}")
+            emit(i + 2, "else:")
+            emit(i + 3, f"{acc} = a; {tt.set}")
+            emit(i, "else:")
+            emit(i + 1, f"{en.clear}; {tt.clear}; {dn.clear}; {acc} = 0")
+        else:
+            emit(i, f"if {s}:")
+            emit(i + 1, f"{en.set}; {tt.clear}; {dn.set}; {acc} = 0")
+            emit(i, "else:")
+            emit(i + 1, en.clear)
+            emit(i + 1, f"if {dn.read}:")
+            emit(i + 2, f"a = {acc} + dt_ms")
+            emit(i + 2, f"if a >= {pre}:")
+            emit(i + 3, f"{acc} = {pre}; {dn.clear}; {tt.clear}")
+            emit(i + 2, "else:")
+            emit(i + 3, f"{acc} = a; {tt.set}")
+
+
+# ============================================================================
+# PROGRAMA COMPILADO
+# ============================================================================
+class LadderProgram:
+    """Tags + rutinas compiladas de un programa L5X."""
+
+    def __init__(self, tags: TagStore, routines: dict, main_routine: str):
+        self.tags = tags
+        self.routine_texts = routines          # {rutina: [(número, texto), ...]}
+        self.main_routine = main_routine
+        self.source = self._generate()
+
+        namespace = {"B": tags.bits, "D": tags.dints}
+        exec(compile(self.source, f"<L5X {main_routine}>", "exec"), namespace)
+        self.routines = {name: namespace[f"R_{name}"] for name in routines}
+        self._main = self.routines[main_routine]
+        self._carry_ms = 0.0
+
+    def _generate(self) -> str:
+        names = set(self.routine_texts)
+        chunks = []
+        for name, rungs in self.routine_texts.items():
+            compiler = _RoutineCompiler(self.tags, names)
+            for number, text in rungs:
+                try:
+                    compiler.rung(number, parse_rung(text))
+                except L5XError as e:
+                    raise L5XError(f"{name} rung {number}: {e}") from None
+            body = "\n".join(compiler.lines) or "    pass"
+            chunks.append(f"def R_{name}(dt_ms, B=B, D=D):\n{body}\n")
+        return "\n".join(chunks)
+
+    def scan(self, dt: float = 0.010):
+        """
+        Un escaneo de la rutina principal. dt en segundos; los timers
+        acumulan ms enteros (la fracción se arrastra al siguiente escaneo).
+        """
+        ms = dt * 1000.0 + self._carry_ms
+        dt_ms = int(ms)
+        self._carry_ms = ms - dt_ms
+        self._main(dt_ms)
+
+
+def load_l5x(path: str, l5k_path: str = None, program: str = None) -> LadderProgram:
+    """
+    Carga tags del controlador y rutinas RLL de un .L5X y las compila.
+
+    l5k_path: declaraciones para los valores iniciales que falten en el L5X
+    (por defecto el .L5K con el mismo nombre, si existe).
+    """
+    root = ET.parse(path).getroot()
+    controller = root.find("Controller")
+
+    if l5k_path is None:
+        candidate = os.path.splitext(path)[0] + ".L5K"
+        l5k_path = candidate if os.path.exists(candidate) else None
+    defaults = parse_l5k_declarations(l5k_path) if l5k_path else {}
+
+    tags = TagStore()
+    for tag in controller.find("Tags").findall("Tag"):
+        name = tag.get("Name")
+        data = tag.find("Data[@Format='L5K']")
+        if data is not None and data.text:
+            value = parse_value(data.text)
+        else:
+            value = defaults.get(name, (None, None))[1]
+        tags.declare(name, tag.get("DataType"), value)
+
+    programs = controller.find("Programs").findall("Program")
+    if program is not None:
+        programs = [p for p in programs if p.get("Name") == program]
+    if not programs:
+        raise L5XError(f"Programa no encontrado en {path}: {program}")
+    main_program = programs[0]
+
+    # Tags de programa (mismo espacio de nombres en este simulador)
+    program_tags = main_program.find("Tags")
+    for tag in (program_tags.findall("Tag") if program_tags is not None else []):
+        tags.declare(tag.get("Name"), tag.get("DataType"))
+
+    routines = {}
+    for routine in main_program.find("Routines").findall("Routine"):
+        if routine.get("Type") != "RLL":
+            raise L5XError(f"Rutina {routine.get('Name')}: tipo {routine.get('Type')} no soportado")
+        routines[routine.get("Name")] = [
+            (rung.get("Number"), rung.findtext("Text").strip())
+            for rung in routine.iter("Rung")
+        ]
+
+    return LadderProgram(tags, routines, main_program.get("MainRoutineName"))
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    path = args[0] if args else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "CPS_001_ver2_PULL_SYSTEM.L5X")
+    program = load_l5x(path)
+    rungs = sum(len(r) for r in program.routine_texts.values())
+    print(f"{os.path.basename(path)}: {len(program.tags.types)} tags, "
+          f"{len(program.routines)} rutinas, {rungs} rungs")
+    if "--source" in sys.argv:
+        print(program.source)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+================================================================================
+    CPS_001 - RELOJES DE SIMULACIÓN
+
+    Deciden cuánto tiempo simulado avanza cada escaneo de PLCLogic:
+
+    - RealTimeClock:      un escaneo cada SCAN_CYCLE en tiempo real (reloj
+                          monotónico, sin deriva acumulada); dt = tiempo medido
+    - FixedStepClock:     dt fijo, sin esperar (más rápido que tiempo real)
+    - DiscreteEventClock: salta directamente al siguiente evento: cruce de
+                          umbral de material (0% / 5%, fin de transferencia),
+                          siguiente escaneo tras un cambio de lógica, evento
+                          del escenario o fin de la simulación
+
+    Todos exponen step(plc, until) -> dt: ejecutan un escaneo y no avanzan
+    más allá de until (próximo evento del escenario).
+
+    Uso:
+        clock = make_clock("event")
+        while now < end:
+            now += clock.step(plc, until=end - now)
+================================================================================
+"""
+
+import math
+import time
+
+from cps_simulator import SCAN_CYCLE
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+TRANSFER_RATE = 50.0        # %/s, igual que _simulate_material_transfer
+R12_RATE = TRANSFER_RATE * 0.5
+LEVEL_THRESHOLDS = (0.0, 5.0)  # Umbrales de Empty / Has_Material / sensores
+
+MIN_EVENT_DT = 0.001        # Resolución del reloj de eventos (s)
+
+CLOCKS = ("realtime", "fixed", "event")
+
+
+def _levels(t) -> list:
+    return [t._material_in_group1, t._material_in_group2,
+            t._material_in_group3, t._material_in_group4]
+
+
+def _logic_state(t) -> dict:
+    """Tags de lógica (todo salvo los niveles de material)."""
+    return {name: value for name, value in t.as_dict().items() if not name.startswith("_")}
+
+
+def material_rates(t) -> list:
+    """
+    Velocidad neta (%/s) de cada grupo con las compuertas actuales.
+
+    Replica el orden de _simulate_material_transfer: un grupo vacío que
+    recibe material en el mismo escaneo también lo entrega.
+    """
+    g1, g2, g3, g4 = _levels(t)
+    rates = [0.0, 0.0, 0.0, 0.0]
+
+    flow12 = t.Material_Gate_Open and g1 > 0
+    flow23 = t.Aspirator_Hopper_Gate and (g2 > 0 or flow12)
+    flow34 = t.R12_Hopper_Gate and (g3 > 0 or flow23)
+    for flowing, src in ((flow12, 0), (flow23, 1), (flow34, 2)):
+        if flowing:
+            rates[src] -= TRANSFER_RATE
+            rates[src + 1] += TRANSFER_RATE
+
+    if t.R12_Permit and (g4 > 0 or flow34):
+        rates[3] -= R12_RATE
+    return rates
+
+
+def time_to_next_event(t) -> float:
+    """Segundos hasta que algún nivel cruce 0% o 5% (inf si nada se mueve)."""
+    horizon = math.inf
+    for level, rate in zip(_levels(t), material_rates(t)):
+        if rate == 0:
+            continue
+        if level in LEVEL_THRESHOLDS:
+            return 0.0  # Sale del umbral en cuanto se mueve
+        ahead = [abs(x - level) for x in LEVEL_THRESHOLDS if (x - level) * rate > 0]
+        if ahead:
+            horizon = min(horizon, min(ahead) / abs(rate))
+    return horizon
+
+
+def snap_levels(t, tolerance=1e-9):
+    """Deja exactamente en el umbral los niveles que quedaron a redondeo de él."""
+    for name in ("_material_in_group1", "_material_in_group2",
+                 "_material_in_group3", "_material_in_group4"):
+        level = getattr(t, name)
+        for threshold in LEVEL_THRESHOLDS:
+            if abs(level - threshold) < tolerance:
+                setattr(t, name, threshold)
+
+
+# ============================================================================
+# RELOJES
+# ============================================================================
+class RealTimeClock:
+    """Escaneo cada period segundos de reloj real (plazos absolutos, sin deriva)"""
+    def __init__(self, period=SCAN_CYCLE):
+        self.period = period
+        self._deadline = None
+        self._last = None
+
+    def step(self, plc, until=math.inf):
+        now = time.monotonic()
+        if self._deadline is None:
+            self._deadline = self._last = now
+        self._deadline += min(self.period, until)
+        if self._deadline > now:
+            time.sleep(self._deadline - now)
+        else:
+            self._deadline = now  # Retraso: no intentar recuperar escaneos perdidos
+
+        now = time.monotonic()
+        dt, self._last = now - self._last, now
+        plc.scan(dt)
+        return dt
+
+
+class FixedStepClock:
+    """dt fijo por escaneo, sin esperar"""
+    def __init__(self, dt=SCAN_CYCLE):
+        self.dt = dt
+
+    def step(self, plc, until=math.inf):
+        dt = min(self.dt, until)
+        plc.scan(dt)
+        return dt
+
+
+class DiscreteEventClock:
+    """
+    Un escaneo y luego la física avanza de una vez hasta el próximo evento
+    (o hasta until). Equivale a plc.scan(dt) con el dt exacto del evento, en
+    lugar de pasos de SCAN_CYCLE.
+
+    Eventos candidatos: cruce de umbral de material y, si el escaneo cambió
+    la lógica, el siguiente escaneo (scan_period después): las salidas de un
+    escaneo se mantienen hasta el próximo, como en el PLC y en
+    FixedStepClock. PLCLogic no tiene TON (los GroupN_Empty_Dly sólo están
+    en el L5K), así que el período de escaneo es el único temporizador; un
+    estado que dura un escaneo (las tres compuertas abiertas cuando Step
+    1 -> 2 -> 3 se encadenan) mueve material igual que con el reloj fijo.
+    """
+    def __init__(self, scan_period=SCAN_CYCLE, min_dt=MIN_EVENT_DT):
+        self.scan_period = scan_period
+        self.min_dt = min_dt
+        self.scans = 0
+
+    def step(self, plc, until=math.inf):
+        t = plc.tags
+        before = _logic_state(t)
+        plc.scan(0.0)
+        self.scans += 1
+
+        if _logic_state(t) != before:
+            dt = min(self.scan_period, until)
+        else:
+            dt = min(max(time_to_next_event(t), self.min_dt), until)
+        if math.isinf(dt):
+            raise RuntimeError("DiscreteEventClock: sin eventos pendientes y sin límite (until)")
+        plc._simulate_material_transfer(dt)
+        snap_levels(t)
+        return dt
+
+
+def make_clock(name: str, dt: float = SCAN_CYCLE):
+    """"realtime" | "fixed" | "event" -> reloj"""
+    if name == "realtime":
+        return RealTimeClock(dt)
+    if name == "fixed":
+        return FixedStepClock(dt)
+    if name == "event":
+        return DiscreteEventClock(dt)
+    raise ValueError(f"Reloj desconocido: {name} (opciones: {', '.join(CLOCKS)})")
@@ -0,0 +1,211 @@
+"""
+================================================================================
+    CPS_001 - ESCENARIOS SCRIPTADOS (SIN UI)
+
+    Sustituye al teclado por una lista de eventos con tiempo simulado, en
+    YAML o JSON, para ejecutar el simulador sin consola en Linux (pruebas de
+    regresión y estudios de capacidad):
+
+        name: ciclo_basico
+        duration: 600            # s simulados
+        events:
+          - {at: 1.0,  key: "1"}                        # misma tecla que la UI
+          - {at: 2.0,  press: BATCH_READY_Button}
+          - {at: 5.0,  set: {R12_Ready: false}}
+          - {at: 30.0, fault: Compressed_Air, value: false, for: 5.0}
+          - {at: 60.0, expect: {Cycle_Step: 3, E_Stop_Active: true}}
+
+    - key:    tecla de SimulatorUI ("1", "2", "3", "e", "r")
+    - press:  pone un botón a True (la lógica lo resetea)
+    - set:    valores de tags
+    - fault:  fuerza un tag (False por defecto) y lo restaura tras "for" s
+    - expect: comprueba tags; los fallos se reportan al final
+
+    Uso:
+        python sim_scenario.py scenarios/ciclo_basico.yaml --clock event
+        python cps_simulator.py --scenario scenarios/ciclo_basico.yaml
+================================================================================
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sys
+import time
+
+try:
+    import yaml
+except ImportError:
+    yaml = None  # Sólo escenarios JSON
+
+from cps_simulator import PLC_TAGS, SCAN_CYCLE, PLCLogic, PLCTags, apply_key
+from sim_clock import CLOCKS, make_clock
+
+EVENT_KINDS = ("key", "press", "set", "fault", "expect")
+
+
+class ScenarioError(ValueError):
+    pass
+
+
+# ============================================================================
+# CARGA
+# ============================================================================
+def load_scenario(path: str) -> dict:
+    """Lee y valida un escenario .yaml/.yml/.json."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ScenarioError("PyYAML no instalado: pip install pyyaml (o usar .json)")
+            scenario = yaml.safe_load(f)
+        else:
+            scenario = json.load(f)
+
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    scenario.setdefault("events", [])
+    if "duration" not in scenario:
+        scenario["duration"] = max((event["at"] for event in scenario["events"]), default=0.0)
+
+    known = set(PLC_TAGS)
+    for event in scenario["events"]:
+        kinds = [kind for kind in EVENT_KINDS if kind in event]
+        if "at" not in event or len(kinds) != 1:
+            raise ScenarioError(f"Evento inválido (requiere 'at' y uno de {EVENT_KINDS}): {event}")
+        tags = event.get("set") or event.get("expect") or {}
+        for name in list(tags) + [event[k] for k in ("press", "fault") if k in event]:
+            if name not in known:
+                raise ScenarioError(f"Tag desconocido en {event}: {name}")
+    return scenario
+
+
+# ============================================================================
+# ENTRADAS SCRIPTADAS
+# ============================================================================
+class ScriptedInput:
+    """Cola de eventos por tiempo simulado, aplicados sobre PLCTags"""
+    def __init__(self, events: list):
+        # (at, orden, evento): el orden conserva la secuencia del fichero
+        self._queue = [(float(event["at"]), i, event) for i, event in enumerate(events)]
+        heapq.heapify(self._queue)
+        self._counter = len(events)
+        self.log = []
+        self.failures = []
+
+    def next_time(self) -> float:
+        return self._queue[0][0] if self._queue else float("inf")
+
+    def apply_due(self, tags: PLCTags, now: float):
+        """Aplica todos los eventos con at <= now."""
+        while self._queue and self._queue[0][0] <= now:
+            at, _, event = heapq.heappop(self._queue)
+            self._apply(tags, at, now, event)
+
+    def _apply(self, tags, at, now, event):
+        if "key" in event:
+            message = apply_key(tags, str(event["key"]).lower())
+            self.log.append((now, message or f"key {event['key']}"))
+        elif "press" in event:
+            setattr(tags, event["press"], True)
+            self.log.append((now, f"{event['press']} pressed"))
+        elif "set" in event:
+            for name, value in event["set"].items():
+                setattr(tags, name, value)
+            self.log.append((now, f"set {event['set']}"))
+        elif "fault" in event:
+            name = event["fault"]
+            restore = getattr(tags, name)
+            setattr(tags, name, event.get("value", False))
+            self.log.append((now, f"FAULT {name} = {event.get('value', False)}"))
+            if "for" in event:
+                heapq.heappush(self._queue, (at + float(event["for"]), self._counter,
+                                             {"at": at + float(event["for"]), "set": {name: restore}}))
+                self._counter += 1
+        elif "expect" in event:
+            for name, expected in event["expect"].items():
+                actual = getattr(tags, name)
+                if actual != expected:
+                    self.failures.append((now, name, expected, actual))
+            self.log.append((now, f"expect {event['expect']}"))
+
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+def run_scenario(scenario: dict, clock, tags: PLCTags = None) -> dict:
+    """
+    Ejecuta el escenario hasta duration con el reloj dado.
+
+    Retorna tiempo simulado/real, escaneos, ciclos completados
+    (flancos de Cycle_Complete), log de eventos y expects fallidos.
+    """
+    tags = tags or PLCTags()
+    plc = PLCLogic(tags)
+    inputs = ScriptedInput(scenario["events"])
+    duration = float(scenario["duration"])
+
+    now = 0.0
+    scans = 0
+    cycles = 0
+    previous = tags.Cycle_Complete
+    start = time.perf_counter()
+
+    while True:
+        inputs.apply_due(tags, now)
+        if now >= duration:
+            break
+        now += clock.step(plc, until=min(inputs.next_time(), duration) - now)
+        scans += 1
+        cycles += tags.Cycle_Complete and not previous
+        previous = tags.Cycle_Complete
+
+    return {
+        "name": scenario["name"],
+        "simulated_s": now,
+        "wall_ms": (time.perf_counter() - start) * 1000,
+        "scans": scans,
+        "cycles": cycles,
+        "tags": tags,
+        "log": inputs.log,
+        "failures": inputs.failures,
+    }
+
+
+def print_report(result: dict):
+    t = result["tags"]
+    print("=" * 70)
+    print(f"🎬 ESCENARIO: {result['name']}")
+    print("=" * 70)
+    for at, message in result["log"]:
+        print(f"  [{at:9.3f} s] {message}")
+    print("-" * 70)
+    print(f"  Tiempo simulado: {result['simulated_s']:.1f} s   "
+          f"Tiempo real: {result['wall_ms']:.1f} ms   Escaneos: {result['scans']}")
+    print(f"  Ciclos completados: {result['cycles']}   Cycle_Step final: {t.Cycle_Step}   "
+          f"Material G1-G4: {t._material_in_group1:.1f} {t._material_in_group2:.1f} "
+          f"{t._material_in_group3:.1f} {t._material_in_group4:.1f}")
+    for at, name, expected, actual in result["failures"]:
+        print(f"  ✗ [{at:.3f} s] {name}: esperado {expected!r}, actual {actual!r}")
+    if not result["failures"]:
+        print("  ✓ Todos los expect cumplidos")
+
+
+def run_file(path: str, clock_name: str = "event", dt: float = SCAN_CYCLE) -> int:
+    """Ejecuta un escenario desde fichero e imprime el reporte. Código de salida."""
+    result = run_scenario(load_scenario(path), make_clock(clock_name, dt))
+    print_report(result)
+    return 1 if result["failures"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPS-001: escenario sin UI")
+    parser.add_argument("scenario", help="Fichero .yaml / .json")
+    parser.add_argument("--clock", choices=CLOCKS, default="event")
+    parser.add_argument("--dt", type=float, default=SCAN_CYCLE,
+                        help="Periodo de escaneo de los relojes realtime / fixed (s)")
+    args = parser.parse_args()
+    return run_file(args.scenario, args.clock, args.dt)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+================================================================================
+    CPS_001 - ALMACÉN DE TAGS COMPILADO
+
+    Estado de tags del controlador en buffers planos, con la disposición
+    calculada una sola vez a partir de las declaraciones L5K/L5X:
+
+    - BOOL (y .EN/.TT/.DN de TIMER): un byte (0/1) por tag en un
+      bytearray. Empaquetar 8 por byte ahorra 60 bytes en CPS_001 pero
+      cada acceso paga máscara y desplazamiento (~40% más lento por
+      escaneo en benchmark_tag_store.py)
+    - DINT (y .PRE/.ACC de TIMER): array('l')
+    - REAL: array('d')
+    - offsets: nombre -> ("B" | "D" | "R", índice)
+
+    snapshot() no copia nada si el estado no cambió desde el último
+    snapshot (retorna el mismo objeto); diff() de dos snapshots iguales es
+    inmediato y, si difieren, compara los BOOL con un XOR entero.
+
+    Uso:
+        store = TagStore.from_l5k("../CPS_001_ver2_PULL_SYSTEM.L5K")
+        before = store.snapshot()
+        store["Cycle_Step"] = 2
+        store.diff(before, store.snapshot())   # ["Cycle_Step"]
+================================================================================
+"""
+
+import re
+from array import array
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+TIMER_BITS = ("EN", "TT", "DN")
+TIMER_WORDS = ("PRE", "ACC")
+INTEGER_TYPES = ("DINT", "INT", "SINT")
+
+_L5K_DECLARATION = re.compile(r"^\s*([A-Za-z_]\w*)\s*:\s*(\w+)\s*:=\s*([^;]+);", re.MULTILINE)
+
+
+# ============================================================================
+# DECLARACIONES L5K
+# ============================================================================
+def parse_l5k_declarations(path: str) -> dict:
+    """
+    Declaraciones "Nombre : TIPO := valor;" de un .L5K.
+
+    Retorna {nombre: (tipo, valor)}; valor es int o lista de ints ([0, 3000, 0]).
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        text = re.sub(r"\(\*.*?\*\)", "", f.read(), flags=re.DOTALL)
+
+    declarations = {}
+    for name, data_type, value in _L5K_DECLARATION.findall(text):
+        declarations[name] = (data_type.upper(), parse_value(value))
+    return declarations
+
+
+def parse_value(text: str):
+    text = text.strip()
+    if text.startswith("["):
+        return [int(float(x)) for x in text.strip("[]").split(",") if x.strip()]
+    return float(text) if "." in text else int(text)
+
+
+# ============================================================================
+# SNAPSHOT
+# ============================================================================
+class TagSnapshot:
+    """Copia inmutable de los buffers (BOOL, DINT, REAL)."""
+
+    __slots__ = ("bits", "dints", "reals")
+
+    def __init__(self, bits: bytes, dints: array, reals: array):
+        self.bits = bits
+        self.dints = dints
+        self.reals = reals
+
+
+# ============================================================================
+# ALMACÉN
+# ============================================================================
+class TagStore:
+    """Tags en buffers planos (un byte por BOOL, arrays tipados); nombre -> offset fijo."""
+
+    def __init__(self, declarations: dict = None):
+        self.types = {}
+        self.offsets = {}
+        self.bits = bytearray()
+        self.dints = array("l")
+        self.reals = array("d")
+
+        # Índice -> nombre, para diff()
+        self._bit_names = []
+        self._dint_names = []
+        self._real_names = []
+        self._last = None
+
+        for name, (data_type, value) in (declarations or {}).items():
+            self.declare(name, data_type, value)
+
+    @classmethod
+    def from_l5k(cls, path: str):
+        return cls(parse_l5k_declarations(path))
+
+    # ------------------------------------------------------------------------
+    # DISPOSICIÓN
+    # ------------------------------------------------------------------------
+
+    def declare(self, name: str, data_type: str, value=None):
+        if name in self.types:
+            raise ValueError(f"Tag duplicado: {name}")
+        data_type = data_type.upper()
+        self.types[name] = data_type
+
+        if data_type == "BOOL":
+            self._add_bit(name, value)
+        elif data_type in INTEGER_TYPES:
+            self._add_word(name, value)
+        elif data_type == "REAL":
+            self.offsets[name] = ("R", len(self.reals))
+            self.reals.append(float(value or 0.0))
+            self._real_names.append(name)
+        elif data_type == "TIMER":
+            # Formato L5K: [control, PRE, ACC]
+            _, pre, acc = (list(value) + [0, 0, 0])[:3] if value else (0, 0, 0)
+            for bit in TIMER_BITS:
+                self._add_bit(f"{name}.{bit}", 0)
+            self._add_word(f"{name}.PRE", pre)
+            self._add_word(f"{name}.ACC", acc)
+        else:
+            raise ValueError(f"{name}: tipo no soportado {data_type}")
+        self._last = None
+
+    def _add_bit(self, name: str, value):
+        self.offsets[name] = ("B", len(self.bits))
+        self.bits.append(1 if value else 0)
+        self._bit_names.append(name)
+
+    def _add_word(self, name: str, value):
+        self.offsets[name] = ("D", len(self.dints))
+        self.dints.append(int(value or 0))
+        self._dint_names.append(name)
+
+    def offset(self, name: str) -> tuple:
+        try:
+            return self.offsets[name]
+        except KeyError:
+            raise KeyError(f"Tag no declarado: {name}") from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    # ------------------------------------------------------------------------
+    # ACCESO POR NOMBRE
+    # ------------------------------------------------------------------------
+
+    def __getitem__(self, name: str):
+        kind, index = self.offset(name)
+        return self._buffer(kind)[index]
+
+    def __setitem__(self, name: str, value):
+        kind, index = self.offset(name)
+        if kind == "B":
+            self.bits[index] = 1 if value else 0
+        elif kind == "D":
+            self.dints[index] = int(value)
+        else:
+            self.reals[index] = float(value)
+
+    def _buffer(self, kind: str):
+        return self.bits if kind == "B" else self.dints if kind == "D" else self.reals
+
+    def as_dict(self) -> dict:
+        return {name: self[name] for name in self.offsets}
+
+    # ------------------------------------------------------------------------
+    # SNAPSHOT / DIFF
+    # ------------------------------------------------------------------------
+
+    def snapshot(self) -> TagSnapshot:
+        """
+        Estado actual. Si nada cambió desde el snapshot anterior retorna ese
+        mismo objeto (la comparación de buffers no reserva memoria).
+        """
+        last = self._last
+        if (last is not None and self.bits == last.bits and
+                self.dints == last.dints and self.reals == last.reals):
+            return last
+        self._last = TagSnapshot(bytes(self.bits), array("l", self.dints), array("d", self.reals))
+        return self._last
+
+    def diff(self, old: TagSnapshot, new: TagSnapshot) -> list:
+        """Nombres de los tags que difieren entre dos snapshots."""
+        if old is new:
+            return []
+
+        changed = []
+        if old.bits != new.bits:
+            delta = int.from_bytes(old.bits, "little") ^ int.from_bytes(new.bits, "little")
+            while delta:
+                low = delta & -delta
+                changed.append(self._bit_names[(low.bit_length() - 1) >> 3])
+                delta ^= low
+        if old.dints != new.dints:
+            changed.extend(name for name, a, b in zip(self._dint_names, old.dints, new.dints) if a != b)
+        if old.reals != new.reals:
+            changed.extend(name for name, a, b in zip(self._real_names, old.reals, new.reals) if a != b)
+        return changed
+
+    def value(self, snapshot: TagSnapshot, name: str):
+        """Valor de un tag en un snapshot."""
+        kind, index = self.offset(name)
+        buffer = snapshot.bits if kind == "B" else snapshot.dints if kind == "D" else snapshot.reals
+        return buffer[index]
@@ -0,0 +1,126 @@
+"""
+================================================================================
+    CONFORMIDAD: BatchPLCLogic (NumPy) vs PLCLogic.scan() (escalar)
+
+    Ejecuta N líneas con la lógica escalar de cps_simulator.py (una PLCLogic
+    por línea, dt fijo) y las mismas N líneas con cps_batch_simulator.py.
+    En cada escaneo se aplican los mismos eventos aleatorios a ambas:
+
+    - Botones del operador (barcode, Batch Ready, START, E-Stop, Reset)
+    - Entradas de campo (aire, colector, R12_Ready, VMEK_Rdy, ...)
+    - Nivel de material de un grupo (para recorrer Step 4 y Cycle_Complete,
+      que el flujo normal no alcanza: ver nota en el resumen)
+
+    Tras cada escaneo se comparan TODOS los tags de todas las líneas con
+    igualdad exacta. dt varía entre escaneos (mismo valor en ambas versiones).
+
+    Ejecutar con: python test_batch_conformance.py [lineas] [escaneos] [semilla]
+================================================================================
+"""
+
+import random
+import sys
+
+from cps_batch_simulator import DT, BatchOperator, BatchPLCLogic, BatchTags
+from cps_simulator import PLCLogic, PLCTags
+
+LINES = 16
+STEPS = 10000
+SEED = 1
+
+EVENT_PROBABILITY = 0.02
+
+# Eventos: (tag, valores posibles)
+EVENTS = [
+    ("Barcode_Scanned", [True]),
+    ("BATCH_READY_Button", [True]),
+    ("START_Button", [True]),
+    ("E_Stop_Button", [True, False]),
+    ("E_Stop_Reset_Button", [True]),
+    ("Compressed_Air", [True, True, False]),
+    ("Dust_Collector_ON", [True, True, False]),
+    ("R12_Ready", [True, True, False]),
+    ("R12_Envelope_Present", [True, True, False]),
+    ("VMEK_Rdy", [True, True, False]),
+    ("_material_in_group1", [0.0, 2.5, 100.0]),
+    ("_material_in_group2", [0.0, 4.9, 5.0]),
+    ("_material_in_group3", [0.0, 5.0, 30.0]),
+    ("_material_in_group4", [0.0, 7.5]),
+]
+
+DTS = [DT, DT, DT, 0.05, 0.25, 1.0]
+
+
+def compare(step: int, scalar_tags: list, batch: BatchTags) -> list:
+    """Diferencias (paso, línea, tag, escalar, lotes) tras un escaneo."""
+
+    differences = []
+    for name in batch.names:
+        values = getattr(batch, name).tolist()
+        for i, tags in enumerate(scalar_tags):
+            expected = getattr(tags, name)
+            if expected != values[i] or type(expected) is bool and type(values[i]) is not bool:
+                differences.append((step, i, name, expected, values[i]))
+    return differences
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else LINES
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else STEPS
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else SEED
+    rng = random.Random(seed)
+
+    print("=" * 70)
+    print("🧪 CONFORMIDAD: BatchPLCLogic vs PLCLogic.scan()")
+    print("=" * 70)
+    print(f"  Líneas: {lines}   Escaneos: {steps}   Semilla: {seed}")
+
+    scalar_tags = [PLCTags() for _ in range(lines)]
+    scalar_plcs = [PLCLogic(tags) for tags in scalar_tags]
+    batch = BatchTags(lines)
+    batch_plc = BatchPLCLogic(batch)
+
+    steps_seen = set()
+    completes = 0
+
+    for step in range(steps):
+        for i, tags in enumerate(scalar_tags):
+            if rng.random() < EVENT_PROBABILITY:
+                name, values = rng.choice(EVENTS)
+                value = rng.choice(values)
+                setattr(tags, name, value)
+                getattr(batch, name)[i] = value
+
+        dt = rng.choice(DTS)
+        for plc in scalar_plcs:
+            plc.scan(dt)
+        batch_plc.scan(dt)
+
+        differences = compare(step, scalar_tags, batch)
+        if differences:
+            print(f"\n  ✗ {len(differences)} diferencias en el escaneo {step} (dt={dt}):")
+            for _, i, name, expected, actual in differences[:20]:
+                print(f"    línea {i:3d}  {name:<28} escalar={expected!r:<10} lotes={actual!r}")
+            return 1
+
+        steps_seen.update(tags.Cycle_Step for tags in scalar_tags)
+        completes += sum(tags.Cycle_Complete for tags in scalar_tags)
+
+    print(f"\n  ✓ {steps * lines} escaneos-línea idénticos en todos los tags ({len(batch.names)})")
+    print(f"  Cycle_Step recorridos: {sorted(steps_seen)}   "
+          f"Escaneos con Cycle_Complete: {completes}")
+
+    # Flujo normal del operador, sin eventos sobre el material
+    batch = BatchTags(1)
+    stats = BatchPLCLogic(batch).run(36000, operator=BatchOperator(batch))
+    print(f"\n  Nota: con el operador automático una línea completa "
+          f"{int(stats['cycles'][0])} ciclos en 1 h simulada; "
+          f"Cycle_Step final = {int(batch.Cycle_Step[0])}")
+    if batch.Cycle_Step[0] == 3:
+        print("  (Step 3 abre Material_Gate con Aspirator_Hopper_Gate cerrado: Group2 llega a 5%,")
+        print("   Group2_Empty cae, Step3_Active se apaga y la secuencia queda detenida en Step 3)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())